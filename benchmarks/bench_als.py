@@ -0,0 +1,28 @@
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_similarity import rating_matrix
+from src.models.als.least_squares import LeastSquares
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark one ALS iteration (user step + movie step)")
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 72_000])
+    parser.add_argument("--factors", type=int, nargs="+", default=[16, 32, 64])
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1])
+    args = parser.parse_args()
+
+    print(f"{'users':>7} {'ratings':>10} {'factors':>8} {'jobs':>5} {'iteration[s]':>13}")
+    for user_nums in args.users:
+        matrix = rating_matrix(user_nums)
+        movie_user_matrix = matrix.T.tocsr()
+        for factor_nums in args.factors:
+            movie_factors = np.random.default_rng(0).standard_normal((matrix.shape[1], factor_nums)).astype(np.float32)
+            for n_jobs in args.jobs:
+                least_squares = LeastSquares(0.1, n_jobs=n_jobs)
+                start = time.perf_counter()
+                user_factors = least_squares.solve(matrix, movie_factors, 3.0)
+                least_squares.solve(movie_user_matrix, user_factors, 3.0)
+                elapsed = time.perf_counter() - start
+                print(f"{user_nums:>7} {matrix.nnz:>10} {factor_nums:>8} {n_jobs:>5} {elapsed:>13.2f}")
@@ -0,0 +1,95 @@
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.utils.dat_reader import DatReader
+from src.utils.path import Path
+
+RATING_COLS = ["user_id", "movie_id", "rating", "timestamp"]
+RATING_DTYPES = {"user_id": "int32", "movie_id": "int32", "rating": "float32", "timestamp": "int32"}
+
+
+def write_ratings(path: str, rows: int, seed: int = 0) -> None:
+    """
+    Write a synthetic ratings.dat in the MovieLens "::" format
+
+    Parameters
+    ----------
+        path: str
+            output path
+        rows: int
+            number of ratings
+        seed: int
+            random seed
+    """
+    rng = np.random.default_rng(seed)
+    ratings = pd.DataFrame(
+        {
+            "user_id": np.sort(rng.integers(1, max(rows // 140, 2), rows)),
+            "movie_id": rng.integers(1, 65134, rows),
+            "rating": rng.integers(1, 11, rows) / 2,
+            "timestamp": rng.integers(789652009, 1231131736, rows),
+        }
+    )
+    lines = (
+        ratings.user_id.astype(str)
+        + "::"
+        + ratings.movie_id.astype(str)
+        + "::"
+        + ratings.rating.map("{:g}".format)
+        + "::"
+        + ratings.timestamp.astype(str)
+    )
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def measure(label: str, load: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Measure wall time and memory usage of a loader
+
+    Parameters
+    ----------
+        label: str
+            label of the loader
+        load: Callable[[], pd.DataFrame]
+            loader to measure
+
+    Returns
+    -------
+        df: pd.DataFrame
+            loaded dataset
+    """
+    start = time.perf_counter()
+    df = load()
+    elapsed = time.perf_counter() - start
+    print(f"{label:>14}: {elapsed:8.3f} sec, {df.memory_usage(deep=True).sum() / 1024**2:8.1f} MiB")
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark the '::' ratings loader against the python engine")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows of synthetic ratings")
+    parser.add_argument("--real", action="store_true", help="use dataset/movielens-10m/ratings.dat")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.real:
+            path = Path().get_local_path("dataset/movielens-10m/ratings.dat")
+        else:
+            path = os.path.join(tmp_dir, "ratings.dat")
+            write_ratings(path, args.rows)
+
+        print(f"{path} ({os.path.getsize(path) / 1024**2:.1f} MiB)")
+        legacy = measure(
+            "python engine",
+            lambda: pd.read_csv(path, sep="::", names=RATING_COLS, encoding="latin-1", engine="python"),
+        )
+        native = measure("DatReader", lambda: DatReader().read(path, RATING_COLS, RATING_DTYPES))
+
+        pd.testing.assert_frame_equal(legacy, native, check_dtype=False)
@@ -0,0 +1,31 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.bench_dat_reader import write_ratings
+from src.dataset import Dataset
+from src.utils.path import Path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark cold and warm loads of Dataset")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows of synthetic ratings")
+    parser.add_argument("--real", action="store_true", help="use dataset/movielens-10m")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.real:
+            dataset_dir = Path().get_local_path("dataset/movielens-10m")
+        else:
+            dataset_dir = tmp_dir
+            write_ratings(os.path.join(tmp_dir, "ratings.dat"), args.rows)
+            with open(os.path.join(tmp_dir, "movies.dat"), "w") as f:
+                f.write("1::Toy Story (1995)::Adventure|Animation|Children|Comedy|Fantasy\n")
+            with open(os.path.join(tmp_dir, "tags.dat"), "w") as f:
+                f.write("15::1::pixar::1215184630\n")
+
+        dataset = Dataset(dataset_dir, None)
+        for label in ["cold", "warm"]:
+            start = time.perf_counter()
+            _, ratings = dataset.load(rebuild_cache=label == "cold")
+            print(f"{label}: {time.perf_counter() - start:8.3f} sec ({len(ratings)} ratings)")
@@ -0,0 +1,86 @@
+import argparse
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from mlxtend.frequent_patterns import apriori, association_rules
+
+from src.models.association_rules.eclat import Eclat
+
+
+def binary_matrix(user_nums: int, movie_nums: int = 10_000, cluster_nums: int = 20, seed: int = 0) -> sp.csr_matrix:
+    """
+    Generate a MovieLens-like boolean user-movie matrix (ratings >= 4.0)
+
+    Parameters
+    ----------
+        user_nums: int
+            number of users
+        movie_nums: int
+            number of movies
+        cluster_nums: int
+            number of taste clusters of users, which make movies co-occur
+        seed: int
+            random seed
+
+    Returns
+    -------
+        binary_matrix: sp.csr_matrix
+            boolean (users, movies) matrix with zipfian movie popularity and heavy-tailed user activity
+    """
+    rng = np.random.default_rng(seed)
+    activity = np.minimum(rng.lognormal(3.5, 1.0, user_nums).astype(np.int64) + 1, movie_nums)
+    user_indexes = np.repeat(np.arange(user_nums), activity)
+
+    # 30% of the movies are drawn from the global popularity, the rest from one of the taste clusters
+    popularity = 1.0 / np.arange(1, movie_nums + 1) ** 0.5
+    movie_indexes = rng.choice(movie_nums, len(user_indexes), p=popularity / popularity.sum())
+    clusters = rng.integers(0, cluster_nums, user_nums)[user_indexes]
+    in_cluster = rng.random(len(user_indexes)) < 0.7
+    cluster_popularity = 1.0 / np.arange(1, movie_nums // cluster_nums + 1) ** 1.2
+    movie_indexes[in_cluster] = (
+        rng.choice(len(cluster_popularity), in_cluster.sum(), p=cluster_popularity / cluster_popularity.sum())
+        * cluster_nums
+        + clusters[in_cluster]
+    )
+
+    matrix = sp.csr_matrix(
+        (np.ones(len(user_indexes), dtype=np.bool_), (user_indexes, movie_indexes)), shape=(user_nums, movie_nums)
+    )
+    matrix.sum_duplicates()
+
+    return matrix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark Eclat against mlxtend apriori")
+    parser.add_argument("--users", type=int, nargs="+", default=[1_000, 10_000, 72_000])
+    parser.add_argument("--supports", type=float, nargs="+", default=[0.05, 0.02, 0.01])
+    parser.add_argument("--mlxtend-max-users", type=int, default=10_000, help="skip mlxtend above this size")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    print(f"{'users':>7} {'support':>8} {'itemsets':>9} {'rules':>8} {'eclat[s]':>9} {'mlxtend[s]':>11}")
+    for user_nums in args.users:
+        matrix = binary_matrix(user_nums)
+        for min_support in args.supports:
+            eclat = Eclat(min_support)
+            start = time.perf_counter()
+            frequent_itemsets = eclat.frequent_itemsets(matrix)
+            rules = eclat.association_rules(frequent_itemsets, metric="lift", min_threshold=1.0)
+            eclat_time = time.perf_counter() - start
+
+            mlxtend_time = float("nan")
+            if user_nums <= args.mlxtend_max_users:
+                start = time.perf_counter()
+                expected = apriori(pd.DataFrame.sparse.from_spmatrix(matrix), min_support=min_support)
+                association_rules(expected, metric="lift", min_threshold=1.0)
+                mlxtend_time = time.perf_counter() - start
+                assert len(expected) == len(frequent_itemsets)
+
+            print(
+                f"{user_nums:>7} {min_support:>8.3f} {len(frequent_itemsets):>9} {len(rules):>8}"
+                f" {eclat_time:>9.3f} {mlxtend_time:>11.3f}"
+            )
@@ -0,0 +1,51 @@
+import argparse
+import time
+
+import numpy as np
+
+from src.evaluation import Evaluation
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark recall@k / precision@k on dicts and on arrays")
+    parser.add_argument("--users", type=int, default=72_000)
+    parser.add_argument("--movies", type=int, default=10_000)
+    parser.add_argument("--favorites", type=int, default=30, help="truly favorite movies per user")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ks", type=int, nargs="+", default=[5, 10, 20, 50], help="cutoffs of the full report")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    true_indptr = np.arange(args.users + 1) * args.favorites
+    true_indices = rng.integers(0, args.movies, args.users * args.favorites)
+    predicted_movie_ids = rng.integers(0, args.movies, (args.users, max(args.k, *args.ks)))
+    evaluation = Evaluation()
+
+    # the dict input which models used to build with groupby(...).agg(list).to_dict()
+    start = time.perf_counter()
+    true_user_id2movie_ids = {
+        user_id: true_indices[true_indptr[user_id] : true_indptr[user_id + 1]].tolist() for user_id in range(args.users)
+    }
+    predicted_user_id2movie_ids = dict(enumerate(predicted_movie_ids[:, : args.k].tolist()))
+    dict_build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    evaluation.calc_recall_at_k(true_user_id2movie_ids, predicted_user_id2movie_ids, args.k)
+    evaluation.calc_precision_at_k(true_user_id2movie_ids, predicted_user_id2movie_ids, args.k)
+    dict_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    evaluation.calc_recall_at_k_array(true_indptr, true_indices, predicted_movie_ids, args.k)
+    evaluation.calc_precision_at_k_array(true_indptr, true_indices, predicted_movie_ids, args.k)
+    array_time = time.perf_counter() - start
+
+    catalog_movie_ids = np.arange(args.movies)
+    movie_popularity = rng.random(args.movies)
+    start = time.perf_counter()
+    scores = evaluation.calc_ranking_metrics(
+        true_indptr, true_indices, predicted_movie_ids, args.ks, catalog_movie_ids, movie_popularity
+    )
+    report_time = time.perf_counter() - start
+
+    print(f"dicts: {dict_build_time:8.3f} sec (build) + {dict_time:8.3f} sec (recall + precision)")
+    print(f"array: {array_time:8.3f} sec (recall + precision)")
+    print(f"report: {report_time:7.3f} sec ({len(scores)} metrics at k={args.ks})")
@@ -0,0 +1,106 @@
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import svds
+
+from benchmarks.bench_similarity import rating_matrix
+from src.dataset import Dataset
+from src.lsh import LSHIndex
+from src.matrix import InteractionMatrix
+from src.similarity import Similarity
+from src.utils.path import Path
+
+
+def latent_factors(matrix: sp.csr_matrix, factor_nums: int) -> np.ndarray:
+    """
+    Compute latent factors of users by truncated SVD of mean-centred ratings
+
+    Parameters
+    ----------
+        matrix: sp.csr_matrix
+            (users, movies) ratings
+        factor_nums: int
+            number of factors
+
+    Returns
+    -------
+        factors: np.ndarray
+            (users, factor_nums) float32 factors
+    """
+    u, s, _ = svds(Similarity(metric="pearson").normalize(matrix), k=factor_nums, random_state=0)
+    return (u * s).astype(np.float32)
+
+
+def exact_neighbors(vectors: np.ndarray, k: int, block_size: int = 1024) -> np.ndarray:
+    """
+    Search exact top-k neighbours by cosine similarity, excluding each vector itself
+
+    Parameters
+    ----------
+        vectors: np.ndarray
+            (n, dim) vectors
+        k: int
+            number of neighbours
+        block_size: int
+            number of queries processed at once
+
+    Returns
+    -------
+        neighbor_indexes: np.ndarray
+            (n, k) indexes of the neighbours (unordered)
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized = vectors / np.where(norms == 0, 1.0, norms)
+    neighbor_indexes = np.empty((len(vectors), k), dtype=np.int64)
+    for start in range(0, len(vectors), block_size):
+        end = min(start + block_size, len(vectors))
+        block = normalized[start:end] @ normalized.T
+        block[np.arange(end - start), np.arange(start, end)] = -np.inf
+        neighbor_indexes[start:end] = np.argpartition(-block, k - 1, axis=1)[:, :k]
+
+    return neighbor_indexes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark LSHIndex against exact neighbour search")
+    parser.add_argument("--users", type=int, nargs="+", default=[1_000, 10_000, 30_000])
+    parser.add_argument("--real", action="store_true", help="use slices of dataset/movielens-10m")
+    parser.add_argument("--factors", type=int, default=32)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--tables", type=int, default=8)
+    parser.add_argument("--bits", type=int, default=12)
+    parser.add_argument("--probes", type=int, nargs="+", default=[0, 2, 4])
+    args = parser.parse_args()
+
+    print(f"{'users':>7} {'probes':>6} {'recall':>7} {'build[vec/s]':>13} {'query[q/s]':>11} {'exact[q/s]':>11}")
+    for user_nums in args.users:
+        if args.real:
+            _, ratings = Dataset(Path().get_local_path("dataset/movielens-10m"), user_nums).load()
+            matrix = InteractionMatrix(ratings).matrix
+        else:
+            matrix = rating_matrix(user_nums)
+        factors = latent_factors(matrix, args.factors)
+        user_nums = len(factors)
+
+        start = time.perf_counter()
+        expected = exact_neighbors(factors, args.k)
+        exact_time = time.perf_counter() - start
+
+        for probe_nums in args.probes:
+            index = LSHIndex(args.factors, table_nums=args.tables, bit_nums=args.bits, probe_nums=probe_nums)
+            start = time.perf_counter()
+            index.add(factors)
+            index.query(factors[:1], args.k)
+            build_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual, _ = index.query(factors, args.k, exclude_indexes=np.arange(user_nums))
+            query_time = time.perf_counter() - start
+
+            hits = sum(len(set(a.tolist()) & set(e.tolist())) for a, e in zip(actual, expected))
+            print(
+                f"{user_nums:>7} {probe_nums:>6} {hits / expected.size:>7.3f} {user_nums / build_time:>13.0f}"
+                f" {user_nums / query_time:>11.0f} {user_nums / exact_time:>11.0f}"
+            )
@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, target: str) -> tuple[int, bytes]:
+    """
+    Send a GET request on a kept-alive connection
+
+    Parameters
+    ----------
+        reader: asyncio.StreamReader
+            reader of the connection
+        writer: asyncio.StreamWriter
+            writer of the connection
+        target: str
+            request target (path and query)
+
+    Returns
+    -------
+        status: int
+            HTTP status code
+        body: bytes
+            response body
+    """
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    length = next(int(line.split(": ", 1)[1]) for line in head if line.lower().startswith("content-length:"))
+
+    return int(head[0].split(" ")[1]), await reader.readexactly(length)
+
+
+async def client(args: argparse.Namespace, user_ids: np.ndarray, deadline: float, latencies: list[float]) -> int:
+    """
+    Send requests one after another until the deadline
+
+    Parameters
+    ----------
+        args: argparse.Namespace
+            command line arguments
+        user_ids: np.ndarray
+            user ids to request in order
+        deadline: float
+            time.perf_counter() at which to stop
+        latencies: list[float]
+            latencies (sec) of the successful requests are appended
+
+    Returns
+    -------
+        errors: int
+            number of failed requests
+    """
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    errors = 0
+    for user_id in user_ids.tolist():
+        start = time.perf_counter()
+        if start >= deadline:
+            break
+        status, _ = await request(reader, writer, f"/recommend?user_id={user_id}&k={args.k}")
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors += 1
+    writer.close()
+
+    return errors
+
+
+async def main(args: argparse.Namespace) -> None:
+    # zipfian user ids, so that hot users hit the cache like real traffic
+    rng = np.random.default_rng(args.seed)
+    popularity = np.cumsum(1.0 / np.arange(1, args.users + 1) ** args.skew)
+    user_ids = np.searchsorted(popularity, rng.random((args.concurrency, 100_000)) * popularity[-1]) + 1
+
+    latencies: list[float] = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(
+        *[client(args, user_ids[i], start + args.duration, latencies) for i in range(args.concurrency)]
+    )
+    elapsed = time.perf_counter() - start
+
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if latencies else (0.0, 0.0)
+    print(f"requests: {len(latencies)} ok, {sum(errors)} failed in {elapsed:.1f} sec")
+    print(f"     qps: {len(latencies) / elapsed:.0f}")
+    print(f" latency: p50 {p50:.2f} ms, p99 {p99:.2f} ms (client side)")
+
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, body = await request(reader, writer, "/stats")
+    writer.close()
+    print(f"  server: {json.dumps(json.loads(body))}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="measure the throughput of a running recommendation server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--users", type=int, default=1_000, help="user ids are drawn from 1 to this number")
+    parser.add_argument("--skew", type=float, default=1.0, help="zipf exponent of the user ids (0 for uniform)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=64, help="number of concurrent connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to send requests")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,55 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import scipy.sparse as sp
+
+from benchmarks.bench_eclat import binary_matrix
+from src.similarity import Similarity
+
+
+def rating_matrix(user_nums: int, seed: int = 0) -> sp.csr_matrix:
+    """
+    Generate a MovieLens-like user-movie rating matrix
+
+    Parameters
+    ----------
+        user_nums: int
+            number of users
+        seed: int
+            random seed
+
+    Returns
+    -------
+        rating_matrix: sp.csr_matrix
+            float32 (users, movies) matrix of ratings 0.5 ~ 5.0
+    """
+    matrix = sp.csr_matrix(binary_matrix(user_nums, seed=seed), dtype=np.float32)
+    matrix.data = np.random.default_rng(seed).integers(1, 11, matrix.nnz).astype(np.float32) / 2
+
+    return matrix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark blocked top-N neighbour search")
+    parser.add_argument("--users", type=int, nargs="+", default=[1_000, 10_000, 72_000])
+    parser.add_argument("--neighbors", type=int, default=50)
+    parser.add_argument("--block-size", type=int, default=256)
+    args = parser.parse_args()
+
+    print(f"{'users':>7} {'ratings':>10} {'time[s]':>8} {'peak[MiB]':>10} {'dense[MiB]':>11}")
+    for user_nums in args.users:
+        matrix = rating_matrix(user_nums)
+        similarity = Similarity(args.neighbors, metric="pearson", block_size=args.block_size)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        similarity.top_neighbors(matrix)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        # a dense float32 users x users similarity matrix for comparison
+        dense = user_nums**2 * 4
+        print(f"{user_nums:>7} {matrix.nnz:>10} {elapsed:>8.2f} {peak / 2**20:>10.1f} {dense / 2**20:>11.1f}")
@@ -0,0 +1,43 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from src.split import Split
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark the split strategies on index arrays")
+    parser.add_argument("--ratings", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=72_000)
+    parser.add_argument("--test-size", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # ratings.dat is sorted by user_id, timestamps are not sorted within a user
+    rng = np.random.default_rng(0)
+    ratings = pd.DataFrame(
+        {
+            "user_id": np.sort(rng.integers(1, args.users + 1, args.ratings)).astype(np.int32),
+            "movie_id": rng.integers(1, 10_000, args.ratings).astype(np.int32),
+            "rating": rng.integers(1, 11, args.ratings).astype(np.float32) / 2,
+            "timestamp": rng.integers(789_652_009, 1_231_131_736, args.ratings).astype(np.int32),
+        }
+    )
+    user_ids, timestamps = ratings.user_id.to_numpy(), ratings.timestamp.to_numpy()
+    split = Split()
+
+    start = time.perf_counter()
+    train_test_split(ratings, test_size=args.test_size)
+    print(f"train_test_split (dataframes): {time.perf_counter() - start:6.3f} sec")
+
+    strategies = {
+        "random": lambda: split.random(len(ratings), args.test_size, seed=0),
+        "time": lambda: split.time_cutoff(timestamps, args.test_size),
+        "user_fraction": lambda: split.user_last_fraction(user_ids, timestamps, args.test_size),
+        "leave_one_out": lambda: split.user_last(user_ids, timestamps, 1),
+    }
+    for name, strategy in strategies.items():
+        start = time.perf_counter()
+        train_indexes, test_indexes = strategy()
+        print(f"{name:>29}: {time.perf_counter() - start:6.3f} sec ({len(test_indexes)} test ratings)")
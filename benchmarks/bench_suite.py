@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from typing import Any, Callable, Optional, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from src.base_recommend import BaseRecommend
+from src.dataset import Dataset
+from src.models.als.model import ALS
+from src.models.association_rules.model import AssociationRules
+from src.models.content_based.model import ContentBased
+from src.models.popularity.model import Popularity
+from src.models.random.model import Random
+from src.models.user_based_collaborative_filtering.model import UserBasedCF
+from src.synthetic import SyntheticDataset
+
+T = TypeVar("T")
+
+# model name: (model factory taking the loaded dataset, largest number of users to run, None for every size)
+# association rules mine pairs of movies over all users and user-based CF compares all pairs of users,
+# so both are skipped at the full MovieLens scale
+MODELS: dict[str, tuple[Callable[[Dataset], BaseRecommend], Optional[int]]] = {
+    "random": (lambda dataset: Random(), None),
+    "popularity": (lambda dataset: Popularity(user_nums=None), None),
+    "association_rules": (lambda dataset: AssociationRules(), 10_000),
+    "user_based_collaborative_filtering": (lambda dataset: UserBasedCF(user_nums=None), 10_000),
+    "als": (lambda dataset: ALS(user_nums=None), None),
+    "content_based": (lambda dataset: ContentBased(None, *dataset.movie_features()), None),
+}
+PHASES = ["load", "split", "fit", "recommend", "evaluate"]
+
+
+def measure(phase: Callable[[], T], trace_memory: bool = False) -> tuple[T, dict[str, float]]:
+    """
+    Measure wall time and memory of a phase
+
+    Parameters
+    ----------
+        phase: Callable[[], T]
+            phase to run
+        trace_memory: bool
+            also trace the peak memory allocated during the phase (tracemalloc slows down the phase)
+
+    Returns
+    -------
+        result: T
+            return value of the phase
+        measurement: dict[str, float]
+            time (sec), max_rss_mib (peak resident memory of the process so far)
+            and peak_mib (peak memory allocated during the phase, if traced)
+    """
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    result = phase()
+    measurement = {"time": time.perf_counter() - start}
+
+    measurement["max_rss_mib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+    if trace_memory:
+        measurement["peak_mib"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    return result, measurement
+
+
+def run_scale(user_nums: int, models: list[str], args: argparse.Namespace) -> list[dict[str, Any]]:
+    """
+    Run every phase of the models on a synthetic dataset of user_nums users
+
+    Parameters
+    ----------
+        user_nums: int
+            number of users
+        models: list[str]
+            names of the models
+        args: argparse.Namespace
+            command line arguments
+
+    Returns
+    -------
+        results: list[dict[str, Any]]
+            phases and scores of each model
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as dataset_dir:
+        SyntheticDataset(user_nums, args.movies, args.mean_ratings, seed=args.seed).write(dataset_dir)
+        dataset = Dataset(dataset_dir, None, use_cache=False)
+        (_, ratings), load = measure(dataset.load, args.trace_memory)
+
+        for name in models:
+            factory, max_user_nums = MODELS[name]
+            result: dict[str, Any] = {"users": user_nums, "ratings": len(ratings), "model": name}
+            if max_user_nums is not None and user_nums > max_user_nums:
+                results.append({**result, "skipped": f"more than {max_user_nums} users"})
+                continue
+
+            np.random.seed(args.seed)
+            phases = {"load": load}
+            (train, test), phases["split"] = measure(
+                lambda: [
+                    ratings.take(indexes)
+                    for indexes in dataset.split_indexes(ratings, args.test_size, strategy="random", seed=args.seed)
+                ],
+                args.trace_memory,
+            )
+            model = factory(dataset)
+            _, phases["fit"] = measure(lambda: model.fit(train), args.trace_memory)
+            test_user_ids = np.unique(test.user_id.to_numpy())
+            _, phases["recommend"] = measure(lambda: model.recommend(test_user_ids, args.k), args.trace_memory)
+            scores, phases["evaluate"] = measure(lambda: model.evaluate(test), args.trace_memory)
+
+            results.append({**result, "phases": phases, "scores": scores})
+            print(
+                f"{user_nums:>7} {name:>35} "
+                + " ".join(f"{phases[phase]['time']:9.3f}" for phase in PHASES)
+                + f" {max(phase.get('peak_mib', phase['max_rss_mib']) for phase in phases.values()):10.1f}",
+                flush=True,
+            )
+
+    return results
+
+
+def compare(results: list[dict[str, Any]], baseline: list[dict[str, Any]], tolerance: float) -> list[str]:
+    """
+    Compare the phase times with a baseline run
+
+    Parameters
+    ----------
+        results: list[dict[str, Any]]
+            results of this run
+        baseline: list[dict[str, Any]]
+            results of the baseline run
+        tolerance: float
+            allowed relative slowdown (0.2: 20% slower)
+
+    Returns
+    -------
+        regressions: list[str]
+            phases slower than the baseline by more than the tolerance
+    """
+    baseline_phases = {(result["users"], result["model"]): result.get("phases", {}) for result in baseline}
+
+    regressions = []
+    for result in results:
+        for phase, measurement in result.get("phases", {}).items():
+            expected = baseline_phases.get((result["users"], result["model"]), {}).get(phase)
+            if expected is None:
+                continue
+            ratio = measurement["time"] / max(expected["time"], 1e-9)
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{result['model']} {phase} at {result['users']} users: "
+                    f"{expected['time']:.3f} -> {measurement['time']:.3f} sec ({ratio:.2f}x)"
+                )
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark every phase of every model on synthetic datasets")
+    parser.add_argument("--users", type=int, nargs="+", default=[1_000, 10_000, 72_000])
+    parser.add_argument("--movies", type=int, default=10_000)
+    parser.add_argument("--mean-ratings", type=int, default=140, help="mean ratings per user (density x movies)")
+    parser.add_argument("--models", nargs="+", choices=list(MODELS), default=list(MODELS))
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-memory", action="store_true", help="trace peak memory per phase (slower phases)")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results of this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    print(f"{'users':>7} {'model':>35} " + " ".join(f"{phase + '[s]':>9}" for phase in PHASES) + f" {'mem[MiB]':>10}")
+    results = [result for user_nums in args.users for result in run_scale(user_nums, args.models, args)]
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "args": vars(args),
+        "results": results,
+    }
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=float)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f)["results"], args.tolerance)
+        for regression in regressions:
+            print(f"slower: {regression}")
+        if regressions:
+            sys.exit(1)
@@ -1,27 +1,312 @@
-from abc import abstractmethod
-from typing import Optional
+import json
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Self, Sequence
 
+import numpy as np
 import pandas as pd
 
 from src.dataset import Dataset
+from src.evaluation import Evaluation
 from src.utils.path import Path
+from src.utils.profiler import Profiler
 
 
-class BaseRecommend:
+class BaseRecommend(ABC):
+    __FORMAT_VERSION: int = 1
+    __MANIFEST: str = "manifest.json"
+    __EVALUATE_MIN_RATING: float = 4.0
+
+    # touched by partial_fit() when the recommendations of users unknown to the model may have changed
+    UNKNOWN_USERS: int = -1
+
+    __evaluation = Evaluation()
+
     def __init__(self, dataset_dir: str, user_nums: Optional[int], test_size: float = 0.3) -> None:
         self.path = Path()
         self.dataset = Dataset(self.path.get_local_path(dataset_dir), user_nums)
         self.user_nums = user_nums
         self.test_size = test_size
 
+        # phase instrumentation, disabled unless RECOMMEND_PROFILE is set (see Profiler.from_env)
+        self.profiler = Profiler.from_env()
+
     def get_dataset(self) -> tuple[pd.DataFrame, pd.DataFrame]:
-        movies, ratings = self.dataset.load()
-        train, test = self.dataset.split_ratings(ratings, self.test_size)
+        with self.profiler.phase("load"):
+            _, ratings = self.dataset.load()
+        with self.profiler.phase("split"):
+            train, test = self.dataset.split_ratings(ratings, self.test_size)
         return train, test
 
+    @abstractmethod
+    def fit(self, train: pd.DataFrame) -> Self:
+        """
+        Fit the recommendation model
+
+        Parameters
+        ----------
+            train: pd.DataFrame
+                ratings(index, user_id, movie_id, rating, timestamp) of the training dataset
+
+        Returns
+        -------
+            model: Self
+                fitted model
+        """
+
+    def partial_fit(self, ratings: pd.DataFrame) -> np.ndarray:
+        """
+        Update the fitted model with a batch of new ratings, without fitting on all ratings again
+
+        Parameters
+        ----------
+            ratings: pd.DataFrame
+                new ratings(index, user_id, movie_id, rating, timestamp)
+
+        Returns
+        -------
+            touched_user_ids: np.ndarray
+                users whose recommendations may have changed (e.g. to invalidate cached recommendations),
+                with UNKNOWN_USERS if the recommendations of every user unknown to the model may have changed
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support incremental updates")
+
+    def known_users(self, user_ids: np.ndarray) -> np.ndarray:
+        """
+        Check which users the model knows, the others get the recommendations of unknown users
+
+        Parameters
+        ----------
+            user_ids: np.ndarray
+                user ids
+
+        Returns
+        -------
+            known: np.ndarray
+                whether each user is known (all users if the model has no recommendations for unknown users)
+        """
+        return np.ones(len(user_ids), dtype=np.bool_)
+
+    @abstractmethod
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+        """
+        Recommend movies for a batch of users
+
+        Parameters
+        ----------
+            user_ids: np.ndarray
+                user ids
+            k: int
+                number of movies to recommend
+
+        Returns
+        -------
+            recommended_movie_ids: np.ndarray
+                (users, k) movie ids in recommended order (-1 if fewer than k candidates)
+        """
+
+    def recommend_dict(self, user_ids: np.ndarray, k: int) -> dict[int, list[int]]:
+        """
+        Recommend movies for a batch of users as lists
+
+        Parameters
+        ----------
+            user_ids: np.ndarray
+                user ids
+            k: int
+                number of movies to recommend
+
+        Returns
+        -------
+            user_id2recommended_movie_ids: dict[int, list[int]]
+                combination of user id and recommended movie ids
+        """
+        recommended_movie_ids = self.recommend(user_ids, k)
+        return {
+            user_id: movie_ids[movie_ids != -1].tolist()
+            for user_id, movie_ids in zip(np.asarray(user_ids).tolist(), recommended_movie_ids)
+        }
+
+    def predict(self, user_ids: np.ndarray, movie_ids: np.ndarray) -> np.ndarray:
+        """
+        Predict ratings of (user, movie) pairs
+
+        Parameters
+        ----------
+            user_ids: np.ndarray
+                user ids of the pairs
+            movie_ids: np.ndarray
+                movie ids of the pairs (same length as user_ids)
+
+        Returns
+        -------
+            predicted_ratings: np.ndarray
+                predicted rating of each pair
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not predict ratings")
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        """
+        Get the fitted state of the model
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            state: dict[str, np.ndarray]
+                arrays needed to recommend without the training dataset
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot be saved")
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        """
+        Restore the fitted state of the model
+
+        Parameters
+        ----------
+            state: dict[str, np.ndarray]
+                arrays returned by get_state()
+        """
+        raise NotImplementedError(f"{type(self).__name__} cannot be loaded")
+
+    def save(self, model_dir: str) -> None:
+        """
+        Save the fitted model as one .npy file per array and a manifest
+
+        Parameters
+        ----------
+            model_dir: str
+                directory to save the model (replaced if it exists)
+        """
+        state = self.get_state()
+
+        # write into a temporary directory first so that a broken model is never visible
+        parent_dir = os.path.dirname(os.path.abspath(model_dir))
+        os.makedirs(parent_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=parent_dir)
+        for name, array in state.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(array), allow_pickle=False)
+
+        manifest = {"format_version": self.__FORMAT_VERSION, "model": type(self).__name__, "arrays": sorted(state)}
+        with open(os.path.join(tmp_dir, self.__MANIFEST), "w") as f:
+            json.dump(manifest, f)
+
+        shutil.rmtree(model_dir, ignore_errors=True)
+        os.replace(tmp_dir, model_dir)
+
+    @classmethod
+    def load(cls, model_dir: str, *args: Any, **kwargs: Any) -> Self:
+        """
+        Load a model saved by save(), memory-mapping its arrays
+
+        Parameters
+        ----------
+            model_dir: str
+                directory of the saved model
+            args: Any
+                positional arguments of the constructor
+            kwargs: Any
+                keyword arguments of the constructor
+
+        Returns
+        -------
+            model: Self
+                fitted model
+        """
+        with open(os.path.join(model_dir, cls.__MANIFEST)) as f:
+            manifest = json.load(f)
+
+        if manifest["format_version"] != cls.__FORMAT_VERSION:
+            raise ValueError(f"unsupported format version: {manifest['format_version']}")
+        if manifest["model"] != cls.__name__:
+            raise ValueError(f"{model_dir} is a saved {manifest['model']}, not {cls.__name__}")
+
+        model = cls(*args, **kwargs)
+        model.set_state(
+            {
+                name: np.asarray(np.load(os.path.join(model_dir, f"{name}.npy"), mmap_mode="r"))
+                for name in manifest["arrays"]
+            }
+        )
+
+        return model
+
+    @abstractmethod
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
+        """
+        Evaluate the fitted model
+
+        Parameters
+        ----------
+            test: pd.DataFrame
+                ratings(index, user_id, movie_id, rating, timestamp) of the test dataset
+
+        Returns
+        -------
+            scores: dict[str, float]
+                combination of metric name and score
+        """
+
+    def evaluate_ranking(
+        self,
+        test: pd.DataFrame,
+        ks: Sequence[int] = (5, 10, 20, 50),
+        train: Optional[pd.DataFrame] = None,
+        min_rating: float = __EVALUATE_MIN_RATING,
+    ) -> dict[str, float]:
+        """
+        Evaluate the ranking of the fitted model by several metrics at several k at once
+
+        Parameters
+        ----------
+            test: pd.DataFrame
+                ratings(index, user_id, movie_id, rating, timestamp) of the test dataset
+            ks: Sequence[int]
+                cutoffs of the metrics
+            train: Optional[pd.DataFrame]
+                ratings of the training dataset, which define the catalog and the popularity of movies
+                (coverage and novelty are skipped if None)
+            min_rating: float
+                test ratings greater than or equal to this value are truly favorite movies
+
+        Returns
+        -------
+            scores: dict[str, float]
+                combination of {metric}_at_{k} and score
+        """
+        # truly favorite movies of each test user as CSR arrays
+        favorite_test = test[test.rating >= min_rating]
+        test_user_ids, true_indptr, true_indices = self.__evaluation.group_by_user(
+            favorite_test.user_id.to_numpy(), favorite_test.movie_id.to_numpy()
+        )
+        recommended_movie_ids = self.recommend(test_user_ids, max(ks))
+
+        catalog_movie_ids, movie_popularity = None, None
+        if train is not None:
+            catalog_movie_ids, counts = np.unique(train.movie_id.to_numpy(), return_counts=True)
+            movie_popularity = counts / max(train.user_id.nunique(), 1)
+
+        return self.__evaluation.calc_ranking_metrics(
+            true_indptr, true_indices, recommended_movie_ids, ks, catalog_movie_ids, movie_popularity
+        )
+
     def output(self, **kwargs: float) -> None:
         print(kwargs)
 
-    @abstractmethod
+        # the phases recorded during the run, next to the metrics
+        self.profiler.report(model=type(self).__name__, metrics=kwargs)
+
     def run(self) -> None:
-        pass
+        """
+        Run the recommendation model: fit on the training dataset and evaluate on the test dataset
+        """
+        train, test = self.get_dataset()
+        with self.profiler.phase("fit"):
+            self.fit(train)
+        with self.profiler.phase("evaluate"):
+            scores = self.evaluate(test)
+        self.output(**scores)
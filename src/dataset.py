@@ -1,38 +1,132 @@
 import os
-from typing import Optional
+from typing import Iterator, Optional
 
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
+from src.features import CategoricalFeatures
+from src.split import Split
+from src.utils.column_cache import ColumnCache
+from src.utils.dat_reader import DatReader
+
 
 class Dataset:
-    def __init__(self, dataset_dir: str, user_nums: Optional[int]) -> None:
+    __CACHE_VERSION: int = 2
+    __MOVIE_DTYPES: dict[str, str] = {"movie_id": "int32", "title": "str", "genres": "str"}
+    __RATING_DTYPES: dict[str, str] = {
+        "user_id": "int32",
+        "movie_id": "int32",
+        "rating": "float32",
+        "timestamp": "int32",
+    }
+    __TAG_DTYPES: dict[str, str] = {"user_id": "int32", "movie_id": "int32", "tag": "str", "timestamp": "int32"}
+
+    def __init__(
+        self, dataset_dir: str, user_nums: Optional[int], use_cache: bool = True, chunk_size: Optional[int] = None
+    ) -> None:
+        """
+        Parameters
+        ----------
+            dataset_dir: str
+                directory containing movies.dat, ratings.dat and tags.dat
+            user_nums: Optional[int]
+                number of users to use (all users if None)
+            use_cache: bool
+                cache the preprocessed datasets
+            chunk_size: Optional[int]
+                if set, stream ratings.dat in chunks of this many bytes and stop reading
+                once `user_nums` users are collected (ratings.dat must be sorted by user_id)
+        """
         self.data_dir = dataset_dir
         self.user_nums = user_nums
-
-    def load(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        self.use_cache = use_cache
+        self.chunk_size = chunk_size
+        self.reader = DatReader(encoding="latin-1")
+        self.cache = ColumnCache(os.path.join(dataset_dir, ".cache"))
+        self.binary = ColumnCache(dataset_dir)
+        self.split = Split()
+
+        # genres and tags of the movies (rows are the movies returned by load()), set by load()
+        self.genres: Optional[CategoricalFeatures] = None
+        self.tags: Optional[CategoricalFeatures] = None
+
+    def load(self, rebuild_cache: bool = False) -> tuple[pd.DataFrame, pd.DataFrame]:
         """
         Load all datasets
 
+        Genres and tags of the movies are encoded as integer codes (see self.genres and self.tags)
+        instead of lists in the cells of the movies.
+        The preprocessed datasets are cached under `<dataset_dir>/.cache` and memory-mapped on later loads.
+        The cache is invalidated when the source files or `user_nums` change.
+        If ratings.dat is absent, binary ratings (`<dataset_dir>/ratings`, see SyntheticDataset.write) are
+        memory-mapped instead, and nothing is cached since they are already in the cached form.
+
         Parameters
         ----------
-            None
+            rebuild_cache: bool
+                ignore the existing cache and rebuild it
 
         Returns
         -------
             movies: pd.DataFrame
-                movies(index, movie_id, title, genres, tags)
+                movies(index, movie_id, title)
             ratings: pd.DataFrame
                 ratings(index, user_id, movie_id, rating, timestamp)
         """
+        use_cache = self.use_cache and not self.__has_binary_ratings()
+        if use_cache:
+            key = self.cache.key(
+                [os.path.join(self.data_dir, name) for name in ["movies.dat", "ratings.dat", "tags.dat"]],
+                user_nums=self.user_nums,
+                version=self.__CACHE_VERSION,
+            )
+            if not rebuild_cache and self.cache.exists(key):
+                frames = self.cache.load(key)
+                state = {
+                    name: frame[name].to_numpy() for name, frame in frames.items() if name not in ["movies", "ratings"]
+                }
+                self.genres = CategoricalFeatures.from_state(state, prefix="genre_")
+                self.tags = CategoricalFeatures.from_state(state, prefix="tag_")
+                return frames["movies"], frames["ratings"]
+
         movies = self.__load_movies()
         ratings = self.__load_ratings()
         tags = self.__load_tags()
 
-        movies, ratings = self.__preprocess(movies, ratings, tags)
+        movies, ratings, self.genres, self.tags = self.__preprocess(movies, ratings, tags)
+
+        if use_cache:
+            # each array of the features is a one-column frame, since their lengths differ
+            state = {**self.genres.get_state(prefix="genre_"), **self.tags.get_state(prefix="tag_")}
+            frames = {name: pd.DataFrame({name: values}) for name, values in state.items()}
+            self.cache.save(key, {"movies": movies, "ratings": ratings, **frames})
 
         return movies, ratings
 
+    def movie_features(self) -> tuple[CategoricalFeatures, CategoricalFeatures]:
+        """
+        Get the genres and tags of the movies, loading the datasets if they have not been loaded
+
+        Returns
+        -------
+            genres: CategoricalFeatures
+                genres of each movie
+            tags: CategoricalFeatures
+                lowercased tags of each movie, repeated for each application
+        """
+        if self.genres is None or self.tags is None:
+            self.load()
+        assert self.genres is not None and self.tags is not None
+
+        return self.genres, self.tags
+
+    def clear_cache(self) -> None:
+        """
+        Remove all cached datasets
+        """
+        self.cache.clear()
+
     def __load_movies(self) -> pd.DataFrame:
         """
         Load the movies dataset
@@ -44,16 +138,12 @@ class Dataset:
         Returns
         -------
             movies: pd.DataFrame
-                movies(index, movie_id, title, genres)
+                movies(index, movie_id, title, genres) with genres joined by "|"
         """
-        movie_cols = ["movie_id", "title", "genres"]
-        movies = pd.read_csv(
-            os.path.join(self.data_dir, "movies.dat"), sep="::", names=movie_cols, encoding="latin-1", engine="python"
+        movies = self.reader.read(
+            os.path.join(self.data_dir, "movies.dat"), list(self.__MOVIE_DTYPES), self.__MOVIE_DTYPES
         )
 
-        # convert type of genres from str to list
-        movies["genres"] = movies.genres.apply(lambda x: x.split("|"))
-
         return movies
 
     def __load_ratings(self) -> pd.DataFrame:
@@ -69,12 +159,82 @@ class Dataset:
             ratings: pd.DataFrame
                 ratings(index, user_id, movie_id, rating, timestamp)
         """
-        rating_cols = ["user_id", "movie_id", "rating", "timestamp"]
-        ratings = pd.read_csv(
-            os.path.join(self.data_dir, "ratings.dat"), sep="::", names=rating_cols, encoding="latin-1", engine="python"
+        if self.__has_binary_ratings():
+            return self.binary.load("ratings")["ratings"]
+
+        path = os.path.join(self.data_dir, "ratings.dat")
+        if self.chunk_size is None:
+            return self.reader.read(path, list(self.__RATING_DTYPES), self.__RATING_DTYPES)
+
+        # streaming mode: only the current chunk and the collected users are kept in memory
+        chunks = DatReader(self.reader.encoding, self.chunk_size).iter_chunks(
+            path, list(self.__RATING_DTYPES), self.__RATING_DTYPES
         )
+        if self.user_nums is not None:
+            chunks = self.__take_users(chunks, self.user_nums)
+
+        ratings_chunks = list(chunks)
+        if len(ratings_chunks) == 0:
+            # empty ratings.dat, or no user selected
+            return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in self.__RATING_DTYPES.items()})
+
+        return pd.concat(ratings_chunks, ignore_index=True)
+
+    def __has_binary_ratings(self) -> bool:
+        """
+        Check whether the ratings are stored as binary columns instead of ratings.dat
 
-        return ratings
+        Returns
+        -------
+            has_binary_ratings: bool
+                whether ratings.dat is absent and the binary ratings exist
+        """
+        return not os.path.exists(os.path.join(self.data_dir, "ratings.dat")) and self.binary.exists("ratings")
+
+    def __take_users(self, chunks: Iterator[pd.DataFrame], user_nums: int) -> Iterator[pd.DataFrame]:
+        """
+        Keep the ratings of the first `user_nums` users and stop reading after them
+
+        Parameters
+        ----------
+            chunks: Iterator[pd.DataFrame]
+                chunks of ratings sorted by user_id
+            user_nums: int
+                number of users to keep
+
+        Returns
+        -------
+            chunks: Iterator[pd.DataFrame]
+                chunks of ratings of the first `user_nums` users
+        """
+        if user_nums <= 0:
+            return
+
+        remaining = user_nums
+        last_user_id = -1
+        max_user_id: Optional[int] = None
+        for chunk in chunks:
+            user_ids = chunk.user_id.to_numpy()
+            if len(user_ids) == 0:
+                continue
+
+            if user_ids[0] < last_user_id or np.any(np.diff(user_ids) < 0):
+                raise ValueError("ratings.dat must be sorted by user_id to be streamed")
+            previous_user_id, last_user_id = last_user_id, int(user_ids[-1])
+
+            if max_user_id is None:
+                new_user_ids = np.unique(user_ids[user_ids > previous_user_id])
+                if len(new_user_ids) < remaining:
+                    remaining -= len(new_user_ids)
+                    yield chunk
+                    continue
+                max_user_id = int(new_user_ids[remaining - 1])
+
+            yield chunk[user_ids <= max_user_id]
+
+            # the rest of the file only contains users after the limit
+            if last_user_id > max_user_id:
+                return
 
     def __load_tags(self) -> pd.DataFrame:
         """
@@ -89,16 +249,13 @@ class Dataset:
             tags: pd.DataFrame
                 tags(index, user_id, movie_id, tag, timestamp)
         """
-        tag_cols = ["user_id", "movie_id", "tag", "timestamp"]
-        tags = pd.read_csv(
-            os.path.join(self.data_dir, "tags.dat"), sep="::", names=tag_cols, encoding="latin-1", engine="python"
-        )
+        tags = self.reader.read(os.path.join(self.data_dir, "tags.dat"), list(self.__TAG_DTYPES), self.__TAG_DTYPES)
 
         return tags
 
     def __preprocess(
         self, movies: pd.DataFrame, ratings: pd.DataFrame, tags: pd.DataFrame
-    ) -> tuple[pd.DataFrame, pd.DataFrame]:
+    ) -> tuple[pd.DataFrame, pd.DataFrame, CategoricalFeatures, CategoricalFeatures]:
         """
         Preprocess the datasets
 
@@ -114,28 +271,35 @@ class Dataset:
         Returns
         -------
             movies: pd.DataFrame
-                movies(index, movie_id, title, genres, tags)
+                movies(index, movie_id, title)
             ratings: pd.DataFrame
                 ratings(index, user_id, movie_id, rating, timestamp)
+            genres: CategoricalFeatures
+                genres of each movie
+            movie_tags: CategoricalFeatures
+                lowercased tags of each movie
         """
+        movie_ids = movies.movie_id.to_numpy()
+        genres = CategoricalFeatures.from_strings(movie_ids, movies.genres)
 
-        # unify tags to lowercase
-        tags["tag"] = tags.tag.str.lower()
-
-        # associate tags with movies
-        movie_with_tags = tags.groupby("movie_id").agg({"tag": list}).rename(columns={"tag": "tags"})
-        movies = movies.merge(movie_with_tags, on="movie_id", how="left")
+        # unify tags to lowercase, and associate them with movies
+        movie_tags = CategoricalFeatures.from_pairs(
+            movie_ids, tags.movie_id.to_numpy(), tags.tag.str.lower().to_numpy(dtype=str)
+        )
+        movies = movies.drop(columns="genres")
 
         if self.user_nums is None:
-            return movies, ratings
+            return movies, ratings, genres, movie_tags
 
         # limit the number of users
         valid_user_ids = sorted(ratings.user_id.unique())[: self.user_nums]
-        ratings = ratings[ratings.user_id <= max(valid_user_ids)]
+        ratings = ratings[ratings.user_id <= max(valid_user_ids, default=-1)]
 
-        return movies, ratings
+        return movies, ratings, genres, movie_tags
 
-    def split_ratings(self, ratings: pd.DataFrame, test_size: float = 0.3) -> tuple[pd.DataFrame, pd.DataFrame]:
+    def split_ratings(
+        self, ratings: pd.DataFrame, test_size: float = 0.3, strategy: str = "random", last_nums: int = 1
+    ) -> tuple[pd.DataFrame, pd.DataFrame]:
         """
         Split the ratings dataset into train and test
 
@@ -144,7 +308,15 @@ class Dataset:
             ratings: pd.DataFrame
                 ratings(index, user_id, movie_id, rating, timestamp)
             test_size: float (range: 0.0 ~ 1.0)
-                Percentage of the dataset to use as test
+                Percentage of the dataset to use as test (random, time and user_fraction)
+            strategy: str
+                random: shuffled split of all ratings,
+                time: ratings newer than a global cutoff are tested,
+                user_fraction: the newest test_size of the ratings of each user are tested,
+                user_last: the newest last_nums ratings of each user are tested,
+                leave_one_out: the newest rating of each user is tested
+            last_nums: int
+                number of ratings to hold out per user (user_last only)
 
         Returns
         -------
@@ -153,6 +325,55 @@ class Dataset:
             test: pd.DataFrame
                 ratings(index, user_id, movie_id, rating, timestamp)
         """
-        train, test = train_test_split(ratings, test_size=test_size)
+        if strategy == "random":
+            train, test = train_test_split(ratings, test_size=test_size)
+            return train, test
+
+        train_indexes, test_indexes = self.split_indexes(ratings, test_size, strategy, last_nums)
+
+        return ratings.take(train_indexes), ratings.take(test_indexes)
+
+    def split_indexes(
+        self,
+        ratings: pd.DataFrame,
+        test_size: float = 0.3,
+        strategy: str = "random",
+        last_nums: int = 1,
+        seed: Optional[int] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Split the ratings dataset into train and test by row positions, without copying the ratings
+
+        Parameters
+        ----------
+            ratings: pd.DataFrame
+                ratings(index, user_id, movie_id, rating, timestamp)
+            test_size: float (range: 0.0 ~ 1.0)
+                Percentage of the dataset to use as test (random, time and user_fraction)
+            strategy: str
+                one of the strategies of split_ratings()
+            last_nums: int
+                number of ratings to hold out per user (user_last only)
+            seed: Optional[int]
+                random seed (random only)
 
-        return train, test
+        Returns
+        -------
+            train_indexes: np.ndarray
+                sorted row positions of the training ratings
+            test_indexes: np.ndarray
+                sorted row positions of the test ratings
+        """
+        user_ids, timestamps = ratings.user_id.to_numpy(), ratings.timestamp.to_numpy()
+        if strategy == "random":
+            return self.split.random(len(ratings), test_size, seed)
+        if strategy == "time":
+            return self.split.time_cutoff(timestamps, test_size)
+        if strategy == "user_fraction":
+            return self.split.user_last_fraction(user_ids, timestamps, test_size)
+        if strategy == "user_last":
+            return self.split.user_last(user_ids, timestamps, last_nums)
+        if strategy == "leave_one_out":
+            return self.split.user_last(user_ids, timestamps, 1)
+
+        raise ValueError(f"unknown split strategy: {strategy!r}")
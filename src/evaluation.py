@@ -1,3 +1,5 @@
+from typing import Optional, Sequence
+
 import numpy as np
 from sklearn.metrics import mean_squared_error as mse
 
@@ -27,34 +29,11 @@ class Evaluation:
         mean_scores : float
             average of recall@k for all users
         """
-        scores = [
-            self.__recall_at_k(true_user_id2movie_ids.get(user_id, []), predicted_user_id2movie_ids.get(user_id, []), k)
-            for user_id in true_user_id2movie_ids.keys()
-        ]
-
-        return float(np.mean(scores))
-
-    def __recall_at_k(self, true_movie_ids: list[int], predicted_movie_ids: list[int], k: int) -> float:
-        """
-        Calculate recall@k
+        true_indptr, true_indices, predicted_movie_ids = self.__to_arrays(
+            true_user_id2movie_ids, predicted_user_id2movie_ids, k
+        )
 
-        Parameters
-        ----------
-        true_movie_ids : list[int]
-            list of truly favorite movie ids
-        predicted_movie_ids : list[int]
-            list of predicted favorite movie ids
-
-        Returns
-        -------
-        score: float
-            recall@k
-        """
-        # if true_movie_ids is empty or k is 0, impossible to calculate recall@k
-        if len(true_movie_ids) == 0 or k == 0:
-            return 0.0
-
-        return len(set(true_movie_ids) & set(predicted_movie_ids[:k])) / len(true_movie_ids)
+        return self.calc_recall_at_k_array(true_indptr, true_indices, predicted_movie_ids, k)
 
     def calc_precision_at_k(
         self,
@@ -77,36 +56,196 @@ class Evaluation:
         mean_scores: float
             average of precision@k for all users
         """
-        scores = [
-            self.__precision_at_k(
-                true_user_id2movie_ids.get(user_id, []), predicted_user_id2movie_ids.get(user_id, []), k
-            )
-            for user_id in true_user_id2movie_ids.keys()
-        ]
+        true_indptr, true_indices, predicted_movie_ids = self.__to_arrays(
+            true_user_id2movie_ids, predicted_user_id2movie_ids, k
+        )
+
+        return self.calc_precision_at_k_array(true_indptr, true_indices, predicted_movie_ids, k)
+
+    def calc_recall_at_k_array(
+        self, true_indptr: np.ndarray, true_indices: np.ndarray, predicted_movie_ids: np.ndarray, k: int = 10
+    ) -> float:
+        """
+        Calculate recall@k of all users at once
+
+        Parameters
+        ----------
+        true_indptr : np.ndarray
+            (users + 1,) offsets of the truly favorite movies of each user in true_indices (CSR)
+        true_indices : np.ndarray
+            truly favorite movie ids of all users
+        predicted_movie_ids : np.ndarray
+            (users, K) predicted favorite movie ids of each user (-1 for padding)
+
+        Returns
+        -------
+        mean_scores : float
+            average of recall@k for all users
+        """
+        true_nums = np.diff(true_indptr)
+        if len(true_nums) == 0:
+            return float(np.mean([]))
+
+        # if true_movie_ids is empty or k is 0, impossible to calculate recall@k
+        hit_nums = self.calc_hits(true_indptr, true_indices, predicted_movie_ids[:, :k]).sum(axis=1)
+        scores = np.zeros(len(true_nums))
+        np.divide(hit_nums, true_nums, out=scores, where=true_nums > 0)
 
         return float(np.mean(scores))
 
-    def __precision_at_k(self, true_movie_ids: list[int], predicted_movie_ids: list[int], k: int) -> float:
+    def calc_precision_at_k_array(
+        self, true_indptr: np.ndarray, true_indices: np.ndarray, predicted_movie_ids: np.ndarray, k: int = 10
+    ) -> float:
         """
-        Calculate precision@k
+        Calculate precision@k of all users at once
 
         Parameters
         ----------
-        true_movie_ids : list[int]
-            list of truly favorite movie ids
-        predicted_movie_ids : list[int]
-            list of predicted favorite movie ids
+        true_indptr : np.ndarray
+            (users + 1,) offsets of the truly favorite movies of each user in true_indices (CSR)
+        true_indices : np.ndarray
+            truly favorite movie ids of all users
+        predicted_movie_ids : np.ndarray
+            (users, K) predicted favorite movie ids of each user (-1 for padding)
 
         Returns
         -------
-        score: float
-            precision@k
+        mean_scores: float
+            average of precision@k for all users
         """
+        if len(true_indptr) <= 1:
+            return float(np.mean([]))
+
         # if k is 0, impossible to calculate precision@k
         if k == 0:
             return 0.0
 
-        return len(set(true_movie_ids) & set(predicted_movie_ids[:k])) / k
+        hit_nums = self.calc_hits(true_indptr, true_indices, predicted_movie_ids[:, :k]).sum(axis=1)
+
+        return float(np.mean(hit_nums / k))
+
+    def calc_ranking_metrics(
+        self,
+        true_indptr: np.ndarray,
+        true_indices: np.ndarray,
+        predicted_movie_ids: np.ndarray,
+        ks: Sequence[int] = (5, 10, 20, 50),
+        catalog_movie_ids: Optional[np.ndarray] = None,
+        movie_popularity: Optional[np.ndarray] = None,
+    ) -> dict[str, float]:
+        """
+        Calculate ranking metrics at several k in one pass over the hits
+
+        Hits are found once for the largest k, and every metric at every k is a prefix of their cumulative sums.
+
+        Parameters
+        ----------
+        true_indptr : np.ndarray
+            (users + 1,) offsets of the truly favorite movies of each user in true_indices (CSR)
+        true_indices : np.ndarray
+            truly favorite movie ids of all users
+        predicted_movie_ids : np.ndarray
+            (users, K) ranked predicted movie ids of each user (-1 for padding), K >= max(ks)
+        ks : Sequence[int]
+            cutoffs of the metrics
+        catalog_movie_ids : Optional[np.ndarray]
+            sorted ids of all recommendable movies (coverage and novelty are skipped if None)
+        movie_popularity : Optional[np.ndarray]
+            fraction of users who rated each movie of catalog_movie_ids (novelty is skipped if None)
+
+        Returns
+        -------
+        scores : dict[str, float]
+            {metric}_at_{k} of recall, precision, hit_rate, ndcg, map, mrr, coverage and novelty,
+            averaged over users (coverage is over the catalog)
+        """
+        max_k = max(ks)
+        user_nums = len(true_indptr) - 1
+        predicted_movie_ids = np.asarray(predicted_movie_ids)[:, :max_k]
+        if predicted_movie_ids.shape[1] < max_k:
+            padding = np.full((user_nums, max_k - predicted_movie_ids.shape[1]), -1, dtype=predicted_movie_ids.dtype)
+            predicted_movie_ids = np.hstack([predicted_movie_ids, padding])
+
+        hits = self.calc_hits(true_indptr, true_indices, predicted_movie_ids)
+        true_nums = np.diff(true_indptr)
+        ranks = np.arange(1, max_k + 1)
+        discounts = 1.0 / np.log2(ranks + 1)
+
+        # cumulative sums over ranks: every metric at k is read from column k - 1
+        hit_nums = np.cumsum(hits, axis=1)
+        dcg = np.cumsum(hits * discounts, axis=1)
+        ideal_dcg = np.r_[0.0, np.cumsum(discounts)]
+        average_precision = np.cumsum(hits * hit_nums / ranks, axis=1)
+        first_hit_ranks = np.where(hits.any(axis=1), hits.argmax(axis=1) + 1, max_k + 1)
+
+        scores: dict[str, float] = {}
+        for k in ks:
+            relevant_nums = np.minimum(true_nums, k)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                scores[f"recall_at_{k}"] = float(np.mean(np.where(true_nums > 0, hit_nums[:, k - 1] / true_nums, 0.0)))
+                scores[f"precision_at_{k}"] = float(np.mean(hit_nums[:, k - 1] / k))
+                scores[f"hit_rate_at_{k}"] = float(np.mean(hit_nums[:, k - 1] > 0))
+                scores[f"ndcg_at_{k}"] = float(
+                    np.mean(np.where(true_nums > 0, dcg[:, k - 1] / ideal_dcg[relevant_nums], 0.0))
+                )
+                scores[f"map_at_{k}"] = float(
+                    np.mean(np.where(true_nums > 0, average_precision[:, k - 1] / relevant_nums, 0.0))
+                )
+                scores[f"mrr_at_{k}"] = float(np.mean(np.where(first_hit_ranks <= k, 1.0 / first_hit_ranks, 0.0)))
+
+        if catalog_movie_ids is not None:
+            scores.update(
+                self.__calc_catalog_metrics(predicted_movie_ids, ks, np.asarray(catalog_movie_ids), movie_popularity)
+            )
+
+        return scores
+
+    def calc_hits(
+        self, true_indptr: np.ndarray, true_indices: np.ndarray, predicted_movie_ids: np.ndarray
+    ) -> np.ndarray:
+        """
+        Find which predicted movies are truly favorite, by one membership test over all users
+
+        Parameters
+        ----------
+        true_indptr : np.ndarray
+            (users + 1,) offsets of the truly favorite movies of each user in true_indices (CSR)
+        true_indices : np.ndarray
+            truly favorite movie ids of all users
+        predicted_movie_ids : np.ndarray
+            (users, K) predicted favorite movie ids of each user (-1 for padding)
+
+        Returns
+        -------
+        hits : np.ndarray
+            (users, K) True where the predicted movie is truly favorite (repeated predictions hit only once)
+        """
+        user_nums, k = predicted_movie_ids.shape
+        true_indices = np.asarray(true_indices, dtype=np.int64)
+        predicted_movie_ids = np.asarray(predicted_movie_ids, dtype=np.int64)
+        if user_nums == 0 or k == 0 or len(true_indices) == 0:
+            return np.zeros((user_nums, k), dtype=np.bool_)
+
+        # (user, movie) pairs as single keys
+        base = int(max(true_indices.max(), predicted_movie_ids.max())) + 1
+        true_keys = np.repeat(np.arange(user_nums, dtype=np.int64), np.diff(true_indptr)) * base + true_indices
+        true_keys.sort()
+
+        # sorting each row makes the predicted keys sorted overall, which keeps the binary search cache friendly
+        order = np.argsort(predicted_movie_ids, axis=1, kind="stable")
+        sorted_movie_ids = np.take_along_axis(predicted_movie_ids, order, axis=1)
+        sorted_keys = np.arange(user_nums, dtype=np.int64)[:, np.newaxis] * base + sorted_movie_ids
+
+        positions = np.minimum(np.searchsorted(true_keys, sorted_keys.ravel()), len(true_keys) - 1)
+        sorted_hits = (true_keys[positions].reshape(user_nums, k) == sorted_keys) & (sorted_movie_ids >= 0)
+
+        # a movie predicted several times for a user is counted once, at its first position
+        sorted_hits[:, 1:] &= sorted_movie_ids[:, 1:] != sorted_movie_ids[:, :-1]
+
+        hits = np.zeros((user_nums, k), dtype=np.bool_)
+        np.put_along_axis(hits, order, sorted_hits, axis=1)
+
+        return hits
 
     def calc_rmse(self, true_ratings: list[float], predicted_ratings: list[float]) -> float:
         """
@@ -125,3 +264,130 @@ class Evaluation:
             RMSE
         """
         return np.sqrt(mse(true_ratings, predicted_ratings))
+
+    def group_by_user(self, user_ids: np.ndarray, movie_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Group movies by user into CSR arrays, without building a dict of lists
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user id of each rating
+        movie_ids : np.ndarray
+            movie id of each rating
+
+        Returns
+        -------
+        unique_user_ids : np.ndarray
+            sorted unique user ids
+        indptr : np.ndarray
+            (users + 1,) offsets of the movies of each user in indices
+        indices : np.ndarray
+            movie ids grouped by user (in the original order within each user)
+        """
+        order = np.argsort(user_ids, kind="stable")
+        sorted_user_ids = np.asarray(user_ids)[order]
+        starts = np.flatnonzero(np.r_[True, sorted_user_ids[1:] != sorted_user_ids[:-1]]) if len(order) > 0 else order
+        indptr = np.r_[starts, len(order)].astype(np.int64)
+
+        return sorted_user_ids[starts], indptr, np.asarray(movie_ids)[order]
+
+    def __calc_catalog_metrics(
+        self,
+        predicted_movie_ids: np.ndarray,
+        ks: Sequence[int],
+        catalog_movie_ids: np.ndarray,
+        movie_popularity: Optional[np.ndarray],
+    ) -> dict[str, float]:
+        """
+        Calculate coverage and novelty at several k
+
+        Parameters
+        ----------
+        predicted_movie_ids : np.ndarray
+            (users, max(ks)) ranked predicted movie ids of each user (-1 for padding)
+        ks : Sequence[int]
+            cutoffs of the metrics
+        catalog_movie_ids : np.ndarray
+            sorted ids of all recommendable movies
+        movie_popularity : Optional[np.ndarray]
+            fraction of users who rated each movie of catalog_movie_ids
+
+        Returns
+        -------
+        scores : dict[str, float]
+            coverage_at_{k} and novelty_at_{k}
+        """
+        if len(catalog_movie_ids) == 0:
+            return {f"{name}_at_{k}": 0.0 for k in ks for name in ["coverage", "novelty"]}
+
+        positions = np.minimum(np.searchsorted(catalog_movie_ids, predicted_movie_ids), len(catalog_movie_ids) - 1)
+        in_catalog = (catalog_movie_ids[positions] == predicted_movie_ids) & (predicted_movie_ids >= 0)
+
+        # the best rank at which each movie is recommended to anyone: coverage at every k at once
+        # (ranks are written from the last to the first, so the smallest one stays)
+        best_ranks = np.full(len(catalog_movie_ids), np.iinfo(np.int64).max)
+        for rank in range(predicted_movie_ids.shape[1] - 1, -1, -1):
+            best_ranks[positions[in_catalog[:, rank], rank]] = rank
+
+        # self-information of recommended movies: less popular movies are more novel
+        if movie_popularity is not None:
+            popularity = np.asarray(movie_popularity, dtype=np.float64)
+            smallest = popularity[popularity > 0].min() if np.any(popularity > 0) else 1.0
+            information = np.where(in_catalog, -np.log2(np.maximum(popularity[positions], smallest)), 0.0)
+            cumulative_information = np.cumsum(information, axis=1)
+            cumulative_nums = np.cumsum(in_catalog, axis=1)
+
+        scores: dict[str, float] = {}
+        for k in ks:
+            scores[f"coverage_at_{k}"] = float(np.mean(best_ranks < k))
+            if movie_popularity is not None:
+                recommended = cumulative_nums[:, k - 1] > 0
+                scores[f"novelty_at_{k}"] = (
+                    float(np.mean(cumulative_information[recommended, k - 1] / cumulative_nums[recommended, k - 1]))
+                    if recommended.any()
+                    else 0.0
+                )
+
+        return scores
+
+    def __to_arrays(
+        self,
+        true_user_id2movie_ids: dict[int, list[int]],
+        predicted_user_id2movie_ids: dict[int, list[int]],
+        k: int,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Convert dicts of movie lists to CSR ground truth and a padded prediction array
+
+        Parameters
+        ----------
+        true_user2movies : dict[int, list[int]]
+            combination of user id and truly favorite movies
+        predicted_user2movies : dict[int, list[int]]
+            combination of user id and predicted favorite movies
+        k : int
+            number of predictions kept for each user
+
+        Returns
+        -------
+        true_indptr : np.ndarray
+            (users + 1,) offsets of the truly favorite movies of each user
+        true_indices : np.ndarray
+            truly favorite movie ids of all users
+        predicted_movie_ids : np.ndarray
+            (users, k) predicted favorite movie ids (-1 for padding)
+        """
+        true_movie_ids = list(true_user_id2movie_ids.values())
+        true_indptr = np.zeros(len(true_movie_ids) + 1, dtype=np.int64)
+        np.cumsum([len(movie_ids) for movie_ids in true_movie_ids], out=true_indptr[1:])
+        true_indices = np.fromiter(
+            (movie_id for movie_ids in true_movie_ids for movie_id in movie_ids), dtype=np.int64, count=true_indptr[-1]
+        )
+
+        predicted_movie_ids = np.full((len(true_movie_ids), k), -1, dtype=np.int64)
+        for row, user_id in enumerate(true_user_id2movie_ids.keys()):
+            movie_ids = predicted_user_id2movie_ids.get(user_id, [])[:k]
+            predicted_movie_ids[row, : len(movie_ids)] = movie_ids
+
+        return true_indptr, true_indices, predicted_movie_ids
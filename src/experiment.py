@@ -0,0 +1,224 @@
+import argparse
+import importlib
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.base_recommend import BaseRecommend
+from src.split import Split
+from src.utils.column_cache import ColumnCache
+
+ModelFactory = Callable[[], BaseRecommend]
+
+
+def run_fold(model_factory: ModelFactory, data_dir: str, fold: int, seed: int) -> dict[str, float]:
+    """
+    Fit and evaluate a model on one fold of memory-mapped ratings
+
+    Parameters
+    ----------
+        model_factory: ModelFactory
+            picklable callable creating an unfitted model (e.g. the model class)
+        data_dir: str
+            directory written by Experiment, holding the ratings and the indexes of each fold
+        fold: int
+            fold number
+        seed: int
+            seed of the global random state, for models drawing random numbers
+
+    Returns
+    -------
+        scores: dict[str, float]
+            metrics of the model, fit_time, evaluate_time and time (wall time of the fold) in seconds
+    """
+    start = time.perf_counter()
+
+    # only the rows of the fold are copied, the ratings stay memory-mapped
+    ratings = ColumnCache(data_dir).load("ratings")["ratings"]
+    train_indexes = np.load(os.path.join(data_dir, f"train_{fold}.npy"), mmap_mode="r")
+    test_indexes = np.load(os.path.join(data_dir, f"test_{fold}.npy"), mmap_mode="r")
+    train, test = ratings.take(train_indexes), ratings.take(test_indexes)
+
+    np.random.seed(seed)
+    model = model_factory()
+
+    fit_start = time.perf_counter()
+    model.fit(train)
+    evaluate_start = time.perf_counter()
+    scores = model.evaluate(test)
+    end = time.perf_counter()
+
+    return {
+        **{name: float(score) for name, score in scores.items()},
+        "fit_time": evaluate_start - fit_start,
+        "evaluate_time": end - evaluate_start,
+        "time": end - start,
+    }
+
+
+class Experiment:
+    __METHODS: list[str] = ["kfold", "holdout"]
+
+    __split = Split()
+
+    def __init__(
+        self,
+        model_factory: ModelFactory,
+        n_splits: int = 5,
+        method: str = "kfold",
+        test_size: float = 0.2,
+        seed: int = 0,
+        n_jobs: Optional[int] = None,
+    ) -> None:
+        """
+        Evaluate a model over several train/test splits in parallel processes
+
+        Parameters
+        ----------
+            model_factory: ModelFactory
+                picklable callable creating an unfitted model (e.g. the model class)
+            n_splits: int
+                number of folds (kfold) or repetitions (holdout)
+            method: str ("kfold" or "holdout")
+                kfold: each rating is tested once, holdout: an independent random split per repetition
+            test_size: float (range: 0.0 ~ 1.0)
+                percentage of the ratings to use as test in each repetition (holdout only)
+            seed: int
+                seed of the splits and of the models (fold i uses seed + i)
+            n_jobs: Optional[int]
+                number of processes (number of CPUs if None, folds run in this process if 1)
+        """
+        if method not in self.__METHODS:
+            raise ValueError(f"method must be one of {self.__METHODS}, not {method!r}")
+        if method == "kfold" and n_splits < 2:
+            raise ValueError(f"kfold needs at least 2 splits, not {n_splits}")
+
+        self.model_factory = model_factory
+        self.n_splits = n_splits
+        self.method = method
+        self.test_size = test_size
+        self.seed = seed
+        self.n_jobs = n_jobs if n_jobs is not None else (os.cpu_count() or 1)
+
+    def split(self, rating_nums: int) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Split the ratings into train and test by row indexes
+
+        Parameters
+        ----------
+            rating_nums: int
+                number of ratings
+
+        Returns
+        -------
+            folds: list[tuple[np.ndarray, np.ndarray]]
+                sorted train indexes and sorted test indexes of each fold
+        """
+        rng = np.random.default_rng(self.seed)
+
+        folds = []
+        if self.method == "kfold":
+            # every rating belongs to the test set of exactly one fold
+            fold_of_rating = rng.permutation(rating_nums) % self.n_splits
+            for fold in range(self.n_splits):
+                folds.append((np.flatnonzero(fold_of_rating != fold), np.flatnonzero(fold_of_rating == fold)))
+        else:
+            for seed in rng.integers(0, np.iinfo(np.int64).max, self.n_splits):
+                folds.append(self.__split.random(rating_nums, self.test_size, int(seed)))
+
+        return folds
+
+    def run(self, ratings: Optional[pd.DataFrame] = None) -> list[dict[str, float]]:
+        """
+        Fit and evaluate the model on every fold
+
+        The ratings and the fold indexes are written once to a temporary directory and memory-mapped by
+        the workers, so no dataframe is pickled to the processes.
+
+        Parameters
+        ----------
+            ratings: Optional[pd.DataFrame]
+                ratings(index, user_id, movie_id, rating, timestamp) (the dataset of the model if None)
+
+        Returns
+        -------
+            fold_scores: list[dict[str, float]]
+                scores of each fold returned by run_fold()
+        """
+        if ratings is None:
+            _, ratings = self.model_factory().dataset.load()
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            ColumnCache(data_dir).save("ratings", {"ratings": ratings.reset_index(drop=True)})
+            for fold, (train_indexes, test_indexes) in enumerate(self.split(len(ratings))):
+                np.save(os.path.join(data_dir, f"train_{fold}.npy"), train_indexes)
+                np.save(os.path.join(data_dir, f"test_{fold}.npy"), test_indexes)
+
+            args = [(self.model_factory, data_dir, fold, self.seed + fold) for fold in range(self.n_splits)]
+            if self.n_jobs == 1:
+                return [run_fold(*fold_args) for fold_args in args]
+
+            with ProcessPoolExecutor(max_workers=min(self.n_jobs, self.n_splits)) as executor:
+                return list(executor.map(run_fold, *zip(*args)))
+
+    def summarize(self, fold_scores: list[dict[str, float]]) -> dict[str, tuple[float, float]]:
+        """
+        Summarize the scores of the folds
+
+        Parameters
+        ----------
+            fold_scores: list[dict[str, float]]
+                scores of each fold
+
+        Returns
+        -------
+            summary: dict[str, tuple[float, float]]
+                combination of metric name and (mean, sample standard deviation) over the folds
+        """
+        summary = {}
+        for name in fold_scores[0]:
+            values = np.array([scores[name] for scores in fold_scores], dtype=np.float64)
+            summary[name] = (float(values.mean()), float(values.std(ddof=1)) if len(values) > 1 else 0.0)
+
+        return summary
+
+
+if __name__ == "__main__":
+    models = {
+        "random": "src.models.random.model.Random",
+        "popularity": "src.models.popularity.model.Popularity",
+        "association_rules": "src.models.association_rules.model.AssociationRules",
+        "user_based_collaborative_filtering": "src.models.user_based_collaborative_filtering.model.UserBasedCF",
+        "als": "src.models.als.model.ALS",
+        "content_based": "src.models.content_based.model.ContentBased",
+    }
+
+    parser = argparse.ArgumentParser(description="cross-validate a recommendation model")
+    parser.add_argument("model", choices=list(models))
+    parser.add_argument("--splits", type=int, default=5)
+    parser.add_argument("--method", choices=["kfold", "holdout"], default="kfold")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=None)
+    args = parser.parse_args()
+
+    module_name, class_name = models[args.model].rsplit(".", 1)
+    experiment = Experiment(
+        getattr(importlib.import_module(module_name), class_name),
+        n_splits=args.splits,
+        method=args.method,
+        test_size=args.test_size,
+        seed=args.seed,
+        n_jobs=args.jobs,
+    )
+    fold_scores = experiment.run()
+
+    for fold, scores in enumerate(fold_scores):
+        print(f"fold {fold}: {scores['time']:.3f} sec (fit {scores['fit_time']:.3f} sec)")
+    for name, (mean, std) in experiment.summarize(fold_scores).items():
+        print(f"{name}: {mean:.6f} ± {std:.6f}")
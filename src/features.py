@@ -0,0 +1,163 @@
+from typing import Self
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class CategoricalFeatures:
+    def __init__(self, ids: np.ndarray, vocabulary: np.ndarray, indptr: np.ndarray, indices: np.ndarray) -> None:
+        """
+        Multi-valued categorical features of rows (e.g. genres or tags of movies) as integer codes in CSR form
+
+        The values of row i are vocabulary[indices[indptr[i]:indptr[i + 1]]], sorted by code and repeated
+        as many times as they were given (e.g. a tag applied by two users).
+
+        Parameters
+        ----------
+            ids: np.ndarray
+                ids of the rows (e.g. movie ids)
+            vocabulary: np.ndarray
+                sorted unique values
+            indptr: np.ndarray
+                (rows + 1,) offsets of the codes of each row
+            indices: np.ndarray
+                codes of the values (indexes of the vocabulary)
+        """
+        self.ids = ids
+        self.vocabulary = vocabulary
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_pairs(cls, ids: np.ndarray, row_ids: np.ndarray, values: np.ndarray) -> Self:
+        """
+        Encode (row id, value) pairs
+
+        Parameters
+        ----------
+            ids: np.ndarray
+                ids of the rows
+            row_ids: np.ndarray
+                row id of each pair (pairs of unknown ids are ignored)
+            values: np.ndarray
+                value of each pair
+
+        Returns
+        -------
+            categorical_features: Self
+                encoded features
+        """
+        ids = np.asarray(ids)
+        sorter = np.argsort(ids, kind="stable")
+        positions = np.minimum(np.searchsorted(ids, row_ids, sorter=sorter), max(len(ids) - 1, 0))
+        known = ids[sorter[positions]] == row_ids if len(ids) > 0 else np.zeros(len(row_ids), dtype=np.bool_)
+        rows = sorter[positions[known]]
+
+        vocabulary, codes = np.unique(np.asarray(values, dtype=str)[known], return_inverse=True)
+        order = np.lexsort((codes, rows))
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(ids)), out=indptr[1:])
+
+        return cls(ids, vocabulary, indptr, codes[order].astype(np.int32))
+
+    @classmethod
+    def from_strings(cls, ids: np.ndarray, strings: pd.Series, separator: str = "|") -> Self:
+        """
+        Encode values joined by a separator (e.g. "Action|Comedy" in movies.dat)
+
+        Parameters
+        ----------
+            ids: np.ndarray
+                ids of the rows
+            strings: pd.Series
+                joined values of each row
+            separator: str
+                separator of the values
+
+        Returns
+        -------
+            categorical_features: Self
+                encoded features
+        """
+        # one column per position, so no list is built per row
+        values = strings.reset_index(drop=True).str.split(separator, expand=True, regex=False).stack().dropna()
+        row_positions = values.index.get_level_values(0).to_numpy()
+
+        return cls.from_pairs(ids, np.asarray(ids)[row_positions], values.to_numpy(dtype=str))
+
+    @classmethod
+    def from_state(cls, state: dict[str, np.ndarray], prefix: str = "") -> Self:
+        """
+        Restore features from arrays returned by get_state()
+
+        Parameters
+        ----------
+            state: dict[str, np.ndarray]
+                arrays of the features (may be memory-mapped)
+            prefix: str
+                prefix of the array names
+
+        Returns
+        -------
+            categorical_features: Self
+                restored features
+        """
+        return cls(
+            state[f"{prefix}ids"], state[f"{prefix}vocabulary"], state[f"{prefix}indptr"], state[f"{prefix}indices"]
+        )
+
+    def get_state(self, prefix: str = "") -> dict[str, np.ndarray]:
+        """
+        Get the arrays of the features
+
+        Parameters
+        ----------
+            prefix: str
+                prefix of the array names
+
+        Returns
+        -------
+            state: dict[str, np.ndarray]
+                ids, vocabulary and CSR arrays
+        """
+        return {
+            f"{prefix}ids": self.ids,
+            f"{prefix}vocabulary": self.vocabulary,
+            f"{prefix}indptr": self.indptr,
+            f"{prefix}indices": self.indices,
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def matrix(self) -> sp.csr_matrix:
+        """
+        Count the values of each row
+
+        Returns
+        -------
+            counts: sp.csr_matrix
+                (rows, vocabulary) float32 number of times each value is given to each row
+        """
+        # copy the structure, since sum_duplicates() works in place
+        counts = sp.csr_matrix(
+            (np.ones(len(self.indices), dtype=np.float32), self.indices.copy(), self.indptr.copy()),
+            shape=(len(self.ids), len(self.vocabulary)),
+        )
+        counts.sum_duplicates()
+
+        return counts
+
+    def to_lists(self) -> list[list[str]]:
+        """
+        Decode the values of each row (slow, only for inspection)
+
+        Returns
+        -------
+            values: list[list[str]]
+                values of each row
+        """
+        values = self.vocabulary[self.indices].tolist()
+
+        return [values[start:end] for start, end in zip(self.indptr[:-1].tolist(), self.indptr[1:].tolist())]
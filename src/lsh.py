@@ -0,0 +1,291 @@
+from typing import Optional, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+# dense vectors (e.g. latent factors) or sparse rows (e.g. ratings of users)
+Vectors = Union[np.ndarray, sp.csr_matrix]
+
+
+class LSHIndex:
+    __BLOCK_SIZE: int = 1024
+    __PAIR_BLOCK_SIZE: int = 1 << 18
+
+    def __init__(
+        self,
+        dim: int,
+        table_nums: int = 8,
+        bit_nums: int = 12,
+        probe_nums: int = 0,
+        block_size: int = __BLOCK_SIZE,
+        seed: int = 0,
+    ) -> None:
+        """
+        Approximate nearest neighbour index for cosine similarity by random-projection LSH
+
+        Each table hashes a vector to the signs of bit_nums random projections, and vectors in the same bucket
+        as the query in any table are re-ranked by their exact cosine similarity.
+
+        Parameters
+        ----------
+            dim: int
+                dimension of the vectors
+            table_nums: int
+                number of hash tables (more tables: higher recall, slower queries)
+            bit_nums: int (range: 1 ~ 62)
+                number of bits of each hash (more bits: smaller buckets, faster queries, lower recall)
+            probe_nums: int
+                number of extra buckets probed per table, flipping the bits whose projections are nearest to 0
+                (more probes: higher recall without more tables)
+            block_size: int
+                number of queries processed at once
+            seed: int
+                random seed of the projections
+        """
+        if not 1 <= bit_nums <= 62:
+            raise ValueError(f"bit_nums must be between 1 and 62, not {bit_nums}")
+
+        self.dim = dim
+        self.table_nums = table_nums
+        self.bit_nums = bit_nums
+        self.probe_nums = min(probe_nums, bit_nums)
+        self.block_size = block_size
+        self.projections = np.random.default_rng(seed).standard_normal((dim, table_nums * bit_nums)).astype(np.float32)
+
+        self.__vector_chunks: list[Vectors] = []
+        self.__code_chunks: list[np.ndarray] = []
+        self.__vectors: Optional[Vectors] = None
+        self.__sorted_codes = np.zeros((table_nums, 0), dtype=np.int64)
+        self.__sorted_indexes = np.zeros((table_nums, 0), dtype=np.int64)
+
+    def __len__(self) -> int:
+        return sum(chunk.shape[0] for chunk in self.__vector_chunks)
+
+    def add(self, vectors: Vectors) -> np.ndarray:
+        """
+        Insert vectors into the index
+
+        Parameters
+        ----------
+            vectors: Vectors
+                (n, dim) dense array or sparse matrix
+
+        Returns
+        -------
+            indexes: np.ndarray
+                indexes assigned to the vectors (consecutive from the current size of the index)
+        """
+        start = len(self)
+        normalized = self.__normalize(vectors)
+        codes, _ = self.__hash(normalized)
+
+        # buckets are re-sorted lazily at the next query, so many small insertions stay cheap
+        self.__vector_chunks.append(normalized)
+        self.__code_chunks.append(codes)
+        self.__vectors = None
+
+        return np.arange(start, start + normalized.shape[0])
+
+    def query(
+        self, vectors: Vectors, k: int, exclude_indexes: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Search approximate top-k neighbours of vectors
+
+        Parameters
+        ----------
+            vectors: Vectors
+                (queries, dim) dense array or sparse matrix
+            k: int
+                number of neighbours
+            exclude_indexes: Optional[np.ndarray]
+                index excluded from the neighbours of each query (e.g. the query itself, -1 for none)
+
+        Returns
+        -------
+            neighbor_indexes: np.ndarray
+                (queries, k) int32 indexes in descending order of similarity (-1 if fewer candidates)
+            similarities: np.ndarray
+                (queries, k) float32 cosine similarities (0.0 for missing neighbours)
+        """
+        self.__consolidate()
+        normalized = self.__normalize(vectors)
+        query_nums = normalized.shape[0]
+
+        neighbor_indexes = np.full((query_nums, k), -1, dtype=np.int32)
+        similarities = np.zeros((query_nums, k), dtype=np.float32)
+        indexed = self.__vectors
+        if indexed is None:
+            return neighbor_indexes, similarities
+
+        # queries are compared in the same representation as the indexed vectors
+        if sp.issparse(indexed) and not sp.issparse(normalized):
+            normalized = sp.csr_matrix(normalized)
+        elif not sp.issparse(indexed) and sp.issparse(normalized):
+            normalized = sp.csr_matrix(normalized).toarray()
+
+        for start in range(0, query_nums, self.block_size):
+            end = min(start + self.block_size, query_nums)
+            block = normalized[start:end]
+            rows, items = self.__candidates(block)
+
+            if exclude_indexes is not None:
+                keep = items != np.asarray(exclude_indexes)[start:end][rows]
+                rows, items = rows[keep], items[keep]
+            if len(rows) == 0:
+                continue
+
+            # exact re-ranking of candidates: by similarity in descending order, then by index
+            candidate_similarities = self.__dot(block, indexed, rows, items)
+            # rows + (1 - similarity) / 4 keeps rows apart, and the stable sort keeps ties in index order
+            order = np.argsort(rows + (1.0 - candidate_similarities.astype(np.float64)) / 4, kind="stable")
+            rows, items, candidate_similarities = rows[order], items[order], candidate_similarities[order]
+            row_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            ranks = np.arange(len(rows)) - np.repeat(row_starts, np.diff(np.r_[row_starts, len(rows)]))
+            top = ranks < k
+            neighbor_indexes[start + rows[top], ranks[top]] = items[top]
+            similarities[start + rows[top], ranks[top]] = candidate_similarities[top]
+
+        return neighbor_indexes, similarities
+
+    def __candidates(self, vectors: Vectors) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Collect indexed vectors sharing a probed bucket with each query
+
+        Parameters
+        ----------
+            vectors: Vectors
+                (queries, dim) normalized vectors
+
+        Returns
+        -------
+            rows: np.ndarray
+                query row of each candidate pair
+            items: np.ndarray
+                index of the indexed vector of each candidate pair (pairs are unique)
+        """
+        codes, margins = self.__hash(vectors)
+
+        # the query bucket plus buckets with one uncertain bit flipped
+        probe_codes = [codes]
+        if self.probe_nums > 0:
+            uncertain_bits = np.argsort(margins, axis=2)[:, :, : self.probe_nums]
+            for probe in range(self.probe_nums):
+                probe_codes.append(codes ^ (np.int64(1) << uncertain_bits[:, :, probe].astype(np.int64)))
+
+        rows_list, items_list = [], []
+        for table in range(self.table_nums):
+            sorted_codes = self.__sorted_codes[table]
+            for table_codes in probe_codes:
+                lefts = np.searchsorted(sorted_codes, table_codes[:, table], side="left")
+                rights = np.searchsorted(sorted_codes, table_codes[:, table], side="right")
+                lengths = rights - lefts
+                offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+                rows_list.append(np.repeat(np.arange(len(lengths)), lengths))
+                items_list.append(self.__sorted_indexes[table][np.repeat(lefts, lengths) + offsets])
+
+        # a vector found in several tables is a single candidate (sorted by query, then by index)
+        keys = np.concatenate(rows_list) * max(len(self), 1) + np.concatenate(items_list)
+        keys.sort()
+        keys = keys[np.r_[True, keys[1:] != keys[:-1]]] if len(keys) > 0 else keys
+
+        return keys // max(len(self), 1), keys % max(len(self), 1)
+
+    def __hash(self, vectors: Vectors) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Hash vectors to the bucket of each table
+
+        Parameters
+        ----------
+            vectors: Vectors
+                (n, dim) vectors
+
+        Returns
+        -------
+            codes: np.ndarray
+                (n, tables) int64 bucket codes
+            margins: np.ndarray
+                (n, tables, bits) absolute projections, small values are uncertain bits
+        """
+        projected = np.asarray(vectors @ self.projections).reshape(-1, self.table_nums, self.bit_nums)
+        weights = np.int64(1) << np.arange(self.bit_nums, dtype=np.int64)
+        codes = ((projected > 0).astype(np.int64) * weights).sum(axis=2)
+
+        return codes, np.abs(projected)
+
+    def __normalize(self, vectors: Vectors) -> Vectors:
+        """
+        Normalize vectors to unit length, so that dot products are cosine similarities
+
+        Parameters
+        ----------
+            vectors: Vectors
+                (n, dim) vectors
+
+        Returns
+        -------
+            normalized: Vectors
+                (n, dim) float32 vectors of the same kind (zero vectors stay zero)
+        """
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"vectors must have {self.dim} dimensions, not {vectors.shape[1]}")
+
+        if sp.issparse(vectors):
+            matrix = sp.csr_matrix(vectors, dtype=np.float32)
+            norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+            return sp.csr_matrix(sp.diags(1.0 / np.where(norms == 0, 1.0, norms)) @ matrix, dtype=np.float32)
+
+        dense = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(dense, axis=1, keepdims=True)
+        return dense / np.where(norms == 0, 1.0, norms)
+
+    def __consolidate(self) -> None:
+        """
+        Merge inserted chunks and sort the buckets of each table
+        """
+        if self.__vectors is not None or len(self.__vector_chunks) == 0:
+            return
+
+        if sp.issparse(self.__vector_chunks[0]):
+            self.__vectors = sp.vstack(self.__vector_chunks, format="csr")
+        else:
+            self.__vectors = np.vstack(self.__vector_chunks)
+        self.__vector_chunks = [self.__vectors]
+
+        codes = np.vstack(self.__code_chunks).T
+        self.__code_chunks = [codes.T]
+        self.__sorted_indexes = np.argsort(codes, axis=1, kind="stable")
+        self.__sorted_codes = np.take_along_axis(codes, self.__sorted_indexes, axis=1)
+
+    def __dot(self, vectors: Vectors, indexed: Vectors, rows: np.ndarray, items: np.ndarray) -> np.ndarray:
+        """
+        Compute dot products of (query, indexed vector) pairs
+
+        Parameters
+        ----------
+            vectors: Vectors
+                (queries, dim) normalized query vectors
+            indexed: Vectors
+                (size, dim) normalized indexed vectors of the same kind as vectors
+            rows: np.ndarray
+                query row of each pair
+            items: np.ndarray
+                index of the indexed vector of each pair
+
+        Returns
+        -------
+            similarities: np.ndarray
+                float32 cosine similarity of each pair
+        """
+        similarities = np.empty(len(rows), dtype=np.float32)
+
+        # pairs are gathered chunk by chunk, bounding the memory of the gathered vectors
+        for start in range(0, len(rows), self.__PAIR_BLOCK_SIZE):
+            end = min(start + self.__PAIR_BLOCK_SIZE, len(rows))
+            if sp.issparse(vectors):
+                products = vectors[rows[start:end]].multiply(indexed[items[start:end]])
+                similarities[start:end] = np.asarray(products.sum(axis=1)).ravel()
+            else:
+                similarities[start:end] = np.einsum("ij,ij->i", vectors[rows[start:end]], indexed[items[start:end]])
+
+        return similarities
@@ -0,0 +1,344 @@
+from typing import Optional, Self
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class InteractionMatrix:
+    def __init__(
+        self,
+        ratings: pd.DataFrame,
+        user_ids: Optional[np.ndarray] = None,
+        movie_ids: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Sparse user-movie matrix (value=rating)
+
+        Parameters
+        ----------
+            ratings: pd.DataFrame
+                ratings(index, user_id, movie_id, rating, timestamp)
+            user_ids: Optional[np.ndarray]
+                user ids of the rows (unique ids of ratings if None)
+            movie_ids: Optional[np.ndarray]
+                movie ids of the columns (unique ids of ratings if None)
+        """
+        # index -> id maps (sorted, so id -> index is a binary search)
+        self.user_ids = np.unique(ratings.user_id.to_numpy() if user_ids is None else user_ids).astype(np.int32)
+        self.movie_ids = np.unique(ratings.movie_id.to_numpy() if movie_ids is None else movie_ids).astype(np.int32)
+
+        # ratings of users or movies out of the given ids are ignored
+        user_indexes = self.to_user_index(ratings.user_id.to_numpy())
+        movie_indexes = self.to_movie_index(ratings.movie_id.to_numpy())
+        known = (user_indexes >= 0) & (movie_indexes >= 0)
+
+        self.matrix = sp.csr_matrix(
+            (
+                ratings.rating.to_numpy(dtype=np.float32)[known],
+                (user_indexes[known], movie_indexes[known]),
+            ),
+            shape=(len(self.user_ids), len(self.movie_ids)),
+            dtype=np.float32,
+        )
+        self.matrix.sort_indices()
+
+    @classmethod
+    def from_state(cls, state: dict[str, np.ndarray], prefix: str = "") -> Self:
+        """
+        Restore a matrix from arrays returned by get_state()
+
+        Parameters
+        ----------
+            state: dict[str, np.ndarray]
+                arrays of the matrix (may be memory-mapped)
+            prefix: str
+                prefix of the array names
+
+        Returns
+        -------
+            interaction_matrix: Self
+                restored matrix
+        """
+        interaction_matrix = cls.__new__(cls)
+        interaction_matrix.user_ids = state[f"{prefix}user_ids"]
+        interaction_matrix.movie_ids = state[f"{prefix}movie_ids"]
+        interaction_matrix.matrix = sp.csr_matrix(
+            (state[f"{prefix}data"], state[f"{prefix}indices"], state[f"{prefix}indptr"]),
+            shape=(len(interaction_matrix.user_ids), len(interaction_matrix.movie_ids)),
+        )
+
+        return interaction_matrix
+
+    def get_state(self, prefix: str = "") -> dict[str, np.ndarray]:
+        """
+        Get the arrays of the matrix
+
+        Parameters
+        ----------
+            prefix: str
+                prefix of the array names
+
+        Returns
+        -------
+            state: dict[str, np.ndarray]
+                ids and CSR arrays of the matrix
+        """
+        return {
+            f"{prefix}user_ids": self.user_ids,
+            f"{prefix}movie_ids": self.movie_ids,
+            f"{prefix}data": self.matrix.data,
+            f"{prefix}indices": self.matrix.indices,
+            f"{prefix}indptr": self.matrix.indptr,
+        }
+
+    def update(self, ratings: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Add new ratings (or overwrite existing ones), growing the id maps with new users and movies
+
+        Only the rows of the users who rated are searched for the positions of the new ratings,
+        so an update costs one copy of the stored ratings instead of rebuilding the matrix from all ratings.
+        The rows and columns keep their relative order, new ids are inserted at their sorted positions.
+
+        Parameters
+        ----------
+            ratings: pd.DataFrame
+                ratings(index, user_id, movie_id, rating, timestamp) to add (the last one wins for duplicates)
+
+        Returns
+        -------
+            user_positions: np.ndarray
+                new row index of each previous row
+            movie_positions: np.ndarray
+                new column index of each previous column
+        """
+        if len(ratings) == 0:
+            return np.arange(len(self.user_ids)), np.arange(len(self.movie_ids))
+
+        user_ids = np.union1d(self.user_ids, ratings.user_id.to_numpy()).astype(np.int32)
+        movie_ids = np.union1d(self.movie_ids, ratings.movie_id.to_numpy()).astype(np.int32)
+        user_positions = np.searchsorted(user_ids, self.user_ids)
+        movie_positions = np.searchsorted(movie_ids, self.movie_ids)
+
+        movie_nums = len(movie_ids)
+        indptr = self.matrix.indptr.astype(np.int64)
+        indices = self.matrix.indices
+        if movie_nums > len(self.movie_ids):
+            indices = movie_positions[indices].astype(np.int32)
+        data = np.array(self.matrix.data, dtype=np.float32)
+
+        # new ratings sorted by (row, column), keeping the last rating of each (user, movie)
+        new_keys = np.searchsorted(user_ids, ratings.user_id.to_numpy()).astype(np.int64) * movie_nums
+        new_keys += np.searchsorted(movie_ids, ratings.movie_id.to_numpy())
+        new_ratings = ratings.rating.to_numpy(dtype=np.float32)
+        order = np.argsort(new_keys, kind="stable")
+        new_keys, new_ratings = new_keys[order], new_ratings[order]
+        last = np.r_[new_keys[1:] != new_keys[:-1], True]
+        new_keys, new_ratings = new_keys[last], new_ratings[last]
+        new_rows, new_columns = new_keys // movie_nums, new_keys % movie_nums
+
+        # previous row of each new rating, new users are inserted before the next previous row
+        previous_rows = np.searchsorted(user_positions, new_rows)
+        existed = previous_rows < len(user_positions)
+        existed[existed] = user_positions[previous_rows[existed]] == new_rows[existed]
+        positions = indptr[previous_rows]
+        exists = np.zeros(len(new_rows), dtype=np.bool_)
+
+        # stored (row, column) keys of the previous rows that got new ratings
+        rated_rows = np.unique(previous_rows[existed])
+        lengths = indptr[rated_rows + 1] - indptr[rated_rows]
+        stored = np.repeat(indptr[rated_rows] - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        stored_keys = np.repeat(rated_rows.astype(np.int64), lengths) * movie_nums + indices[stored]
+        if len(stored_keys) > 0:
+            keys = previous_rows[existed].astype(np.int64) * movie_nums + new_columns[existed]
+            found = np.minimum(np.searchsorted(stored_keys, keys), len(stored_keys) - 1)
+            # the first stored column >= the new column in the same row, or the end of the row
+            in_row = (stored_keys[found] >= keys) & (stored_keys[found] // movie_nums == previous_rows[existed])
+            positions[existed] = np.where(in_row, stored[found], indptr[previous_rows[existed] + 1])
+            exists[existed] = in_row & (stored_keys[found] == keys)
+
+        # overwrite existing ratings and insert the others
+        data[positions[exists]] = new_ratings[exists]
+        indices = np.insert(indices, positions[~exists], new_columns[~exists].astype(np.int32))
+        data = np.insert(data, positions[~exists], new_ratings[~exists])
+
+        counts = np.zeros(len(user_ids), dtype=np.int64)
+        counts[user_positions] = np.diff(indptr)
+        counts += np.bincount(new_rows[~exists], minlength=len(user_ids))
+
+        self.user_ids, self.movie_ids = user_ids, movie_ids
+        self.matrix = sp.csr_matrix(
+            (data, indices, np.r_[0, np.cumsum(counts)]), shape=(len(user_ids), movie_nums), dtype=np.float32
+        )
+
+        return user_positions, movie_positions
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.user_ids), len(self.movie_ids)
+
+    @property
+    def user_id2index(self) -> dict[int, int]:
+        return dict(zip(self.user_ids.tolist(), range(len(self.user_ids))))
+
+    @property
+    def movie_id2index(self) -> dict[int, int]:
+        return dict(zip(self.movie_ids.tolist(), range(len(self.movie_ids))))
+
+    def to_user_index(self, user_ids: np.ndarray) -> np.ndarray:
+        """
+        Convert user ids to row indexes
+
+        Parameters
+        ----------
+            user_ids: np.ndarray
+                user ids
+
+        Returns
+        -------
+            user_indexes: np.ndarray
+                row indexes (-1 for unknown users)
+        """
+        return self.__to_index(self.user_ids, user_ids)
+
+    def to_movie_index(self, movie_ids: np.ndarray) -> np.ndarray:
+        """
+        Convert movie ids to column indexes
+
+        Parameters
+        ----------
+            movie_ids: np.ndarray
+                movie ids
+
+        Returns
+        -------
+            movie_indexes: np.ndarray
+                column indexes (-1 for unknown movies)
+        """
+        return self.__to_index(self.movie_ids, movie_ids)
+
+    def rows(self, user_ids: np.ndarray) -> sp.csr_matrix:
+        """
+        Slice the rows of users
+
+        Parameters
+        ----------
+            user_ids: np.ndarray
+                user ids
+
+        Returns
+        -------
+            rows: sp.csr_matrix
+                (len(user_ids), movies) matrix, unknown users are empty rows
+        """
+        user_indexes = self.to_user_index(np.asarray(user_ids))
+        known = user_indexes >= 0
+
+        indptr = self.matrix.indptr
+        starts = np.where(known, indptr[user_indexes], 0)
+        lengths = np.where(known, indptr[user_indexes + 1] - starts, 0)
+
+        row_indptr = np.zeros(len(user_indexes) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=row_indptr[1:])
+        positions = np.repeat(starts - row_indptr[:-1], lengths) + np.arange(row_indptr[-1])
+
+        return sp.csr_matrix(
+            (self.matrix.data[positions], self.matrix.indices[positions], row_indptr),
+            shape=(len(user_indexes), len(self.movie_ids)),
+        )
+
+    def ratings(self, user_ids: np.ndarray, movie_ids: np.ndarray) -> np.ndarray:
+        """
+        Look up the stored ratings of (user, movie) pairs
+
+        Parameters
+        ----------
+            user_ids: np.ndarray
+                user ids of the pairs
+            movie_ids: np.ndarray
+                movie ids of the pairs (same length as user_ids)
+
+        Returns
+        -------
+            ratings: np.ndarray
+                rating of each pair (NaN if the pair has no rating)
+        """
+        user_indexes = self.to_user_index(np.asarray(user_ids))
+        movie_indexes = self.to_movie_index(np.asarray(movie_ids))
+        known = (user_indexes >= 0) & (movie_indexes >= 0)
+
+        # each row is sorted by column, so (row, column) keys of the stored ratings are sorted
+        movie_nums = len(self.movie_ids)
+        indptr = self.matrix.indptr
+        stored_keys = np.repeat(np.arange(len(self.user_ids), dtype=np.int64), np.diff(indptr)) * movie_nums
+        stored_keys += self.matrix.indices
+        keys = user_indexes[known].astype(np.int64) * movie_nums + movie_indexes[known]
+        positions = np.minimum(np.searchsorted(stored_keys, keys), max(len(stored_keys) - 1, 0))
+        found = stored_keys[positions] == keys if len(stored_keys) > 0 else np.zeros(len(keys), dtype=np.bool_)
+
+        ratings = np.full(len(user_indexes), np.nan, dtype=np.float32)
+        ratings[np.flatnonzero(known)[found]] = self.matrix.data[positions[found]]
+
+        return ratings
+
+    def user_movie_ids(self, user_id: int) -> np.ndarray:
+        """
+        Get the movie ids rated by a user
+
+        Parameters
+        ----------
+            user_id: int
+                user id
+
+        Returns
+        -------
+            movie_ids: np.ndarray
+                rated movie ids
+        """
+        return self.movie_ids[self.rows(np.array([user_id])).indices]
+
+    def binary(self, min_rating: float) -> sp.csr_matrix:
+        """
+        Binarize the matrix by a rating threshold
+
+        Parameters
+        ----------
+            min_rating: float
+                ratings greater than or equal to this value are True
+
+        Returns
+        -------
+            binary_matrix: sp.csr_matrix
+                boolean (users, movies) matrix
+        """
+        # copy the structure, since eliminate_zeros() works in place
+        binary_matrix = sp.csr_matrix(
+            (self.matrix.data >= min_rating, self.matrix.indices.copy(), self.matrix.indptr.copy()),
+            shape=self.matrix.shape,
+        )
+        binary_matrix.eliminate_zeros()
+
+        return binary_matrix
+
+    def __to_index(self, sorted_ids: np.ndarray, ids: np.ndarray) -> np.ndarray:
+        """
+        Convert ids to indexes by binary search
+
+        Parameters
+        ----------
+            sorted_ids: np.ndarray
+                sorted unique ids
+            ids: np.ndarray
+                ids to convert
+
+        Returns
+        -------
+            indexes: np.ndarray
+                indexes (-1 for unknown ids)
+        """
+        ids = np.asarray(ids)
+        indexes = np.searchsorted(sorted_ids, ids)
+        clipped = np.minimum(indexes, len(sorted_ids) - 1)
+        known = (indexes < len(sorted_ids)) & (sorted_ids[clipped] == ids) if len(sorted_ids) > 0 else indexes < 0
+
+        return np.where(known, indexes, -1)
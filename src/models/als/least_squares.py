@@ -0,0 +1,126 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class LeastSquares:
+    __BLOCK_ENTRIES: int = 1 << 18
+
+    def __init__(
+        self, regularization: float, n_jobs: Optional[int] = None, block_entries: int = __BLOCK_ENTRIES
+    ) -> None:
+        """
+        Batched regularized least squares, one half-step of ALS
+
+        Parameters
+        ----------
+            regularization: float
+                weight of L2 regularization, scaled by the number of ratings of each row (ALS-WR)
+            n_jobs: Optional[int]
+                number of threads (number of CPUs if None)
+            block_entries: int
+                maximum rows x padded ratings solved at once, which bounds the memory of each thread
+        """
+        self.regularization = regularization
+        self.n_jobs = n_jobs if n_jobs is not None else (os.cpu_count() or 1)
+        self.block_entries = block_entries
+
+    def solve(self, matrix: sp.csr_matrix, fixed: np.ndarray, offset: float = 0.0) -> np.ndarray:
+        """
+        Solve the factors of all rows with the factors of the columns fixed
+
+        For each row u: (Y_u^T Y_u + regularization * n_u * I) x_u = Y_u^T (r_u - offset),
+        where Y_u are the fixed factors of the columns rated by u.
+
+        Parameters
+        ----------
+            matrix: sp.csr_matrix
+                (rows, columns) ratings
+            fixed: np.ndarray
+                (columns, factors) fixed factors
+            offset: float
+                value subtracted from every rating (e.g. the global mean)
+
+        Returns
+        -------
+            factors: np.ndarray
+                (rows, factors) float32 factors (zero for rows without ratings)
+        """
+        factors = np.zeros((matrix.shape[0], fixed.shape[1]), dtype=np.float32)
+        fixed = np.asarray(fixed, dtype=np.float32)
+
+        # blocks write disjoint rows, and numpy releases the GIL in matmul and solve
+        with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+            for rows, solution in executor.map(
+                lambda rows: (rows, self.__solve_block(matrix, fixed, offset, rows)), self.__blocks(matrix)
+            ):
+                factors[rows] = solution
+
+        return factors
+
+    def __blocks(self, matrix: sp.csr_matrix) -> Iterator[np.ndarray]:
+        """
+        Group rows of similar numbers of ratings, so that padding them to the same length wastes little
+
+        Parameters
+        ----------
+            matrix: sp.csr_matrix
+                (rows, columns) ratings
+
+        Returns
+        -------
+            blocks: Iterator[np.ndarray]
+                row indexes of each block
+        """
+        counts = np.diff(matrix.indptr)
+        rows = np.argsort(counts, kind="stable")
+        rows = rows[counts[rows] > 0]
+
+        start = 0
+        while start < len(rows):
+            # rows are sorted by count, so the padded length of a block is the count of its last row
+            window = max(self.block_entries // int(counts[rows[start]]), 1)
+            ends = np.arange(start + 1, min(start + window, len(rows)) + 1)
+            fits = (ends - start) * counts[rows[ends - 1]] <= self.block_entries
+            end = start + max(int(np.count_nonzero(fits)), 1)
+            yield rows[start:end]
+            start = end
+
+    def __solve_block(self, matrix: sp.csr_matrix, fixed: np.ndarray, offset: float, rows: np.ndarray) -> np.ndarray:
+        """
+        Solve the factors of a block of rows at once
+
+        Parameters
+        ----------
+            matrix: sp.csr_matrix
+                (rows, columns) ratings
+            fixed: np.ndarray
+                (columns, factors) fixed factors
+            offset: float
+                value subtracted from every rating
+            rows: np.ndarray
+                row indexes of the block
+
+        Returns
+        -------
+            factors: np.ndarray
+                (len(rows), factors) factors of the block
+        """
+        starts = matrix.indptr[rows]
+        counts = matrix.indptr[rows + 1] - starts
+        length = int(counts.max())
+
+        # (rows, length) ratings padded with zero, and (rows, length, factors) factors of the rated columns
+        rated = np.arange(length) < counts[:, np.newaxis]
+        positions = np.minimum(starts[:, np.newaxis] + np.arange(length), max(matrix.nnz - 1, 0))
+        ratings = np.where(rated, matrix.data[positions] - offset, 0.0).astype(np.float32)
+        rated_factors = fixed[matrix.indices[positions]] * rated[:, :, np.newaxis]
+
+        gram = np.matmul(rated_factors.transpose(0, 2, 1), rated_factors)
+        gram += (self.regularization * counts)[:, np.newaxis, np.newaxis] * np.eye(fixed.shape[1], dtype=np.float32)
+        rhs = np.matmul(rated_factors.transpose(0, 2, 1), ratings[:, :, np.newaxis])
+
+        return np.linalg.solve(gram, rhs)[:, :, 0]
@@ -0,0 +1,6 @@
+from model import ALS
+
+if __name__ == "__main__":
+    model = ALS()
+    model.run()
+    print(f"fit time per iteration: {sum(model.iteration_times) / len(model.iteration_times):.3f} sec")
@@ -0,0 +1,243 @@
+import time
+from typing import Optional, Self
+
+import numpy as np
+import pandas as pd
+
+from src.base_recommend import BaseRecommend
+from src.evaluation import Evaluation
+from src.matrix import InteractionMatrix
+from src.models.als.least_squares import LeastSquares
+from src.popularity import PopularityRanking
+from src.ranking import Ranking
+
+
+class ALS(BaseRecommend):
+    __USER_NUMS: int = 1000
+    __TEST_SIZE: float = 0.2
+    __MOVIELENS_MIN_RATING: float = 0.5
+    __MOVIELENS_MAX_RATING: float = 5.0
+    __FACTOR_NUMS: int = 32
+    __REGULARIZATION: float = 0.1
+    __ITERATION_NUMS: int = 10
+    __SEED: int = 0
+    __RECOMMEND_MOVIE_NUMS: int = 10
+    __EVALUATE_MIN_RATING: float = 4.0
+
+    __evaluation = Evaluation()
+    __ranking = Ranking()
+
+    __user_movie_matrix: InteractionMatrix
+    __global_mean: float
+    __user_factors: np.ndarray
+    __movie_factors: np.ndarray
+    __popularity: PopularityRanking
+
+    def __init__(self, user_nums: Optional[int] = __USER_NUMS, n_jobs: Optional[int] = None) -> None:
+        """
+        Matrix factorization by alternating least squares (ALS-WR)
+
+        rating = global mean + user factors . movie factors
+
+        Parameters
+        ----------
+        user_nums : Optional[int]
+            number of users to load (all users if None)
+        n_jobs : Optional[int]
+            number of threads solving the factors (number of CPUs if None)
+        """
+        super().__init__(dataset_dir="dataset/movielens-10m", user_nums=user_nums, test_size=self.__TEST_SIZE)
+        self.least_squares = LeastSquares(self.__REGULARIZATION, n_jobs=n_jobs)
+
+        # wall time of each iteration of the last fit
+        self.iteration_times: list[float] = []
+
+    def fit(self, train: pd.DataFrame) -> Self:
+        """
+        Fit the recommendation model
+
+        Parameters
+        ----------
+        train : pd.DataFrame
+            Training dataset
+
+        Returns
+        -------
+        model : Self
+            fitted model
+        """
+        # create sparse user-movie matrix(value=rating) and its transpose for the movie step
+        self.__user_movie_matrix = InteractionMatrix(train)
+        matrix = self.__user_movie_matrix.matrix
+        movie_user_matrix = matrix.T.tocsr()
+        self.__global_mean = float(matrix.data.mean()) if matrix.nnz > 0 else 0.0
+
+        rng = np.random.default_rng(self.__SEED)
+        self.__movie_factors = (0.1 * rng.standard_normal((matrix.shape[1], self.__FACTOR_NUMS))).astype(np.float32)
+
+        # alternately solve the user factors and the movie factors, each in closed form
+        self.iteration_times = []
+        for _ in range(self.__ITERATION_NUMS):
+            start = time.perf_counter()
+            with self.profiler.phase("iteration"):
+                self.__user_factors = self.least_squares.solve(matrix, self.__movie_factors, self.__global_mean)
+                self.__movie_factors = self.least_squares.solve(
+                    movie_user_matrix, self.__user_factors, self.__global_mean
+                )
+            self.iteration_times.append(time.perf_counter() - start)
+
+        # most popular movies for users not in the training dataset
+        self.__popularity = PopularityRanking().fit(train)
+
+        return self
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        """
+        Get the fitted state of the model
+
+        Returns
+        -------
+        state : dict[str, np.ndarray]
+            user-movie matrix, global mean, factors and popularity ranking
+        """
+        return {
+            **self.__user_movie_matrix.get_state(),
+            "global_mean": np.array(self.__global_mean),
+            "user_factors": self.__user_factors,
+            "movie_factors": self.__movie_factors,
+            **self.__popularity.get_state("popularity_"),
+        }
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        """
+        Restore the fitted state of the model
+
+        Parameters
+        ----------
+        state : dict[str, np.ndarray]
+            arrays returned by get_state()
+        """
+        self.__user_movie_matrix = InteractionMatrix.from_state(state)
+        self.__global_mean = float(state["global_mean"])
+        self.__user_factors = state["user_factors"]
+        self.__movie_factors = state["movie_factors"]
+        self.__popularity = PopularityRanking.from_state(state, "popularity_")
+
+    def known_users(self, user_ids: np.ndarray) -> np.ndarray:
+        """
+        Check which users are in the training dataset
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids
+
+        Returns
+        -------
+        known : np.ndarray
+            whether each user is known (the others get the most popular movies)
+        """
+        return self.__user_movie_matrix.to_user_index(np.asarray(user_ids)) >= 0
+
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+        """
+        Recommend movies for a batch of users
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids
+        k : int
+            number of movies to recommend
+
+        Returns
+        -------
+        recommended_movie_ids : np.ndarray
+            (users, k) movie ids (the most popular movies for users not in the training dataset)
+        """
+        user_indexes = self.__user_movie_matrix.to_user_index(np.asarray(user_ids))
+
+        def scores(start: int, end: int) -> np.ndarray:
+            block_user_indexes = user_indexes[start:end]
+            block_scores = self.__user_factors[np.maximum(block_user_indexes, 0)] @ self.__movie_factors.T
+            block_scores[block_user_indexes < 0] = -np.inf
+            return block_scores
+
+        # top-k movies for each user, excluding movies that have been previously rated
+        recommended_movie_ids = self.__ranking.top_k(
+            scores,
+            self.__user_movie_matrix.movie_ids,
+            k,
+            seen=self.__user_movie_matrix.rows(user_ids),
+        )
+
+        # users not in the training dataset get the most popular movies
+        recommended_movie_ids[user_indexes < 0] = self.__popularity.top_k(k)
+
+        return recommended_movie_ids
+
+    def predict(self, user_ids: np.ndarray, movie_ids: np.ndarray) -> np.ndarray:
+        """
+        Predict ratings of (user, movie) pairs
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids of the pairs
+        movie_ids : np.ndarray
+            movie ids of the pairs (same length as user_ids)
+
+        Returns
+        -------
+        predicted_ratings : np.ndarray
+            predicted rating of each pair (global mean if the user or the movie is not in the training dataset)
+        """
+        user_indexes = self.__user_movie_matrix.to_user_index(np.asarray(user_ids))
+        movie_indexes = self.__user_movie_matrix.to_movie_index(np.asarray(movie_ids))
+        known = (user_indexes >= 0) & (movie_indexes >= 0)
+
+        predicted_ratings = np.full(len(known), self.__global_mean, dtype=np.float32)
+        predicted_ratings[known] += np.einsum(
+            "ij,ij->i", self.__user_factors[user_indexes[known]], self.__movie_factors[movie_indexes[known]]
+        )
+
+        return np.clip(predicted_ratings, self.__MOVIELENS_MIN_RATING, self.__MOVIELENS_MAX_RATING)
+
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
+        """
+        Evaluate the recommendation model
+
+        Parameters
+        ----------
+        test : pd.DataFrame
+            Test dataset
+
+        Returns
+        -------
+        scores : dict[str, float]
+            RMSE, Recall@k and Precision@k
+        """
+        # truly favorite movies of each test user as CSR arrays
+        favorite_test = test[test.rating >= self.__EVALUATE_MIN_RATING]
+        test_user_ids, true_indptr, true_indices = self.__evaluation.group_by_user(
+            favorite_test.user_id.to_numpy(), favorite_test.movie_id.to_numpy()
+        )
+        with self.profiler.phase("predict"):
+            predicted_ratings = self.predict(test.user_id.to_numpy(), test.movie_id.to_numpy())
+        with self.profiler.phase("recommend"):
+            recommended_movie_ids = self.recommend(test_user_ids, self.__RECOMMEND_MOVIE_NUMS)
+
+        # rmse
+        rmse = self.__evaluation.calc_rmse(test.rating.to_list(), predicted_ratings.tolist())
+
+        # recall@k
+        recall_at_k = self.__evaluation.calc_recall_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        )
+
+        # precision@k
+        precision_at_k = self.__evaluation.calc_precision_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        )
+
+        return {"rmse": rmse, "recall_at_k": recall_at_k, "precision_at_k": precision_at_k}
@@ -0,0 +1,258 @@
+from itertools import combinations
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# number of set bits of each byte, used if np.bitwise_count is not available (numpy < 2.0)
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class Eclat:
+    __ITEM_BLOCK_SIZE: int = 256
+
+    def __init__(self, min_support: float, max_len: Optional[int] = None) -> None:
+        """
+        Frequent itemset mining by Eclat over bitset tidlists
+
+        Parameters
+        ----------
+            min_support: float (range: 0.0 ~ 1.0)
+                minimum support of frequent itemsets
+            max_len: Optional[int]
+                maximum length of frequent itemsets (unlimited if None)
+        """
+        self.min_support = min_support
+        self.max_len = max_len
+
+    def frequent_itemsets(self, binary_matrix: sp.csr_matrix, columns: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Extract frequent itemsets, same as mlxtend.frequent_patterns.apriori
+
+        Parameters
+        ----------
+            binary_matrix: sp.csr_matrix
+                boolean (transactions, items) matrix
+            columns: Optional[np.ndarray]
+                names of the items (column indexes if None)
+
+        Returns
+        -------
+            frequent_itemsets: pd.DataFrame
+                frequent_itemsets(index, support, itemsets), sorted by length and items of the itemsets
+        """
+        transaction_nums = binary_matrix.shape[0]
+        if transaction_nums == 0:
+            return pd.DataFrame({"support": pd.Series(dtype=float), "itemsets": pd.Series(dtype=object)})
+
+        binary_matrix = sp.csc_matrix(binary_matrix, dtype=np.bool_)
+        binary_matrix.eliminate_zeros()
+
+        # frequent items (length 1)
+        counts = np.diff(binary_matrix.indptr)
+        items = np.flatnonzero(counts / transaction_nums >= self.min_support)
+        itemsets: list[tuple[int, ...]] = [(int(item),) for item in items]
+        itemset_counts: list[int] = counts[items].tolist()
+
+        if self.max_len is None or self.max_len >= 2:
+            frequent_matrix = binary_matrix[:, items]
+
+            # frequent pairs (length 2) from the co-occurrence counts
+            co_occurrences = (frequent_matrix.T.astype(np.int32) @ frequent_matrix.astype(np.int32)).tocoo()
+            pairs = (co_occurrences.row < co_occurrences.col) & (
+                co_occurrences.data / transaction_nums >= self.min_support
+            )
+            first, second, pair_counts = (
+                co_occurrences.row[pairs],
+                co_occurrences.col[pairs],
+                co_occurrences.data[pairs],
+            )
+            order = np.lexsort((second, first))
+            first, second, pair_counts = first[order], second[order], pair_counts[order]
+
+            # longer itemsets by intersecting the tidlists of each equivalence class
+            bitsets = self.__to_bitsets(frequent_matrix)
+            boundaries = np.flatnonzero(np.diff(first)) + 1
+            for class_first, class_second, class_counts in zip(
+                np.split(first, boundaries), np.split(second, boundaries), np.split(pair_counts, boundaries)
+            ):
+                if len(class_first) == 0:
+                    continue
+
+                prefix = (int(items[class_first[0]]),)
+                for item, count in zip(items[class_second].tolist(), class_counts.tolist()):
+                    itemsets.append(prefix + (item,))
+                    itemset_counts.append(count)
+
+                if self.max_len is None or self.max_len >= 3:
+                    self.__extend(
+                        prefix,
+                        items[class_second],
+                        bitsets[class_first[0]] & bitsets[class_second],
+                        transaction_nums,
+                        itemsets,
+                        itemset_counts,
+                    )
+
+        # sort as apriori does: by length, then by items
+        sorted_indexes = sorted(range(len(itemsets)), key=lambda i: (len(itemsets[i]), itemsets[i]))
+        names = np.arange(binary_matrix.shape[1]) if columns is None else np.asarray(columns)
+
+        return pd.DataFrame(
+            {
+                "support": np.array(itemset_counts, dtype=np.float64)[sorted_indexes] / transaction_nums,
+                "itemsets": [frozenset(names[list(itemsets[i])].tolist()) for i in sorted_indexes],
+            }
+        )
+
+    def association_rules(
+        self, frequent_itemsets: pd.DataFrame, metric: str = "confidence", min_threshold: float = 0.8
+    ) -> pd.DataFrame:
+        """
+        Generate association rules, same as mlxtend.frequent_patterns.association_rules
+
+        Parameters
+        ----------
+            frequent_itemsets: pd.DataFrame
+                frequent_itemsets(index, support, itemsets)
+            metric: str
+                metric to filter rules ("support", "confidence", "lift", "leverage", "conviction", "zhangs_metric")
+            min_threshold: float
+                minimum value of the metric
+
+        Returns
+        -------
+            rules: pd.DataFrame
+                rules(index, antecedents, consequents, antecedent support, consequent support,
+                      support, confidence, lift, leverage, conviction, zhangs_metric)
+        """
+        itemset2support = dict(zip(frequent_itemsets.itemsets, frequent_itemsets.support))
+
+        # enumerate every split of each frequent itemset into antecedents and consequents
+        antecedents, consequents = [], []
+        for itemset in frequent_itemsets.itemsets:
+            for antecedent_len in range(len(itemset) - 1, 0, -1):
+                for antecedent in combinations(sorted(itemset), antecedent_len):
+                    antecedents.append(frozenset(antecedent))
+                    consequents.append(itemset - antecedents[-1])
+
+        # compute metrics for all rules at once
+        s_a = np.array([itemset2support[itemset] for itemset in antecedents], dtype=np.float64)
+        s_c = np.array([itemset2support[itemset] for itemset in consequents], dtype=np.float64)
+        s_ac = np.array(
+            [itemset2support[a | c] for a, c in zip(antecedents, consequents)],
+            dtype=np.float64,
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            confidence = s_ac / s_a
+            lift = confidence / s_c
+            leverage = s_ac - s_a * s_c
+            conviction = np.where(confidence < 1.0, (1.0 - s_c) / (1.0 - confidence), np.inf)
+            denominator = np.maximum(s_ac * (1.0 - s_a), s_a * (s_c - s_ac))
+            zhangs_metric = np.where(denominator == 0, 0.0, leverage / denominator)
+
+        rules = pd.DataFrame(
+            {
+                "antecedents": pd.Series(antecedents, dtype=object),
+                "consequents": pd.Series(consequents, dtype=object),
+                "antecedent support": s_a,
+                "consequent support": s_c,
+                "support": s_ac,
+                "confidence": confidence,
+                "lift": lift,
+                "leverage": leverage,
+                "conviction": conviction,
+                "zhangs_metric": zhangs_metric,
+            }
+        )
+
+        return rules[rules[metric] >= min_threshold].reset_index(drop=True)
+
+    def __extend(
+        self,
+        prefix: tuple[int, ...],
+        items: np.ndarray,
+        bitsets: np.ndarray,
+        transaction_nums: int,
+        itemsets: list[tuple[int, ...]],
+        itemset_counts: list[int],
+    ) -> None:
+        """
+        Extend frequent itemsets of an equivalence class in depth-first order
+
+        Parameters
+        ----------
+            prefix: tuple[int, ...]
+                common prefix of the equivalence class
+            items: np.ndarray
+                last items of the frequent itemsets of the class (prefix + (item,))
+            bitsets: np.ndarray
+                (items, words) tidlists of the frequent itemsets of the class
+            transaction_nums: int
+                number of transactions
+            itemsets: list[tuple[int, ...]]
+                found frequent itemsets (appended in place)
+            itemset_counts: list[int]
+                transaction counts of found frequent itemsets (appended in place)
+        """
+        for i in range(len(items) - 1):
+            # intersect the tidlist of prefix + items[i] with those of all following siblings at once
+            child_bitsets = bitsets[i] & bitsets[i + 1 :]
+            child_counts = self.__popcount(child_bitsets)
+            frequent = np.flatnonzero(child_counts / transaction_nums >= self.min_support)
+            if len(frequent) == 0:
+                continue
+
+            child_prefix = prefix + (int(items[i]),)
+            child_items = items[i + 1 :][frequent]
+            for item, count in zip(child_items.tolist(), child_counts[frequent].tolist()):
+                itemsets.append(child_prefix + (item,))
+                itemset_counts.append(count)
+
+            if self.max_len is None or len(child_prefix) + 2 <= self.max_len:
+                self.__extend(
+                    child_prefix, child_items, child_bitsets[frequent], transaction_nums, itemsets, itemset_counts
+                )
+
+    def __to_bitsets(self, binary_matrix: sp.csc_matrix) -> np.ndarray:
+        """
+        Convert columns of a boolean matrix to packed bitsets
+
+        Parameters
+        ----------
+            binary_matrix: sp.csc_matrix
+                boolean (transactions, items) matrix
+
+        Returns
+        -------
+            bitsets: np.ndarray
+                (items, words) uint64 bitsets of the transactions containing each item
+        """
+        word_nums = -(-binary_matrix.shape[0] // 64)
+        bitsets = np.zeros((binary_matrix.shape[1], word_nums * 8), dtype=np.uint8)
+        for start in range(0, binary_matrix.shape[1], self.__ITEM_BLOCK_SIZE):
+            block = binary_matrix[:, start : start + self.__ITEM_BLOCK_SIZE].T.toarray()
+            packed = np.packbits(block, axis=1)
+            bitsets[start : start + len(block), : packed.shape[1]] = packed
+
+        return bitsets.view(np.uint64)
+
+    def __popcount(self, bitsets: np.ndarray) -> np.ndarray:
+        """
+        Count set bits of each bitset
+
+        Parameters
+        ----------
+            bitsets: np.ndarray
+                (n, words) uint64 bitsets
+
+        Returns
+        -------
+            counts: np.ndarray
+                (n,) number of set bits
+        """
+        if hasattr(np, "bitwise_count"):
+            return np.bitwise_count(bitsets).sum(axis=1, dtype=np.int64)
+
+        return POPCOUNT[bitsets.view(np.uint8)].sum(axis=1, dtype=np.int64)
@@ -0,0 +1,540 @@
+from itertools import combinations
+from typing import Optional, Self
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.models.association_rules.eclat import Eclat
+
+
+class IncrementalItemsets:
+    __BLOCK_SIZE: int = 4096
+
+    def __init__(self, min_support: float, max_len: Optional[int] = None) -> None:
+        """
+        Frequent itemsets kept up to date under changing transactions
+
+        Besides the frequent itemsets, the negative border (infrequent itemsets whose subsets are all frequent)
+        is counted. Their counts are updated from the changed transactions only. A new frequent itemset always
+        has a subset in the negative border that becomes frequent, so the itemsets are mined again only then.
+        The negative border is counted at the first update, so fitting costs as much as Eclat.
+
+        Parameters
+        ----------
+            min_support: float (range: 0.0 ~ 1.0)
+                minimum support of frequent itemsets
+            max_len: Optional[int]
+                maximum length of frequent itemsets (unlimited if None)
+        """
+        self.min_support = min_support
+        self.max_len = max_len
+        self.mine_nums = 0
+
+    def fit(self, binary_matrix: sp.csr_matrix) -> Self:
+        """
+        Mine the frequent itemsets
+
+        Parameters
+        ----------
+            binary_matrix: sp.csr_matrix
+                boolean (transactions, items) matrix
+
+        Returns
+        -------
+            itemsets: Self
+                fitted itemsets
+        """
+        transaction_nums, item_nums = binary_matrix.shape
+        frequent_itemsets = Eclat(self.min_support, self.max_len).frequent_itemsets(binary_matrix)
+
+        self.itemsets = self.__to_matrix([tuple(sorted(itemset)) for itemset in frequent_itemsets.itemsets], item_nums)
+        self.counts = np.round(frequent_itemsets.support.to_numpy() * transaction_nums).astype(np.int64)
+        self.frequent = np.ones(len(self.counts), dtype=np.bool_)
+        self.transaction_nums = transaction_nums
+        self.has_border = False
+        self.mine_nums += 1
+
+        return self
+
+    @classmethod
+    def from_state(cls, state: dict[str, np.ndarray], min_support: float, max_len: Optional[int] = None) -> Self:
+        """
+        Restore itemsets from arrays returned by get_state()
+
+        Parameters
+        ----------
+            state: dict[str, np.ndarray]
+                arrays of the itemsets
+            min_support: float
+                minimum support of frequent itemsets
+            max_len: Optional[int]
+                maximum length of frequent itemsets
+
+        Returns
+        -------
+            itemsets: Self
+                restored itemsets
+        """
+        itemsets = cls(min_support, max_len)
+        itemsets.itemsets = sp.csr_matrix(
+            (
+                np.ones(len(state["itemset_indices"]), dtype=np.bool_),
+                state["itemset_indices"],
+                state["itemset_indptr"],
+            ),
+            shape=(len(state["itemset_counts"]), int(state["itemset_item_nums"])),
+        )
+        itemsets.counts = np.array(state["itemset_counts"])
+        itemsets.frequent = np.array(state["itemset_frequent"])
+        itemsets.transaction_nums = int(state["itemset_transaction_nums"])
+        itemsets.has_border = bool(state["itemset_has_border"])
+
+        return itemsets
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        """
+        Get the arrays of the itemsets
+
+        Returns
+        -------
+            state: dict[str, np.ndarray]
+                tracked itemsets, their counts, frequent flags and whether the negative border is counted
+        """
+        return {
+            "itemset_indices": self.itemsets.indices,
+            "itemset_indptr": self.itemsets.indptr,
+            "itemset_item_nums": np.array(self.itemsets.shape[1]),
+            "itemset_counts": self.counts,
+            "itemset_frequent": self.frequent,
+            "itemset_transaction_nums": np.array(self.transaction_nums),
+            "itemset_has_border": np.array(self.has_border),
+        }
+
+    def remap_items(self, item_positions: np.ndarray, item_nums: int) -> None:
+        """
+        Move the items to new indexes, e.g. after new items were inserted
+
+        New items are tracked as infrequent itemsets of length 1 with no transactions, once the negative border
+        is counted.
+
+        Parameters
+        ----------
+            item_positions: np.ndarray
+                new index of each previous item
+            item_nums: int
+                number of items
+        """
+        new_items = np.setdiff1d(np.arange(item_nums), item_positions) if self.has_border else np.array([], dtype=int)
+        self.itemsets = sp.vstack(
+            [
+                sp.csr_matrix(
+                    (self.itemsets.data, item_positions[self.itemsets.indices], self.itemsets.indptr),
+                    shape=(self.itemsets.shape[0], item_nums),
+                ),
+                sp.csr_matrix(
+                    (np.ones(len(new_items), dtype=np.bool_), new_items, np.arange(len(new_items) + 1)),
+                    shape=(len(new_items), item_nums),
+                ),
+            ],
+            format="csr",
+        )
+        self.counts = np.r_[self.counts, np.zeros(len(new_items), dtype=np.int64)]
+        self.frequent = np.r_[self.frequent, np.zeros(len(new_items), dtype=np.bool_)]
+
+    def update(self, binary_matrix: sp.csr_matrix, rows: np.ndarray, previous_rows: sp.csr_matrix) -> bool:
+        """
+        Update the counts after some transactions changed or were added
+
+        Parameters
+        ----------
+            binary_matrix: sp.csr_matrix
+                boolean (transactions, items) matrix after the change, with the items of the tracked itemsets
+            rows: np.ndarray
+                indexes of the changed or added transactions in binary_matrix
+            previous_rows: sp.csr_matrix
+                boolean (len(rows), items) transactions before the change (empty for added transactions)
+
+        Returns
+        -------
+            mined: bool
+                whether an itemset of the negative border became frequent and the itemsets were mined again
+        """
+        self.counts += self.__count(binary_matrix[rows], self.itemsets) - self.__count(previous_rows, self.itemsets)
+        self.transaction_nums = binary_matrix.shape[0]
+        if not self.has_border:
+            self.__add_border(binary_matrix, self.itemsets[:0], self.counts[:0])
+
+        frequent = self.counts / max(self.transaction_nums, 1) >= self.min_support
+        if np.any(frequent & ~self.frequent):
+            # most of the new negative border was tracked already with up-to-date counts
+            tracked, tracked_counts = self.itemsets, self.counts
+            self.fit(binary_matrix)
+            self.__add_border(binary_matrix, tracked, tracked_counts)
+            return True
+
+        # itemsets that became infrequent stay tracked, they are the negative border or above it
+        self.frequent = frequent
+        return False
+
+    def frequent_itemsets(self) -> pd.DataFrame:
+        """
+        Get the frequent itemsets, same as Eclat.frequent_itemsets
+
+        Returns
+        -------
+            frequent_itemsets: pd.DataFrame
+                frequent_itemsets(index, support, itemsets), sorted by length and items of the itemsets
+        """
+        indexes = np.flatnonzero(self.frequent)
+        itemsets = [
+            tuple(self.itemsets.indices[self.itemsets.indptr[i] : self.itemsets.indptr[i + 1]].tolist())
+            for i in indexes
+        ]
+        order = sorted(range(len(itemsets)), key=lambda i: (len(itemsets[i]), itemsets[i]))
+
+        return pd.DataFrame(
+            {
+                "support": self.counts[indexes[order]].astype(np.float64) / self.transaction_nums,
+                "itemsets": pd.Series([frozenset(itemsets[i]) for i in order], dtype=object),
+            }
+        )
+
+    def association_rules(self, min_lift: float) -> tuple[sp.csr_matrix, sp.csr_matrix, np.ndarray, np.ndarray]:
+        """
+        Generate the association rules of the frequent itemsets, same as Eclat.association_rules (metric="lift")
+
+        The itemsets of each length are split at the same positions at once, and the supports of both sides
+        are looked up among the sorted itemsets of their length, so no rule is built as a Python object.
+
+        Parameters
+        ----------
+            min_lift: float
+                minimum lift of the rules
+
+        Returns
+        -------
+            antecedents: sp.csr_matrix
+                boolean (rules, items) matrix of the antecedents, rules in the order of Eclat.association_rules
+            consequents: sp.csr_matrix
+                boolean (rules, items) matrix of the consequents
+            lifts: np.ndarray
+                (rules,) lift of each rule
+            keys: np.ndarray
+                (rules, 4 + longest itemset length) counts of the antecedents, consequents and itemsets,
+                antecedent positions as bits and items of each rule (-1 after the items), equal for equal rules
+        """
+        frequent = self.itemsets[self.frequent]
+        counts = self.counts[self.frequent]
+        item_nums = frequent.shape[1]
+        lengths = np.diff(frequent.indptr)
+        levels = {int(length): self.__level(frequent, length) for length in np.unique(lengths)}
+        key_width = 4 + max(levels, default=0)
+
+        # (length, itemset position, split) of each rule to sort them in the order of Eclat.association_rules
+        sort_keys, antecedents, consequents, keys = [], [], [], []
+        for length in range(2, max(levels, default=0) + 1):
+            level, rows = levels[length]
+            split = 0
+            for antecedent_length in range(length - 1, 0, -1):
+                for positions in combinations(range(length), antecedent_length):
+                    rest = [position for position in range(length) if position not in positions]
+
+                    # subsets of frequent itemsets are frequent, both sides are found
+                    antecedent_level, antecedent_rows = levels[antecedent_length]
+                    consequent_level, consequent_rows = levels[length - antecedent_length]
+                    split_counts = np.stack(
+                        [
+                            counts[antecedent_rows[self.__find(antecedent_level, level[:, positions])]],
+                            counts[consequent_rows[self.__find(consequent_level, level[:, rest])]],
+                            counts[rows],
+                        ],
+                        axis=1,
+                    )
+
+                    sort_keys.append(
+                        np.stack([np.full(len(level), length), np.arange(len(level)), np.full(len(level), split)])
+                    )
+                    antecedents.append(self.__to_matrix_array(level[:, positions], item_nums))
+                    consequents.append(self.__to_matrix_array(level[:, rest], item_nums))
+                    split_keys = np.full((len(level), key_width), -1, dtype=np.int64)
+                    split_keys[:, :3] = split_counts
+                    split_keys[:, 3] = sum(1 << position for position in positions)
+                    split_keys[:, 4 : 4 + length] = level
+                    keys.append(split_keys)
+                    split += 1
+
+        if len(keys) == 0:
+            empty = sp.csr_matrix((0, item_nums), dtype=np.bool_)
+            return empty, empty.copy(), np.zeros(0, dtype=np.float64), np.zeros((0, key_width), dtype=np.int64)
+
+        # lifts from the supports as in Eclat.association_rules, so that equal lifts are ordered the same
+        keys_array = np.vstack(keys)
+        supports = keys_array[:, :3].astype(np.float64) / self.transaction_nums
+        lifts = supports[:, 2] / supports[:, 0] / supports[:, 1]
+        order = np.lexsort(np.hstack(sort_keys)[::-1])
+        order = order[lifts[order] >= min_lift]
+
+        return (
+            sp.vstack(antecedents, format="csr")[order],
+            sp.vstack(consequents, format="csr")[order],
+            lifts[order],
+            keys_array[order],
+        )
+
+    def __add_border(self, binary_matrix: sp.csr_matrix, tracked: sp.csr_matrix, tracked_counts: np.ndarray) -> None:
+        """
+        Track the negative border of the frequent itemsets, counting only the itemsets not tracked before
+
+        Parameters
+        ----------
+            binary_matrix: sp.csr_matrix
+                boolean (transactions, items) matrix
+            tracked: sp.csr_matrix
+                boolean (itemsets, items) matrix of previously tracked itemsets
+            tracked_counts: np.ndarray
+                (itemsets,) number of transactions of binary_matrix containing each previously tracked itemset
+        """
+        border = self.__negative_border(self.itemsets)
+        counts = np.full(border.shape[0], -1, dtype=np.int64)
+        for length in np.unique(np.diff(border.indptr)):
+            level, rows = self.__level(border, length)
+            tracked_level, tracked_rows = self.__level(tracked, length)
+            positions = self.__find(tracked_level, level)
+            counts[rows[positions >= 0]] = tracked_counts[tracked_rows[positions[positions >= 0]]]
+
+        # the border is sorted within each length, and so are the itemsets left to count
+        missing = np.flatnonzero(counts < 0)
+        counts[missing] = self.__count_border(binary_matrix, border[missing])
+
+        self.itemsets = sp.vstack([self.itemsets, border], format="csr")
+        self.counts = np.r_[self.counts, counts]
+        self.frequent = np.r_[self.frequent, np.zeros(border.shape[0], dtype=np.bool_)]
+        self.has_border = True
+
+    def __negative_border(self, frequent: sp.csr_matrix) -> sp.csr_matrix:
+        """
+        Generate the infrequent itemsets whose subsets are all frequent (apriori candidates that are not frequent)
+
+        Each level is a sorted (itemsets, length) array, and the candidates of the next level are generated
+        by joining the itemsets sharing all but the last item, as whole arrays.
+
+        Parameters
+        ----------
+            frequent: sp.csr_matrix
+                boolean (itemsets, items) matrix of the frequent itemsets
+
+        Returns
+        -------
+            border: sp.csr_matrix
+                boolean (itemsets, items) matrix of the negative border, shortest itemsets first
+        """
+        item_nums = frequent.shape[1]
+        level, _ = self.__level(frequent, 1)
+        border = [np.setdiff1d(np.arange(item_nums), level.ravel()).reshape(-1, 1)]
+        while len(level) > 0 and (self.max_len is None or level.shape[1] < self.max_len):
+            length = level.shape[1]
+            next_level, _ = self.__level(frequent, length + 1)
+
+            # pairs (i, j), i < j, of itemsets with the same prefix (a group of consecutive rows)
+            new_group = np.r_[True, np.any(level[1:, :-1] != level[:-1, :-1], axis=1)]
+            group_ends = np.r_[np.flatnonzero(new_group)[1:], len(level)]
+            pair_nums = group_ends[np.cumsum(new_group) - 1] - np.arange(len(level)) - 1
+            firsts = np.repeat(np.arange(len(level)), pair_nums)
+            seconds = firsts + 1 + np.arange(len(firsts)) - np.repeat(np.cumsum(pair_nums) - pair_nums, pair_nums)
+            candidates = np.hstack([level[firsts], level[seconds, -1:]])
+
+            # the subsets without one of the last two items are the joined itemsets, the others must be frequent too
+            subsets_frequent = np.ones(len(candidates), dtype=np.bool_)
+            for position in range(length - 1):
+                subsets_frequent &= self.__find(level, np.delete(candidates, position, axis=1)) >= 0
+            candidates = candidates[subsets_frequent]
+
+            border.append(candidates[self.__find(next_level, candidates) < 0])
+            level = next_level
+
+        return sp.vstack([self.__to_matrix_array(itemsets, item_nums) for itemsets in border], format="csr")
+
+    def __level(self, itemsets: sp.csr_matrix, length: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Get the itemsets of a length as a sorted array
+
+        Parameters
+        ----------
+            itemsets: sp.csr_matrix
+                boolean (itemsets, items) matrix
+            length: int
+                length of the itemsets to get
+
+        Returns
+        -------
+            level: np.ndarray
+                (itemsets, length) items of each itemset, sorted lexicographically
+            rows: np.ndarray
+                (itemsets,) row of each itemset in itemsets
+        """
+        rows = np.flatnonzero(np.diff(itemsets.indptr) == length)
+        level = np.sort(itemsets.indices[itemsets.indptr[rows, None] + np.arange(length)], axis=1).astype(np.int64)
+        order = np.lexsort(level.T[::-1])
+
+        return level[order], rows[order]
+
+    def __find(self, sorted_itemsets: np.ndarray, itemsets: np.ndarray) -> np.ndarray:
+        """
+        Find itemsets among the rows of a sorted (itemsets, length) array
+
+        Parameters
+        ----------
+            sorted_itemsets: np.ndarray
+                (itemsets, length) array sorted lexicographically
+            itemsets: np.ndarray
+                (queries, length) itemsets to look up
+
+        Returns
+        -------
+            positions: np.ndarray
+                (queries,) row of each query in sorted_itemsets (-1 if not found)
+        """
+        if len(sorted_itemsets) == 0 or len(itemsets) == 0:
+            return np.full(len(itemsets), -1, dtype=np.int64)
+
+        # big-endian bytes of non-negative items compare as the rows do lexicographically
+        width = 8 * sorted_itemsets.shape[1]
+        sorted_keys = np.ascontiguousarray(sorted_itemsets, dtype=">u8").view(f"S{width}").ravel()
+        keys = np.ascontiguousarray(itemsets, dtype=">u8").view(f"S{width}").ravel()
+        positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+
+        return np.where(sorted_keys[positions] == keys, positions, -1)
+
+    def __count_border(self, binary_matrix: sp.csr_matrix, border: sp.csr_matrix) -> np.ndarray:
+        """
+        Count the transactions containing each itemset of the negative border
+
+        Single items are counted from the item supports, and a longer itemset from the co-occurrences of
+        its prefix, which is frequent, with its last item, like the pairs of Eclat.
+
+        Parameters
+        ----------
+            binary_matrix: sp.csr_matrix
+                boolean (transactions, items) matrix
+            border: sp.csr_matrix
+                boolean (itemsets, items) matrix of the negative border, shortest itemsets first
+
+        Returns
+        -------
+            counts: np.ndarray
+                (itemsets,) number of transactions containing all items of the itemset
+        """
+        lengths = np.diff(border.indptr)
+        counts = np.zeros(border.shape[0], dtype=np.int64)
+        matrix = sp.csc_matrix(binary_matrix, dtype=np.int32)
+
+        singles = np.flatnonzero(lengths == 1)
+        counts[singles] = np.diff(matrix.indptr)[border.indices[border.indptr[singles]]]
+
+        for length in np.unique(lengths[lengths > 1]):
+            rows = np.flatnonzero(lengths == length)
+            items = border.indices[border.indptr[rows, None] + np.arange(length)]
+            # the itemsets of a length are sorted, the itemsets sharing a prefix are consecutive
+            new_prefix = np.r_[True, np.any(items[1:, :-1] != items[:-1, :-1], axis=1)]
+            prefixes, prefix_positions = items[new_prefix, :-1], np.cumsum(new_prefix) - 1
+            lasts, last_positions = np.unique(items[:, -1], return_inverse=True)
+
+            # (transactions, prefixes) indicator of the transactions containing all items of each prefix
+            contained = (
+                matrix @ sp.csc_matrix(self.__to_matrix_array(prefixes, border.shape[1]).T, dtype=np.int32)
+            ).tocsc()
+            contained.data = (contained.data == length - 1).astype(np.int32)
+            last_matrix = matrix[:, lasts]
+
+            for start in range(0, len(prefixes), self.__BLOCK_SIZE):
+                # look the itemsets up by their (prefix, last) key among the sorted keys of the non-zero products
+                co_occurrences = (contained[:, start : start + self.__BLOCK_SIZE].T @ last_matrix).tocsr()
+                co_occurrences.eliminate_zeros()
+                co_occurrences.sort_indices()
+                keys = (
+                    np.repeat(np.arange(co_occurrences.shape[0], dtype=np.int64), np.diff(co_occurrences.indptr))
+                    * len(lasts)
+                    + co_occurrences.indices
+                )
+                block = np.flatnonzero((prefix_positions >= start) & (prefix_positions < start + self.__BLOCK_SIZE))
+                block_keys = (prefix_positions[block] - start).astype(np.int64) * len(lasts) + last_positions[block]
+                positions = np.searchsorted(keys, block_keys)
+                found = positions < len(keys)
+                found[found] = keys[positions[found]] == block_keys[found]
+                counts[rows[block[found]]] = co_occurrences.data[positions[found]]
+
+        return counts
+
+    def __count(self, binary_matrix: sp.csr_matrix, itemsets: sp.csr_matrix) -> np.ndarray:
+        """
+        Count the transactions containing each itemset
+
+        Parameters
+        ----------
+            binary_matrix: sp.csr_matrix
+                boolean (transactions, items) matrix
+            itemsets: sp.csr_matrix
+                boolean (itemsets, items) matrix
+
+        Returns
+        -------
+            counts: np.ndarray
+                (itemsets,) number of transactions containing all items of the itemset
+        """
+        lengths = np.diff(itemsets.indptr)
+        itemsets_t = sp.csc_matrix(itemsets.T, dtype=np.int32)
+        counts = np.zeros(itemsets.shape[0], dtype=np.int64)
+        for start in range(0, binary_matrix.shape[0], self.__BLOCK_SIZE):
+            # number of items of each itemset in each transaction
+            matched = (
+                sp.csr_matrix(binary_matrix[start : start + self.__BLOCK_SIZE], dtype=np.int32) @ itemsets_t
+            ).tocoo()
+            counts += np.bincount(matched.col[matched.data == lengths[matched.col]], minlength=itemsets.shape[0])
+
+        return counts
+
+    def __to_matrix_array(self, itemsets: np.ndarray, item_nums: int) -> sp.csr_matrix:
+        """
+        Convert itemsets of the same length to a boolean (itemsets, items) matrix
+
+        Parameters
+        ----------
+            itemsets: np.ndarray
+                (itemsets, length) sorted items of each itemset
+            item_nums: int
+                number of items
+
+        Returns
+        -------
+            matrix: sp.csr_matrix
+                boolean (itemsets, items) matrix
+        """
+        indptr = np.arange(len(itemsets) + 1, dtype=np.int64) * itemsets.shape[1]
+
+        return sp.csr_matrix(
+            (np.ones(itemsets.size, dtype=np.bool_), itemsets.ravel().astype(np.int32), indptr),
+            shape=(len(itemsets), item_nums),
+        )
+
+    def __to_matrix(self, itemsets: list[tuple[int, ...]], item_nums: int) -> sp.csr_matrix:
+        """
+        Convert itemsets to a boolean (itemsets, items) matrix
+
+        Parameters
+        ----------
+            itemsets: list[tuple[int, ...]]
+                sorted itemsets
+            item_nums: int
+                number of items
+
+        Returns
+        -------
+            matrix: sp.csr_matrix
+                boolean (itemsets, items) matrix
+        """
+        indptr = np.zeros(len(itemsets) + 1, dtype=np.int64)
+        np.cumsum([len(itemset) for itemset in itemsets], out=indptr[1:])
+        indices = np.fromiter((item for itemset in itemsets for item in itemset), dtype=np.int32, count=int(indptr[-1]))
+
+        return sp.csr_matrix((np.ones(len(indices), dtype=np.bool_), indices, indptr), shape=(len(itemsets), item_nums))
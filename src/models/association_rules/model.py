@@ -1,10 +1,15 @@
-from collections import Counter, defaultdict
+from typing import Self
 
+import numpy as np
 import pandas as pd
-from mlxtend.frequent_patterns import apriori, association_rules
+import scipy.sparse as sp
 
 from src.base_recommend import BaseRecommend
 from src.evaluation import Evaluation
+from src.matrix import InteractionMatrix
+from src.models.association_rules.incremental_itemsets import IncrementalItemsets
+from src.models.association_rules.rule_index import RuleIndex
+from src.popularity import PopularityRanking
 
 
 class AssociationRules(BaseRecommend):
@@ -18,132 +23,443 @@ class AssociationRules(BaseRecommend):
 
     __evaluation = Evaluation()
 
+    __user_movie_matrix: InteractionMatrix
+    __newest_rated_matrix: InteractionMatrix
+    __newest_timestamps: np.ndarray
+    __high_rated_keys: np.ndarray
+    __high_rated_ratings: np.ndarray
+    __high_rated_timestamps: np.ndarray
+    __itemsets: IncrementalItemsets
+    __rule_index: RuleIndex
+    __popularity: PopularityRanking
+
     def __init__(self) -> None:
         super().__init__(dataset_dir="dataset/movielens-10m", user_nums=self.__USER_NUMS, test_size=self.__TEST_SIZE)
 
-    def __recommend(self, train: pd.DataFrame, test: pd.DataFrame) -> tuple[pd.DataFrame, dict[int, list[int]]]:
+    def fit(self, train: pd.DataFrame) -> Self:
         """
-        Recommend movies for each user
+        Fit the recommendation model
 
         Parameters
         ----------
         train : pd.DataFrame
             Training dataset
-        test : pd.DataFrame
-            Test dataset
 
         Returns
         -------
-        predicted_ratings : list[float]
-            list of predicted ratings
-        user_id2recommended_movie_ids : dict[int, list[int]]
-            combination of user id and recommended movie ids
+        model : Self
+            fitted model
         """
-        # create user-movie matrix(value=rating)
-        user_movie_matrix = train.pivot(index="user_id", columns="movie_id", values="rating")
+        # create sparse user-movie matrix(value=rating)
+        self.__user_movie_matrix = InteractionMatrix(train)
+
+        # convert ratings to True and False based on threshold for using frequent itemset mining
+        binary_matrix = self.__user_movie_matrix.binary(self.__EVALUATE_MIN_RATING)
 
-        # convert ratings to 0 and 1 based on threshold for using apriori algorithm
+        # extract movies that have high support by using eclat algorithm (same itemsets as apriori algorithm)
         # apriori algorithm: https://docs.oracle.com/cd/E16338_01/datamine.112/e48231/algo_apriori.htm
-        user_movie_matrix[user_movie_matrix < self.__EVALUATE_MIN_RATING] = 0.0
-        user_movie_matrix[user_movie_matrix.isnull()] = 0.0
-        user_movie_matrix[user_movie_matrix >= self.__EVALUATE_MIN_RATING] = 1.0
-
-        # extract movies that have high support by using apriori algorithm
-        frequent_movies = apriori(
-            df=user_movie_matrix.astype("bool"),
-            min_support=self.__APRIORI_SUPPORT_THRESHOLD,
-            use_colnames=True,
+        # partial_fit() updates the itemsets from their negative border, counted at its first call
+        with self.profiler.phase("frequent_itemsets"):
+            self.__itemsets = IncrementalItemsets(min_support=self.__APRIORI_SUPPORT_THRESHOLD).fit(binary_matrix)
+
+        # association rules (items are movie indexes of the user-movie matrix)
+        with self.profiler.phase("association_rules"):
+            self.__build_rules()
+
+        # newest highly rated movies of each user are the inputs of association rules
+        high_ratings = train[train.rating >= self.__EVALUATE_MIN_RATING]
+        self.__build_newest_rated(high_ratings)
+
+        # all highly rated movies with their timestamps, to refill the newest ones when they are re-rated
+        keys = self.__rating_keys(high_ratings)
+        order = np.argsort(keys, kind="stable")
+        self.__high_rated_keys = keys[order]
+        self.__high_rated_ratings = high_ratings.rating.to_numpy(dtype=np.float32)[order]
+        self.__high_rated_timestamps = high_ratings.timestamp.to_numpy(dtype=np.int64)[order]
+
+        # most popular movies for users not in the training dataset
+        self.__popularity = PopularityRanking().fit(train)
+
+        return self
+
+    def partial_fit(self, ratings: pd.DataFrame) -> np.ndarray:
+        """
+        Update the fitted model with new ratings without mining all itemsets again
+
+        The supports of the frequent itemsets and their negative border are updated from the transactions
+        of the users who rated, and the itemsets are mined again only if a new itemset becomes frequent.
+        The newest highly rated movies of the users who rated are selected again from all their highly rated
+        movies, so a re-rated movie is replaced by the next newest one as in a full fit.
+
+        Parameters
+        ----------
+        ratings : pd.DataFrame
+            new ratings(index, user_id, movie_id, rating, timestamp)
+
+        Returns
+        -------
+        touched_user_ids : np.ndarray
+            users who rated and users whose input movies match the antecedents of an added, removed or changed rule
+            (with UNKNOWN_USERS if the popularity ranking changed)
+        """
+        if len(ratings) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # a batch may repeat a (user, movie) pair, the last rating wins as in InteractionMatrix.update()
+        ratings = ratings.drop_duplicates(["user_id", "movie_id"], keep="last")
+        user_ids = np.unique(ratings.user_id.to_numpy())
+        previous_rows = self.__user_movie_matrix.rows(user_ids)
+        previous_ratings = self.__user_movie_matrix.ratings(ratings.user_id.to_numpy(), ratings.movie_id.to_numpy())
+
+        user_positions, movie_positions = self.__user_movie_matrix.update(ratings)
+        movie_nums = len(self.__user_movie_matrix.movie_ids)
+
+        # transactions of the users before and after the new ratings
+        previous_rows = sp.csr_matrix(
+            (
+                previous_rows.data >= self.__EVALUATE_MIN_RATING,
+                movie_positions[previous_rows.indices],
+                previous_rows.indptr,
+            ),
+            shape=(len(user_ids), movie_nums),
         )
+        previous_rows.eliminate_zeros()
+        binary_matrix = self.__user_movie_matrix.binary(self.__EVALUATE_MIN_RATING)
+
+        with self.profiler.phase("frequent_itemsets"):
+            self.__itemsets.remap_items(movie_positions, movie_nums)
+            previous_antecedents, _, _, previous_rule_keys = self.__itemsets.association_rules(
+                self.__APRIORI_LIFT_THRESHOLD
+            )
+            self.__itemsets.update(binary_matrix, self.__user_movie_matrix.to_user_index(user_ids), previous_rows)
+        with self.profiler.phase("association_rules"):
+            antecedents, rule_keys = self.__build_rules()
+
+        # newest highly rated movies: unchanged for the other users, selected again for the users who rated
+        self.__update_high_rated(ratings)
+        newest = self.__newest_rated_frame()
+        newest = newest[~np.isin(newest.user_id.to_numpy(), user_ids)]
+        self.__build_newest_rated(pd.concat([newest, self.__high_rated_frame(user_ids)], ignore_index=True))
+        first_changed_rank = self.__popularity.update(ratings, previous_ratings)
 
-        # association rules
-        rules = association_rules(
-            df=frequent_movies,
-            metric="lift",
-            min_threshold=self.__APRIORI_LIFT_THRESHOLD,
+        # other users are touched only through their input movies matching a rule that is not in both rule sets
+        changed_antecedents = self.__changed_antecedents(
+            previous_antecedents, previous_rule_keys, antecedents, rule_keys
         )
+        matched = sp.csr_matrix(self.__newest_rated_matrix.matrix, dtype=np.int32) @ changed_antecedents.T
+        touched_user_ids = np.union1d(user_ids, self.__user_movie_matrix.user_ids[np.diff(matched.tocsr().indptr) > 0])
 
-        # list of recommended movies for each user
-        user_id2recommended_movie_ids = defaultdict(list)
+        # users not in the training dataset get the most popular movies
+        if first_changed_rank < len(self.__popularity.ranked_movie_ids):
+            touched_user_ids = np.union1d(touched_user_ids, [self.UNKNOWN_USERS])
 
-        user_id2evaluated_movie_ids = train.groupby("user_id").agg({"movie_id": list})["movie_id"].to_dict()
+        return touched_user_ids
 
-        train_filtered_high_rating = train[train.rating >= self.__EVALUATE_MIN_RATING]
-        for user_id, movies in train_filtered_high_rating.groupby("user_id"):
-            newest_rated_movie_ids = movies.sort_values("timestamp")["movie_id"].to_list()[
-                -self.__INPUT_MAX_MOVIE_NUMS :
-            ]
+    def get_state(self) -> dict[str, np.ndarray]:
+        """
+        Get the fitted state of the model
 
-            # extract association rules that contain at least one in antecedents
-            matched_rules = rules.antecedents.apply(lambda x: len(set(newest_rated_movie_ids) & x)) >= 1
+        Returns
+        -------
+        state : dict[str, np.ndarray]
+            user-movie matrix, highly rated movies, itemsets, rule index and popularity ranking
+        """
+        return {
+            **self.__user_movie_matrix.get_state(prefix="train_"),
+            **self.__newest_rated_matrix.get_state(prefix="newest_"),
+            "newest_timestamps": self.__newest_timestamps,
+            "high_rated_keys": self.__high_rated_keys,
+            "high_rated_ratings": self.__high_rated_ratings,
+            "high_rated_timestamps": self.__high_rated_timestamps,
+            **self.__itemsets.get_state(),
+            **self.__rule_index.get_state(),
+            **self.__popularity.get_state("popularity_"),
+        }
 
-            consequent_movie_ids = []
-            for _, row in rules[matched_rules].sort_values("lift", ascending=False).iterrows():
-                consequent_movie_ids.extend(row.consequents)
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        """
+        Restore the fitted state of the model
+
+        Parameters
+        ----------
+        state : dict[str, np.ndarray]
+            arrays returned by get_state()
+        """
+        self.__user_movie_matrix = InteractionMatrix.from_state(state, prefix="train_")
+        self.__newest_rated_matrix = InteractionMatrix.from_state(state, prefix="newest_")
+        self.__newest_timestamps = state["newest_timestamps"]
+        self.__high_rated_keys = state["high_rated_keys"]
+        self.__high_rated_ratings = state["high_rated_ratings"]
+        self.__high_rated_timestamps = state["high_rated_timestamps"]
+        self.__itemsets = IncrementalItemsets.from_state(state, min_support=self.__APRIORI_SUPPORT_THRESHOLD)
+        self.__rule_index = RuleIndex.from_state(state)
+        self.__popularity = PopularityRanking.from_state(state, "popularity_")
 
-            counter = Counter(consequent_movie_ids)
-            for movie_id, _ in counter.most_common():
-                # recommend movies that have not been previously rated
-                if movie_id not in user_id2evaluated_movie_ids[user_id]:
-                    user_id2recommended_movie_ids[user_id].append(movie_id)
+    def known_users(self, user_ids: np.ndarray) -> np.ndarray:
+        """
+        Check which users are in the training dataset
 
-                if len(user_id2recommended_movie_ids[user_id]) == self.__RECOMMEND_MOVIE_NUMS:
-                    break
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids
 
-        # since the RMSE is not calculated, return the ratings of test as predicted ratings
-        return test.rating, dict(user_id2recommended_movie_ids)
+        Returns
+        -------
+        known : np.ndarray
+            whether each user is known (the others get the most popular movies)
+        """
+        return self.__user_movie_matrix.to_user_index(np.asarray(user_ids)) >= 0
 
-    def __evaluate(
-        self, test: pd.DataFrame, predicted_ratings: list[float], user_id2recommended_movie_ids: dict[int, list[int]]
-    ) -> tuple[float, float]:
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
         """
-        Evaluate the recommendation model
+        Recommend movies for a batch of users
 
         Parameters
         ----------
-        test : pd.DataFrame
-            Test dataset
-        predicted_ratings : list[float]
-            list of predicted ratings
-        user_id2recommended_movie_ids : dict[int, list[int]]
-            combination of user id and recommended movie ids
+        user_ids : np.ndarray
+            user ids
+        k : int
+            number of movies to recommend
+
+        Returns
+        -------
+        recommended_movie_ids : np.ndarray
+            (users, k) movie ids (-1 if fewer than k movies are recommended by matched rules,
+            the most popular movies for users not in the training dataset)
+        """
+        # consequents of matched rules, excluding movies that have been previously rated
+        recommended_movie_indexes = self.__rule_index.recommend(
+            self.__newest_rated_matrix.rows(user_ids), self.__user_movie_matrix.rows(user_ids), k
+        )
+
+        recommended_movie_ids = np.where(
+            recommended_movie_indexes >= 0,
+            self.__user_movie_matrix.movie_ids[np.maximum(recommended_movie_indexes, 0)],
+            -1,
+        ).astype(np.int32)
+
+        # users not in the training dataset get the most popular movies
+        unknown = self.__user_movie_matrix.to_user_index(np.asarray(user_ids)) < 0
+        recommended_movie_ids[unknown] = self.__popularity.top_k(k)
+
+        return recommended_movie_ids
+
+    def __build_rules(self) -> tuple[sp.csr_matrix, np.ndarray]:
+        """
+        Generate the association rules from the frequent itemsets and index them
+
+        Returns
+        -------
+        antecedents : sp.csr_matrix
+            boolean (rules, movies) antecedents of the rules in the order of the itemsets
+        rule_keys : np.ndarray
+            keys of the rules (see IncrementalItemsets.association_rules)
+        """
+        antecedents, consequents, lifts, rule_keys = self.__itemsets.association_rules(self.__APRIORI_LIFT_THRESHOLD)
+        self.__rule_index = RuleIndex.from_matrices(antecedents, consequents, lifts)
+
+        return antecedents, rule_keys
+
+    def __changed_antecedents(
+        self,
+        previous_antecedents: sp.csr_matrix,
+        previous_rule_keys: np.ndarray,
+        antecedents: sp.csr_matrix,
+        rule_keys: np.ndarray,
+    ) -> sp.csr_matrix:
+        """
+        Get the antecedents of the rules that were added, removed or whose itemsets changed support
+
+        A rule whose itemsets kept their counts keeps its order among the other rules, even if the number
+        of users and so all lifts changed, so only the users matching the other rules may be recommended
+        differently.
+
+        Parameters
+        ----------
+        previous_antecedents : sp.csr_matrix
+            boolean (previous rules, movies) antecedents of the previous rules
+        previous_rule_keys : np.ndarray
+            keys of the previous rules (see IncrementalItemsets.association_rules)
+        antecedents : sp.csr_matrix
+            boolean (rules, movies) antecedents of the current rules
+        rule_keys : np.ndarray
+            keys of the current rules
 
         Returns
         -------
-        recall_at_k : float
-            Recall@k
-        precision_at_k : float
-            Precision@k
+        changed_antecedents : sp.csr_matrix
+            boolean (changed rules, movies) antecedents of the rules that are not in both rule sets
+        """
+        # rows of keys padded to the same width as bytes, which are compared at once
+        width = max(previous_rule_keys.shape[1], rule_keys.shape[1])
+        keys = np.full((len(previous_rule_keys) + len(rule_keys), width), -1, dtype=np.int64)
+        keys[: len(previous_rule_keys), : previous_rule_keys.shape[1]] = previous_rule_keys
+        keys[len(previous_rule_keys) :, : rule_keys.shape[1]] = rule_keys
+        keys = keys.view(f"S{8 * width}").ravel()
+        previous_keys, keys = keys[: len(previous_rule_keys)], keys[len(previous_rule_keys) :]
+
+        return sp.vstack(
+            [previous_antecedents[~np.isin(previous_keys, keys)], antecedents[~np.isin(keys, previous_keys)]],
+            format="csr",
+        )
+
+    def __build_newest_rated(self, high_ratings: pd.DataFrame) -> None:
+        """
+        Keep the newest highly rated movies of each user with their timestamps
+
+        Parameters
+        ----------
+        high_ratings : pd.DataFrame
+            highly rated ratings(index, user_id, movie_id, rating, timestamp), the larger movie id of equal
+            timestamps is newer, so that the order of the ratings does not matter
         """
-        test_user_id2movie_ids = (
-            test[test.rating >= self.__EVALUATE_MIN_RATING]
+        newest_rated_movies = (
+            high_ratings.sort_values(["user_id", "timestamp", "movie_id"], kind="stable")
             .groupby("user_id")
-            .agg({"movie_id": list})["movie_id"]
-            .to_dict()
+            .tail(self.__INPUT_MAX_MOVIE_NUMS)
+        )
+        self.__newest_rated_matrix = InteractionMatrix(
+            newest_rated_movies,
+            user_ids=self.__user_movie_matrix.user_ids,
+            movie_ids=self.__user_movie_matrix.movie_ids,
         )
 
-        # recall@k
-        recall_at_k = self.__evaluation.calc_recall_at_k(
-            test_user_id2movie_ids,
-            user_id2recommended_movie_ids,
-            self.__RECOMMEND_MOVIE_NUMS,
+        # timestamps in the order of the sparse matrix (sorted by user, then movie)
+        keys = self.__newest_rated_matrix.to_user_index(newest_rated_movies.user_id.to_numpy()).astype(np.int64)
+        keys = keys * len(self.__user_movie_matrix.movie_ids)
+        keys += self.__newest_rated_matrix.to_movie_index(newest_rated_movies.movie_id.to_numpy())
+        self.__newest_timestamps = newest_rated_movies.timestamp.to_numpy(dtype=np.int64)[np.argsort(keys)]
+
+    def __rating_keys(self, ratings: pd.DataFrame) -> np.ndarray:
+        """
+        Encode the (user, movie) pairs of ratings as sortable integers
+
+        Parameters
+        ----------
+        ratings : pd.DataFrame
+            ratings(index, user_id, movie_id, rating, timestamp)
+
+        Returns
+        -------
+        keys : np.ndarray
+            user_id << 32 | movie_id of each rating
+        """
+        return ratings.user_id.to_numpy(dtype=np.int64) << 32 | ratings.movie_id.to_numpy(dtype=np.int64)
+
+    def __update_high_rated(self, ratings: pd.DataFrame) -> None:
+        """
+        Replace the highly rated movies re-rated by new ratings, and add the new highly rated ones
+
+        Parameters
+        ----------
+        ratings : pd.DataFrame
+            new ratings(index, user_id, movie_id, rating, timestamp) without repeated (user, movie) pairs
+        """
+        keys = self.__high_rated_keys
+
+        # previous high ratings of re-rated movies are removed, whatever the new rating is
+        rated_keys = np.sort(self.__rating_keys(ratings))
+        positions = np.minimum(np.searchsorted(keys, rated_keys), max(len(keys) - 1, 0))
+        rerated = positions[keys[positions] == rated_keys] if len(keys) > 0 else positions[:0]
+        keys = np.delete(keys, rerated)
+        high_ratings = np.delete(self.__high_rated_ratings, rerated)
+        timestamps = np.delete(self.__high_rated_timestamps, rerated)
+
+        # new high ratings are inserted at their sorted positions
+        new_high_ratings = ratings[ratings.rating >= self.__EVALUATE_MIN_RATING]
+        new_keys = self.__rating_keys(new_high_ratings)
+        order = np.argsort(new_keys, kind="stable")
+        positions = np.searchsorted(keys, new_keys[order])
+        self.__high_rated_keys = np.insert(keys, positions, new_keys[order])
+        self.__high_rated_ratings = np.insert(
+            high_ratings, positions, new_high_ratings.rating.to_numpy(dtype=np.float32)[order]
+        )
+        self.__high_rated_timestamps = np.insert(
+            timestamps, positions, new_high_ratings.timestamp.to_numpy(dtype=np.int64)[order]
         )
 
-        # precision@k
-        precision_at_k = self.__evaluation.calc_precision_at_k(
-            test_user_id2movie_ids,
-            user_id2recommended_movie_ids,
-            self.__RECOMMEND_MOVIE_NUMS,
+    def __high_rated_frame(self, user_ids: np.ndarray) -> pd.DataFrame:
+        """
+        Get all highly rated movies of users as ratings
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            sorted unique user ids
+
+        Returns
+        -------
+        high_ratings : pd.DataFrame
+            ratings(index, user_id, movie_id, rating, timestamp) sorted by user, then movie
+        """
+        # each user is a contiguous range of the sorted keys
+        user_keys = np.asarray(user_ids, dtype=np.int64) << 32
+        starts = np.searchsorted(self.__high_rated_keys, user_keys)
+        lengths = np.searchsorted(self.__high_rated_keys, user_keys + (1 << 32)) - starts
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        keys = self.__high_rated_keys[positions]
+
+        return pd.DataFrame(
+            {
+                "user_id": (keys >> 32).astype(np.int32),
+                "movie_id": (keys & 0xFFFFFFFF).astype(np.int32),
+                "rating": self.__high_rated_ratings[positions],
+                "timestamp": self.__high_rated_timestamps[positions],
+            }
         )
 
-        return recall_at_k, precision_at_k
+    def __newest_rated_frame(self) -> pd.DataFrame:
+        """
+        Get the newest highly rated movies of each user as ratings
 
-    def run(self) -> None:
+        Returns
+        -------
+        newest_rated_movies : pd.DataFrame
+            ratings(index, user_id, movie_id, rating, timestamp), user ids and movie ids of the previous fit
         """
-        Run the recommendation model
+        matrix = self.__newest_rated_matrix
+        return pd.DataFrame(
+            {
+                "user_id": np.repeat(matrix.user_ids, np.diff(matrix.matrix.indptr)),
+                "movie_id": matrix.movie_ids[matrix.matrix.indices],
+                "rating": matrix.matrix.data,
+                "timestamp": self.__newest_timestamps,
+            }
+        )
+
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
         """
-        train, test = super().get_dataset()
-        predicted_ratings, user_id2recommended_movie_ids = self.__recommend(train, test)
+        Evaluate the recommendation model
+
+        RMSE is not calculated due to the difficulty in predicting the evaluation value.
+
+        Parameters
+        ----------
+        test : pd.DataFrame
+            Test dataset
+
+        Returns
+        -------
+        scores : dict[str, float]
+            Recall@k and Precision@k
+        """
+        # truly favorite movies of each test user as CSR arrays
+        favorite_test = test[test.rating >= self.__EVALUATE_MIN_RATING]
+        test_user_ids, true_indptr, true_indices = self.__evaluation.group_by_user(
+            favorite_test.user_id.to_numpy(), favorite_test.movie_id.to_numpy()
+        )
+        with self.profiler.phase("recommend"):
+            recommended_movie_ids = self.recommend(test_user_ids, self.__RECOMMEND_MOVIE_NUMS)
+
+        # recall@k
+        recall_at_k = self.__evaluation.calc_recall_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        )
+
+        # precision@k
+        precision_at_k = self.__evaluation.calc_precision_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        )
 
-        # RMSE is not calculated due to the difficulty in predicting the evaluation value
-        recall_at_k, precision_at_k = self.__evaluate(test, list(predicted_ratings), user_id2recommended_movie_ids)
-        super().output(recall_at_k=recall_at_k, precision_at_k=precision_at_k)
+        return {"recall_at_k": recall_at_k, "precision_at_k": precision_at_k}
@@ -0,0 +1,255 @@
+from typing import Self
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class RuleIndex:
+    __BLOCK_SIZE: int = 1024
+
+    def __init__(self, rules: pd.DataFrame, movie_nums: int, block_size: int = __BLOCK_SIZE) -> None:
+        """
+        Inverted index of association rules for fast matching
+
+        Rules are renumbered in descending order of lift, so a smaller rule id means a stronger rule.
+
+        Parameters
+        ----------
+            rules: pd.DataFrame
+                rules(index, antecedents, consequents, ..., lift, ...) whose items are movie indexes
+            movie_nums: int
+                number of movies (columns of the user-movie matrix)
+            block_size: int
+                number of users processed at once
+        """
+        self.movie_nums = movie_nums
+        self.block_size = block_size
+        self.__index(
+            self.__to_matrix(rules.antecedents.to_numpy()),
+            self.__to_matrix(rules.consequents.to_numpy()),
+            rules.lift.to_numpy(dtype=np.float64),
+        )
+
+    @classmethod
+    def from_matrices(
+        cls, antecedents: sp.csr_matrix, consequents: sp.csr_matrix, lifts: np.ndarray, block_size: int = __BLOCK_SIZE
+    ) -> Self:
+        """
+        Index rules given as (rules, movies) matrices, e.g. from IncrementalItemsets.association_rules()
+
+        Parameters
+        ----------
+            antecedents: sp.csr_matrix
+                boolean (rules, movies) matrix of the antecedents
+            consequents: sp.csr_matrix
+                boolean (rules, movies) matrix of the consequents
+            lifts: np.ndarray
+                (rules,) lift of each rule
+            block_size: int
+                number of users processed at once
+
+        Returns
+        -------
+            rule_index: Self
+                index of the rules
+        """
+        rule_index = cls.__new__(cls)
+        rule_index.movie_nums = antecedents.shape[1]
+        rule_index.block_size = block_size
+        rule_index.__index(antecedents, consequents, np.asarray(lifts, dtype=np.float64))
+
+        return rule_index
+
+    @classmethod
+    def from_state(cls, state: dict[str, np.ndarray], block_size: int = __BLOCK_SIZE) -> Self:
+        """
+        Restore an index from arrays returned by get_state()
+
+        Parameters
+        ----------
+            state: dict[str, np.ndarray]
+                arrays of the index (may be memory-mapped)
+            block_size: int
+                number of users processed at once
+
+        Returns
+        -------
+            rule_index: Self
+                restored index
+        """
+        rule_index = cls.__new__(cls)
+        rule_index.movie_nums = int(state["rule_movie_nums"])
+        rule_index.block_size = block_size
+        rule_index.lifts = state["rule_lifts"]
+        rule_index.antecedent_index = sp.csr_matrix(
+            (
+                np.ones(len(state["rule_antecedent_indices"]), dtype=np.bool_),
+                state["rule_antecedent_indices"],
+                state["rule_antecedent_indptr"],
+            ),
+            shape=(rule_index.movie_nums, len(rule_index.lifts)),
+        )
+        rule_index.consequents = sp.csr_matrix(
+            (
+                np.ones(len(state["rule_consequent_indices"]), dtype=np.bool_),
+                state["rule_consequent_indices"],
+                state["rule_consequent_indptr"],
+            ),
+            shape=(len(rule_index.lifts), rule_index.movie_nums),
+        )
+
+        return rule_index
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        """
+        Get the arrays of the index
+
+        Parameters
+        ----------
+            None
+
+        Returns
+        -------
+            state: dict[str, np.ndarray]
+                flat arrays of the index
+        """
+        return {
+            "rule_movie_nums": np.array(self.movie_nums),
+            "rule_lifts": self.lifts,
+            "rule_antecedent_indices": self.antecedent_index.indices,
+            "rule_antecedent_indptr": self.antecedent_index.indptr,
+            "rule_consequent_indices": self.consequents.indices,
+            "rule_consequent_indptr": self.consequents.indptr,
+        }
+
+    def __index(self, antecedents: sp.csr_matrix, consequents: sp.csr_matrix, lifts: np.ndarray) -> None:
+        """
+        Renumber the rules in descending order of lift and index them
+
+        Parameters
+        ----------
+            antecedents: sp.csr_matrix
+                boolean (rules, movies) matrix of the antecedents
+            consequents: sp.csr_matrix
+                boolean (rules, movies) matrix of the consequents
+            lifts: np.ndarray
+                (rules,) lift of each rule
+        """
+        order = np.argsort(-lifts, kind="stable")
+        self.lifts = lifts[order]
+
+        # movie -> ids of the rules whose antecedents contain the movie
+        self.antecedent_index = sp.csr_matrix(antecedents[order], dtype=np.bool_).T.tocsr()
+
+        # rule id -> consequent movies
+        self.consequents = sp.csr_matrix(consequents[order], dtype=np.bool_)
+
+    @property
+    def rule_nums(self) -> int:
+        return len(self.lifts)
+
+    def recommend(self, input_matrix: sp.csr_matrix, seen: sp.csr_matrix, k: int) -> np.ndarray:
+        """
+        Recommend consequents of the rules matched by the input movies of each user
+
+        Consequent movies are ordered by the number of matched rules recommending them,
+        then by the strongest (highest lift) of those rules, then by movie index.
+
+        Parameters
+        ----------
+            input_matrix: sp.csr_matrix
+                (users, movies) matrix of input movies (e.g. newest highly rated movies) of each user
+            seen: sp.csr_matrix
+                (users, movies) matrix of already rated movies, which are never recommended
+            k: int
+                number of movies to recommend
+
+        Returns
+        -------
+            recommended_movie_indexes: np.ndarray
+                (users, k) movie indexes (-1 if fewer than k candidates)
+        """
+        user_nums = input_matrix.shape[0]
+        recommended_movie_indexes = np.full((user_nums, k), -1, dtype=np.int64)
+        for start in range(0, user_nums, self.block_size):
+            end = min(start + self.block_size, user_nums)
+            self.__recommend_block(input_matrix[start:end], seen[start:end], recommended_movie_indexes[start:end])
+
+        return recommended_movie_indexes
+
+    def __recommend_block(self, input_matrix: sp.csr_matrix, seen: sp.csr_matrix, out: np.ndarray) -> None:
+        """
+        Recommend movies for a block of users
+
+        Parameters
+        ----------
+            input_matrix: sp.csr_matrix
+                (block users, movies) matrix of input movies
+            seen: sp.csr_matrix
+                (block users, movies) matrix of already rated movies
+            out: np.ndarray
+                (block users, k) output of recommended movie indexes (filled in place)
+        """
+        # rules that contain at least one input movie in antecedents: only matched rules are touched
+        matched = (sp.csr_matrix(input_matrix, dtype=np.int32) @ self.antecedent_index).tocoo()
+        if matched.nnz == 0:
+            return
+
+        # expand (user, rule) pairs into (user, rule, consequent movie)
+        lengths = np.diff(self.consequents.indptr)[matched.col]
+        users = np.repeat(matched.row.astype(np.int64), lengths)
+        rule_ids = np.repeat(matched.col.astype(np.int64), lengths)
+        starts = self.consequents.indptr[matched.col]
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        movies = self.consequents.indices[np.repeat(starts, lengths) + offsets].astype(np.int64)
+
+        # count each (user, movie) and keep the strongest rule recommending it
+        keys = users * self.movie_nums + movies
+        order = np.lexsort((rule_ids, keys))
+        keys, rule_ids = keys[order], rule_ids[order]
+        group_starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        counts = np.diff(np.r_[group_starts, len(keys)])
+        keys, first_rule_ids = keys[group_starts], rule_ids[group_starts]
+
+        # recommend movies that have not been previously rated
+        seen_keys = np.repeat(np.arange(seen.shape[0], dtype=np.int64), np.diff(seen.indptr)) * self.movie_nums
+        seen_keys += seen.indices
+        seen_keys.sort()
+        positions = np.minimum(np.searchsorted(seen_keys, keys), max(len(seen_keys) - 1, 0))
+        unseen = seen_keys[positions] != keys if len(seen_keys) > 0 else np.ones(len(keys), dtype=np.bool_)
+        keys, counts, first_rule_ids = keys[unseen], counts[unseen], first_rule_ids[unseen]
+
+        # rank candidates of each user and take the top k
+        users, movies = keys // self.movie_nums, keys % self.movie_nums
+        order = np.lexsort((movies, first_rule_ids, -counts, users))
+        users, movies = users[order], movies[order]
+        user_starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+        ranks = np.arange(len(users)) - np.repeat(user_starts, np.diff(np.r_[user_starts, len(users)]))
+        top = ranks < out.shape[1]
+        out[users[top], ranks[top]] = movies[top]
+
+    def __to_matrix(self, itemsets: np.ndarray) -> sp.csr_matrix:
+        """
+        Convert itemsets to a boolean (itemsets, movies) matrix
+
+        Parameters
+        ----------
+            itemsets: np.ndarray
+                frozensets of movie indexes
+
+        Returns
+        -------
+            matrix: sp.csr_matrix
+                boolean (itemsets, movies) matrix
+        """
+        lengths = np.fromiter((len(itemset) for itemset in itemsets), dtype=np.int64, count=len(itemsets))
+        indptr = np.zeros(len(itemsets) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        indices = np.fromiter(
+            (item for itemset in itemsets for item in sorted(itemset)), dtype=np.int32, count=int(indptr[-1])
+        )
+
+        return sp.csr_matrix(
+            (np.ones(len(indices), dtype=np.bool_), indices, indptr), shape=(len(itemsets), self.movie_nums)
+        )
@@ -0,0 +1,5 @@
+from model import ContentBased
+
+if __name__ == "__main__":
+    model = ContentBased()
+    model.run()
@@ -0,0 +1,386 @@
+from typing import Optional, Self
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.base_recommend import BaseRecommend
+from src.evaluation import Evaluation
+from src.features import CategoricalFeatures
+from src.matrix import InteractionMatrix
+from src.models.content_based.tfidf import TfIdf
+from src.popularity import PopularityRanking
+from src.ranking import Ranking
+from src.similarity import Similarity
+
+
+class ContentBased(BaseRecommend):
+    __USER_NUMS: int = 1000
+    __TEST_SIZE: float = 0.2
+    __MOVIELENS_MIN_RATING: float = 0.5
+    __MOVIELENS_MAX_RATING: float = 5.0
+    __PROFILE_MIN_RATING: float = 4.0
+    __SIMILAR_MOVIE_NUMS: int = 50
+    __BLOCK_SIZE: int = 512
+    __PREDICT_BLOCK_SIZE: int = 65536
+    __RECOMMEND_MOVIE_NUMS: int = 10
+    __EVALUATE_MIN_RATING: float = 4.0
+
+    __evaluation = Evaluation()
+    __ranking = Ranking(block_size=__BLOCK_SIZE)
+    __similarity = Similarity(__SIMILAR_MOVIE_NUMS, metric="cosine", block_size=__BLOCK_SIZE)
+
+    __tfidf: TfIdf
+    __user_movie_matrix: InteractionMatrix
+    __movie_features: sp.csr_matrix
+    __user_profiles: sp.csr_matrix
+    __user_means: np.ndarray
+    __similar_indexes: np.ndarray
+    __similarities: np.ndarray
+    __popularity: PopularityRanking
+
+    def __init__(
+        self,
+        user_nums: Optional[int] = __USER_NUMS,
+        genres: Optional[CategoricalFeatures] = None,
+        tags: Optional[CategoricalFeatures] = None,
+    ) -> None:
+        """
+        Content-based filtering by TF-IDF of the genres and tags of movies
+
+        A user profile is the sum of the features of the movies the user rated highly, weighted by the ratings,
+        and movies are ranked by the dot product of their features and the profile.
+
+        Parameters
+        ----------
+        user_nums : Optional[int]
+            number of users to load (all users if None)
+        genres : Optional[CategoricalFeatures]
+            genres of movies (loaded from the dataset by get_dataset if None)
+        tags : Optional[CategoricalFeatures]
+            tags of movies (loaded from the dataset by get_dataset if None)
+        """
+        super().__init__(dataset_dir="dataset/movielens-10m", user_nums=user_nums, test_size=self.__TEST_SIZE)
+        self.genres = genres
+        self.tags = tags
+
+    def get_dataset(self) -> tuple[pd.DataFrame, pd.DataFrame]:
+        # the features of movies come with the dataset unless they were given
+        if self.genres is None or self.tags is None:
+            with self.profiler.phase("load"):
+                self.genres, self.tags = self.dataset.movie_features()
+        return super().get_dataset()
+
+    def fit(self, train: pd.DataFrame) -> Self:
+        """
+        Fit the recommendation model
+
+        Parameters
+        ----------
+        train : pd.DataFrame
+            Training dataset
+
+        Returns
+        -------
+        model : Self
+            fitted model
+        """
+        if self.genres is None or self.tags is None:
+            raise ValueError("genres and tags of movies are required to fit ContentBased")
+
+        # movies nobody rated can be recommended too, so the columns are all movies
+        movie_ids = np.union1d(np.union1d(self.genres.ids, self.tags.ids), train.movie_id.to_numpy())
+        self.__user_movie_matrix = InteractionMatrix(train, movie_ids=movie_ids)
+        matrix = self.__user_movie_matrix.matrix
+        self.__user_means = self.__mean_ratings(matrix)
+
+        # sparse (movies, genres + tags) TF-IDF features, the idf is learned per model
+        with self.profiler.phase("features"):
+            self.__tfidf = TfIdf()
+            self.__movie_features = self.__tfidf.fit_transform(self.__feature_counts([self.genres, self.tags]))
+        self.__build_profiles()
+
+        # top-N movies with the most similar features of each movie ("more like this")
+        with self.profiler.phase("similarity"):
+            self.__similar_indexes, self.__similarities = self.__similarity.top_neighbors(self.__movie_features)
+
+        # most popular movies for users not in the training dataset
+        self.__popularity = PopularityRanking().fit(train)
+
+        return self
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        """
+        Get the fitted state of the model
+
+        Returns
+        -------
+        state : dict[str, np.ndarray]
+            user-movie matrix, mean ratings, movie features, similar movies and popularity ranking
+        """
+        return {
+            **self.__user_movie_matrix.get_state(),
+            "user_means": self.__user_means,
+            "feature_data": self.__movie_features.data,
+            "feature_indices": self.__movie_features.indices,
+            "feature_indptr": self.__movie_features.indptr,
+            "feature_nums": np.array(self.__movie_features.shape[1]),
+            "similar_indexes": self.__similar_indexes,
+            "similarities": self.__similarities,
+            **self.__popularity.get_state("popularity_"),
+        }
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        """
+        Restore the fitted state of the model
+
+        Parameters
+        ----------
+        state : dict[str, np.ndarray]
+            arrays returned by get_state()
+        """
+        self.__user_movie_matrix = InteractionMatrix.from_state(state)
+        self.__user_means = state["user_means"]
+        self.__movie_features = sp.csr_matrix(
+            (state["feature_data"], state["feature_indices"], state["feature_indptr"]),
+            shape=(len(self.__user_movie_matrix.movie_ids), int(state["feature_nums"])),
+        )
+        self.__similar_indexes = state["similar_indexes"]
+        self.__similarities = state["similarities"]
+        self.__popularity = PopularityRanking.from_state(state, "popularity_")
+        self.__build_profiles()
+
+    def known_users(self, user_ids: np.ndarray) -> np.ndarray:
+        """
+        Check which users are in the training dataset
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids
+
+        Returns
+        -------
+        known : np.ndarray
+            whether each user is known (the others get the most popular movies)
+        """
+        return self.__user_movie_matrix.to_user_index(np.asarray(user_ids)) >= 0
+
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+        """
+        Recommend movies for a batch of users
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids
+        k : int
+            number of movies to recommend
+
+        Returns
+        -------
+        recommended_movie_ids : np.ndarray
+            (users, k) movie ids (-1 for users without highly rated movies,
+            the most popular movies for users not in the training dataset)
+        """
+        user_indexes = self.__user_movie_matrix.to_user_index(np.asarray(user_ids))
+        movie_features_t = self.__movie_features.T
+
+        def scores(start: int, end: int) -> np.ndarray:
+            # profiles of active users touch most features, so a dense block of profiles is faster than sparse
+            block_user_indexes = user_indexes[start:end]
+            block_scores = self.__user_profiles[np.maximum(block_user_indexes, 0)].toarray() @ movie_features_t
+            # movies sharing no feature with the profile are not recommended
+            block_scores[(block_scores <= 0) | (block_user_indexes < 0)[:, np.newaxis]] = -np.inf
+            return block_scores
+
+        # top-k movies for each user, excluding movies that have been previously rated
+        recommended_movie_ids = self.__ranking.top_k(
+            scores,
+            self.__user_movie_matrix.movie_ids,
+            k,
+            seen=self.__user_movie_matrix.rows(user_ids),
+        )
+
+        # users not in the training dataset get the most popular movies
+        recommended_movie_ids[user_indexes < 0] = self.__popularity.top_k(k)
+
+        return recommended_movie_ids
+
+    def similar_movies(self, movie_ids: np.ndarray, n: int) -> np.ndarray:
+        """
+        Look up the movies with the most similar genres and tags
+
+        Parameters
+        ----------
+        movie_ids : np.ndarray
+            movie ids
+        n : int
+            number of similar movies (at most the number of precomputed similar movies)
+
+        Returns
+        -------
+        similar_movie_ids : np.ndarray
+            (movies, n) movie ids in descending order of similarity (-1 if fewer similar movies or unknown movies)
+        """
+        movie_indexes = self.__user_movie_matrix.to_movie_index(np.asarray(movie_ids))
+        similar_indexes = np.where(
+            (movie_indexes >= 0)[:, np.newaxis], self.__similar_indexes[np.maximum(movie_indexes, 0), :n], -1
+        )
+
+        return np.where(
+            similar_indexes >= 0, self.__user_movie_matrix.movie_ids[np.maximum(similar_indexes, 0)], -1
+        ).astype(np.int32)
+
+    def predict(self, user_ids: np.ndarray, movie_ids: np.ndarray) -> np.ndarray:
+        """
+        Predict ratings of (user, movie) pairs
+
+        rating = user mean + similarity-weighted mean of (rating - user mean) of the similar movies the user rated
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids of the pairs
+        movie_ids : np.ndarray
+            movie ids of the pairs (same length as user_ids)
+
+        Returns
+        -------
+        predicted_ratings : np.ndarray
+            predicted rating of each pair (mean rating of the movie if the user is not in the training dataset)
+        """
+        user_indexes = self.__user_movie_matrix.to_user_index(np.asarray(user_ids))
+        movie_indexes = self.__user_movie_matrix.to_movie_index(np.asarray(movie_ids))
+        matrix = self.__user_movie_matrix.matrix
+        movie_nums = matrix.shape[1]
+
+        predicted_ratings = self.__popularity.mean_ratings(np.asarray(movie_ids)).astype(np.float32)
+        known_users = user_indexes >= 0
+        predicted_ratings[known_users] = self.__user_means[user_indexes[known_users]]
+
+        # (user, movie) keys of the stored ratings, sorted since the columns of each row are sorted
+        stored_keys = np.repeat(np.arange(matrix.shape[0], dtype=np.int64), np.diff(matrix.indptr)) * movie_nums
+        stored_keys += matrix.indices
+        deviations = matrix.data - np.repeat(self.__user_means, np.diff(matrix.indptr))
+
+        pairs = np.flatnonzero(known_users & (movie_indexes >= 0)) if matrix.nnz > 0 else np.empty(0, dtype=np.int64)
+        for start in range(0, len(pairs), self.__PREDICT_BLOCK_SIZE):
+            block = pairs[start : start + self.__PREDICT_BLOCK_SIZE]
+            similar_indexes = self.__similar_indexes[movie_indexes[block]]
+            keys = user_indexes[block, np.newaxis].astype(np.int64) * movie_nums + similar_indexes
+
+            # ratings of the user on the similar movies
+            positions = np.minimum(np.searchsorted(stored_keys, keys), len(stored_keys) - 1)
+            rated = (similar_indexes >= 0) & (stored_keys[positions] == keys)
+            weights = np.where(rated, self.__similarities[movie_indexes[block]], 0.0)
+            weight_sums = weights.sum(axis=1)
+
+            has_neighbors = weight_sums > 0
+            weighted_deviations = (weights * np.where(rated, deviations[positions], 0.0)).sum(axis=1)
+            predicted_ratings[block[has_neighbors]] += weighted_deviations[has_neighbors] / weight_sums[has_neighbors]
+
+        return np.clip(predicted_ratings, self.__MOVIELENS_MIN_RATING, self.__MOVIELENS_MAX_RATING)
+
+    def __feature_counts(self, features: list[CategoricalFeatures]) -> sp.csr_matrix:
+        """
+        Count the genres and tags of each movie
+
+        Parameters
+        ----------
+        features : list[CategoricalFeatures]
+            categorical features of movies (e.g. genres and tags), whose values get separate columns
+
+        Returns
+        -------
+        counts : sp.csr_matrix
+            (movies of the user-movie matrix, values of all features) number of times each value is given to the movie
+        """
+        blocks = []
+        for feature in features:
+            # move the rows of the feature to the columns of the user-movie matrix (unknown movies are dropped)
+            movie_indexes = self.__user_movie_matrix.to_movie_index(feature.ids)
+            known = np.flatnonzero(movie_indexes >= 0)
+            reorder = sp.csr_matrix(
+                (np.ones(len(known), dtype=np.float32), (movie_indexes[known], known)),
+                shape=(len(self.__user_movie_matrix.movie_ids), len(feature)),
+            )
+            blocks.append(reorder @ feature.matrix())
+
+        return sp.hstack(blocks, format="csr")
+
+    def __build_profiles(self) -> None:
+        """
+        Sum the features of the highly rated movies of each user, weighted by the ratings
+        """
+        matrix = self.__user_movie_matrix.matrix
+        # copy the structure, since eliminate_zeros() works in place
+        weights = sp.csr_matrix(
+            (
+                np.where(matrix.data >= self.__PROFILE_MIN_RATING, matrix.data, 0.0),
+                matrix.indices.copy(),
+                matrix.indptr.copy(),
+            ),
+            shape=matrix.shape,
+        )
+        weights.eliminate_zeros()
+
+        self.__user_profiles = (weights @ self.__movie_features).tocsr()
+
+    def __mean_ratings(self, matrix: sp.csr_matrix) -> np.ndarray:
+        """
+        Mean rating of each user
+
+        Parameters
+        ----------
+        matrix : sp.csr_matrix
+            (users, movies) ratings
+
+        Returns
+        -------
+        user_means : np.ndarray
+            (users,) float32 mean ratings
+        """
+        rating_nums = np.diff(matrix.indptr)
+        rating_sums = np.asarray(matrix.sum(axis=1)).ravel()
+
+        return (rating_sums / np.maximum(rating_nums, 1)).astype(np.float32)
+
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
+        """
+        Evaluate the recommendation model
+
+        Parameters
+        ----------
+        test : pd.DataFrame
+            Test dataset
+
+        Returns
+        -------
+        scores : dict[str, float]
+            RMSE, Recall@k and Precision@k
+        """
+        # truly favorite movies of each test user as CSR arrays
+        favorite_test = test[test.rating >= self.__EVALUATE_MIN_RATING]
+        test_user_ids, true_indptr, true_indices = self.__evaluation.group_by_user(
+            favorite_test.user_id.to_numpy(), favorite_test.movie_id.to_numpy()
+        )
+        with self.profiler.phase("predict"):
+            predicted_ratings = self.predict(test.user_id.to_numpy(), test.movie_id.to_numpy())
+        with self.profiler.phase("recommend"):
+            recommended_movie_ids = self.recommend(test_user_ids, self.__RECOMMEND_MOVIE_NUMS)
+
+        # rmse
+        rmse = self.__evaluation.calc_rmse(test.rating.to_list(), predicted_ratings.tolist())
+
+        # recall@k
+        recall_at_k = self.__evaluation.calc_recall_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        )
+
+        # precision@k
+        precision_at_k = self.__evaluation.calc_precision_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        )
+
+        return {"rmse": rmse, "recall_at_k": recall_at_k, "precision_at_k": precision_at_k}
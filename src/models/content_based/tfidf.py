@@ -0,0 +1,56 @@
+import numpy as np
+import scipy.sparse as sp
+
+
+class TfIdf:
+    def __init__(self, min_df: int = 1, sublinear_tf: bool = True) -> None:
+        """
+        TF-IDF weighting of sparse term counts
+
+        idf = log((1 + documents) / (1 + documents containing the term)) + 1, as the smoothed idf of scikit-learn.
+
+        Parameters
+        ----------
+            min_df: int
+                terms in fewer documents than this are dropped
+            sublinear_tf: bool
+                use 1 + log(count) instead of count as the term frequency
+        """
+        self.min_df = min_df
+        self.sublinear_tf = sublinear_tf
+
+    def fit_transform(self, counts: sp.csr_matrix) -> sp.csr_matrix:
+        """
+        Learn the idf of the terms and weight the counts
+
+        Parameters
+        ----------
+            counts: sp.csr_matrix
+                (documents, terms) number of times each term occurs in each document
+
+        Returns
+        -------
+            tfidf: sp.csr_matrix
+                (documents, terms) float32 TF-IDF, each non-empty row normalized to unit length
+        """
+        counts = sp.csr_matrix(counts, dtype=np.float32, copy=True)
+        counts.sum_duplicates()
+        counts.eliminate_zeros()
+
+        document_nums = counts.shape[0]
+        document_frequencies = np.bincount(counts.indices, minlength=counts.shape[1])
+        self.idf = (np.log((1.0 + document_nums) / (1.0 + document_frequencies)) + 1.0).astype(np.float32)
+        self.idf[document_frequencies < self.min_df] = 0.0
+
+        term_frequencies = 1.0 + np.log(counts.data) if self.sublinear_tf else counts.data
+        tfidf = sp.csr_matrix(
+            (term_frequencies * self.idf[counts.indices], counts.indices, counts.indptr), shape=counts.shape
+        )
+        tfidf.eliminate_zeros()
+
+        # l2 normalization, so that dot products are cosine similarities
+        rows = np.repeat(np.arange(document_nums), np.diff(tfidf.indptr))
+        norms = np.sqrt(np.bincount(rows, tfidf.data.astype(np.float64) ** 2, minlength=document_nums))
+        tfidf.data = (tfidf.data / norms[rows]).astype(np.float32)
+
+        return tfidf
@@ -0,0 +1,5 @@
+from model import Popularity
+
+if __name__ == "__main__":
+    model = Popularity()
+    model.run()
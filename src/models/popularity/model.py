@@ -0,0 +1,227 @@
+from typing import Optional, Self
+
+import numpy as np
+import pandas as pd
+
+from src.base_recommend import BaseRecommend
+from src.evaluation import Evaluation
+from src.matrix import InteractionMatrix
+from src.popularity import PopularityRanking
+
+
+class Popularity(BaseRecommend):
+    __USER_NUMS: int = 1000
+    __TEST_SIZE: float = 0.2
+    __MOVIELENS_MIN_RATING: float = 0.5
+    __MOVIELENS_MAX_RATING: float = 5.0
+    __HALF_LIFE: float = 365 * 24 * 60 * 60
+    __MEAN_PRIOR_NUMS: float = 10.0
+    __RECOMMEND_MOVIE_NUMS: int = 10
+    __MAX_K: int = 100
+    __EVALUATE_MIN_RATING: float = 4.0
+
+    __evaluation = Evaluation()
+
+    __user_movie_matrix: InteractionMatrix
+    __popularity: PopularityRanking
+
+    def __init__(
+        self,
+        user_nums: Optional[int] = __USER_NUMS,
+        half_life: Optional[float] = __HALF_LIFE,
+        max_k: int = __MAX_K,
+    ) -> None:
+        """
+        Most popular movies the user has not rated, from one global ranking
+
+        Parameters
+        ----------
+        user_nums : Optional[int]
+            number of users to load (all users if None)
+        half_life : Optional[float]
+            seconds after which a rating counts half for the popularity (plain number of ratings if None)
+        max_k : int
+            largest number of movies recommended to a user, which bounds the ranks partial_fit() checks
+        """
+        super().__init__(dataset_dir="dataset/movielens-10m", user_nums=user_nums, test_size=self.__TEST_SIZE)
+        self.half_life = half_life
+        self.max_k = max_k
+
+    def fit(self, train: pd.DataFrame) -> Self:
+        """
+        Fit the recommendation model
+
+        Parameters
+        ----------
+        train : pd.DataFrame
+            Training dataset
+
+        Returns
+        -------
+        model : Self
+            fitted model
+        """
+        # sparse user-movie matrix, only to skip the movies each user has rated
+        self.__user_movie_matrix = InteractionMatrix(train)
+
+        # counts, mean ratings and time-decayed counts of movies, ranked once for all users
+        self.__popularity = PopularityRanking(self.half_life).fit(train)
+
+        return self
+
+    def partial_fit(self, ratings: pd.DataFrame) -> np.ndarray:
+        """
+        Update the fitted model with a batch of new ratings
+
+        The top-k movies of a user are within the first k + (number of movies the user has rated) ranks,
+        so a user who did not rate is touched only if the ranking changed within them for k = max_k.
+
+        Parameters
+        ----------
+        ratings : pd.DataFrame
+            new ratings
+
+        Returns
+        -------
+        touched_user_ids : np.ndarray
+            users who rated and users whose servable prefix of the ranking changed
+            (with UNKNOWN_USERS if the first max_k ranks changed)
+        """
+        if len(ratings) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # a batch may repeat a (user, movie) pair, the last rating wins as in InteractionMatrix.update()
+        ratings = ratings.drop_duplicates(["user_id", "movie_id"], keep="last")
+        previous_ratings = self.__user_movie_matrix.ratings(ratings.user_id.to_numpy(), ratings.movie_id.to_numpy())
+        self.__user_movie_matrix.update(ratings)
+        first_changed_rank = self.__popularity.update(ratings, previous_ratings)
+        if first_changed_rank == len(self.__popularity.ranked_movie_ids):
+            return np.unique(ratings.user_id.to_numpy())
+
+        seen_nums = np.diff(self.__user_movie_matrix.matrix.indptr)
+        touched = first_changed_rank < self.max_k + seen_nums
+        touched_user_ids = np.union1d(ratings.user_id.to_numpy(), self.__user_movie_matrix.user_ids[touched])
+
+        # users not in the training dataset get the first max_k ranks
+        if first_changed_rank < self.max_k:
+            touched_user_ids = np.union1d(touched_user_ids, [self.UNKNOWN_USERS])
+
+        return touched_user_ids
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        """
+        Get the fitted state of the model
+
+        Returns
+        -------
+        state : dict[str, np.ndarray]
+            user-movie matrix and popularity ranking
+        """
+        return {**self.__user_movie_matrix.get_state(), **self.__popularity.get_state("popularity_")}
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        """
+        Restore the fitted state of the model
+
+        Parameters
+        ----------
+        state : dict[str, np.ndarray]
+            arrays returned by get_state()
+        """
+        self.__user_movie_matrix = InteractionMatrix.from_state(state)
+        self.__popularity = PopularityRanking.from_state(state, "popularity_")
+        self.half_life = self.__popularity.half_life
+
+    def known_users(self, user_ids: np.ndarray) -> np.ndarray:
+        """
+        Check which users are in the training dataset
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids
+
+        Returns
+        -------
+        known : np.ndarray
+            whether each user is known (the others get the most popular movies)
+        """
+        return self.__user_movie_matrix.to_user_index(np.asarray(user_ids)) >= 0
+
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+        """
+        Recommend movies for a batch of users
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids
+        k : int
+            number of movies to recommend
+
+        Returns
+        -------
+        recommended_movie_ids : np.ndarray
+            (users, k) movie ids (the most popular movies for users not in the training dataset)
+        """
+        # the global ranking, skipping movies that have been previously rated
+        return self.__popularity.top_k(k, seen=self.__user_movie_matrix.rows(user_ids))
+
+    def predict(self, user_ids: np.ndarray, movie_ids: np.ndarray) -> np.ndarray:
+        """
+        Predict ratings of (user, movie) pairs
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids of the pairs
+        movie_ids : np.ndarray
+            movie ids of the pairs (same length as user_ids)
+
+        Returns
+        -------
+        predicted_ratings : np.ndarray
+            mean rating of each movie, shrunk to the global mean for rarely rated movies
+        """
+        predicted_ratings = self.__popularity.mean_ratings(np.asarray(movie_ids), self.__MEAN_PRIOR_NUMS)
+
+        return np.clip(predicted_ratings, self.__MOVIELENS_MIN_RATING, self.__MOVIELENS_MAX_RATING)
+
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
+        """
+        Evaluate the recommendation model
+
+        Parameters
+        ----------
+        test : pd.DataFrame
+            Test dataset
+
+        Returns
+        -------
+        scores : dict[str, float]
+            RMSE, Recall@k and Precision@k
+        """
+        # truly favorite movies of each test user as CSR arrays
+        favorite_test = test[test.rating >= self.__EVALUATE_MIN_RATING]
+        test_user_ids, true_indptr, true_indices = self.__evaluation.group_by_user(
+            favorite_test.user_id.to_numpy(), favorite_test.movie_id.to_numpy()
+        )
+        with self.profiler.phase("predict"):
+            predicted_ratings = self.predict(test.user_id.to_numpy(), test.movie_id.to_numpy())
+        with self.profiler.phase("recommend"):
+            recommended_movie_ids = self.recommend(test_user_ids, self.__RECOMMEND_MOVIE_NUMS)
+
+        # rmse
+        rmse = self.__evaluation.calc_rmse(test.rating.to_list(), predicted_ratings.tolist())
+
+        # recall@k
+        recall_at_k = self.__evaluation.calc_recall_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        )
+
+        # precision@k
+        precision_at_k = self.__evaluation.calc_precision_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        )
+
+        return {"rmse": rmse, "recall_at_k": recall_at_k, "precision_at_k": precision_at_k}
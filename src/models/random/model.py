@@ -1,10 +1,13 @@
-from collections import defaultdict
+from typing import Self
 
 import numpy as np
 import pandas as pd
 
 from src.base_recommend import BaseRecommend
 from src.evaluation import Evaluation
+from src.matrix import InteractionMatrix
+from src.popularity import PopularityRanking
+from src.ranking import Ranking
 
 
 class Random(BaseRecommend):
@@ -16,88 +19,174 @@ class Random(BaseRecommend):
     __EVALUATE_MIN_RATING: float = 4.0
 
     __evaluation = Evaluation()
+    __ranking = Ranking()
+
+    __user_movie_matrix: InteractionMatrix
+    __seed: int
+    __popularity: PopularityRanking
 
     def __init__(self) -> None:
         super().__init__(dataset_dir="dataset/movielens-10m", user_nums=self.__USER_NUMS, test_size=self.__TEST_SIZE)
 
-    def __recommend(self, train: pd.DataFrame, test: pd.DataFrame) -> tuple[pd.DataFrame, dict[int, list[int]]]:
+    def fit(self, train: pd.DataFrame) -> Self:
         """
-        Recommend movies for each user
+        Fit the recommendation model
 
         Parameters
         ----------
         train : pd.DataFrame
             Training dataset
-        test : pd.DataFrame
-            Test dataset
 
         Returns
         -------
-        predicted_ratings : list[float]
-            list of predicted ratings
-        user_id2recommended_movie_ids : dict[int, list[int]]
-            combination of user id and recommended movie ids
+        model : Self
+            fitted model
+        """
+        # sparse user-movie matrix holding sorted unique user and movie ids
+        self.__user_movie_matrix = InteractionMatrix(train)
+
+        # predicted ratings (random value between 0.5 and 5.0) are regenerated from a seed when needed,
+        # instead of keeping a dense users x movies matrix
+        self.__seed = int(np.random.randint(np.iinfo(np.int64).max))
+
+        # most popular movies for users not in the training dataset
+        self.__popularity = PopularityRanking().fit(train)
+
+        return self
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        """
+        Get the fitted state of the model
+
+        Returns
+        -------
+        state : dict[str, np.ndarray]
+            user-movie matrix, seed of the predicted ratings and popularity ranking
         """
-        # sorted unique user and movie ids
-        sorted_unique_user_ids = sorted(train.user_id.unique())
-        sorted_unique_movie_ids = sorted(train.movie_id.unique())
-
-        # associate user and movie ids with index
-        user_id2index = dict(zip(sorted_unique_user_ids, range(len(sorted_unique_user_ids))))
-        movie_id2index = dict(zip(sorted_unique_movie_ids, range(len(sorted_unique_movie_ids))))
-
-        # create prediction matrix (predicted ratings: random value between 0.5 and 5.0)
-        prediction_matrix = np.random.uniform(
-            self.__MOVIELENS_MIN_RATING,
-            self.__MOVIELENS_MAX_RATING,
-            (len(sorted_unique_user_ids), len(sorted_unique_movie_ids)),
+        return {
+            **self.__user_movie_matrix.get_state(),
+            "seed": np.array(self.__seed, dtype=np.int64),
+            **self.__popularity.get_state("popularity_"),
+        }
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        """
+        Restore the fitted state of the model
+
+        Parameters
+        ----------
+        state : dict[str, np.ndarray]
+            arrays returned by get_state()
+        """
+        self.__user_movie_matrix = InteractionMatrix.from_state(state)
+        self.__seed = int(state["seed"])
+        self.__popularity = PopularityRanking.from_state(state, "popularity_")
+
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+        """
+        Recommend movies for a batch of users
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids
+        k : int
+            number of movies to recommend
+
+        Returns
+        -------
+        recommended_movie_ids : np.ndarray
+            (users, k) movie ids (the most popular movies for users not in the training dataset)
+        """
+        user_indexes = self.__user_movie_matrix.to_user_index(np.asarray(user_ids))
+        movie_indexes = np.arange(len(self.__user_movie_matrix.movie_ids))
+
+        def scores(start: int, end: int) -> np.ndarray:
+            block_user_indexes = user_indexes[start:end]
+            block_scores = self.__random_ratings(block_user_indexes[:, np.newaxis], movie_indexes)
+            block_scores[block_user_indexes < 0] = -np.inf
+            return block_scores
+
+        # top-k movies for each user, excluding movies that have been previously rated
+        recommended_movie_ids = self.__ranking.top_k(
+            scores,
+            self.__user_movie_matrix.movie_ids,
+            k,
+            seen=self.__user_movie_matrix.rows(user_ids),
         )
 
-        expected_results = test.copy()
-        predicted_ratings = []
+        # users not in the training dataset get the most popular movies
+        recommended_movie_ids[user_indexes < 0] = self.__popularity.top_k(k)
 
-        for i, row in test.iterrows():
-            user_id = row["user_id"]
-            movie_id = row["movie_id"]
+        return recommended_movie_ids
 
-            # if movie_id is not in the training dataset, predict random value
-            if movie_id not in movie_id2index:
-                predicted_ratings.append(np.random.uniform(self.__MOVIELENS_MIN_RATING, self.__MOVIELENS_MAX_RATING))
-                continue
+    def predict(self, user_ids: np.ndarray, movie_ids: np.ndarray) -> np.ndarray:
+        """
+        Predict ratings of (user, movie) pairs
 
-            user_index = user_id2index[user_id]
-            movie_index = movie_id2index[movie_id]
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids of the pairs
+        movie_ids : np.ndarray
+            movie ids of the pairs (same length as user_ids)
 
-            predicted_score = prediction_matrix[user_index, movie_index]
+        Returns
+        -------
+        predicted_ratings : np.ndarray
+            predicted rating of each pair
+        """
+        user_indexes = self.__user_movie_matrix.to_user_index(user_ids)
+        movie_indexes = self.__user_movie_matrix.to_movie_index(movie_ids)
+        known = (user_indexes >= 0) & (movie_indexes >= 0)
 
-            predicted_ratings.append(predicted_score.tolist())
+        predicted_ratings = np.empty(len(known), dtype=np.float64)
+        predicted_ratings[known] = self.__random_ratings(user_indexes[known], movie_indexes[known])
 
-        expected_results["predicted_ratings"] = predicted_ratings
+        # if user_id or movie_id is not in the training dataset, predict random value
+        predicted_ratings[~known] = np.random.uniform(
+            self.__MOVIELENS_MIN_RATING, self.__MOVIELENS_MAX_RATING, int(np.count_nonzero(~known))
+        )
 
-        # list of recommended movies for each user
-        user_id2recommended_movie_ids = defaultdict(list)
+        return predicted_ratings
 
-        user_id2evaluated_movie_ids = train.groupby("user_id").agg({"movie_id": list})["movie_id"].to_dict()
-        for user_id in sorted_unique_user_ids:
-            user_index = user_id2index[user_id]
+    def __random_ratings(self, user_indexes: np.ndarray, movie_indexes: np.ndarray) -> np.ndarray:
+        """
+        Random ratings of (user, movie) pairs, the same for a pair every time they are generated
 
-            # sort movies by predicted ratings in descending order
-            movie_indexes = np.argsort(-prediction_matrix[user_index, :])
-            for movie_index in movie_indexes:
-                movie_id = sorted_unique_movie_ids[movie_index]
+        Each pair is hashed with the seed (splitmix64), so the ratings of any subset of pairs
+        can be generated without generating the whole users x movies matrix.
 
-                # recommend movies that have not been previously rated
-                if movie_id not in user_id2evaluated_movie_ids[user_id]:
-                    user_id2recommended_movie_ids[user_id].append(movie_id)
+        Parameters
+        ----------
+        user_indexes : np.ndarray
+            user indexes of the user-movie matrix (broadcast against movie_indexes)
+        movie_indexes : np.ndarray
+            movie indexes of the user-movie matrix
+
+        Returns
+        -------
+        random_ratings : np.ndarray
+            uniform ratings between 0.5 and 5.0
+        """
+        movie_nums = len(self.__user_movie_matrix.movie_ids)
+        offset = (self.__seed + 1) * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF
+
+        # uint64 arithmetic wraps around, as the hash expects
+        hashes = user_indexes.astype(np.uint64) * np.uint64(movie_nums) + movie_indexes.astype(np.uint64)
+        hashes += np.uint64(offset)
+        hashes ^= hashes >> np.uint64(30)
+        hashes *= np.uint64(0xBF58476D1CE4E5B9)
+        hashes ^= hashes >> np.uint64(27)
+        hashes *= np.uint64(0x94D049BB133111EB)
+        hashes ^= hashes >> np.uint64(31)
 
-                if len(user_id2recommended_movie_ids[user_id]) == self.__RECOMMEND_MOVIE_NUMS:
-                    break
+        # the top 53 bits as a uniform value in [0, 1)
+        uniform = (hashes >> np.uint64(11)).astype(np.float64) * 2.0**-53
 
-        return expected_results.predicted_ratings, dict(user_id2recommended_movie_ids)
+        return self.__MOVIELENS_MIN_RATING + (self.__MOVIELENS_MAX_RATING - self.__MOVIELENS_MIN_RATING) * uniform
 
-    def __evaluate(
-        self, test: pd.DataFrame, predicted_ratings: list[float], user_id2recommended_movie_ids: dict[int, list[int]]
-    ) -> tuple[float, float, float]:
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
         """
         Evaluate the recommendation model
 
@@ -105,48 +194,33 @@ class Random(BaseRecommend):
         ----------
         test : pd.DataFrame
             Test dataset
-        predicted_ratings : list[float]
-            list of predicted ratings
-        user_id2recommended_movie_ids : dict[int, list[int]]
-            combination of user id and recommended movie ids
 
         Returns
         -------
-        rmse : float
-            RMSE
-        recall_at_k : float
-            Recall@k
-        precision_at_k : float
-            Precision@k
+        scores : dict[str, float]
+            RMSE, Recall@k and Precision@k
         """
-        test_user_id2movie_ids = (
-            test[test.rating > self.__EVALUATE_MIN_RATING]
-            .groupby("user_id")
-            .agg({"movie_id": list})["movie_id"]
-            .to_dict()
+        # truly favorite movies of each test user as CSR arrays
+        favorite_test = test[test.rating > self.__EVALUATE_MIN_RATING]
+        test_user_ids, true_indptr, true_indices = self.__evaluation.group_by_user(
+            favorite_test.user_id.to_numpy(), favorite_test.movie_id.to_numpy()
         )
+        with self.profiler.phase("predict"):
+            predicted_ratings = self.predict(test.user_id.to_numpy(), test.movie_id.to_numpy())
+        with self.profiler.phase("recommend"):
+            recommended_movie_ids = self.recommend(test_user_ids, self.__RECOMMEND_MOVIE_NUMS)
+
         # rmse
-        rmse = self.__evaluation.calc_rmse(test.rating.to_list(), predicted_ratings)
+        rmse = self.__evaluation.calc_rmse(test.rating.to_list(), predicted_ratings.tolist())
 
         # recall@k
-        recall_at_k = self.__evaluation.calc_recall_at_k(
-            test_user_id2movie_ids, user_id2recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        recall_at_k = self.__evaluation.calc_recall_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
         )
 
         # precision@k
-        precision_at_k = self.__evaluation.calc_precision_at_k(
-            test_user_id2movie_ids, user_id2recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        precision_at_k = self.__evaluation.calc_precision_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
         )
 
-        return rmse, recall_at_k, precision_at_k
-
-    def run(self) -> None:
-        """
-        Run the recommendation model
-        """
-        train, test = super().get_dataset()
-        predicted_ratings, user_id2recommended_movie_ids = self.__recommend(train, test)
-        rmse, recall_at_k, precision_at_k = self.__evaluate(
-            test, predicted_ratings.to_list(), user_id2recommended_movie_ids
-        )
-        super().output(rmse=rmse, recall_at_k=recall_at_k, precision_at_k=precision_at_k)
+        return {"rmse": rmse, "recall_at_k": recall_at_k, "precision_at_k": precision_at_k}
@@ -0,0 +1,5 @@
+from model import UserBasedCF
+
+if __name__ == "__main__":
+    model = UserBasedCF()
+    model.run()
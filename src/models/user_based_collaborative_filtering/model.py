@@ -0,0 +1,362 @@
+from typing import Optional, Self
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.base_recommend import BaseRecommend
+from src.evaluation import Evaluation
+from src.matrix import InteractionMatrix
+from src.popularity import PopularityRanking
+from src.ranking import Ranking
+from src.similarity import Similarity
+
+
+class UserBasedCF(BaseRecommend):
+    __USER_NUMS: int = 1000
+    __TEST_SIZE: float = 0.2
+    __MOVIELENS_MIN_RATING: float = 0.5
+    __MOVIELENS_MAX_RATING: float = 5.0
+    __NEIGHBOR_NUMS: int = 50
+    __SIMILARITY_METRIC: str = "pearson"
+    __BLOCK_SIZE: int = 256
+    __RECOMMEND_MOVIE_NUMS: int = 10
+    __EVALUATE_MIN_RATING: float = 4.0
+
+    __evaluation = Evaluation()
+    __ranking = Ranking(block_size=__BLOCK_SIZE)
+    __similarity = Similarity(__NEIGHBOR_NUMS, metric=__SIMILARITY_METRIC, block_size=__BLOCK_SIZE)
+
+    __user_movie_matrix: InteractionMatrix
+    __user_means: np.ndarray
+    __global_mean: float
+    __neighbor_indexes: np.ndarray
+    __similarities: np.ndarray
+    __deviations: sp.csr_matrix
+    __rated: sp.csr_matrix
+    __popularity: PopularityRanking
+
+    def __init__(self, user_nums: Optional[int] = __USER_NUMS) -> None:
+        """
+        User-based collaborative filtering
+
+        Parameters
+        ----------
+        user_nums : Optional[int]
+            number of users to load (all users if None)
+        """
+        super().__init__(dataset_dir="dataset/movielens-10m", user_nums=user_nums, test_size=self.__TEST_SIZE)
+
+    def fit(self, train: pd.DataFrame) -> Self:
+        """
+        Fit the recommendation model
+
+        Parameters
+        ----------
+        train : pd.DataFrame
+            Training dataset
+
+        Returns
+        -------
+        model : Self
+            fitted model
+        """
+        # create sparse user-movie matrix(value=rating)
+        self.__user_movie_matrix = InteractionMatrix(train)
+        matrix = self.__user_movie_matrix.matrix
+        self.__fit_means()
+
+        # top-N similar users of each user (only the neighbours are kept, not the users x users matrix)
+        with self.profiler.phase("similarity"):
+            self.__neighbor_indexes, self.__similarities = self.__similarity.top_neighbors(matrix)
+        self.__prepare_aggregation()
+
+        # most popular movies for users not in the training dataset
+        self.__popularity = PopularityRanking().fit(train)
+
+        return self
+
+    def partial_fit(self, ratings: pd.DataFrame) -> np.ndarray:
+        """
+        Update the fitted model with new ratings without searching the neighbours of all users again
+
+        The neighbours of the users who rated are searched again and merged into the neighbours of the other
+        users (see Similarity.update_neighbors), so the neighbours are approximate until the next fit.
+
+        Parameters
+        ----------
+        ratings : pd.DataFrame
+            new ratings(index, user_id, movie_id, rating, timestamp)
+
+        Returns
+        -------
+        touched_user_ids : np.ndarray
+            users who rated and users who had or now have one of them as a neighbour
+            (with UNKNOWN_USERS if the popularity ranking changed)
+        """
+        if len(ratings) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # a batch may repeat a (user, movie) pair, the last rating wins as in InteractionMatrix.update()
+        ratings = ratings.drop_duplicates(["user_id", "movie_id"], keep="last")
+        user_ids = np.unique(ratings.user_id.to_numpy())
+        previous_ratings = self.__user_movie_matrix.ratings(ratings.user_id.to_numpy(), ratings.movie_id.to_numpy())
+        user_positions, _ = self.__user_movie_matrix.update(ratings)
+        matrix = self.__user_movie_matrix.matrix
+
+        # neighbours of the previous users at their new rows (new users have none yet)
+        neighbor_indexes = np.full((matrix.shape[0], self.__NEIGHBOR_NUMS), -1, dtype=np.int32)
+        similarities = np.zeros((matrix.shape[0], self.__NEIGHBOR_NUMS), dtype=np.float32)
+        neighbor_indexes[user_positions] = np.where(
+            self.__neighbor_indexes >= 0, user_positions[np.maximum(self.__neighbor_indexes, 0)], -1
+        )
+        similarities[user_positions] = self.__similarities
+
+        with self.profiler.phase("similarity"):
+            self.__neighbor_indexes, self.__similarities, affected = self.__similarity.update_neighbors(
+                matrix, neighbor_indexes, similarities, self.__user_movie_matrix.to_user_index(user_ids)
+            )
+        self.__fit_means()
+        self.__prepare_aggregation()
+        first_changed_rank = self.__popularity.update(ratings, previous_ratings)
+        touched_user_ids = self.__user_movie_matrix.user_ids[affected]
+
+        # users not in the training dataset get the most popular movies
+        if first_changed_rank < len(self.__popularity.ranked_movie_ids):
+            touched_user_ids = np.union1d(touched_user_ids, [self.UNKNOWN_USERS])
+
+        return touched_user_ids
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        """
+        Get the fitted state of the model
+
+        Returns
+        -------
+        state : dict[str, np.ndarray]
+            user-movie matrix, mean ratings, neighbours of users and popularity ranking
+        """
+        return {
+            **self.__user_movie_matrix.get_state(),
+            "user_means": self.__user_means,
+            "global_mean": np.array(self.__global_mean),
+            "neighbor_indexes": self.__neighbor_indexes,
+            "similarities": self.__similarities,
+            **self.__popularity.get_state("popularity_"),
+        }
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        """
+        Restore the fitted state of the model
+
+        Parameters
+        ----------
+        state : dict[str, np.ndarray]
+            arrays returned by get_state()
+        """
+        self.__user_movie_matrix = InteractionMatrix.from_state(state)
+        self.__user_means = state["user_means"]
+        self.__global_mean = float(state["global_mean"])
+        self.__neighbor_indexes = state["neighbor_indexes"]
+        self.__similarities = state["similarities"]
+        self.__popularity = PopularityRanking.from_state(state, "popularity_")
+        self.__prepare_aggregation()
+
+    def known_users(self, user_ids: np.ndarray) -> np.ndarray:
+        """
+        Check which users are in the training dataset
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids
+
+        Returns
+        -------
+        known : np.ndarray
+            whether each user is known (the others get the most popular movies)
+        """
+        return self.__user_movie_matrix.to_user_index(np.asarray(user_ids)) >= 0
+
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+        """
+        Recommend movies for a batch of users
+
+        Movies are ranked by the similarity-weighted sum of how much the neighbours liked them
+        (neighbour rating - neighbour mean rating), so movies liked by many close neighbours come first.
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids
+        k : int
+            number of movies to recommend
+
+        Returns
+        -------
+        recommended_movie_ids : np.ndarray
+            (users, k) movie ids (-1 for users without rated neighbours,
+            the most popular movies for users not in the training dataset)
+        """
+        user_indexes = self.__user_movie_matrix.to_user_index(np.asarray(user_ids))
+
+        def scores(start: int, end: int) -> np.ndarray:
+            block_user_indexes = user_indexes[start:end]
+            weighted_sums, weights = self.__aggregate(np.maximum(block_user_indexes, 0))
+            weighted_sums[(weights == 0) | (block_user_indexes < 0)[:, np.newaxis]] = -np.inf
+            return weighted_sums
+
+        # top-k movies for each user, excluding movies that have been previously rated
+        recommended_movie_ids = self.__ranking.top_k(
+            scores,
+            self.__user_movie_matrix.movie_ids,
+            k,
+            seen=self.__user_movie_matrix.rows(user_ids),
+        )
+
+        # users not in the training dataset get the most popular movies
+        recommended_movie_ids[user_indexes < 0] = self.__popularity.top_k(k)
+
+        return recommended_movie_ids
+
+    def predict(self, user_ids: np.ndarray, movie_ids: np.ndarray) -> np.ndarray:
+        """
+        Predict ratings of (user, movie) pairs
+
+        rating = user mean + sum(similarity * (neighbour rating - neighbour mean)) / sum(|similarity|)
+        over the neighbours who rated the movie.
+
+        Parameters
+        ----------
+        user_ids : np.ndarray
+            user ids of the pairs
+        movie_ids : np.ndarray
+            movie ids of the pairs (same length as user_ids)
+
+        Returns
+        -------
+        predicted_ratings : np.ndarray
+            predicted rating of each pair
+        """
+        user_indexes = self.__user_movie_matrix.to_user_index(np.asarray(user_ids))
+        movie_indexes = self.__user_movie_matrix.to_movie_index(np.asarray(movie_ids))
+
+        # unknown users: global mean, unknown movies: user mean
+        predicted_ratings = np.where(
+            user_indexes >= 0, self.__user_means[np.maximum(user_indexes, 0)], self.__global_mean
+        ).astype(np.float32)
+
+        # aggregate neighbours block by block of unique users
+        known = np.flatnonzero((user_indexes >= 0) & (movie_indexes >= 0))
+        unique_user_indexes, inverse = np.unique(user_indexes[known], return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        known, inverse = known[order], inverse[order]
+
+        for start in range(0, len(unique_user_indexes), self.__BLOCK_SIZE):
+            end = min(start + self.__BLOCK_SIZE, len(unique_user_indexes))
+            first, last = np.searchsorted(inverse, [start, end])
+            pairs, rows = known[first:last], inverse[first:last] - start
+
+            weighted_sums, weights = self.__aggregate(unique_user_indexes[start:end])
+            pair_weighted_sums = weighted_sums[rows, movie_indexes[pairs]]
+            pair_weights = weights[rows, movie_indexes[pairs]]
+            rated = pair_weights > 0
+            predicted_ratings[pairs[rated]] += pair_weighted_sums[rated] / pair_weights[rated]
+
+        return np.clip(predicted_ratings, self.__MOVIELENS_MIN_RATING, self.__MOVIELENS_MAX_RATING)
+
+    def __fit_means(self) -> None:
+        """
+        Compute the mean rating of each user, used as the baseline of predicted ratings, and the global mean
+        """
+        matrix = self.__user_movie_matrix.matrix
+        counts = np.diff(matrix.indptr)
+        self.__user_means = (np.asarray(matrix.sum(axis=1)).ravel() / np.maximum(counts, 1)).astype(np.float32)
+        self.__global_mean = float(matrix.data.mean()) if matrix.nnz > 0 else self.__MOVIELENS_MAX_RATING / 2
+
+    def __prepare_aggregation(self) -> None:
+        """
+        Build the matrices aggregated over neighbours: rating deviations from the user mean and rated flags
+        """
+        matrix = self.__user_movie_matrix.matrix
+        counts = np.diff(matrix.indptr)
+        self.__deviations = sp.csr_matrix(
+            (matrix.data - np.repeat(self.__user_means, counts), matrix.indices, matrix.indptr), shape=matrix.shape
+        )
+        self.__rated = sp.csr_matrix(
+            (np.ones(matrix.nnz, dtype=np.float32), matrix.indices, matrix.indptr), shape=matrix.shape
+        )
+
+    def __aggregate(self, user_indexes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Aggregate the ratings of the neighbours of users
+
+        Parameters
+        ----------
+        user_indexes : np.ndarray
+            row indexes of users (a block)
+
+        Returns
+        -------
+        weighted_sums : np.ndarray
+            (users, movies) sum of similarity * (neighbour rating - neighbour mean)
+        weights : np.ndarray
+            (users, movies) sum of |similarity| of the neighbours who rated the movie
+        """
+        matrix = self.__user_movie_matrix.matrix
+
+        # (users, all users) sparse matrix of neighbour similarities
+        neighbor_indexes = self.__neighbor_indexes[user_indexes]
+        valid = neighbor_indexes >= 0
+        neighbors = sp.csr_matrix(
+            (
+                self.__similarities[user_indexes][valid],
+                neighbor_indexes[valid],
+                np.r_[0, np.cumsum(valid.sum(axis=1))],
+            ),
+            shape=(len(user_indexes), matrix.shape[0]),
+        )
+
+        weighted_sums = (neighbors @ self.__deviations).toarray()
+        weights = (abs(neighbors) @ self.__rated).toarray()
+
+        return weighted_sums, weights
+
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
+        """
+        Evaluate the recommendation model
+
+        Parameters
+        ----------
+        test : pd.DataFrame
+            Test dataset
+
+        Returns
+        -------
+        scores : dict[str, float]
+            RMSE, Recall@k and Precision@k
+        """
+        # truly favorite movies of each test user as CSR arrays
+        favorite_test = test[test.rating >= self.__EVALUATE_MIN_RATING]
+        test_user_ids, true_indptr, true_indices = self.__evaluation.group_by_user(
+            favorite_test.user_id.to_numpy(), favorite_test.movie_id.to_numpy()
+        )
+        with self.profiler.phase("predict"):
+            predicted_ratings = self.predict(test.user_id.to_numpy(), test.movie_id.to_numpy())
+        with self.profiler.phase("recommend"):
+            recommended_movie_ids = self.recommend(test_user_ids, self.__RECOMMEND_MOVIE_NUMS)
+
+        # rmse
+        rmse = self.__evaluation.calc_rmse(test.rating.to_list(), predicted_ratings.tolist())
+
+        # recall@k
+        recall_at_k = self.__evaluation.calc_recall_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        )
+
+        # precision@k
+        precision_at_k = self.__evaluation.calc_precision_at_k_array(
+            true_indptr, true_indices, recommended_movie_ids, self.__RECOMMEND_MOVIE_NUMS
+        )
+
+        return {"rmse": rmse, "recall_at_k": recall_at_k, "precision_at_k": precision_at_k}
@@ -0,0 +1,291 @@
+from typing import Optional, Self
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class PopularityRanking:
+    __HALF_LIFE: float = 365 * 24 * 60 * 60
+
+    def __init__(self, half_life: Optional[float] = __HALF_LIFE) -> None:
+        """
+        Global ranking of movies by popularity, shared by all users
+
+        The score of a movie is its number of ratings, each weighted by 0.5 ** (age / half_life),
+        where the age is measured from the newest rating. The ranking is computed once,
+        so the top-k movies of any user cost a binary search over the movies the user has rated.
+
+        Parameters
+        ----------
+            half_life: Optional[float]
+                seconds after which a rating counts half (no decay, i.e. plain counts, if None)
+        """
+        self.half_life = half_life
+
+    def fit(self, ratings: pd.DataFrame) -> Self:
+        """
+        Count the ratings of each movie
+
+        Parameters
+        ----------
+            ratings: pd.DataFrame
+                ratings(index, user_id, movie_id, rating, timestamp)
+
+        Returns
+        -------
+            popularity_ranking: Self
+                fitted ranking
+        """
+        self.movie_ids = np.unique(ratings.movie_id.to_numpy()).astype(np.int32)
+        self.reference_time = float(ratings.timestamp.max()) if len(ratings) > 0 else 0.0
+        self.counts, self.rating_sums, self.scores = self.__accumulate(ratings)
+        self.__rank()
+
+        return self
+
+    @classmethod
+    def from_state(cls, state: dict[str, np.ndarray], prefix: str = "") -> Self:
+        """
+        Restore a ranking from arrays returned by get_state()
+
+        Parameters
+        ----------
+            state: dict[str, np.ndarray]
+                arrays of the ranking (may be memory-mapped)
+            prefix: str
+                prefix of the array names
+
+        Returns
+        -------
+            popularity_ranking: Self
+                restored ranking
+        """
+        half_life = float(state[f"{prefix}half_life"])
+        popularity_ranking = cls(None if np.isnan(half_life) else half_life)
+        popularity_ranking.movie_ids = state[f"{prefix}movie_ids"]
+        popularity_ranking.reference_time = float(state[f"{prefix}reference_time"])
+        popularity_ranking.counts = state[f"{prefix}counts"]
+        popularity_ranking.rating_sums = state[f"{prefix}rating_sums"]
+        popularity_ranking.scores = state[f"{prefix}scores"]
+        popularity_ranking.ranked_movie_ids = state[f"{prefix}ranked_movie_ids"]
+        popularity_ranking.movie_ranks = state[f"{prefix}movie_ranks"]
+
+        return popularity_ranking
+
+    def get_state(self, prefix: str = "") -> dict[str, np.ndarray]:
+        """
+        Get the arrays of the ranking
+
+        Parameters
+        ----------
+            prefix: str
+                prefix of the array names
+
+        Returns
+        -------
+            state: dict[str, np.ndarray]
+                counts, scores and the ranking of the movies
+        """
+        return {
+            f"{prefix}half_life": np.array(np.nan if self.half_life is None else self.half_life),
+            f"{prefix}movie_ids": self.movie_ids,
+            f"{prefix}reference_time": np.array(self.reference_time),
+            f"{prefix}counts": self.counts,
+            f"{prefix}rating_sums": self.rating_sums,
+            f"{prefix}scores": self.scores,
+            f"{prefix}ranked_movie_ids": self.ranked_movie_ids,
+            f"{prefix}movie_ranks": self.movie_ranks,
+        }
+
+    def update(self, ratings: pd.DataFrame, previous_ratings: Optional[np.ndarray] = None) -> int:
+        """
+        Add new ratings, growing the movie ids with new movies
+
+        A re-rating replaces the previous rating of its (user, movie) pair, so its count and rating are removed.
+        The timestamps of previous ratings are not kept, so a re-rated movie loses the mean decayed weight
+        of its ratings, which makes the scores (not the counts and mean ratings) approximate until the next fit.
+
+        Parameters
+        ----------
+            ratings: pd.DataFrame
+                new ratings(index, user_id, movie_id, rating, timestamp) without repeated (user, movie) pairs
+            previous_ratings: Optional[np.ndarray]
+                rating each new rating replaces (NaN for pairs rated for the first time, all new if None)
+
+        Returns
+        -------
+            first_changed_rank: int
+                first rank whose movie changed (the number of movies if the ranking did not change)
+        """
+        if len(ratings) == 0:
+            return len(self.ranked_movie_ids)
+
+        movie_ids = np.union1d(self.movie_ids, ratings.movie_id.to_numpy()).astype(np.int32)
+        positions = np.searchsorted(movie_ids, self.movie_ids)
+
+        # the scores decay to the newest rating before the new ratings are added
+        reference_time = max(self.reference_time, float(ratings.timestamp.max()))
+        decay = self.__decay(np.array(reference_time - self.reference_time))
+        previous = np.zeros((3, len(movie_ids)), dtype=np.float64)
+        previous[:, positions] = self.counts, self.rating_sums, self.scores * decay
+
+        # replaced ratings are removed, each with the mean decayed weight of its movie
+        if previous_ratings is not None:
+            rerated = ~np.isnan(previous_ratings)
+            rerated_indexes = np.searchsorted(movie_ids, ratings.movie_id.to_numpy()[rerated])
+            mean_weights = previous[2, rerated_indexes] / np.maximum(previous[0, rerated_indexes], 1)
+            previous[0] -= np.bincount(rerated_indexes, minlength=len(movie_ids))
+            previous[1] -= np.bincount(
+                rerated_indexes, previous_ratings[rerated].astype(np.float64), minlength=len(movie_ids)
+            )
+            previous[2] = np.maximum(previous[2] - np.bincount(rerated_indexes, mean_weights, len(movie_ids)), 0.0)
+
+        self.movie_ids, self.reference_time = movie_ids, reference_time
+        counts, rating_sums, scores = self.__accumulate(ratings)
+        self.counts = counts + previous[0].astype(np.int64)
+        self.rating_sums = rating_sums + previous[1]
+        self.scores = scores + previous[2]
+        previous_ranked_movie_ids = self.ranked_movie_ids
+        self.__rank()
+
+        # the end of the previous ranking if it is a prefix of the new one
+        length = len(previous_ranked_movie_ids)
+        changed_ranks = np.flatnonzero(previous_ranked_movie_ids != self.ranked_movie_ids[:length])
+
+        return int(changed_ranks[0]) if len(changed_ranks) > 0 else length
+
+    def mean_ratings(self, movie_ids: np.ndarray, prior_nums: float = 0.0) -> np.ndarray:
+        """
+        Get the mean rating of movies
+
+        Parameters
+        ----------
+            movie_ids: np.ndarray
+                movie ids
+            prior_nums: float
+                number of pseudo ratings of the global mean added to each movie (shrinks rarely rated movies)
+
+        Returns
+        -------
+            mean_ratings: np.ndarray
+                mean rating of each movie (global mean for unknown movies)
+        """
+        movie_ids = np.asarray(movie_ids)
+        global_mean = self.rating_sums.sum() / max(int(self.counts.sum()), 1)
+        indexes = np.searchsorted(self.movie_ids, movie_ids)
+        clipped = np.minimum(indexes, max(len(self.movie_ids) - 1, 0))
+        known = (indexes < len(self.movie_ids)) & (self.movie_ids[clipped] == movie_ids)
+
+        mean_ratings = np.full(len(movie_ids), global_mean, dtype=np.float64)
+        counts = self.counts[clipped[known]]
+        mean_ratings[known] = (self.rating_sums[clipped[known]] + prior_nums * global_mean) / (counts + prior_nums)
+
+        return mean_ratings
+
+    def top_k(self, k: int, seen: Optional[sp.csr_matrix] = None, n_users: int = 1) -> np.ndarray:
+        """
+        Select the most popular movies each user has not rated
+
+        The j-th unrated movie in the ranking is at rank j + (number of rated movies with
+        rank - (number of rated movies ranked above) <= j), so one binary search per (user, j) is enough.
+
+        Parameters
+        ----------
+            k: int
+                number of movies to recommend
+            seen: Optional[sp.csr_matrix]
+                (users, movies) matrix of already rated movies, whose columns are the movie ids of this ranking
+            n_users: int
+                number of users (only used if seen is None)
+
+        Returns
+        -------
+            recommended_movie_ids: np.ndarray
+                (users, k) movie ids in descending order of popularity (-1 if fewer than k unrated movies)
+        """
+        movie_nums = len(self.movie_ids)
+        if seen is not None:
+            if seen.shape[1] != movie_nums:
+                raise ValueError(f"seen must have {movie_nums} columns, not {seen.shape[1]}")
+            n_users = seen.shape[0]
+
+        recommended_movie_ids = np.full((n_users, k), -1, dtype=np.int32)
+        positions = np.arange(min(k, movie_nums))
+        if len(positions) == 0:
+            return recommended_movie_ids
+        if seen is None or seen.nnz == 0:
+            recommended_movie_ids[:, : len(positions)] = self.ranked_movie_ids[positions]
+            return recommended_movie_ids
+
+        # ranks of the rated movies, sorted within each user
+        lengths = np.diff(seen.indptr)
+        rows = np.repeat(np.arange(n_users, dtype=np.int64), lengths)
+        seen_ranks = np.sort(rows * movie_nums + self.movie_ranks[seen.indices]) - rows * movie_nums
+
+        # number of unrated movies ranked above each rated movie (non-decreasing within each user)
+        unseen_above = seen_ranks - (np.arange(len(seen_ranks)) - np.repeat(seen.indptr[:-1], lengths))
+        keys = rows * (movie_nums + 1) + unseen_above
+        queries = np.arange(n_users, dtype=np.int64)[:, np.newaxis] * (movie_nums + 1) + positions
+        ranks = positions + np.searchsorted(keys, queries, side="right") - seen.indptr[:-1, np.newaxis]
+
+        recommended_movie_ids[:, : len(positions)] = np.where(
+            ranks < movie_nums, self.ranked_movie_ids[np.minimum(ranks, movie_nums - 1)], -1
+        )
+
+        return recommended_movie_ids
+
+    def __accumulate(self, ratings: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Count, sum and decay the ratings of each movie in one pass over the ratings
+
+        Parameters
+        ----------
+            ratings: pd.DataFrame
+                ratings(index, user_id, movie_id, rating, timestamp) of the movies in self.movie_ids
+
+        Returns
+        -------
+            counts: np.ndarray
+                number of ratings of each movie
+            rating_sums: np.ndarray
+                sum of the ratings of each movie
+            scores: np.ndarray
+                decayed number of ratings of each movie at self.reference_time
+        """
+        movie_indexes = np.searchsorted(self.movie_ids, ratings.movie_id.to_numpy())
+        ages = self.reference_time - ratings.timestamp.to_numpy(dtype=np.float64)
+        movie_nums = len(self.movie_ids)
+
+        counts = np.bincount(movie_indexes, minlength=movie_nums)
+        rating_sums = np.bincount(movie_indexes, ratings.rating.to_numpy(dtype=np.float64), minlength=movie_nums)
+        scores = np.bincount(movie_indexes, self.__decay(ages), minlength=movie_nums)
+
+        return counts, rating_sums, scores
+
+    def __decay(self, ages: np.ndarray) -> np.ndarray:
+        """
+        Weight of ratings by their age
+
+        Parameters
+        ----------
+            ages: np.ndarray
+                seconds since the ratings
+
+        Returns
+        -------
+            weights: np.ndarray
+                0.5 ** (ages / half_life), or 1 if there is no decay
+        """
+        if self.half_life is None:
+            return np.ones_like(ages, dtype=np.float64)
+        return np.exp2(-ages / self.half_life)
+
+    def __rank(self) -> None:
+        """
+        Sort the movies by descending scores (ties by descending counts, then by movie ids)
+        """
+        order = np.lexsort((-self.counts, -self.scores))
+        self.ranked_movie_ids = self.movie_ids[order]
+        self.movie_ranks = np.empty(len(order), dtype=np.int64)
+        self.movie_ranks[order] = np.arange(len(order))
@@ -0,0 +1,106 @@
+from typing import Callable, Optional, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+# dense scores of all users, or a function returning the scores of users[start:end]
+Scores = Union[np.ndarray, Callable[[int, int], Union[np.ndarray, sp.csr_matrix]]]
+
+
+class Ranking:
+    __BLOCK_SIZE: int = 1024
+
+    def __init__(self, block_size: int = __BLOCK_SIZE) -> None:
+        self.block_size = block_size
+
+    def top_k(
+        self,
+        scores: Scores,
+        movie_ids: np.ndarray,
+        k: int,
+        seen: Optional[sp.csr_matrix] = None,
+        n_users: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Select the top-k movies of each user, processing users block by block
+
+        Parameters
+        ----------
+            scores: Scores
+                (users, movies) scores, or a function returning the scores of users[start:end]
+                (-inf or nan means the movie cannot be recommended)
+            movie_ids: np.ndarray
+                movie ids of the score columns
+            k: int
+                number of movies to recommend
+            seen: Optional[sp.csr_matrix]
+                (users, movies) matrix of already rated movies, which are never recommended
+            n_users: Optional[int]
+                number of users (required only if scores is a function and seen is None)
+
+        Returns
+        -------
+            recommended_movie_ids: np.ndarray
+                (users, k) movie ids in descending order of scores (-1 if fewer than k candidates)
+        """
+        if n_users is None:
+            if isinstance(scores, np.ndarray):
+                n_users = scores.shape[0]
+            elif seen is not None:
+                n_users = seen.shape[0]
+            else:
+                raise ValueError("n_users is required if scores is a function and seen is None")
+
+        recommended_movie_ids = np.full((n_users, k), -1, dtype=np.int32)
+        candidate_nums = min(k, len(movie_ids))
+        if candidate_nums == 0:
+            return recommended_movie_ids
+
+        for start in range(0, n_users, self.block_size):
+            end = min(start + self.block_size, n_users)
+            block_scores = self.__block_scores(scores, start, end)
+
+            # movies that have been previously rated are never recommended
+            if seen is not None:
+                block_seen = seen[start:end]
+                rows = np.repeat(np.arange(end - start), np.diff(block_seen.indptr))
+                block_scores[rows, block_seen.indices] = -np.inf
+
+            # partial sort: O(movies) per user instead of O(movies * log(movies))
+            top_indexes = np.argpartition(-block_scores, candidate_nums - 1, axis=1)[:, :candidate_nums]
+            top_scores = np.take_along_axis(block_scores, top_indexes, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top_indexes = np.take_along_axis(top_indexes, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            recommended_movie_ids[start:end, :candidate_nums] = np.where(
+                np.isneginf(top_scores), -1, movie_ids[top_indexes]
+            )
+
+        return recommended_movie_ids
+
+    def __block_scores(self, scores: Scores, start: int, end: int) -> np.ndarray:
+        """
+        Get a writable float copy of the scores of users[start:end]
+
+        Parameters
+        ----------
+            scores: Scores
+                (users, movies) scores, or a function returning the scores of users[start:end]
+            start: int
+                first user index of the block
+            end: int
+                last user index (exclusive) of the block
+
+        Returns
+        -------
+            block_scores: np.ndarray
+                (end - start, movies) scores, nan is replaced with -inf
+        """
+        block = scores[start:end] if isinstance(scores, np.ndarray) else scores(start, end)
+        block_scores = block.copy() if isinstance(block, np.ndarray) else block.toarray()
+        if block_scores.dtype.kind != "f":
+            block_scores = block_scores.astype(np.float64)
+        block_scores[np.isnan(block_scores)] = -np.inf
+
+        return block_scores
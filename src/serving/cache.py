@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+
+class RecommendationCache:
+    def __init__(
+        self, max_size: int = 100_000, ttl: Optional[float] = 300.0, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """
+        LRU cache of the top-k lists of hot users with a time to live
+
+        One list is kept per user, and a request for fewer movies than cached is served by its prefix.
+
+        Parameters
+        ----------
+            max_size: int
+                maximum number of users, the least recently used users are evicted
+            ttl: Optional[float]
+                seconds after which a list expires (never if None)
+            clock: Callable[[], float]
+                clock in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.__entries: OrderedDict[int, tuple[float, int, list[int]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def user_ids(self) -> list[int]:
+        """
+        Get the users whose lists are cached (including expired ones not dropped yet)
+
+        Returns
+        -------
+            user_ids: list[int]
+                user ids from the least to the most recently used
+        """
+        return list(self.__entries)
+
+    def get(self, user_id: int, k: int) -> Optional[list[int]]:
+        """
+        Get the cached top-k list of a user
+
+        Parameters
+        ----------
+            user_id: int
+                user id
+            k: int
+                number of movies
+
+        Returns
+        -------
+            movie_ids: Optional[list[int]]
+                recommended movie ids (None if not cached, expired or cached for fewer movies)
+        """
+        entry = self.__entries.get(user_id)
+        if entry is None:
+            return None
+
+        expires, cached_k, movie_ids = entry
+        if expires < self.clock():
+            del self.__entries[user_id]
+            return None
+        if cached_k < k:
+            return None
+
+        self.__entries.move_to_end(user_id)
+        return movie_ids[:k]
+
+    def put(self, user_id: int, k: int, movie_ids: list[int]) -> None:
+        """
+        Cache the top-k list of a user
+
+        Parameters
+        ----------
+            user_id: int
+                user id
+            k: int
+                number of movies requested (movie_ids may be shorter if there are fewer candidates)
+            movie_ids: list[int]
+                recommended movie ids
+        """
+        if self.max_size <= 0:
+            return
+
+        expires = self.clock() + self.ttl if self.ttl is not None else float("inf")
+        self.__entries[user_id] = (expires, k, movie_ids)
+        self.__entries.move_to_end(user_id)
+        while len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+
+    def invalidate(self, user_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Drop the cached lists of users
+
+        Parameters
+        ----------
+            user_ids: Optional[Iterable[int]]
+                user ids (all users if None)
+        """
+        if user_ids is None:
+            self.__entries.clear()
+            return
+
+        for user_id in user_ids:
+            self.__entries.pop(user_id, None)
@@ -0,0 +1,445 @@
+import argparse
+import asyncio
+import importlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src.base_recommend import BaseRecommend
+from src.serving.cache import RecommendationCache
+from src.serving.stats import ServingStats
+
+
+class RecommendServer:
+    __REASONS: dict[int, str] = {
+        200: "OK",
+        400: "Bad Request",
+        404: "Not Found",
+        405: "Method Not Allowed",
+        500: "Internal Server Error",
+        501: "Not Implemented",
+    }
+    __RATING_DTYPES: dict[str, type] = {
+        "user_id": np.int32,
+        "movie_id": np.int32,
+        "rating": np.float32,
+        "timestamp": np.int64,
+    }
+    __RATING_COLUMNS: tuple[str, ...] = tuple(__RATING_DTYPES)
+
+    def __init__(
+        self,
+        model: BaseRecommend,
+        k: int = 10,
+        max_k: int = 100,
+        max_batch_size: int = 256,
+        max_delay: float = 0.002,
+        cache_size: int = 100_000,
+        cache_ttl: Optional[float] = 300.0,
+    ) -> None:
+        """
+        Asyncio HTTP server answering `GET /recommend?user_id=...&k=...` with a fitted model
+
+        Concurrent requests are coalesced into micro-batches for the vectorized model.recommend(),
+        which runs in a worker thread so that the event loop keeps accepting requests meanwhile.
+        `POST /ratings` with {"ratings": [{"user_id", "movie_id", "rating", "timestamp"}, ...]} updates the model
+        by model.partial_fit() and drops the cached recommendations of the touched users, and of the users
+        unknown to the model if their recommendations changed (501 if the model does not implement partial_fit()).
+        `GET /stats` reports latency percentiles and throughput counters.
+
+        Parameters
+        ----------
+            model: BaseRecommend
+                fitted model
+            k: int
+                number of movies if the request has no k
+            max_k: int
+                largest k accepted (at most model.max_k if the model has one, which bounds its touched users)
+            max_batch_size: int
+                largest number of users passed to model.recommend() at once
+            max_delay: float
+                seconds a request waits for other requests to join its batch
+            cache_size: int
+                number of users whose top-k lists are cached (0 to disable the cache)
+            cache_ttl: Optional[float]
+                seconds after which cached lists expire (never if None)
+        """
+        # a model with max_k only touches the users whose top-max_k lists may have changed
+        model_max_k = getattr(model, "max_k", None)
+        if model_max_k is not None and max_k > model_max_k:
+            raise ValueError(f"max_k must be at most {model_max_k}, the max_k of the model, not {max_k}")
+
+        self.model = model
+        self.k = k
+        self.max_k = max_k
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.cache = RecommendationCache(cache_size, cache_ttl)
+        self.__updatable = type(model).partial_fit is not BaseRecommend.partial_fit
+        self.stats = ServingStats()
+        self.__queue: Optional[asyncio.Queue[tuple[int, int, asyncio.Future[list[int]]]]] = None
+        self.__batcher: Optional[asyncio.Task[None]] = None
+        # one worker: batches run one at a time, the model is not thread safe
+        self.__executor = ThreadPoolExecutor(max_workers=1)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> asyncio.Server:
+        """
+        Start serving on the running event loop
+
+        Parameters
+        ----------
+            host: str
+                host to bind
+            port: int
+                port to bind (0 for any free port)
+
+        Returns
+        -------
+            server: asyncio.Server
+                started server
+        """
+        self.__queue = asyncio.Queue()
+        self.__batcher = asyncio.create_task(self.__batch_loop())
+        return await asyncio.start_server(self.__handle, host, port)
+
+    async def stop(self, server: asyncio.Server) -> None:
+        """
+        Stop serving
+
+        Parameters
+        ----------
+            server: asyncio.Server
+                server returned by start()
+        """
+        server.close()
+        await server.wait_closed()
+        if self.__batcher is not None:
+            self.__batcher.cancel()
+        self.__executor.shutdown(wait=False)
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        """
+        Serve until interrupted
+
+        Parameters
+        ----------
+            host: str
+                host to bind
+            port: int
+                port to bind
+        """
+
+        async def serve_forever() -> None:
+            server = await self.start(host, port)
+            print(f"serving {type(self.model).__name__} on http://{host}:{port}", flush=True)
+            async with server:
+                await server.serve_forever()
+
+        try:
+            asyncio.run(serve_forever())
+        except KeyboardInterrupt:
+            print(json.dumps(self.stats.summary()))
+
+    async def recommend(self, user_id: int, k: int) -> tuple[list[int], bool]:
+        """
+        Recommend movies for a user from the cache or the next micro-batch
+
+        Parameters
+        ----------
+            user_id: int
+                user id
+            k: int
+                number of movies to recommend
+
+        Returns
+        -------
+            movie_ids: list[int]
+                recommended movie ids (empty for users unknown to the model)
+            cache_hit: bool
+                whether the list was cached
+        """
+        cached = self.cache.get(user_id, k)
+        if cached is not None:
+            return cached, True
+
+        if self.__queue is None:
+            raise RuntimeError("the server is not started")
+        future: asyncio.Future[list[int]] = asyncio.get_running_loop().create_future()
+        self.__queue.put_nowait((user_id, k, future))
+
+        return await future, False
+
+    async def update(self, ratings: pd.DataFrame) -> np.ndarray:
+        """
+        Update the model with new ratings and drop the cached recommendations of the touched users
+
+        The update runs in the same worker thread as the batches, so no batch sees a half-updated model.
+        If the recommendations of unknown users changed, the cached users the model does not know are dropped too.
+
+        Parameters
+        ----------
+            ratings: pd.DataFrame
+                new ratings(index, user_id, movie_id, rating, timestamp)
+
+        Returns
+        -------
+            touched_user_ids: np.ndarray
+                users whose recommendations may have changed (with BaseRecommend.UNKNOWN_USERS for unknown users)
+        """
+        cached_user_ids = np.array(self.cache.user_ids(), dtype=np.int64)
+
+        def partial_fit() -> tuple[np.ndarray, np.ndarray]:
+            touched_user_ids = self.model.partial_fit(ratings)
+            if BaseRecommend.UNKNOWN_USERS not in touched_user_ids:
+                return touched_user_ids, cached_user_ids[:0]
+            return touched_user_ids, cached_user_ids[~self.model.known_users(cached_user_ids)]
+
+        touched_user_ids, unknown_user_ids = await asyncio.get_running_loop().run_in_executor(
+            self.__executor, partial_fit
+        )
+        self.cache.invalidate(touched_user_ids.tolist() + unknown_user_ids.tolist())
+        self.stats.record_update(len(ratings))
+
+        return touched_user_ids
+
+    async def __batch_loop(self) -> None:
+        """
+        Collect queued requests into micro-batches and recommend for each batch at once
+        """
+        assert self.__queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = [await self.__queue.get()]
+            # give concurrent requests a moment to join, unless the batch is already full
+            if self.__queue.qsize() + 1 < self.max_batch_size:
+                await asyncio.sleep(self.max_delay)
+            while len(requests) < self.max_batch_size and not self.__queue.empty():
+                requests.append(self.__queue.get_nowait())
+
+            user_ids, inverse = np.unique(np.array([user_id for user_id, _, _ in requests]), return_inverse=True)
+            k = max(k for _, k, _ in requests)
+            self.stats.record_batch(len(user_ids))
+            try:
+                recommended_movie_ids = await loop.run_in_executor(self.__executor, self.model.recommend, user_ids, k)
+            except Exception as e:
+                for _, _, future in requests:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            movie_id_lists = [movie_ids[movie_ids != -1].tolist() for movie_ids in recommended_movie_ids]
+            for user_id, movie_ids in zip(user_ids.tolist(), movie_id_lists):
+                self.cache.put(user_id, k, movie_ids)
+            for (_, request_k, future), index in zip(requests, inverse.tolist()):
+                if not future.done():
+                    future.set_result(movie_id_lists[index][:request_k])
+
+    async def __handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serve the HTTP/1.1 requests of a connection (kept alive unless the client closes it)
+
+        Parameters
+        ----------
+            reader: asyncio.StreamReader
+                reader of the connection
+            writer: asyncio.StreamWriter
+                writer of the connection
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                start = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, version = (lines[0].split(" ") + ["", "", ""])[:3]
+                headers = dict(line.lower().split(": ", 1) for line in lines[1:] if ": " in line)
+
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    length = -1
+                # the end of the body is unknown without a valid length, so the connection is closed after answering
+                if length < 0:
+                    await self.__respond(writer, 400, {"error": "Content-Length must be a non-negative integer"}, False)
+                    break
+
+                try:
+                    payload = await reader.readexactly(length) if length > 0 else b""
+                except asyncio.IncompleteReadError:
+                    # the client closed the connection before sending the whole body
+                    break
+
+                status, body, cache_hit = await self.__route(method, target, payload)
+                if urlsplit(target).path == "/recommend":
+                    self.stats.record(time.perf_counter() - start, cache_hit=cache_hit, error=status != 200)
+
+                keep_alive = headers.get("connection") != "close" and version == "HTTP/1.1"
+                await self.__respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def __respond(self, writer: asyncio.StreamWriter, status: int, body: Any, keep_alive: bool) -> None:
+        """
+        Write a JSON response
+
+        Parameters
+        ----------
+            writer: asyncio.StreamWriter
+                writer of the connection
+            status: int
+                HTTP status code
+            body: Any
+                json serializable response body
+            keep_alive: bool
+                whether the connection is kept open for the next request
+        """
+        payload = json.dumps(body, default=int).encode()
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {self.__REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+            ).encode()
+            + payload
+        )
+        await writer.drain()
+
+    async def __route(self, method: str, target: str, payload: bytes = b"") -> tuple[int, Any, bool]:
+        """
+        Answer a request
+
+        Parameters
+        ----------
+            method: str
+                HTTP method
+            target: str
+                request target (path and query)
+            payload: bytes
+                request body
+
+        Returns
+        -------
+            status: int
+                HTTP status code
+            body: Any
+                json serializable response body
+            cache_hit: bool
+                whether the recommendations were cached
+        """
+        url = urlsplit(target)
+        methods = {"/recommend": "GET", "/stats": "GET", "/ratings": "POST"}
+        if url.path not in methods:
+            return 404, {"error": f"unknown path: {url.path}"}, False
+        if method != methods[url.path]:
+            return 405, {"error": f"unsupported method: {method}"}, False
+        if url.path == "/ratings":
+            return await self.__post_ratings(payload)
+        if url.path == "/stats":
+            return 200, {**self.stats.summary(), "cached_users": len(self.cache)}, False
+
+        query = parse_qs(url.query)
+        try:
+            user_id = int(query["user_id"][0])
+            k = int(query.get("k", [self.k])[0])
+        except (KeyError, ValueError):
+            return 400, {"error": "user_id and k must be integers"}, False
+        if not 1 <= k <= self.max_k:
+            return 400, {"error": f"k must be between 1 and {self.max_k}"}, False
+
+        try:
+            movie_ids, cache_hit = await self.recommend(user_id, k)
+        except Exception as e:
+            return 500, {"error": str(e)}, False
+
+        return 200, {"user_id": user_id, "movie_ids": movie_ids}, cache_hit
+
+    async def __post_ratings(self, payload: bytes) -> tuple[int, Any, bool]:
+        """
+        Update the model with the ratings of a request body
+
+        Parameters
+        ----------
+            payload: bytes
+                JSON {"ratings": [{"user_id", "movie_id", "rating", "timestamp"}, ...]}
+
+        Returns
+        -------
+            status: int
+                HTTP status code
+            body: Any
+                number of ratings and touched users
+            cache_hit: bool
+                always False
+        """
+        if not self.__updatable:
+            return 501, {"error": "model does not support incremental updates"}, False
+
+        try:
+            ratings = pd.DataFrame(json.loads(payload)["ratings"], columns=self.__RATING_COLUMNS)
+            ratings = ratings.astype(self.__RATING_DTYPES)
+        except (ValueError, KeyError, TypeError):
+            return 400, {"error": f"ratings must be a list of {list(self.__RATING_COLUMNS)}"}, False
+
+        if len(ratings) == 0:
+            return 200, {"ratings": 0, "touched_users": 0}, False
+
+        try:
+            touched_user_ids = await self.update(ratings)
+        except Exception as e:
+            return 500, {"error": str(e)}, False
+
+        touched_users = int(np.count_nonzero(touched_user_ids != BaseRecommend.UNKNOWN_USERS))
+        return 200, {"ratings": len(ratings), "touched_users": touched_users}, False
+
+
+if __name__ == "__main__":
+    models = {
+        "random": "src.models.random.model.Random",
+        "popularity": "src.models.popularity.model.Popularity",
+        "association_rules": "src.models.association_rules.model.AssociationRules",
+        "user_based_collaborative_filtering": "src.models.user_based_collaborative_filtering.model.UserBasedCF",
+        "als": "src.models.als.model.ALS",
+        "content_based": "src.models.content_based.model.ContentBased",
+    }
+
+    parser = argparse.ArgumentParser(description="serve recommendations of a fitted model over HTTP")
+    parser.add_argument("model", choices=list(models))
+    parser.add_argument("--model-dir", help="load the model saved in this directory instead of fitting it")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-delay", type=float, default=0.002, help="seconds a request waits for its batch")
+    parser.add_argument("--cache-size", type=int, default=100_000)
+    parser.add_argument("--cache-ttl", type=float, default=300.0)
+    args = parser.parse_args()
+
+    module_name, class_name = models[args.model].rsplit(".", 1)
+    model_class = getattr(importlib.import_module(module_name), class_name)
+    if args.model_dir is not None:
+        model = model_class.load(args.model_dir)
+    else:
+        model = model_class()
+        model.fit(model.get_dataset()[0])
+
+    RecommendServer(
+        model,
+        k=args.k,
+        max_batch_size=args.max_batch_size,
+        max_delay=args.max_delay,
+        cache_size=args.cache_size,
+        cache_ttl=args.cache_ttl,
+    ).serve(args.host, args.port)
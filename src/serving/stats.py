@@ -0,0 +1,99 @@
+import time
+from typing import Callable
+
+import numpy as np
+
+
+class ServingStats:
+    def __init__(self, window: int = 100_000, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        Latency percentiles and throughput counters of a server
+
+        Latencies are kept in a ring buffer of the latest `window` requests.
+
+        Parameters
+        ----------
+            window: int
+                number of latest requests for the percentiles
+            clock: Callable[[], float]
+                clock in seconds
+        """
+        self.clock = clock
+        self.started = clock()
+        self.requests = 0
+        self.errors = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.batched_users = 0
+        self.updates = 0
+        self.updated_ratings = 0
+        self.__latencies = np.zeros(window, dtype=np.float64)
+
+    def record(self, latency: float, cache_hit: bool = False, error: bool = False) -> None:
+        """
+        Record a request
+
+        Parameters
+        ----------
+            latency: float
+                seconds from the request to the response
+            cache_hit: bool
+                whether the response was cached
+            error: bool
+                whether the request failed
+        """
+        self.__latencies[self.requests % len(self.__latencies)] = latency
+        self.requests += 1
+        self.cache_hits += cache_hit
+        self.errors += error
+
+    def record_batch(self, user_nums: int) -> None:
+        """
+        Record a batch passed to the model
+
+        Parameters
+        ----------
+            user_nums: int
+                number of users in the batch
+        """
+        self.batches += 1
+        self.batched_users += user_nums
+
+    def record_update(self, rating_nums: int) -> None:
+        """
+        Record an update of the model
+
+        Parameters
+        ----------
+            rating_nums: int
+                number of new ratings
+        """
+        self.updates += 1
+        self.updated_ratings += rating_nums
+
+    def summary(self) -> dict[str, float]:
+        """
+        Summarize the recorded requests
+
+        Returns
+        -------
+            summary: dict[str, float]
+                counters, p50/p99 latency (msec), throughput (requests/sec), cache hit rate and mean batch size
+        """
+        latencies = self.__latencies[: min(self.requests, len(self.__latencies))]
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000 if len(latencies) > 0 else (0.0, 0.0)
+        elapsed = max(self.clock() - self.started, 1e-9)
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "cache_hits": self.cache_hits,
+            "batches": self.batches,
+            "updates": self.updates,
+            "updated_ratings": self.updated_ratings,
+            "p50_ms": float(p50),
+            "p99_ms": float(p99),
+            "qps": self.requests / elapsed,
+            "cache_hit_rate": self.cache_hits / max(self.requests, 1),
+            "mean_batch_size": self.batched_users / max(self.batches, 1),
+        }
@@ -0,0 +1,233 @@
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+
+class Similarity:
+    __BLOCK_SIZE: int = 256
+    __METRICS: tuple[str, ...] = ("cosine", "pearson")
+
+    def __init__(self, neighbor_nums: int = 50, metric: str = "pearson", block_size: int = __BLOCK_SIZE) -> None:
+        """
+        Top-N neighbour search by sparse cosine / pearson similarity
+
+        Parameters
+        ----------
+            neighbor_nums: int
+                number of neighbours kept for each row
+            metric: str
+                "cosine" (raw values) or "pearson" (cosine of values centred by the mean of each row)
+            block_size: int
+                number of rows whose similarities are computed at once,
+                memory is bounded by (block_size, rows) similarities
+        """
+        if metric not in self.__METRICS:
+            raise ValueError(f"metric must be one of {self.__METRICS}, not {metric!r}")
+
+        self.neighbor_nums = neighbor_nums
+        self.metric = metric
+        self.block_size = block_size
+
+    def top_neighbors(self, matrix: sp.csr_matrix) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Find the most similar rows of each row
+
+        Only rows with positive similarity are neighbours, and a row is never its own neighbour.
+
+        Parameters
+        ----------
+            matrix: sp.csr_matrix
+                (rows, columns) matrix, e.g. user-movie ratings (missing values are not stored)
+
+        Returns
+        -------
+            neighbor_indexes: np.ndarray
+                (rows, neighbor_nums) int32 row indexes in descending order of similarity (-1 if fewer neighbours)
+            similarities: np.ndarray
+                (rows, neighbor_nums) float32 similarities (0.0 for missing neighbours)
+        """
+        normalized = self.normalize(matrix)
+        normalized_t = normalized.T.tocsr()
+        row_nums = normalized.shape[0]
+        neighbor_nums = min(self.neighbor_nums, max(row_nums - 1, 0))
+
+        neighbor_indexes = np.full((row_nums, self.neighbor_nums), -1, dtype=np.int32)
+        similarities = np.zeros((row_nums, self.neighbor_nums), dtype=np.float32)
+        if neighbor_nums == 0:
+            return neighbor_indexes, similarities
+
+        for start in range(0, row_nums, self.block_size):
+            end = min(start + self.block_size, row_nums)
+
+            # (block rows, rows) similarities as one sparse product, the only O(rows) buffer
+            block = (normalized[start:end] @ normalized_t).toarray()
+            block[np.arange(end - start), np.arange(start, end)] = -np.inf
+
+            neighbor_indexes[start:end], similarities[start:end] = self.__select(None, block, neighbor_nums)
+
+        return neighbor_indexes, similarities
+
+    def update_neighbors(
+        self, matrix: sp.csr_matrix, neighbor_indexes: np.ndarray, similarities: np.ndarray, rows: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Update the neighbours found by top_neighbors() after some rows of the matrix changed
+
+        The neighbours of the changed rows are searched again, and since similarities are symmetric,
+        the changed rows are merged into the neighbours of the other rows from the same (changed rows, rows)
+        similarities, instead of the (rows, rows) similarities of a full search.
+        Rows whose similarity to a changed row dropped keep their other neighbours, so a row out of
+        their neighbours might be closer until the next full search.
+
+        Parameters
+        ----------
+            matrix: sp.csr_matrix
+                (rows, columns) matrix after the change (rows must be aligned with the neighbours)
+            neighbor_indexes: np.ndarray
+                (rows, neighbor_nums) neighbours before the change
+            similarities: np.ndarray
+                (rows, neighbor_nums) similarities before the change
+            rows: np.ndarray
+                indexes of the changed rows
+
+        Returns
+        -------
+            neighbor_indexes: np.ndarray
+                (rows, neighbor_nums) updated neighbours
+            similarities: np.ndarray
+                (rows, neighbor_nums) updated similarities
+            affected_rows: np.ndarray
+                sorted indexes of the changed rows and the rows that had or now have a changed row as a neighbour
+        """
+        rows = np.unique(rows)
+        row_nums = matrix.shape[0]
+        neighbor_indexes = np.array(neighbor_indexes, dtype=np.int32)
+        similarities = np.array(similarities, dtype=np.float32)
+        changed = np.zeros(row_nums, dtype=np.bool_)
+        changed[rows] = True
+
+        # similarities to the changed rows are stale: drop them, they are merged again below
+        stale = (neighbor_indexes >= 0) & changed[np.maximum(neighbor_indexes, 0)]
+        affected = changed | stale.any(axis=1)
+        stale_rows = np.flatnonzero(stale.any(axis=1) & ~changed)
+        neighbor_indexes[stale], similarities[stale] = -1, 0.0
+        neighbor_indexes[stale_rows], similarities[stale_rows] = self.__select(
+            neighbor_indexes[stale_rows], self.__candidate_similarities(neighbor_indexes, similarities, stale_rows)
+        )
+
+        normalized = self.normalize(matrix)
+        normalized_t = normalized.T.tocsr()
+        for start in range(0, len(rows), self.block_size):
+            block_rows = rows[start : start + self.block_size]
+            block = (normalized[block_rows] @ normalized_t).toarray()
+            block[np.arange(len(block_rows)), block_rows] = -np.inf
+
+            # neighbours of the changed rows from scratch
+            neighbor_indexes[block_rows], similarities[block_rows] = self.__select(None, block)
+
+            # the changed rows are candidates of the other rows they are similar to
+            others = np.flatnonzero(~changed & (block > 0).any(axis=0))
+            neighbor_indexes[others], similarities[others] = self.__select(
+                np.hstack([neighbor_indexes[others], np.broadcast_to(block_rows, (len(others), len(block_rows)))]),
+                np.hstack([self.__candidate_similarities(neighbor_indexes, similarities, others), block[:, others].T]),
+            )
+            # only the rows where a changed row made it into the neighbours are affected
+            affected[others] |= np.isin(neighbor_indexes[others], block_rows).any(axis=1)
+
+        return neighbor_indexes, similarities, np.flatnonzero(affected)
+
+    def __candidate_similarities(
+        self, neighbor_indexes: np.ndarray, similarities: np.ndarray, rows: np.ndarray
+    ) -> np.ndarray:
+        """
+        Get the similarities of the current neighbours of rows as candidates (-inf for missing neighbours)
+
+        Parameters
+        ----------
+            neighbor_indexes: np.ndarray
+                (rows, neighbor_nums) neighbours
+            similarities: np.ndarray
+                (rows, neighbor_nums) similarities
+            rows: np.ndarray
+                row indexes
+
+        Returns
+        -------
+            candidate_similarities: np.ndarray
+                (len(rows), neighbor_nums) similarities
+        """
+        return np.where(neighbor_indexes[rows] >= 0, similarities[rows], -np.inf)
+
+    def __select(
+        self, candidate_indexes: Optional[np.ndarray], candidate_similarities: np.ndarray, neighbor_nums: int = -1
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Select the most similar candidates of each row
+
+        Parameters
+        ----------
+            candidate_indexes: Optional[np.ndarray]
+                (rows, candidates) row indexes of the candidates (column positions if None)
+            candidate_similarities: np.ndarray
+                (rows, candidates) similarities of the candidates
+            neighbor_nums: int
+                number of neighbours to select (self.neighbor_nums if negative)
+
+        Returns
+        -------
+            neighbor_indexes: np.ndarray
+                (rows, self.neighbor_nums) int32 candidates with positive similarity in descending order (-1 if fewer)
+            similarities: np.ndarray
+                (rows, self.neighbor_nums) float32 similarities (0.0 for missing neighbours)
+        """
+        row_nums, candidate_nums = candidate_similarities.shape
+        neighbor_nums = min(self.neighbor_nums if neighbor_nums < 0 else neighbor_nums, candidate_nums)
+        neighbor_indexes = np.full((row_nums, self.neighbor_nums), -1, dtype=np.int32)
+        similarities = np.zeros((row_nums, self.neighbor_nums), dtype=np.float32)
+        if neighbor_nums == 0 or row_nums == 0:
+            return neighbor_indexes, similarities
+
+        top_indexes = np.argpartition(-candidate_similarities, neighbor_nums - 1, axis=1)[:, :neighbor_nums]
+        top_similarities = np.take_along_axis(candidate_similarities, top_indexes, axis=1)
+        order = np.argsort(-top_similarities, axis=1, kind="stable")
+        top_indexes = np.take_along_axis(top_indexes, order, axis=1)
+        top_similarities = np.take_along_axis(top_similarities, order, axis=1)
+        if candidate_indexes is not None:
+            top_indexes = np.take_along_axis(candidate_indexes, top_indexes, axis=1)
+
+        positive = top_similarities > 0
+        neighbor_indexes[:, :neighbor_nums] = np.where(positive, top_indexes, -1)
+        similarities[:, :neighbor_nums] = np.where(positive, top_similarities, 0.0)
+
+        return neighbor_indexes, similarities
+
+    def normalize(self, matrix: sp.csr_matrix) -> sp.csr_matrix:
+        """
+        Normalize rows so that their dot products are the similarities
+
+        Parameters
+        ----------
+            matrix: sp.csr_matrix
+                (rows, columns) matrix
+
+        Returns
+        -------
+            normalized: sp.csr_matrix
+                (rows, columns) float32 matrix of unit rows (empty rows stay empty)
+        """
+        matrix = sp.csr_matrix(matrix, dtype=np.float32)
+        counts = np.diff(matrix.indptr)
+        data = matrix.data.copy()
+
+        if self.metric == "pearson":
+            sums = np.add.reduceat(data, matrix.indptr[:-1][counts > 0]) if len(data) > 0 else np.zeros(0)
+            means = np.zeros(len(counts), dtype=np.float32)
+            means[counts > 0] = sums / counts[counts > 0]
+            data -= np.repeat(means, counts)
+
+        norms = np.sqrt(np.bincount(np.repeat(np.arange(len(counts)), counts), weights=data**2, minlength=len(counts)))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            data = np.nan_to_num(data / np.repeat(norms, counts)).astype(np.float32)
+
+        return sp.csr_matrix((data, matrix.indices.copy(), matrix.indptr.copy()), shape=matrix.shape)
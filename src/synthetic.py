@@ -0,0 +1,381 @@
+import argparse
+import os
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.features import CategoricalFeatures
+from src.utils.column_cache import ColumnCache
+
+
+class SyntheticDataset:
+    __GENRES: list[str] = [
+        "Action",
+        "Adventure",
+        "Animation",
+        "Children",
+        "Comedy",
+        "Crime",
+        "Documentary",
+        "Drama",
+        "Fantasy",
+        "Film-Noir",
+        "Horror",
+        "IMAX",
+        "Musical",
+        "Mystery",
+        "Romance",
+        "Sci-Fi",
+        "Thriller",
+        "War",
+        "Western",
+    ]
+    __FIRST_TIMESTAMP: int = 789652009
+    __LAST_TIMESTAMP: int = 1231131736
+    __MIN_USER_RATINGS: int = 20
+    __BLOCK_USER_NUMS: int = 10_000
+
+    def __init__(
+        self,
+        user_nums: int,
+        movie_nums: int = 10_000,
+        mean_ratings: int = 140,
+        tag_nums: int = 95_000,
+        cluster_nums: int = 20,
+        seed: int = 0,
+    ) -> None:
+        """
+        MovieLens-shaped synthetic dataset
+
+        Movie popularity is zipfian, user activity is log-normal (at least 20 ratings like MovieLens,
+        if the catalog is much larger than that), and users belong to taste clusters in which they find
+        and rate movies higher, so that collaborative models have a signal to learn.
+
+        Parameters
+        ----------
+            user_nums: int
+                number of users
+            movie_nums: int
+                number of movies
+            mean_ratings: int
+                mean number of ratings per user (density = mean_ratings / movie_nums)
+            tag_nums: int
+                number of tag applications
+            cluster_nums: int
+                number of taste clusters
+            seed: int
+                random seed
+        """
+        self.user_nums = user_nums
+        self.movie_nums = movie_nums
+        self.mean_ratings = mean_ratings
+        self.tag_nums = tag_nums
+        self.cluster_nums = cluster_nums
+        self.seed = seed
+
+    def movies(self) -> pd.DataFrame:
+        """
+        Generate movies
+
+        Returns
+        -------
+            movies: pd.DataFrame
+                movies(index, movie_id, title, genres) with genres joined by "|" as in movies.dat
+        """
+        rng = np.random.default_rng([self.seed, 0])
+        movie_ids = np.arange(1, self.movie_nums + 1)
+        years = rng.integers(1915, 2009, self.movie_nums)
+        genres, _ = self.movie_features(with_tags=False)
+
+        return pd.DataFrame(
+            {
+                "movie_id": movie_ids.astype(np.int32),
+                "title": [f"Movie {movie_id} ({year})" for movie_id, year in zip(movie_ids, years)],
+                "genres": ["|".join(values) for values in genres.to_lists()],
+            }
+        )
+
+    def movie_features(self, with_tags: bool = True) -> tuple[CategoricalFeatures, Optional[CategoricalFeatures]]:
+        """
+        Generate the genres and tags of movies as integer codes, the same as Dataset.movie_features() reads back
+
+        Parameters
+        ----------
+            with_tags: bool
+                also encode the tag applications (generating them is the slow part)
+
+        Returns
+        -------
+            genres: CategoricalFeatures
+                1 ~ 3 genres per movie, the first one shared by the taste cluster of the movie
+            tags: Optional[CategoricalFeatures]
+                tags applied to each movie (None if with_tags is False)
+        """
+        rng = np.random.default_rng([self.seed, 3])
+        movie_ids = np.arange(1, self.movie_nums + 1, dtype=np.int32)
+
+        # (movies, 3) genre codes, cut to the number of genres of each movie
+        genre_nums = rng.integers(1, 4, self.movie_nums)
+        codes = np.empty((self.movie_nums, 3), dtype=np.int64)
+        codes[:, 0] = (movie_ids - 1) % self.cluster_nums % len(self.__GENRES)
+        codes[:, 1:] = rng.integers(0, len(self.__GENRES), (self.movie_nums, 2))
+        kept = np.arange(3) < genre_nums[:, np.newaxis]
+
+        # a genre drawn twice for a movie is kept once
+        kept[:, 1] &= codes[:, 1] != codes[:, 0]
+        kept[:, 2] &= (codes[:, 2] != codes[:, 0]) & (codes[:, 2] != codes[:, 1])
+        genres = CategoricalFeatures.from_pairs(
+            movie_ids,
+            np.broadcast_to(movie_ids[:, np.newaxis], codes.shape)[kept],
+            np.asarray(self.__GENRES)[codes[kept]],
+        )
+
+        if not with_tags:
+            return genres, None
+
+        tags = self.tags()
+        return genres, CategoricalFeatures.from_pairs(movie_ids, tags.movie_id.to_numpy(), tags.tag.to_numpy())
+
+    def ratings(self) -> pd.DataFrame:
+        """
+        Generate ratings
+
+        Returns
+        -------
+            ratings: pd.DataFrame
+                ratings(index, user_id, movie_id, rating, timestamp) sorted by user_id as in ratings.dat
+        """
+        return pd.concat(list(self.iter_ratings()), ignore_index=True)
+
+    def iter_ratings(self) -> Iterator[pd.DataFrame]:
+        """
+        Generate ratings block by block of users, so that datasets larger than memory can be streamed
+
+        Each block has its own random stream, so the ratings only depend on the seed.
+
+        Returns
+        -------
+            chunks: Iterator[pd.DataFrame]
+                ratings(index, user_id, movie_id, rating, timestamp) of consecutive blocks of users
+        """
+        # movies are shared by all blocks
+        rng = np.random.default_rng([self.seed, 1])
+        popularity = np.cumsum(1.0 / np.arange(1, self.movie_nums + 1) ** 0.8)
+        cluster_movie_nums = max(self.movie_nums // self.cluster_nums, 1)
+        cluster_popularity = np.cumsum(1.0 / np.arange(1, cluster_movie_nums + 1))
+        quality = rng.normal(3.4, 0.5, self.movie_nums)
+
+        for block, first_user_index in enumerate(range(0, self.user_nums, self.__BLOCK_USER_NUMS)):
+            user_nums = min(self.__BLOCK_USER_NUMS, self.user_nums - first_user_index)
+            rng = np.random.default_rng([self.seed, 1, block])
+
+            # log-normal activity with the requested mean
+            activity = rng.lognormal(np.log(self.mean_ratings) - 0.5, 1.0, user_nums).astype(np.int64)
+            activity = np.clip(activity, min(self.__MIN_USER_RATINGS, self.movie_nums), self.movie_nums)
+            user_clusters = rng.integers(0, self.cluster_nums, user_nums)
+
+            # candidates are oversampled, since popular movies are drawn several times for a user
+            user_indexes = np.repeat(np.arange(user_nums), 2 * activity)
+
+            # 30% of the movies are drawn from the global popularity, the rest from the cluster of the user
+            movie_indexes = np.searchsorted(popularity, rng.random(len(user_indexes)) * popularity[-1])
+            in_cluster = rng.random(len(user_indexes)) < 0.7
+            movie_indexes[in_cluster] = np.minimum(
+                np.searchsorted(cluster_popularity, rng.random(in_cluster.sum()) * cluster_popularity[-1])
+                * self.cluster_nums
+                + user_clusters[user_indexes[in_cluster]],
+                self.movie_nums - 1,
+            )
+
+            # a user rates a movie once (sorted by user, then movie)
+            keys = user_indexes * self.movie_nums + movie_indexes
+            keys.sort()
+            user_indexes, movie_indexes = np.divmod(keys[np.r_[True, keys[1:] != keys[:-1]]], self.movie_nums)
+
+            # a random subset of activity movies of each user is kept
+            order = np.argsort(user_indexes + rng.random(len(user_indexes)))
+            user_starts = np.searchsorted(user_indexes, np.arange(user_nums))
+            kept = np.empty(len(order), dtype=np.bool_)
+            kept[order] = np.arange(len(order)) - user_starts[user_indexes] < activity[user_indexes]
+            user_indexes, movie_indexes = user_indexes[kept], movie_indexes[kept]
+            in_cluster = movie_indexes % self.cluster_nums == user_clusters[user_indexes]
+
+            # rating = movie quality + user bias + cluster affinity + noise, in 0.5 steps
+            bias = rng.normal(0.0, 0.4, user_nums)
+            scores = quality[movie_indexes] + bias[user_indexes] + 0.6 * in_cluster
+            ratings = np.clip(np.round((scores + rng.normal(0.0, 0.8, len(user_indexes))) * 2) / 2, 0.5, 5.0)
+
+            # each user rates movies over a period starting at a random point of the MovieLens period
+            period = self.__LAST_TIMESTAMP - self.__FIRST_TIMESTAMP
+            starts = rng.integers(self.__FIRST_TIMESTAMP, self.__LAST_TIMESTAMP, user_nums)
+            durations = rng.exponential(period / 20, user_nums)
+            timestamps = np.minimum(
+                starts[user_indexes] + rng.random(len(user_indexes)) * durations[user_indexes], self.__LAST_TIMESTAMP
+            )
+
+            yield pd.DataFrame(
+                {
+                    "user_id": (first_user_index + user_indexes + 1).astype(np.int32),
+                    "movie_id": (movie_indexes + 1).astype(np.int32),
+                    "rating": ratings.astype(np.float32),
+                    "timestamp": timestamps.astype(np.int32),
+                }
+            )
+
+    def tags(self) -> pd.DataFrame:
+        """
+        Generate tag applications
+
+        Returns
+        -------
+            tags: pd.DataFrame
+                tags(index, user_id, movie_id, tag, timestamp), tags are zipfian over a vocabulary
+        """
+        return pd.concat(list(self.iter_tags()), ignore_index=True)
+
+    def iter_tags(self) -> Iterator[pd.DataFrame]:
+        """
+        Generate tag applications block by block
+
+        Returns
+        -------
+            chunks: Iterator[pd.DataFrame]
+                tags(index, user_id, movie_id, tag, timestamp) of consecutive blocks of tag applications
+        """
+        vocabulary_nums = max(self.tag_nums // 6, 1)
+        tag_popularity = np.cumsum(1.0 / np.arange(1, vocabulary_nums + 1))
+        movie_popularity = np.cumsum(1.0 / np.arange(1, self.movie_nums + 1) ** 0.8)
+
+        block_tag_nums = self.__BLOCK_USER_NUMS * self.__MIN_USER_RATINGS
+        for block, first_tag_index in enumerate(range(0, self.tag_nums, block_tag_nums)):
+            tag_nums = min(block_tag_nums, self.tag_nums - first_tag_index)
+            rng = np.random.default_rng([self.seed, 2, block])
+            movie_indexes = np.searchsorted(movie_popularity, rng.random(tag_nums) * movie_popularity[-1])
+            tag_indexes = np.searchsorted(tag_popularity, rng.random(tag_nums) * tag_popularity[-1])
+
+            yield pd.DataFrame(
+                {
+                    "user_id": rng.integers(1, self.user_nums + 1, tag_nums).astype(np.int32),
+                    "movie_id": (movie_indexes + 1).astype(np.int32),
+                    "tag": np.char.add("tag", tag_indexes.astype(str)),
+                    "timestamp": rng.integers(self.__FIRST_TIMESTAMP, self.__LAST_TIMESTAMP, tag_nums).astype(np.int32),
+                }
+            )
+
+    def write(self, dataset_dir: str, binary: bool = False) -> None:
+        """
+        Stream the dataset to disk block by block
+
+        movies.dat and tags.dat are written in the MovieLens "::" format. The ratings are written to ratings.dat,
+        or with binary=True, to memory-mappable .npy columns (ratings/ in the dataset directory) read by Dataset.
+
+        Parameters
+        ----------
+            dataset_dir: str
+                output directory
+            binary: bool
+                write the ratings as .npy columns instead of ratings.dat
+        """
+        os.makedirs(dataset_dir, exist_ok=True)
+
+        movies = self.movies()
+        self.__write(
+            os.path.join(dataset_dir, "movies.dat"),
+            [[(movies.movie_id.astype(str) + "::" + movies.title + "::" + movies.genres).to_numpy(dtype=str)]],
+        )
+
+        tag_lines = (
+            [
+                self.__format_ints(tags.user_id.to_numpy()),
+                self.__format_ints(tags.movie_id.to_numpy()),
+                tags.tag.to_numpy(dtype=str),
+                self.__format_ints(tags.timestamp.to_numpy()),
+            ]
+            for tags in self.iter_tags()
+        )
+        self.__write(os.path.join(dataset_dir, "tags.dat"), tag_lines)
+
+        if binary:
+            ColumnCache(dataset_dir).save_chunks("ratings", {"ratings": self.iter_ratings()})
+            return
+
+        # ratings are 0.5 ~ 5.0 in 0.5 steps, formatted as in ratings.dat ("4", "4.5")
+        rating_texts = np.array([f"{rating / 2:g}" for rating in range(11)])
+        rating_lines = (
+            [
+                self.__format_ints(ratings.user_id.to_numpy()),
+                self.__format_ints(ratings.movie_id.to_numpy()),
+                rating_texts[np.round(ratings.rating.to_numpy() * 2).astype(np.int64)],
+                self.__format_ints(ratings.timestamp.to_numpy()),
+            ]
+            for ratings in self.iter_ratings()
+        )
+        self.__write(os.path.join(dataset_dir, "ratings.dat"), rating_lines)
+
+    def __write(self, path: str, chunks: Iterable[list[np.ndarray]]) -> None:
+        """
+        Write chunks of columns as "::" separated lines
+
+        Parameters
+        ----------
+            path: str
+                output path
+            chunks: Iterable[list[np.ndarray]]
+                columns of each chunk of lines as str arrays or uint8 character matrices (0 for padding),
+                consumed one chunk at a time so that only one chunk is in memory
+        """
+        with open(path, "wb") as f:
+            for columns in chunks:
+                # (lines, characters) matrix of the chunk, padding is dropped when flattened
+                matrices = []
+                for i, column in enumerate(columns):
+                    if column.dtype.kind == "U":
+                        column = np.frombuffer(column.astype(bytes).tobytes(), dtype=np.uint8).reshape(len(column), -1)
+                    separator = b"::" if i < len(columns) - 1 else b"\n"
+                    matrices += [
+                        column,
+                        np.frombuffer(separator * len(column), dtype=np.uint8).reshape(len(column), -1),
+                    ]
+                lines = np.hstack(matrices).ravel()
+                f.write(lines[lines != 0].tobytes())
+
+    def __format_ints(self, values: np.ndarray) -> np.ndarray:
+        """
+        Format non-negative integers as decimal characters
+
+        Parameters
+        ----------
+            values: np.ndarray
+                non-negative integers
+
+        Returns
+        -------
+            characters: np.ndarray
+                (values, digits) uint8 matrix of ASCII digits, right-aligned with 0 for padding
+        """
+        values = np.asarray(values, dtype=np.int64)
+        digit_nums = len(str(int(values.max()))) if len(values) > 0 else 1
+        digits = values[:, np.newaxis] // 10 ** np.arange(digit_nums - 1, -1, -1, dtype=np.int64) % 10
+
+        # leading zeros are padding, except the last digit of 0
+        leading = np.cumsum(digits, axis=1) == 0
+        leading[:, -1] = False
+
+        return np.where(leading, 0, digits + ord("0")).astype(np.uint8)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="write a MovieLens-shaped synthetic dataset")
+    parser.add_argument("dataset_dir")
+    parser.add_argument("--users", type=int, default=72_000)
+    parser.add_argument("--movies", type=int, default=10_000)
+    parser.add_argument("--mean-ratings", type=int, default=140)
+    parser.add_argument("--tags", type=int, default=95_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--binary", action="store_true", help="write the ratings as .npy columns")
+    args = parser.parse_args()
+
+    SyntheticDataset(args.users, args.movies, args.mean_ratings, args.tags, seed=args.seed).write(
+        args.dataset_dir, binary=args.binary
+    )
@@ -0,0 +1,240 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from typing import Any, BinaryIO, Iterable
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnCache:
+    __VERSION: int = 1
+    __MANIFEST: str = "manifest.json"
+
+    def __init__(self, cache_dir: str) -> None:
+        self.cache_dir = cache_dir
+
+    def key(self, source_paths: list[str], **params: Any) -> str:
+        """
+        Build a cache key from the source files and parameters
+
+        The key changes whenever a source file is replaced or modified (size/mtime)
+        or any of the parameters changes.
+
+        Parameters
+        ----------
+            source_paths: list[str]
+                paths of the source files
+            params: Any
+                json serializable parameters affecting the cached data
+
+        Returns
+        -------
+            key: str
+                cache key
+        """
+        sources = []
+        for path in source_paths:
+            stat = os.stat(path)
+            sources.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+
+        payload = json.dumps({"version": self.__VERSION, "sources": sources, "params": params}, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    def exists(self, key: str) -> bool:
+        """
+        Check whether the cache of the key exists
+
+        Parameters
+        ----------
+            key: str
+                cache key
+
+        Returns
+        -------
+            exists: bool
+                whether the cache exists
+        """
+        return os.path.isfile(os.path.join(self.cache_dir, key, self.__MANIFEST))
+
+    def save(self, key: str, frames: dict[str, pd.DataFrame]) -> None:
+        """
+        Save dataframes column by column
+
+        Numeric and string columns are stored as .npy files which can be memory-mapped,
+        other columns (e.g. lists) are pickled. The index is not stored.
+
+        Parameters
+        ----------
+            key: str
+                cache key
+            frames: dict[str, pd.DataFrame]
+                dataframes to cache
+        """
+        self.save_chunks(key, {name: [df] for name, df in frames.items()})
+
+    def save_chunks(self, key: str, frames: dict[str, Iterable[pd.DataFrame]]) -> None:
+        """
+        Save dataframes given as chunks of rows, streaming numeric columns to disk
+
+        Numeric columns are appended to their .npy files chunk by chunk, so a dataframe larger than memory
+        can be cached. Other columns are collected in memory and saved as in save().
+
+        Parameters
+        ----------
+            key: str
+                cache key
+            frames: dict[str, Iterable[pd.DataFrame]]
+                chunks of the dataframes to cache (all chunks of a dataframe have the same columns)
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # write into a temporary directory first so that a broken cache is never visible
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            manifest = {name: self.__save_frame(os.path.join(tmp_dir, name), chunks) for name, chunks in frames.items()}
+            with open(os.path.join(tmp_dir, self.__MANIFEST), "w") as f:
+                json.dump(manifest, f)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        target_dir = os.path.join(self.cache_dir, key)
+        shutil.rmtree(target_dir, ignore_errors=True)
+        os.replace(tmp_dir, target_dir)
+
+    def load(self, key: str) -> dict[str, pd.DataFrame]:
+        """
+        Load cached dataframes, memory-mapping the .npy columns
+
+        Parameters
+        ----------
+            key: str
+                cache key
+
+        Returns
+        -------
+            frames: dict[str, pd.DataFrame]
+                cached dataframes
+        """
+        key_dir = os.path.join(self.cache_dir, key)
+        with open(os.path.join(key_dir, self.__MANIFEST)) as f:
+            manifest = json.load(f)
+
+        frames = {}
+        for name, columns in manifest.items():
+            data = {}
+            for i, col in enumerate(columns):
+                path = os.path.join(key_dir, name, f"{i}.npy")
+                if col["pickled"]:
+                    data[col["name"]] = np.load(path, allow_pickle=True)
+                else:
+                    # copy-on-write mapping: pages are read lazily and the file is never modified
+                    data[col["name"]] = np.asarray(np.load(path, mmap_mode="c"))
+            frames[name] = pd.DataFrame(data, copy=False)
+
+        return frames
+
+    def clear(self) -> None:
+        """
+        Remove all caches
+        """
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def __save_frame(self, frame_dir: str, chunks: Iterable[pd.DataFrame]) -> list[dict[str, Any]]:
+        """
+        Save the chunks of a dataframe column by column
+
+        Parameters
+        ----------
+            frame_dir: str
+                directory of the dataframe
+            chunks: Iterable[pd.DataFrame]
+                chunks of rows of the dataframe
+
+        Returns
+        -------
+            columns: list[dict[str, Any]]
+                name and pickled flag of each column (manifest of the dataframe)
+        """
+        os.makedirs(frame_dir)
+        columns: list[dict[str, Any]] = []
+        files: dict[int, tuple[BinaryIO, np.dtype]] = {}
+        lengths: dict[int, int] = {}
+        collected: dict[int, list[pd.Series]] = {}
+
+        try:
+            for chunk in chunks:
+                if not columns:
+                    columns = [{"name": col, "pickled": False} for col in chunk.columns]
+                for i, col in enumerate(chunk.columns):
+                    # numeric columns are streamed, the kind of a column is decided by its first chunk
+                    if i not in files and i not in collected:
+                        if chunk[col].dtype.kind in "biuf":
+                            files[i] = (open(os.path.join(frame_dir, f"{i}.npy"), "wb"), np.dtype(chunk[col].dtype))
+                            self.__write_header(*files[i], 0)
+                            lengths[i] = 0
+                        else:
+                            collected[i] = []
+
+                    if i in files:
+                        f, dtype = files[i]
+                        f.write(np.ascontiguousarray(chunk[col].to_numpy(dtype=dtype)).tobytes())
+                        lengths[i] += len(chunk)
+                    else:
+                        collected[i].append(chunk[col])
+        finally:
+            # the header is rewritten with the final length (numpy leaves room in it for the shape to grow)
+            for i, (f, dtype) in files.items():
+                f.seek(0)
+                self.__write_header(f, dtype, lengths[i])
+                f.close()
+
+        for i, series in collected.items():
+            values, pickled = self.__to_array(pd.concat(series, ignore_index=True))
+            np.save(os.path.join(frame_dir, f"{i}.npy"), values, allow_pickle=pickled)
+            columns[i]["pickled"] = pickled
+
+        return columns
+
+    def __write_header(self, f: BinaryIO, dtype: np.dtype, length: int) -> None:
+        """
+        Write the .npy header of a 1-D array
+
+        Parameters
+        ----------
+            f: BinaryIO
+                file at the position of the header
+            dtype: np.dtype
+                dtype of the array
+            length: int
+                length of the array
+        """
+        header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (length,)}
+        np.lib.format.write_array_header_1_0(f, header)
+
+    def __to_array(self, column: pd.Series) -> tuple[np.ndarray, bool]:
+        """
+        Convert a column to an array that can be saved as .npy
+
+        Parameters
+        ----------
+            column: pd.Series
+                column to convert
+
+        Returns
+        -------
+            values: np.ndarray
+                converted array
+            pickled: bool
+                whether the array needs pickle
+        """
+        if column.dtype.kind in "biuf":
+            return column.to_numpy(), False
+
+        if column.map(lambda x: isinstance(x, str)).all():
+            return column.to_numpy(dtype=str), False
+
+        return column.to_numpy(dtype=object), True
@@ -0,0 +1,109 @@
+import csv
+import io
+from typing import Iterator, Optional
+
+import pandas as pd
+
+
+class DatReader:
+    __DELIMITER: bytes = b"::"
+    # single-byte replacement for "::" so that the C engine of pandas can be used (ASCII unit separator)
+    __C_DELIMITER: bytes = b"\x1f"
+    __CHUNK_BYTES: int = 64 * 1024 * 1024
+
+    def __init__(self, encoding: str = "latin-1", chunk_bytes: int = __CHUNK_BYTES) -> None:
+        self.encoding = encoding
+        self.chunk_bytes = chunk_bytes
+
+    def read(self, path: str, names: list[str], dtype: Optional[dict[str, str]] = None) -> pd.DataFrame:
+        """
+        Read a "::" delimited file at once
+
+        Parameters
+        ----------
+            path: str
+                path of the file
+            names: list[str]
+                column names
+            dtype: Optional[dict[str, str]]
+                dtype of each column
+
+        Returns
+        -------
+            df: pd.DataFrame
+                parsed dataset
+        """
+        chunks = list(self.iter_chunks(path, names, dtype))
+        if len(chunks) == 0:
+            return pd.DataFrame({name: pd.Series(dtype=(dtype or {}).get(name)) for name in names})
+
+        return pd.concat(chunks, ignore_index=True)
+
+    def iter_chunks(
+        self, path: str, names: list[str], dtype: Optional[dict[str, str]] = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Read a "::" delimited file chunk by chunk
+
+        Each chunk holds about `chunk_bytes` bytes of complete lines, so memory stays bounded
+        regardless of the file size.
+
+        Parameters
+        ----------
+            path: str
+                path of the file
+            names: list[str]
+                column names
+            dtype: Optional[dict[str, str]]
+                dtype of each column
+
+        Returns
+        -------
+            chunks: Iterator[pd.DataFrame]
+                parsed chunks of the dataset
+        """
+        for buffer in self.__iter_buffers(path):
+            yield pd.read_csv(
+                io.BytesIO(buffer.replace(self.__DELIMITER, self.__C_DELIMITER)),
+                sep=self.__C_DELIMITER.decode(),
+                names=names,
+                dtype=dtype,
+                header=None,
+                encoding=self.encoding,
+                quoting=csv.QUOTE_NONE,
+                engine="c",
+            )
+
+    def __iter_buffers(self, path: str) -> Iterator[bytes]:
+        """
+        Read raw bytes of a file which always end at a line boundary
+
+        Parameters
+        ----------
+            path: str
+                path of the file
+
+        Returns
+        -------
+            buffers: Iterator[bytes]
+                raw bytes of complete lines
+        """
+        remainder = b""
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(self.chunk_bytes)
+                if not block:
+                    break
+
+                block = remainder + block
+                last_newline = block.rfind(b"\n")
+                if last_newline == -1:
+                    remainder = block
+                    continue
+
+                remainder = block[last_newline + 1 :]
+                yield block[: last_newline + 1]
+
+        # the last line may not end with a newline
+        if remainder.strip():
+            yield remainder
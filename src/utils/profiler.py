@@ -0,0 +1,193 @@
+import cProfile
+import functools
+import json
+import os
+import pstats
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Profiler:
+    __PROFILE_FUNCTION_NUMS: int = 20
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        report_path: Optional[str] = None,
+        trace_memory: bool = False,
+        profile_phases: Optional[list[str]] = None,
+    ) -> None:
+        """
+        Phase timers with memory and cProfile instrumentation, reported as JSON lines
+
+        Phases can be nested, and are named by their path (e.g. "fit/similarity").
+        A disabled profiler does nothing in its phases.
+
+        Parameters
+        ----------
+            enabled: bool
+                record phases
+            report_path: Optional[str]
+                JSON lines file which reports are appended to (printed if None)
+            trace_memory: bool
+                trace the peak memory allocated in each phase with tracemalloc (slows down allocations)
+            profile_phases: Optional[list[str]]
+                paths of the phases to run under cProfile (e.g. ["fit"])
+        """
+        self.enabled = enabled
+        self.report_path = report_path
+        self.trace_memory = trace_memory
+        self.profile_phases = profile_phases or []
+        self.records: list[dict[str, Any]] = []
+        self.__stack: list[dict[str, Any]] = []
+
+    @classmethod
+    def from_env(cls) -> "Profiler":
+        """
+        Create a profiler from environment variables
+
+        RECOMMEND_PROFILE: report path ("-" to print), enables the profiler
+        RECOMMEND_TRACE_MEMORY: "1" to trace memory
+        RECOMMEND_PROFILE_PHASES: comma separated paths of the phases to run under cProfile
+
+        Returns
+        -------
+            profiler: Profiler
+                profiler (disabled if RECOMMEND_PROFILE is not set)
+        """
+        report_path = os.environ.get("RECOMMEND_PROFILE")
+        phases = os.environ.get("RECOMMEND_PROFILE_PHASES")
+
+        return cls(
+            enabled=report_path is not None,
+            report_path=None if report_path in (None, "-") else report_path,
+            trace_memory=os.environ.get("RECOMMEND_TRACE_MEMORY") == "1",
+            profile_phases=phases.split(",") if phases else None,
+        )
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Record the wall time, CPU time and memory of a phase
+
+        Parameters
+        ----------
+            name: str
+                name of the phase
+        """
+        if not self.enabled:
+            yield
+            return
+
+        path = "/".join([frame["name"] for frame in self.__stack] + [name])
+        frame: dict[str, Any] = {"name": name, "peak": 0}
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            # the parent keeps the peak reached so far, since the peak is reset for this phase
+            if self.__stack:
+                self.__stack[-1]["peak"] = max(self.__stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+            frame["start_memory"] = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.__stack.append(frame)
+
+        profile = cProfile.Profile() if path in self.profile_phases else None
+        start, cpu_start = time.perf_counter(), time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            record: dict[str, Any] = {
+                "phase": path,
+                "time": time.perf_counter() - start,
+                "cpu_time": time.process_time() - cpu_start,
+                "max_rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10,
+            }
+            self.__stack.pop()
+            if self.trace_memory:
+                peak = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+                record["peak_mib"] = (peak - frame["start_memory"]) / 2**20
+                if self.__stack:
+                    self.__stack[-1]["peak"] = max(self.__stack[-1]["peak"], peak)
+                    tracemalloc.reset_peak()
+                else:
+                    tracemalloc.stop()
+            if profile is not None:
+                record["profile"] = self.__top_functions(profile)
+            self.records.append(record)
+
+    def timed(self, name: str) -> Callable[[F], F]:
+        """
+        Decorate a function to record each call as a phase
+
+        Parameters
+        ----------
+            name: str
+                name of the phase
+
+        Returns
+        -------
+            decorator: Callable[[F], F]
+                decorator
+        """
+
+        def decorator(function: F) -> F:
+            @functools.wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.phase(name):
+                    return function(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorator
+
+    def report(self, **fields: Any) -> None:
+        """
+        Write the recorded phases with other fields (e.g. metrics) as one JSON line, and clear the records
+
+        Parameters
+        ----------
+            fields: Any
+                json serializable fields of the report
+        """
+        if not self.enabled:
+            return
+
+        line = json.dumps({**fields, "phases": self.records}, default=float)
+        self.records = []
+        if self.report_path is None:
+            print(line)
+            return
+
+        with open(self.report_path, "a") as f:
+            f.write(line + "\n")
+
+    def __top_functions(self, profile: cProfile.Profile) -> list[dict[str, Any]]:
+        """
+        Summarize the most expensive functions of a profile
+
+        Parameters
+        ----------
+            profile: cProfile.Profile
+                finished profile
+
+        Returns
+        -------
+            functions: list[dict[str, Any]]
+                function, calls, tottime and cumtime of the functions with the largest cumulative time
+        """
+        stats = pstats.Stats(profile)
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)  # type: ignore[attr-defined]
+
+        return [
+            {"function": f"{filename}:{line}({function})", "calls": calls, "tottime": tottime, "cumtime": cumtime}
+            for (filename, line, function), (_, calls, tottime, cumtime, _) in rows[: self.__PROFILE_FUNCTION_NUMS]
+        ]
@@ -0,0 +1,45 @@
+import pathlib
+
+import pytest
+
+MOVIES = b"""1::Toy Story (1995)::Adventure|Animation|Children|Comedy|Fantasy
+2::Jumanji (1995)::Adventure|Children|Fantasy
+3::"Great" Escape, The (1963)::Action|Drama|War
+4::Am\xe9lie (2001)::Comedy|Romance
+5::Heat (1995)::Action|Crime|Thriller
+"""
+
+RATINGS = b"""1::1::5::838985046
+1::2::3.5::838983525
+1::3::4::838983392
+2::1::0.5::868245777
+2::4::4.5::868244562
+2::5::3::868245920
+3::2::4::1136075494
+3::3::2::1136075500
+3::5::5::1136075520
+4::1::4::1162157545
+4::4::1::1162157550
+"""
+
+TAGS = b"""15::1::Pixar::1215184630
+20::1::pixar::1188263867
+20::4::"quirky"::1188263880
+21::5::Al Pacino::1188263881
+"""
+
+
+@pytest.fixture
+def movielens_dir(tmp_path: pathlib.Path) -> str:
+    """
+    Write a tiny dataset in the MovieLens 10M format
+
+    Returns
+    -------
+        dataset_dir: str
+            directory containing movies.dat, ratings.dat and tags.dat
+    """
+    (tmp_path / "movies.dat").write_bytes(MOVIES)
+    (tmp_path / "ratings.dat").write_bytes(RATINGS)
+    (tmp_path / "tags.dat").write_bytes(TAGS)
+    return str(tmp_path)
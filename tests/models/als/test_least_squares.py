@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from src.models.als.least_squares import LeastSquares
+
+
+class TestLeastSquares:
+    __matrix = sp.random(30, 20, density=0.3, format="csr", random_state=0, dtype=np.float32) * 5
+    __fixed = np.random.default_rng(0).standard_normal((20, 4)).astype(np.float32)
+
+    @pytest.mark.parametrize("n_jobs, block_entries", [(1, 1), (1, 1 << 18), (4, 16)])
+    def test_solve(self, n_jobs: int, block_entries: int) -> None:
+        actual = LeastSquares(0.1, n_jobs=n_jobs, block_entries=block_entries).solve(self.__matrix, self.__fixed, 1.5)
+
+        assert actual.shape == (30, 4) and actual.dtype == np.float32
+        for row in range(30):
+            columns = self.__matrix[row].indices
+            if len(columns) == 0:
+                np.testing.assert_array_equal(actual[row], 0.0)
+                continue
+            fixed = self.__fixed[columns].astype(np.float64)
+            gram = fixed.T @ fixed + 0.1 * len(columns) * np.eye(4)
+            expected = np.linalg.solve(gram, fixed.T @ (self.__matrix[row].data - 1.5))
+            np.testing.assert_allclose(actual[row], expected, rtol=1e-3, atol=1e-4)
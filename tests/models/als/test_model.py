@@ -0,0 +1,50 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
+from src.models.als.model import ALS
+
+
+class TestALS:
+    # ratings of rank 1: users of the first half like the first half of movies, and so on
+    __user_ids, __movie_ids = (ids.ravel() for ids in np.meshgrid(np.arange(40), np.arange(40), indexing="ij"))
+    __train = pd.DataFrame(
+        {
+            "user_id": __user_ids,
+            "movie_id": __movie_ids,
+            "rating": np.where((__user_ids < 20) == (__movie_ids < 20), 4.5, 1.5),
+            "timestamp": 0,
+        }
+    )[np.random.default_rng(0).random(1600) < 0.5]
+
+    def test_fit(self) -> None:
+        model = ALS(n_jobs=2).fit(self.__train)
+
+        predicted_ratings = model.predict(self.__train.user_id.to_numpy(), self.__train.movie_id.to_numpy())
+
+        assert len(model.iteration_times) == 10
+        assert np.sqrt(np.mean((predicted_ratings - self.__train.rating.to_numpy()) ** 2)) < 0.3
+
+    def test_recommend(self) -> None:
+        model = ALS().fit(self.__train)
+
+        actual = model.recommend(np.array([0, 39, 100]), 3)
+
+        seen = set(self.__train[self.__train.user_id == 0].movie_id)
+        assert all(movie_id < 20 and movie_id not in seen for movie_id in actual[0])
+        assert all(movie_id >= 20 for movie_id in actual[1])
+        # the unknown user 100 gets the most rated movies
+        counts = self.__train.movie_id.value_counts()
+        np.testing.assert_array_equal(
+            actual[2], sorted(counts.index, key=lambda movie_id: (-counts[movie_id], movie_id))[:3]
+        )
+
+    def test_save_load(self, tmp_path: pathlib.Path) -> None:
+        model = ALS().fit(self.__train)
+        model.save(str(tmp_path / "model"))
+        loaded = ALS.load(str(tmp_path / "model"))
+
+        np.testing.assert_array_equal(loaded.recommend(np.arange(40), 5), model.recommend(np.arange(40), 5))
+        np.testing.assert_array_equal(
+            loaded.predict(np.arange(40), np.arange(40)), model.predict(np.arange(40), np.arange(40))
+        )
@@ -0,0 +1,62 @@
+import warnings
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from mlxtend.frequent_patterns import apriori, association_rules
+from src.models.association_rules.eclat import Eclat
+
+
+class TestEclat:
+    __METRICS: list[str] = [
+        "antecedent support",
+        "consequent support",
+        "support",
+        "confidence",
+        "lift",
+        "leverage",
+        "conviction",
+        "zhangs_metric",
+    ]
+
+    def __binary_matrix(self, seed: int) -> sp.csr_matrix:
+        rng = np.random.default_rng(seed)
+        return sp.csr_matrix(rng.random((300, 20)) < np.linspace(0.05, 0.6, 20))
+
+    @pytest.mark.parametrize(["min_support", "max_len"], [(0.05, None), (0.02, 3), (0.2, 1)])
+    def test_frequent_itemsets(self, min_support: float, max_len: Optional[int]) -> None:
+        binary_matrix = self.__binary_matrix(0)
+        columns = np.arange(100, 120)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            expected = apriori(pd.DataFrame(binary_matrix.toarray(), columns=columns), min_support, True, max_len)
+        actual = Eclat(min_support, max_len).frequent_itemsets(binary_matrix, columns=columns)
+
+        assert actual.itemsets.map(len).to_list() == expected.itemsets.map(len).to_list()
+        assert dict(zip(actual.itemsets, actual.support)) == pytest.approx(
+            dict(zip(expected.itemsets, expected.support))
+        )
+
+    @pytest.mark.parametrize(["metric", "min_threshold"], [("lift", 1.0), ("confidence", 0.5), ("conviction", 1.1)])
+    def test_association_rules(self, metric: str, min_threshold: float) -> None:
+        eclat = Eclat(0.05)
+        frequent_itemsets = eclat.frequent_itemsets(self.__binary_matrix(1))
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            expected = association_rules(frequent_itemsets, metric=metric, min_threshold=min_threshold)
+        actual = eclat.association_rules(frequent_itemsets, metric=metric, min_threshold=min_threshold)
+
+        assert len(actual) > 0
+        expected_rules = {
+            (a, c): v for a, c, v in zip(expected.antecedents, expected.consequents, expected[self.__METRICS].values)
+        }
+        actual_rules = {
+            (a, c): v for a, c, v in zip(actual.antecedents, actual.consequents, actual[self.__METRICS].values)
+        }
+        assert actual_rules.keys() == expected_rules.keys()
+        for key, values in actual_rules.items():
+            np.testing.assert_allclose(values, expected_rules[key])
@@ -0,0 +1,105 @@
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from src.models.association_rules.eclat import Eclat
+from src.models.association_rules.incremental_itemsets import IncrementalItemsets
+
+
+class TestIncrementalItemsets:
+    def test_update(self) -> None:
+        rng = np.random.default_rng(0)
+        dense = rng.random((300, 20)) < np.linspace(0.05, 0.4, 20)
+        itemsets = IncrementalItemsets(min_support=0.1).fit(sp.csr_matrix(dense))
+        pd.testing.assert_frame_equal(
+            itemsets.frequent_itemsets(), Eclat(min_support=0.1).frequent_itemsets(sp.csr_matrix(dense))
+        )
+
+        for _ in range(10):
+            # some transactions change and some are added
+            rows = rng.choice(len(dense), 20, replace=False)
+            previous_rows = sp.csr_matrix(dense[rows])
+            dense[rows] = rng.random((20, 20)) < np.linspace(0.4, 0.05, 20)
+            dense = np.vstack([dense, rng.random((5, 20)) < 0.3])
+            rows = np.r_[rows, np.arange(len(dense) - 5, len(dense))]
+            previous_rows = sp.vstack([previous_rows, sp.csr_matrix((5, 20), dtype=np.bool_)])
+
+            itemsets.update(sp.csr_matrix(dense), rows, previous_rows)
+
+            pd.testing.assert_frame_equal(
+                itemsets.frequent_itemsets(), Eclat(min_support=0.1).frequent_itemsets(sp.csr_matrix(dense))
+            )
+        assert 1 < itemsets.mine_nums < 11
+
+    def test_negative_border(self) -> None:
+        dense = np.random.default_rng(1).random((200, 12)) < np.linspace(0.1, 0.6, 12)
+        itemsets = IncrementalItemsets(min_support=0.1).fit(sp.csr_matrix(dense))
+        assert itemsets.frequent.all()
+
+        # the negative border is counted at the first update
+        itemsets.update(sp.csr_matrix(dense), np.array([], dtype=np.int64), sp.csr_matrix((0, 12), dtype=np.bool_))
+
+        # the infrequent itemsets whose subsets are all frequent, and the number of transactions containing them
+        frequent = set(Eclat(min_support=0.1).frequent_itemsets(sp.csr_matrix(dense)).itemsets)
+        expected = {
+            frozenset(itemset): int(dense[:, list(itemset)].all(axis=1).sum())
+            for length in range(1, 13)
+            for itemset in combinations(range(12), length)
+            if frozenset(itemset) not in frequent
+            and all(frozenset(subset) in frequent for subset in combinations(itemset, length - 1) if subset)
+        }
+        border = itemsets.itemsets[~itemsets.frequent]
+        actual = {
+            frozenset(border.indices[start:end]): int(count)
+            for start, end, count in zip(border.indptr[:-1], border.indptr[1:], itemsets.counts[~itemsets.frequent])
+        }
+
+        assert actual == expected
+
+    def test_association_rules(self) -> None:
+        rng = np.random.default_rng(2)
+        dense = rng.random((200, 10)) < np.linspace(0.2, 0.6, 10)
+        itemsets = IncrementalItemsets(min_support=0.05).fit(sp.csr_matrix(dense))
+        previous_rows = sp.csr_matrix(dense[:20])
+        dense[:20] = rng.random((20, 10)) < 0.5
+        itemsets.update(sp.csr_matrix(dense), np.arange(20), previous_rows)
+
+        antecedents, consequents, lifts, keys = itemsets.association_rules(min_lift=1.0)
+
+        # same rules in the same order as Eclat
+        eclat = Eclat(min_support=0.05)
+        expected = eclat.association_rules(itemsets.frequent_itemsets(), metric="lift", min_threshold=1.0)
+        assert [frozenset(row.indices.tolist()) for row in antecedents] == expected.antecedents.tolist()
+        assert [frozenset(row.indices.tolist()) for row in consequents] == expected.consequents.tolist()
+        np.testing.assert_array_equal(lifts, expected.lift)
+        assert len(lifts) > 0
+        assert len(np.unique(keys, axis=0)) == len(keys)
+
+    def test_remap_items(self) -> None:
+        dense = np.array([[1, 1, 0], [1, 1, 0], [1, 0, 1]], dtype=np.bool_)
+        itemsets = IncrementalItemsets(min_support=0.5).fit(sp.csr_matrix(dense))
+
+        # a new item is inserted at index 1 and becomes frequent
+        itemsets.remap_items(np.array([0, 2, 3]), 4)
+        previous_rows = sp.csr_matrix(np.insert(dense, 1, False, axis=1))
+        mined = itemsets.update(sp.csr_matrix(np.insert(dense, 1, True, axis=1)), np.arange(3), previous_rows)
+
+        assert mined
+        assert set(itemsets.frequent_itemsets().itemsets) == {
+            frozenset({0}),
+            frozenset({1}),
+            frozenset({2}),
+            frozenset({0, 1}),
+            frozenset({0, 2}),
+            frozenset({1, 2}),
+            frozenset({0, 1, 2}),
+        }
+
+    def test_state(self) -> None:
+        binary_matrix = sp.csr_matrix(np.random.default_rng(0).random((50, 8)) < 0.4)
+        itemsets = IncrementalItemsets(min_support=0.2).fit(binary_matrix)
+
+        restored = IncrementalItemsets.from_state(itemsets.get_state(), min_support=0.2)
+
+        pd.testing.assert_frame_equal(restored.frequent_itemsets(), itemsets.frequent_itemsets())
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+from src.models.association_rules.model import AssociationRules
+
+
+class TestAssociationRules:
+    # users 1 ~ 4 like movies 10 and 20 together, user 5 has seen only movie 10
+    __train = pd.DataFrame(
+        {
+            "user_id": [1, 1, 2, 2, 3, 3, 4, 4, 4, 5],
+            "movie_id": [10, 20, 10, 20, 10, 20, 10, 20, 30, 10],
+            "rating": [5.0, 4.5, 4.0, 5.0, 4.5, 4.0, 5.0, 4.0, 1.0, 5.0],
+            "timestamp": [0, 1, 0, 1, 0, 1, 0, 1, 2, 0],
+        }
+    )
+
+    def test_recommend(self) -> None:
+        model = AssociationRules().fit(self.__train)
+
+        actual = model.recommend(np.array([5, 1, 100]), 2)
+
+        # the unknown user 100 gets the most rated movies
+        np.testing.assert_array_equal(actual, [[20, -1], [-1, -1], [10, 20]])
+        assert model.recommend_dict(np.array([5]), 2) == {5: [20]}
+
+    def test_partial_fit(self) -> None:
+        # the newer ratings of users 4 and 5, and a new user 6
+        new_ratings = pd.DataFrame(
+            {
+                "user_id": [5, 4, 6, 6],
+                "movie_id": [30, 30, 10, 40],
+                "rating": [4.5, 5.0, 5.0, 4.0],
+                "timestamp": [3, 3, 3, 4],
+            }
+        )
+        model = AssociationRules().fit(self.__train)
+
+        touched_user_ids = model.partial_fit(new_ratings)
+
+        expected = AssociationRules().fit(pd.concat([self.__train, new_ratings], ignore_index=True))
+        user_ids = np.arange(1, 8)
+        np.testing.assert_array_equal(model.recommend(user_ids, 3), expected.recommend(user_ids, 3))
+        # movie 30 became frequent with new rules, so every user may be recommended differently,
+        # and the most popular movies of unknown users changed
+        np.testing.assert_array_equal(touched_user_ids, [AssociationRules.UNKNOWN_USERS, 1, 2, 3, 4, 5, 6])
+
+    def test_partial_fit_touched_users(self) -> None:
+        # users 8 and 9 like movies 50 and 60 together, apart from the other users
+        cluster = pd.DataFrame({"user_id": [8, 8, 9, 9], "movie_id": [50, 60, 50, 60], "rating": 5.0, "timestamp": 0})
+        train = pd.concat([self.__train, cluster], ignore_index=True)
+        model = AssociationRules().fit(train)
+
+        # a low rating changes no itemset, and a new user only scales the lifts of all rules
+        # (both change the most popular movies of unknown users)
+        unknown_users = AssociationRules.UNKNOWN_USERS
+        low_rating = pd.DataFrame({"user_id": [5], "movie_id": [30], "rating": [2.0], "timestamp": [3]})
+        np.testing.assert_array_equal(model.partial_fit(low_rating), [unknown_users, 5])
+        new_user = pd.DataFrame({"user_id": [7], "movie_id": [40], "rating": [1.0], "timestamp": [4]})
+        np.testing.assert_array_equal(model.partial_fit(new_user), [unknown_users, 7])
+
+        # new fans of movie 50 change the rules of movies 50 and 60 (now weaker than those of movies 10 and 20),
+        # which users 1 ~ 5 do not match
+        fans = pd.DataFrame({"user_id": [10, 11, 12, 13], "movie_id": 50, "rating": 4.5, "timestamp": 5})
+        np.testing.assert_array_equal(model.partial_fit(fans), [unknown_users, 8, 9, 10, 11, 12, 13])
+
+        expected = AssociationRules().fit(pd.concat([train, low_rating, new_user, fans], ignore_index=True))
+        user_ids = np.arange(1, 14)
+        np.testing.assert_array_equal(model.recommend(user_ids, 3), expected.recommend(user_ids, 3))
+
+    def test_partial_fit_repeated_pairs(self) -> None:
+        # user 5 rates movie 30 twice in one batch, the last rating wins
+        new_ratings = pd.DataFrame({"user_id": [5, 5], "movie_id": [30, 30], "rating": [4.5, 5.0], "timestamp": [3, 4]})
+        model = AssociationRules().fit(self.__train)
+
+        model.partial_fit(new_ratings)
+        model.partial_fit(new_ratings.iloc[:1])
+
+        expected = AssociationRules().fit(pd.concat([self.__train, new_ratings.iloc[:1]], ignore_index=True))
+        user_ids = np.arange(1, 7)
+        np.testing.assert_array_equal(model.recommend(user_ids, 3), expected.recommend(user_ids, 3))
+        state = model.get_state()
+        assert len(state["newest_timestamps"]) == len(state["newest_indices"])
+        assert state["newest_data"].max() <= 5.0
+
+    def test_partial_fit_downgrade(self) -> None:
+        # user 4 rated 6 movies highly, and movie 10 is not one of the 5 newest inputs of the rules
+        train = pd.concat(
+            [
+                self.__train,
+                pd.DataFrame({"user_id": 4, "movie_id": [50, 60, 70, 80], "rating": 4.5, "timestamp": [3, 4, 5, 6]}),
+            ],
+            ignore_index=True,
+        )
+        model = AssociationRules().fit(train)
+
+        # user 4 no longer likes movie 80, so movie 10 becomes one of the newest inputs again
+        new_ratings = pd.DataFrame({"user_id": [4], "movie_id": [80], "rating": [1.0], "timestamp": [7]})
+        model.partial_fit(new_ratings)
+
+        expected = AssociationRules().fit(pd.concat([train.iloc[:-1], new_ratings], ignore_index=True))
+        state, expected_state = model.get_state(), expected.get_state()
+        for name in ["newest_indptr", "newest_indices", "newest_data", "newest_timestamps"]:
+            np.testing.assert_array_equal(state[name], expected_state[name])
+        user_ids = np.arange(1, 6)
+        np.testing.assert_array_equal(model.recommend(user_ids, 3), expected.recommend(user_ids, 3))
+
+    def test_partial_fit_tied_timestamps(self) -> None:
+        # user 6 rates six movies at once, listed in descending order of movie id
+        train = pd.concat(
+            [
+                self.__train,
+                pd.DataFrame({"user_id": 6, "movie_id": [60, 50, 40, 30, 20, 10], "rating": 5.0, "timestamp": 0}),
+            ],
+            ignore_index=True,
+        )
+        new_ratings = pd.DataFrame({"user_id": [6], "movie_id": [70], "rating": [1.0], "timestamp": [0]})
+        model = AssociationRules().fit(train)
+
+        model.partial_fit(new_ratings)
+
+        # the same input movies as a fit, whatever the order of the ratings
+        expected = AssociationRules().fit(pd.concat([train, new_ratings], ignore_index=True))
+        for name in ["newest_indices", "newest_indptr", "newest_timestamps"]:
+            np.testing.assert_array_equal(model.get_state()[name], expected.get_state()[name])
+        user_ids = np.arange(1, 8)
+        np.testing.assert_array_equal(model.recommend(user_ids, 3), expected.recommend(user_ids, 3))
+
+    def test_partial_fit_empty(self) -> None:
+        model = AssociationRules().fit(self.__train)
+
+        actual = model.partial_fit(self.__train.iloc[:0])
+
+        assert actual.dtype == np.int64 and len(actual) == 0
+        np.testing.assert_array_equal(
+            model.recommend(np.arange(1, 6), 3), AssociationRules().fit(self.__train).recommend(np.arange(1, 6), 3)
+        )
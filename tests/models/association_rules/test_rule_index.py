@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from src.models.association_rules.rule_index import RuleIndex
+
+
+class TestRuleIndex:
+    __rules = pd.DataFrame(
+        {
+            "antecedents": [frozenset({0}), frozenset({1}), frozenset({0, 2}), frozenset({3})],
+            "consequents": [frozenset({3, 4}), frozenset({4}), frozenset({5}), frozenset({0})],
+            "lift": [1.5, 2.0, 1.2, 3.0],
+        }
+    )
+
+    @pytest.mark.parametrize("block_size", [1, 1024])
+    def test_recommend(self, block_size: int) -> None:
+        rule_index = RuleIndex(self.__rules, 6, block_size)
+        input_matrix = sp.csr_matrix(np.array([[1, 1, 0, 0, 0, 0], [1, 0, 1, 0, 0, 0], [0, 0, 0, 0, 0, 1]], dtype=bool))
+        seen = sp.csr_matrix(np.array([[1, 1, 0, 0, 0, 0], [1, 0, 1, 1, 0, 0], [0, 0, 0, 0, 0, 1]], dtype=bool))
+
+        actual = rule_index.recommend(input_matrix, seen, 3)
+
+        assert rule_index.rule_nums == 4
+        # user 0: movie 4 is recommended by 2 rules, then movie 3 (lift 1.5) and movie 5 (lift 1.2)
+        # user 1: movie 3 has been rated
+        # user 2: no rule is matched
+        np.testing.assert_array_equal(actual, [[4, 3, 5], [4, 5, -1], [-1, -1, -1]])
+
+    def test_state(self) -> None:
+        rule_index = RuleIndex(self.__rules, 6)
+        restored = RuleIndex.from_state(rule_index.get_state())
+        input_matrix = sp.csr_matrix(np.array([[1, 1, 0, 0, 0, 0], [0, 0, 0, 1, 0, 0]], dtype=bool))
+        seen = sp.csr_matrix((2, 6), dtype=bool)
+
+        assert restored.rule_nums == rule_index.rule_nums
+        np.testing.assert_array_equal(restored.lifts, [3.0, 2.0, 1.5, 1.2])
+        np.testing.assert_array_equal(
+            restored.recommend(input_matrix, seen, 3), rule_index.recommend(input_matrix, seen, 3)
+        )
@@ -0,0 +1,98 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.features import CategoricalFeatures
+from src.models.content_based.model import ContentBased
+
+
+class TestContentBased:
+    # movies 10 ~ 30 are animated, 40 ~ 60 are horror, and movie 60 has not been rated
+    __movie_ids = np.array([10, 20, 30, 40, 50, 60])
+    __genres = CategoricalFeatures.from_pairs(
+        __movie_ids,
+        np.array([10, 10, 20, 20, 30, 30, 40, 50, 50, 60, 60]),
+        np.array(
+            [
+                "Animation",
+                "Children",
+                "Animation",
+                "Comedy",
+                "Animation",
+                "Children",
+                "Horror",
+                "Horror",
+                "Thriller",
+                "Horror",
+                "Thriller",
+            ]
+        ),
+    )
+    __tags = CategoricalFeatures.from_pairs(
+        __movie_ids,
+        np.array([10, 10, 30, 40, 50, 50, 60]),
+        np.array(["pixar", "pixar", "pixar", "gore", "gore", "slasher", "slasher"]),
+    )
+    __train = pd.DataFrame(
+        {
+            "user_id": [1, 1, 2, 2, 3],
+            "movie_id": [10, 40, 40, 20, 30],
+            "rating": [5.0, 1.0, 4.5, 2.0, 2.0],
+            "timestamp": [0] * 5,
+        }
+    )
+
+    def test_recommend(self) -> None:
+        model = ContentBased(genres=self.__genres, tags=self.__tags).fit(self.__train)
+
+        actual = model.recommend(np.array([1, 2, 3, 100]), 3)
+
+        # user 1 likes animations, user 2 likes horror movies, user 3 likes nothing,
+        # and the unknown user 100 gets the most rated movies
+        np.testing.assert_array_equal(actual[0], [30, 20, -1])
+        np.testing.assert_array_equal(actual[1][:2], [50, 60])
+        np.testing.assert_array_equal(actual[2], [-1, -1, -1])
+        np.testing.assert_array_equal(actual[3], [40, 10, 20])
+
+    def test_fit_without_features(self) -> None:
+        # fit does not load the features from the dataset, only get_dataset does
+        with pytest.raises(ValueError, match="genres and tags"):
+            ContentBased(genres=self.__genres).fit(self.__train)
+
+    def test_similar_movies(self) -> None:
+        model = ContentBased(genres=self.__genres, tags=self.__tags).fit(self.__train)
+
+        actual = model.similar_movies(np.array([50, 30, 99]), 2)
+
+        np.testing.assert_array_equal(actual, [[60, 40], [10, 20], [-1, -1]])
+
+    def test_fit_independent(self) -> None:
+        model = ContentBased(genres=self.__genres, tags=self.__tags).fit(self.__train)
+        idf = getattr(model, "_ContentBased__tfidf").idf.copy()
+
+        # another model fitted on other features does not change the idf of the first one
+        other_genres = CategoricalFeatures.from_pairs(np.array([10]), np.array([10]), np.array(["Drama"]))
+        other = ContentBased(genres=other_genres, tags=self.__tags).fit(self.__train)
+
+        np.testing.assert_array_equal(getattr(model, "_ContentBased__tfidf").idf, idf)
+        assert getattr(other, "_ContentBased__tfidf") is not getattr(model, "_ContentBased__tfidf")
+
+    def test_predict(self) -> None:
+        model = ContentBased(genres=self.__genres, tags=self.__tags).fit(self.__train)
+
+        actual = model.predict(np.array([1, 1, 100]), np.array([30, 50, 40]))
+
+        # the similar movie 10 is liked more than the mean of user 1, and movie 50 resembles the disliked movie 40
+        assert actual[0] > 3.0 > actual[1]
+        np.testing.assert_allclose(actual[2], 2.75, rtol=1e-6)
+
+    def test_save_load(self, tmp_path: pathlib.Path) -> None:
+        model = ContentBased(genres=self.__genres, tags=self.__tags).fit(self.__train)
+        model.save(str(tmp_path / "model"))
+        loaded = ContentBased.load(str(tmp_path / "model"))
+
+        user_ids, movie_ids = np.array([1, 2, 3, 100]), np.array([30, 50, 60, 10])
+        np.testing.assert_array_equal(loaded.recommend(user_ids, 3), model.recommend(user_ids, 3))
+        np.testing.assert_allclose(loaded.predict(user_ids, movie_ids), model.predict(user_ids, movie_ids))
+        np.testing.assert_array_equal(loaded.similar_movies(movie_ids, 3), model.similar_movies(movie_ids, 3))
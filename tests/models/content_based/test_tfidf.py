@@ -0,0 +1,34 @@
+import numpy as np
+import scipy.sparse as sp
+from src.models.content_based.tfidf import TfIdf
+
+
+class TestTfIdf:
+    # term 0 is in every document, term 2 only in the last one
+    __counts = sp.csr_matrix(np.array([[1, 1, 0], [1, 3, 0], [1, 0, 2], [0, 0, 0]], dtype=np.float32))
+
+    def test_fit_transform(self) -> None:
+        tfidf = TfIdf(sublinear_tf=False)
+
+        actual = tfidf.fit_transform(self.__counts).toarray()
+
+        idf = np.log(5.0 / (1.0 + np.array([3, 2, 1]))) + 1.0
+        expected = self.__counts.toarray() * idf
+        expected[:3] /= np.linalg.norm(expected[:3], axis=1, keepdims=True)
+        np.testing.assert_allclose(tfidf.idf, idf, rtol=1e-6)
+        np.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+    def test_sublinear_tf(self) -> None:
+        actual = TfIdf().fit_transform(self.__counts).toarray()
+
+        # 3 occurrences weigh 1 + log(3) times as much as 1 occurrence
+        np.testing.assert_allclose(
+            (actual[1, 1] / actual[1, 0]) / (actual[0, 1] / actual[0, 0]), 1.0 + np.log(3.0), rtol=1e-5
+        )
+
+    def test_min_df(self) -> None:
+        actual = TfIdf(min_df=2).fit_transform(self.__counts)
+
+        # the rare term is dropped, and the empty row stays empty
+        assert actual[:, 2].nnz == 0
+        np.testing.assert_allclose(np.linalg.norm(actual.toarray(), axis=1), [1.0, 1.0, 1.0, 0.0], rtol=1e-6)
@@ -0,0 +1,127 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
+from src.models.popularity.model import Popularity
+
+
+class TestPopularity:
+    # movie 10 is rated by everyone, movie 40 by two users, the others once
+    __train = pd.DataFrame(
+        {
+            "user_id": [1, 1, 2, 2, 3, 3, 3],
+            "movie_id": [10, 20, 10, 40, 10, 30, 40],
+            "rating": [5.0, 3.0, 4.0, 4.0, 3.0, 2.0, 5.0],
+            "timestamp": [0] * 7,
+        }
+    )
+
+    def test_recommend(self) -> None:
+        model = Popularity().fit(self.__train)
+
+        actual = model.recommend(np.array([1, 3, 100]), 3)
+
+        # the same ranking for everyone, without the movies each user has rated
+        np.testing.assert_array_equal(actual, [[40, 30, -1], [20, -1, -1], [10, 40, 20]])
+
+    def test_predict(self) -> None:
+        model = Popularity().fit(self.__train)
+
+        actual = model.predict(np.array([1, 1, 1]), np.array([10, 20, 99]))
+
+        # mean ratings shrunk to the global mean, which is predicted for unknown movies
+        global_mean = self.__train.rating.mean()
+        assert global_mean < actual[0] < 4.0
+        assert 3.0 < actual[1] < global_mean
+        np.testing.assert_allclose(actual[2], global_mean, rtol=1e-6)
+
+    def test_partial_fit(self) -> None:
+        new_ratings = pd.DataFrame(
+            {"user_id": [4, 4, 5], "movie_id": [20, 50, 20], "rating": [4.0] * 3, "timestamp": [1] * 3}
+        )
+        model = Popularity(half_life=None).fit(self.__train)
+
+        touched_user_ids = model.partial_fit(new_ratings)
+
+        expected = Popularity(half_life=None).fit(pd.concat([self.__train, new_ratings], ignore_index=True))
+        user_ids = np.array([1, 2, 3, 4, 5, 100])
+        np.testing.assert_array_equal(model.recommend(user_ids, 4), expected.recommend(user_ids, 4))
+        # movie 20 overtook movie 40, so the recommendations of every user may have changed
+        np.testing.assert_array_equal(touched_user_ids, [Popularity.UNKNOWN_USERS, 1, 2, 3, 4, 5])
+
+    def test_partial_fit_served_prefix(self) -> None:
+        # ranking 10, 20, 30, 40 (ties by movie id)
+        train = pd.DataFrame(
+            {
+                "user_id": [1, 2, 2, 3, 3, 4, 4, 4, 4],
+                "movie_id": [10, 10, 20, 10, 20, 10, 20, 30, 40],
+                "rating": 4.0,
+                "timestamp": 0,
+            }
+        )
+        new_ratings = pd.DataFrame({"user_id": [5], "movie_id": [40], "rating": [4.0], "timestamp": [1]})
+        model = Popularity(half_life=None, max_k=1).fit(train)
+
+        touched_user_ids = model.partial_fit(new_ratings)
+
+        # movie 40 overtook movie 30 at rank 2, beyond the top-1 of user 1 (ranks 0 and 1) and of unknown users
+        np.testing.assert_array_equal(touched_user_ids, [2, 3, 4, 5])
+        expected = Popularity(half_life=None).fit(pd.concat([train, new_ratings], ignore_index=True))
+        np.testing.assert_array_equal(model.recommend(np.array([1]), 1), expected.recommend(np.array([1]), 1))
+
+    def test_partial_fit_rerated(self) -> None:
+        # movie 10 is rated by two users, movies 20 and 30 by one
+        train = pd.DataFrame(
+            {
+                "user_id": [1, 2, 1, 3],
+                "movie_id": [10, 10, 20, 30],
+                "rating": [4.0, 3.0, 2.0, 5.0],
+                "timestamp": [0] * 4,
+            }
+        )
+        model = Popularity().fit(train)
+
+        # user 1 re-rates movie 20 twice, the second time twice in one batch
+        model.partial_fit(pd.DataFrame({"user_id": [1], "movie_id": [20], "rating": [3.0], "timestamp": [1]}))
+        model.partial_fit(
+            pd.DataFrame({"user_id": [1, 1], "movie_id": [20, 20], "rating": [4.0, 5.0], "timestamp": [2, 2]})
+        )
+
+        # the same as fitting on the last rating of each pair
+        expected = Popularity().fit(
+            pd.DataFrame(
+                {
+                    "user_id": [1, 2, 1, 3],
+                    "movie_id": [10, 10, 20, 30],
+                    "rating": [4.0, 3.0, 5.0, 5.0],
+                    "timestamp": [0, 0, 2, 0],
+                }
+            )
+        )
+        user_ids = np.array([1, 2, 3, 100])
+        np.testing.assert_array_equal(model.recommend(user_ids, 3), expected.recommend(user_ids, 3))
+        np.testing.assert_allclose(
+            model.predict(user_ids, np.array([20, 20, 10, 30])), expected.predict(user_ids, np.array([20, 20, 10, 30]))
+        )
+
+    def test_partial_fit_empty(self) -> None:
+        model = Popularity().fit(self.__train)
+
+        actual = model.partial_fit(self.__train.iloc[:0])
+
+        assert actual.dtype == np.int64 and len(actual) == 0
+        user_ids = np.array([1, 2, 3, 100])
+        np.testing.assert_array_equal(
+            model.recommend(user_ids, 3), Popularity().fit(self.__train).recommend(user_ids, 3)
+        )
+
+    def test_save_load(self, tmp_path: pathlib.Path) -> None:
+        model = Popularity().fit(self.__train)
+        model.save(str(tmp_path / "model"))
+        loaded = Popularity.load(str(tmp_path / "model"))
+
+        user_ids = np.array([1, 2, 3, 100])
+        np.testing.assert_array_equal(loaded.recommend(user_ids, 3), model.recommend(user_ids, 3))
+        np.testing.assert_allclose(
+            loaded.predict(user_ids, np.array([10, 20, 30, 40])), model.predict(user_ids, np.array([10, 20, 30, 40]))
+        )
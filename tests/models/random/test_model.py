@@ -0,0 +1,61 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
+from src.models.random.model import Random
+
+
+class TestRandom:
+    __train = pd.DataFrame(
+        {
+            "user_id": [1, 1, 3, 3, 3, 7],
+            "movie_id": [10, 30, 10, 20, 40, 30],
+            "rating": [5.0, 3.5, 4.0, 1.0, 4.5, 2.0],
+            "timestamp": [0, 0, 0, 0, 0, 0],
+        }
+    )
+
+    def test_recommend(self) -> None:
+        np.random.seed(0)
+        model = Random().fit(self.__train)
+
+        actual = model.recommend(np.array([3, 100, 1]), 3)
+
+        assert actual.shape == (3, 3)
+        # user 3 has rated all movies but 30, and unknown users get the most rated movies
+        np.testing.assert_array_equal(actual[0], [30, -1, -1])
+        np.testing.assert_array_equal(actual[1], [10, 30, 20])
+        assert sorted(actual[2][:2].tolist()) == [20, 40]
+        assert actual[2][2] == -1
+
+    def test_predict(self) -> None:
+        np.random.seed(0)
+        model = Random().fit(self.__train)
+
+        actual = model.predict(np.array([1, 1, 100]), np.array([20, 20, 10]))
+
+        assert actual[0] == actual[1]
+        assert np.all((actual >= 0.5) & (actual <= 5.0))
+
+    def test_predict_recommend(self) -> None:
+        np.random.seed(0)
+        model = Random().fit(self.__train)
+
+        recommended_movie_ids = model.recommend(np.array([1]), 2)[0]
+        predicted_ratings = model.predict(np.array([1, 1]), recommended_movie_ids)
+
+        # the same generated ratings are predicted and ranked
+        assert sorted(recommended_movie_ids.tolist()) == [20, 40]
+        assert predicted_ratings[0] >= predicted_ratings[1]
+
+    def test_save_load(self, tmp_path: pathlib.Path) -> None:
+        np.random.seed(0)
+        model = Random().fit(self.__train)
+        model.save(str(tmp_path / "model"))
+        loaded = Random.load(str(tmp_path / "model"))
+
+        user_ids, movie_ids = np.array([1, 3, 7, 1]), np.array([20, 30, 40, 10])
+        np.testing.assert_array_equal(loaded.recommend(user_ids, 3), model.recommend(user_ids, 3))
+        np.testing.assert_array_equal(loaded.predict(user_ids, movie_ids), model.predict(user_ids, movie_ids))
+        # no users x movies array is saved, only arrays as long as the ratings at most
+        assert max(array.size for array in model.get_state().values()) <= len(self.__train) + 1
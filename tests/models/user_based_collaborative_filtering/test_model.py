@@ -0,0 +1,82 @@
+import pathlib
+
+import numpy as np
+import pandas as pd
+from src.models.user_based_collaborative_filtering.model import UserBasedCF
+
+
+class TestUserBasedCF:
+    # users 1 and 2 have the same taste, user 3 has the opposite taste
+    __train = pd.DataFrame(
+        {
+            "user_id": [1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3],
+            "movie_id": [10, 20, 30, 10, 20, 30, 40, 10, 20, 30, 50],
+            "rating": [5.0, 1.0, 4.0, 4.5, 1.5, 4.0, 5.0, 1.0, 5.0, 2.0, 5.0],
+            "timestamp": [0] * 11,
+        }
+    )
+
+    def test_recommend(self) -> None:
+        model = UserBasedCF().fit(self.__train)
+
+        actual = model.recommend(np.array([1, 100]), 2)
+
+        # movie 40 is liked by the similar user 2, movie 50 is liked only by the dissimilar user 3,
+        # and the unknown user 100 gets the most rated movies
+        np.testing.assert_array_equal(actual, [[40, -1], [10, 20]])
+
+    def test_predict(self) -> None:
+        model = UserBasedCF().fit(self.__train)
+
+        actual = model.predict(np.array([1, 1, 100]), np.array([40, 50, 10]))
+
+        # user 1 likes movie 40 more than the own mean, movie 50 falls back to the own mean
+        assert actual[0] > self.__train[self.__train.user_id == 1].rating.mean()
+        np.testing.assert_allclose(actual[1], self.__train[self.__train.user_id == 1].rating.mean(), rtol=1e-6)
+        np.testing.assert_allclose(actual[2], self.__train.rating.mean(), rtol=1e-6)
+
+    def test_save_load(self, tmp_path: pathlib.Path) -> None:
+        model = UserBasedCF().fit(self.__train)
+        model.save(str(tmp_path / "model"))
+        loaded = UserBasedCF.load(str(tmp_path / "model"))
+
+        user_ids, movie_ids = self.__train.user_id.to_numpy(), self.__train.movie_id.to_numpy()
+        np.testing.assert_array_equal(loaded.recommend(np.array([1, 2, 3]), 3), model.recommend(np.array([1, 2, 3]), 3))
+        np.testing.assert_allclose(loaded.predict(user_ids, movie_ids), model.predict(user_ids, movie_ids))
+
+    def test_partial_fit(self) -> None:
+        # a new user 4 with the taste of user 1
+        new_ratings = pd.DataFrame(
+            {"user_id": [4, 4, 4], "movie_id": [10, 20, 30], "rating": [5.0, 1.0, 4.5], "timestamp": [1, 1, 1]}
+        )
+        model = UserBasedCF().fit(self.__train)
+
+        touched_user_ids = model.partial_fit(new_ratings)
+
+        expected = UserBasedCF().fit(pd.concat([self.__train, new_ratings], ignore_index=True))
+        user_ids = np.array([1, 2, 3, 4])
+        assert set(touched_user_ids.tolist()) == {1, 2, 4}
+        np.testing.assert_array_equal(model.recommend(user_ids, 2), expected.recommend(user_ids, 2))
+        np.testing.assert_allclose(
+            model.predict(user_ids, np.full(4, 40)), expected.predict(user_ids, np.full(4, 40)), rtol=1e-6
+        )
+
+    def test_partial_fit_unknown_users(self) -> None:
+        # new users 4 and 5 make movie 40 as popular as movies 10 ~ 30, and more recently rated
+        new_ratings = pd.DataFrame({"user_id": [4, 5], "movie_id": [40, 40], "rating": [4.0, 4.0], "timestamp": [1, 1]})
+        model = UserBasedCF().fit(self.__train)
+        previous = model.recommend(np.array([100]), 4)
+
+        touched_user_ids = model.partial_fit(new_ratings)
+
+        # the most popular movies of the unknown user 100 changed
+        assert UserBasedCF.UNKNOWN_USERS in touched_user_ids
+        assert not np.array_equal(model.recommend(np.array([100]), 4), previous)
+        assert not model.known_users(np.array([100]))[0] and model.known_users(np.array([4]))[0]
+
+    def test_partial_fit_empty(self) -> None:
+        model = UserBasedCF().fit(self.__train)
+
+        actual = model.partial_fit(self.__train.iloc[:0])
+
+        assert actual.dtype == np.int64 and len(actual) == 0
@@ -0,0 +1,43 @@
+from src.serving.cache import RecommendationCache
+
+
+class TestRecommendationCache:
+    def test_prefix(self) -> None:
+        cache = RecommendationCache()
+        cache.put(1, 3, [10, 20, 30])
+
+        assert cache.get(1, 2) == [10, 20]
+        assert cache.get(1, 3) == [10, 20, 30]
+        assert cache.get(1, 4) is None
+        assert cache.get(2, 1) is None
+
+    def test_lru(self) -> None:
+        cache = RecommendationCache(max_size=2)
+        cache.put(1, 1, [10])
+        cache.put(2, 1, [20])
+        cache.get(1, 1)
+        cache.put(3, 1, [30])
+
+        assert cache.get(2, 1) is None
+        assert cache.get(1, 1) == [10] and cache.get(3, 1) == [30]
+
+    def test_ttl(self) -> None:
+        now = [0.0]
+        cache = RecommendationCache(ttl=10.0, clock=lambda: now[0])
+        cache.put(1, 1, [10])
+
+        now[0] = 9.0
+        assert cache.get(1, 1) == [10]
+        now[0] = 11.0
+        assert cache.get(1, 1) is None
+        assert len(cache) == 0
+
+    def test_invalidate(self) -> None:
+        cache = RecommendationCache()
+        for user_id in [1, 2, 3]:
+            cache.put(user_id, 1, [10])
+
+        cache.invalidate([1, 3, 4])
+        assert len(cache) == 1 and cache.get(2, 1) == [10]
+        cache.invalidate()
+        assert len(cache) == 0
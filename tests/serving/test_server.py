@@ -0,0 +1,220 @@
+import asyncio
+import json
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.base_recommend import BaseRecommend
+from src.models.popularity.model import Popularity
+from src.models.user_based_collaborative_filtering.model import UserBasedCF
+from src.serving.server import RecommendServer
+
+
+class UserIdModel(BaseRecommend):
+    def __init__(self) -> None:
+        super().__init__(dataset_dir="dataset/movielens-10m", user_nums=None)
+        self.batches: list[list[int]] = []
+        self.updates: list[pd.DataFrame] = []
+
+    def fit(self, train: pd.DataFrame) -> "UserIdModel":
+        return self
+
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+        # user u gets movies u * 100 + 1, ..., u * 100 + k, and unknown users (u > 100) get nothing
+        self.batches.append(user_ids.tolist())
+        recommended_movie_ids = user_ids[:, np.newaxis] * 100 + np.arange(1, k + 1)
+        recommended_movie_ids[user_ids > 100] = -1
+        return recommended_movie_ids
+
+    def partial_fit(self, ratings: pd.DataFrame) -> np.ndarray:
+        self.updates.append(ratings)
+        return np.unique(ratings.user_id.to_numpy())
+
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
+        return {}
+
+
+class FixedModel(BaseRecommend):
+    def __init__(self) -> None:
+        super().__init__(dataset_dir="dataset/movielens-10m", user_nums=None)
+
+    def fit(self, train: pd.DataFrame) -> "FixedModel":
+        return self
+
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+        return np.zeros((len(user_ids), k), dtype=np.int32)
+
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
+        return {}
+
+
+async def get(port: int, target: str, method: str = "GET", body: bytes = b"") -> tuple[int, Any]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {target} HTTP/1.1\r\nConnection: close\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    head, body = (await reader.read()).split(b"\r\n\r\n", 1)
+    writer.close()
+    return int(head.split(b" ")[1]), json.loads(body)
+
+
+class TestRecommendServer:
+    # movie 10 is rated most, then movies 20 and 30 (ties by movie id)
+    __train = pd.DataFrame({"user_id": [1, 1, 2, 3], "movie_id": [10, 20, 10, 30], "rating": 4.0, "timestamp": 0})
+
+    def test_recommend(self) -> None:
+        async def scenario() -> tuple[list[tuple[int, Any]], RecommendServer]:
+            server = RecommendServer(UserIdModel(), max_delay=0.05)
+            started = await server.start(port=0)
+            port = started.sockets[0].getsockname()[1]
+            responses = list(
+                await asyncio.gather(
+                    get(port, "/recommend?user_id=1&k=2"),
+                    get(port, "/recommend?user_id=2&k=3"),
+                    get(port, "/recommend?user_id=1&k=1"),
+                    get(port, "/recommend?user_id=200"),
+                )
+            )
+            # served from the cache
+            responses.append(await get(port, "/recommend?user_id=2&k=2"))
+            responses.append(await get(port, "/stats"))
+            await server.stop(started)
+            return responses, server
+
+        responses, server = asyncio.run(scenario())
+
+        assert responses[:5] == [
+            (200, {"user_id": 1, "movie_ids": [101, 102]}),
+            (200, {"user_id": 2, "movie_ids": [201, 202, 203]}),
+            (200, {"user_id": 1, "movie_ids": [101]}),
+            (200, {"user_id": 200, "movie_ids": []}),
+            (200, {"user_id": 2, "movie_ids": [201, 202]}),
+        ]
+        # concurrent requests are coalesced into one batch of unique users
+        assert server.model.batches == [[1, 2, 200]]  # type: ignore[attr-defined]
+        status, stats = responses[5]
+        assert status == 200
+        assert stats["requests"] == 5 and stats["cache_hits"] == 1 and stats["batches"] == 1
+        assert stats["p99_ms"] >= stats["p50_ms"] > 0
+
+    def test_errors(self) -> None:
+        async def scenario() -> list[tuple[int, Any]]:
+            server = RecommendServer(UserIdModel(), max_k=5)
+            started = await server.start(port=0)
+            port = started.sockets[0].getsockname()[1]
+            responses = [
+                await get(port, target)
+                for target in ["/recommend?user_id=a", "/recommend?k=3", "/recommend?user_id=1&k=6", "/unknown"]
+            ]
+            await server.stop(started)
+            return responses
+
+        assert [status for status, _ in asyncio.run(scenario())] == [400, 400, 400, 404]
+
+    def test_update(self) -> None:
+        async def scenario() -> tuple[list[tuple[int, Any]], RecommendServer]:
+            server = RecommendServer(UserIdModel())
+            started = await server.start(port=0)
+            port = started.sockets[0].getsockname()[1]
+            await asyncio.gather(get(port, "/recommend?user_id=1&k=2"), get(port, "/recommend?user_id=2&k=2"))
+            body = json.dumps({"ratings": [{"user_id": 1, "movie_id": 10, "rating": 4.5, "timestamp": 5}]})
+            responses = [
+                await get(port, "/ratings", method="POST", body=body.encode()),
+                await get(port, "/ratings", method="POST", body=b'{"ratings": [{"user_id": "a"}]}'),
+                await get(port, "/ratings"),
+            ]
+            await server.stop(started)
+            return responses, server
+
+        responses, server = asyncio.run(scenario())
+
+        assert responses[0] == (200, {"ratings": 1, "touched_users": 1})
+        assert [status for status, _ in responses[1:]] == [400, 405]
+        update = server.model.updates[0]  # type: ignore[attr-defined]
+        assert update.to_dict("list") == {"user_id": [1], "movie_id": [10], "rating": [4.5], "timestamp": [5]}
+        # only the touched user is dropped from the cache
+        assert server.cache.get(1, 2) is None and server.cache.get(2, 2) == [201, 202]
+
+    def test_update_unknown_user(self) -> None:
+        async def scenario() -> list[tuple[int, Any]]:
+            server = RecommendServer(Popularity(half_life=None).fit(self.__train))
+            started = await server.start(port=0)
+            port = started.sockets[0].getsockname()[1]
+            responses = [await get(port, "/recommend?user_id=100&k=2")]
+            # movie 30 overtakes movie 20 in the ranking the unknown user 100 gets
+            ratings = [{"user_id": 2, "movie_id": 30, "rating": 4.0, "timestamp": 1}]
+            responses.append(await get(port, "/ratings", method="POST", body=json.dumps({"ratings": ratings}).encode()))
+            responses.append(await get(port, "/recommend?user_id=100&k=2"))
+            await server.stop(started)
+            return responses
+
+        responses = asyncio.run(scenario())
+
+        assert responses[0] == (200, {"user_id": 100, "movie_ids": [10, 20]})
+        assert responses[1] == (200, {"ratings": 1, "touched_users": 3})
+        # the cached list of the unknown user was dropped
+        assert responses[2] == (200, {"user_id": 100, "movie_ids": [10, 30]})
+
+    def test_update_empty(self) -> None:
+        async def scenario() -> tuple[int, Any]:
+            server = RecommendServer(UserBasedCF().fit(self.__train))
+            started = await server.start(port=0)
+            port = started.sockets[0].getsockname()[1]
+            response = await get(port, "/ratings", method="POST", body=b'{"ratings": []}')
+            await server.stop(started)
+            return response
+
+        assert asyncio.run(scenario()) == (200, {"ratings": 0, "touched_users": 0})
+
+    def test_max_k(self) -> None:
+        model = Popularity(max_k=10).fit(self.__train)
+
+        # longer lists would stay cached after updates that touch only the top-10 lists
+        with pytest.raises(ValueError):
+            RecommendServer(model, max_k=100)
+        assert RecommendServer(model, max_k=10).max_k == 10
+
+    def test_update_unsupported(self) -> None:
+        async def scenario() -> tuple[int, Any]:
+            server = RecommendServer(FixedModel())
+            started = await server.start(port=0)
+            port = started.sockets[0].getsockname()[1]
+            body = json.dumps({"ratings": [{"user_id": 1, "movie_id": 10, "rating": 4.5, "timestamp": 5}]})
+            response = await get(port, "/ratings", method="POST", body=body.encode())
+            await server.stop(started)
+            return response
+
+        assert asyncio.run(scenario()) == (501, {"error": "model does not support incremental updates"})
+
+    def test_malformed_body(self) -> None:
+        async def send(port: int, request: bytes) -> bytes:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(request)
+            if writer.can_write_eof():
+                writer.write_eof()
+            response = await reader.read()
+            writer.close()
+            return response
+
+        async def scenario() -> list[bytes]:
+            server = RecommendServer(UserIdModel())
+            started = await server.start(port=0)
+            port = started.sockets[0].getsockname()[1]
+            responses = [
+                await send(port, b"POST /ratings HTTP/1.1\r\nContent-Length: abc\r\n\r\n{}"),
+                await send(port, b"POST /ratings HTTP/1.1\r\nContent-Length: -1\r\n\r\n"),
+                # the body is shorter than its length
+                await send(port, b"POST /ratings HTTP/1.1\r\nContent-Length: 100\r\n\r\n{}"),
+            ]
+            # the server still answers
+            responses.append(await send(port, b"GET /recommend?user_id=1&k=1 HTTP/1.1\r\nConnection: close\r\n\r\n"))
+            await server.stop(started)
+            return responses
+
+        responses = asyncio.run(scenario())
+
+        assert responses[0].startswith(b"HTTP/1.1 400 ") and b"Connection: close" in responses[0]
+        assert responses[1].startswith(b"HTTP/1.1 400 ")
+        assert responses[2] == b""
+        assert responses[3].startswith(b"HTTP/1.1 200 ")
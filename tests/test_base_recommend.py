@@ -0,0 +1,116 @@
+import json
+import os
+import pathlib
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.base_recommend import BaseRecommend
+from src.matrix import InteractionMatrix
+
+
+class Popular(BaseRecommend):
+    def __init__(self) -> None:
+        super().__init__(dataset_dir="dataset/movielens-10m", user_nums=None)
+
+    def fit(self, train: pd.DataFrame) -> "Popular":
+        self.user_movie_matrix = InteractionMatrix(train)
+        self.popularity = np.asarray(self.user_movie_matrix.matrix.sum(axis=0)).ravel()
+        return self
+
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+        order = np.argsort(-self.popularity, kind="stable")[:k]
+        recommended_movie_ids = np.full((len(user_ids), k), -1, dtype=np.int32)
+        recommended_movie_ids[:, : len(order)] = self.user_movie_matrix.movie_ids[order]
+        return recommended_movie_ids
+
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
+        return self.evaluate_ranking(test, ks=[1])
+
+    def get_state(self) -> dict[str, np.ndarray]:
+        return {**self.user_movie_matrix.get_state(), "popularity": self.popularity}
+
+    def set_state(self, state: dict[str, np.ndarray]) -> None:
+        self.user_movie_matrix = InteractionMatrix.from_state(state)
+        self.popularity = state["popularity"]
+
+    def run(self) -> None:
+        pass
+
+
+class TestBaseRecommend:
+    __ratings = pd.DataFrame(
+        {
+            "user_id": [1, 1, 3, 3, 3, 7],
+            "movie_id": [10, 30, 10, 20, 40, 30],
+            "rating": [5.0, 3.5, 4.0, 1.0, 4.5, 2.0],
+            "timestamp": [0, 0, 0, 0, 0, 0],
+        }
+    )
+
+    def test_recommend_dict(self) -> None:
+        model = Popular().fit(self.__ratings)
+
+        assert model.recommend_dict(np.array([1, 100]), 5) == {1: [10, 30, 40, 20], 100: [10, 30, 40, 20]}
+
+    def test_save_load(self, tmp_path: pathlib.Path) -> None:
+        model = Popular()
+        model.fit(self.__ratings)
+        model.save(str(tmp_path / "model"))
+        loaded = Popular.load(str(tmp_path / "model"))
+
+        assert sorted(os.listdir(tmp_path)) == ["model"]
+        np.testing.assert_array_equal(loaded.popularity, model.popularity)
+        np.testing.assert_array_equal(loaded.user_movie_matrix.user_ids, model.user_movie_matrix.user_ids)
+        np.testing.assert_array_equal(
+            loaded.user_movie_matrix.matrix.toarray(), model.user_movie_matrix.matrix.toarray()
+        )
+        np.testing.assert_array_equal(loaded.user_movie_matrix.to_movie_index(np.array([30, 50])), [2, -1])
+
+        # large arrays are memory-mapped instead of read into memory
+        assert isinstance(loaded.popularity.base, np.memmap)
+
+    def test_save_overwrite(self, tmp_path: pathlib.Path) -> None:
+        model = Popular()
+        model.fit(self.__ratings)
+        model.save(str(tmp_path / "model"))
+        model.fit(self.__ratings[self.__ratings.user_id != 7])
+        model.save(str(tmp_path / "model"))
+
+        assert Popular.load(str(tmp_path / "model")).user_movie_matrix.shape == (2, 4)
+
+    @pytest.mark.parametrize(
+        "manifest, message",
+        [
+            ({"format_version": 0, "model": "Popular"}, "unsupported format version"),
+            ({"format_version": 1, "model": "Random"}, "not Popular"),
+        ],
+    )
+    def test_load_invalid(self, tmp_path: pathlib.Path, manifest: dict, message: str) -> None:
+        model = Popular()
+        model.fit(self.__ratings)
+        model.save(str(tmp_path / "model"))
+        with open(tmp_path / "model" / "manifest.json") as f:
+            saved_manifest = json.load(f)
+        with open(tmp_path / "model" / "manifest.json", "w") as f:
+            json.dump({**saved_manifest, **manifest}, f)
+
+        with pytest.raises(ValueError, match=message):
+            Popular.load(str(tmp_path / "model"))
+
+    def test_not_implemented(self, tmp_path: pathlib.Path) -> None:
+        class Unsaveable(Popular):
+            def get_state(self) -> dict[str, np.ndarray]:
+                return BaseRecommend.get_state(self)
+
+        class Unfitted(BaseRecommend):
+            def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+                return np.full((len(user_ids), k), -1)
+
+        with pytest.raises(NotImplementedError):
+            Unsaveable().fit(self.__ratings).save(str(tmp_path / "model"))
+        with pytest.raises(NotImplementedError):
+            Popular().partial_fit(self.__ratings)
+        # a model without fit() and evaluate() cannot be created
+        with pytest.raises(TypeError):
+            Unfitted("dataset", None)  # type: ignore[abstract]
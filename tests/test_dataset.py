@@ -0,0 +1,117 @@
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.dataset import Dataset
+
+
+class TestDataset:
+    @pytest.mark.parametrize("user_nums", [None, 2])
+    def test_load(self, movielens_dir: str, user_nums: Optional[int]) -> None:
+        dataset = Dataset(movielens_dir, user_nums)
+        movies, ratings = dataset.load()
+        genres, tags = dataset.movie_features()
+
+        expected_ratings = pd.read_csv(
+            os.path.join(movielens_dir, "ratings.dat"),
+            sep="::",
+            names=["user_id", "movie_id", "rating", "timestamp"],
+            encoding="latin-1",
+            engine="python",
+        )
+        if user_nums is not None:
+            expected_ratings = expected_ratings[expected_ratings.user_id <= user_nums]
+
+        assert ratings.dtypes.to_dict() == {
+            "user_id": "int32",
+            "movie_id": "int32",
+            "rating": "float32",
+            "timestamp": "int32",
+        }
+        pd.testing.assert_frame_equal(ratings, expected_ratings, check_dtype=False)
+        assert movies.title.to_list()[2] == '"Great" Escape, The (1963)'
+        assert list(movies.columns) == ["movie_id", "title"]
+        np.testing.assert_array_equal(genres.ids, movies.movie_id)
+        assert genres.to_lists()[0] == ["Adventure", "Animation", "Children", "Comedy", "Fantasy"]
+        assert tags.to_lists()[0] == ["pixar", "pixar"]
+
+    def test_load_cache(self, movielens_dir: str) -> None:
+        dataset = Dataset(movielens_dir, 3)
+        movies, ratings = dataset.load()
+        genres, tags = dataset.movie_features()
+        cached_movies, cached_ratings = dataset.load()
+
+        pd.testing.assert_frame_equal(cached_ratings, ratings)
+        pd.testing.assert_frame_equal(cached_movies, movies, check_dtype=False)
+        assert dataset.genres is not None and dataset.tags is not None
+        assert dataset.genres.to_lists() == genres.to_lists()
+        assert dataset.tags.to_lists() == tags.to_lists()
+        assert len(os.listdir(os.path.join(movielens_dir, ".cache"))) == 1
+
+        # different parameters use another cache
+        Dataset(movielens_dir, None).load()
+        assert len(os.listdir(os.path.join(movielens_dir, ".cache"))) == 2
+
+        # modified source files invalidate the cache
+        with open(os.path.join(movielens_dir, "ratings.dat"), "ab") as f:
+            f.write(b"3::4::3::1136075530\n")
+        _, ratings = dataset.load()
+        assert len(ratings) == len(cached_ratings) + 1
+
+        dataset.clear_cache()
+        assert not os.path.exists(os.path.join(movielens_dir, ".cache"))
+
+    @pytest.mark.parametrize("user_nums", [None, 0, 1, 2, 3, 10])
+    @pytest.mark.parametrize("chunk_size", [1, 24, 1 << 20])
+    def test_load_streaming(self, movielens_dir: str, user_nums: Optional[int], chunk_size: int) -> None:
+        _, expected = Dataset(movielens_dir, user_nums, use_cache=False).load()
+        _, actual = Dataset(movielens_dir, user_nums, use_cache=False, chunk_size=chunk_size).load()
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    @pytest.mark.parametrize("chunk_size", [None, 24])
+    def test_load_empty(self, movielens_dir: str, chunk_size: Optional[int]) -> None:
+        open(os.path.join(movielens_dir, "ratings.dat"), "wb").close()
+
+        _, ratings = Dataset(movielens_dir, 2, use_cache=False, chunk_size=chunk_size).load()
+
+        assert len(ratings) == 0
+        assert ratings.dtypes.to_dict() == {
+            "user_id": "int32",
+            "movie_id": "int32",
+            "rating": "float32",
+            "timestamp": "int32",
+        }
+
+    def test_load_streaming_unsorted(self, movielens_dir: str) -> None:
+        with open(os.path.join(movielens_dir, "ratings.dat"), "ab") as f:
+            f.write(b"1::5::3::1136075530\n")
+
+        with pytest.raises(ValueError):
+            Dataset(movielens_dir, 10, use_cache=False, chunk_size=24).load()
+
+    @pytest.mark.parametrize(
+        "strategy, expected_test_index",
+        [
+            ("time", [6, 7, 8, 9, 10]),
+            ("leave_one_out", [0, 5, 8, 10]),
+            ("user_last", [0, 1, 3, 5, 7, 8, 10]),
+            ("user_fraction", [0, 1, 3, 5, 7, 8, 10]),
+        ],
+    )
+    def test_split_ratings(self, movielens_dir: str, strategy: str, expected_test_index: list[int]) -> None:
+        dataset = Dataset(movielens_dir, None, use_cache=False)
+        _, ratings = dataset.load()
+        train, test = dataset.split_ratings(ratings, test_size=0.4, strategy=strategy, last_nums=2)
+
+        assert test.index.to_list() == expected_test_index
+        assert sorted(train.index.to_list() + test.index.to_list()) == list(range(len(ratings)))
+
+    def test_split_ratings_invalid(self, movielens_dir: str) -> None:
+        dataset = Dataset(movielens_dir, None, use_cache=False)
+        _, ratings = dataset.load()
+
+        with pytest.raises(ValueError, match="unknown split strategy"):
+            dataset.split_ratings(ratings, strategy="future")
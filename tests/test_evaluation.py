@@ -117,3 +117,96 @@ class Test_Evaluation:
     def test_calc_rmse(self, true_ratings: list[float], predicted_ratings: list[float], expected: float) -> None:
         actual = self.__evaluation.calc_rmse(true_ratings, predicted_ratings)
         assert np.isclose(actual, expected, atol=1e-3, rtol=1e-3)
+
+    @pytest.mark.parametrize(
+        ["k", "expected_recall", "expected_precision"],
+        [
+            pytest.param(1, 0.333, 1.000),
+            pytest.param(3, 0.833, 0.833),
+            pytest.param(4, 0.833, 0.625),
+            pytest.param(0, 0.000, 0.000),
+        ],
+    )
+    def test_calc_at_k_array(self, k: int, expected_recall: float, expected_precision: float) -> None:
+        # user 1: [1, 2, 3], user 2: [1, 2, 3], user 3: no truly favorite movies
+        true_indptr = np.array([0, 3, 6, 6])
+        true_indices = np.array([1, 2, 3, 1, 2, 3])
+        predicted_movie_ids = np.array([[1, 2, 3, 4], [3, 3, 1, -1], [5, 6, -1, -1]])
+        true_user_id2movie_ids = {1: [1, 2, 3], 2: [1, 2, 3], 3: []}
+        predicted_user_id2movie_ids = {1: [1, 2, 3, 4], 2: [3, 3, 1], 3: [5, 6]}
+
+        recall = self.__evaluation.calc_recall_at_k_array(true_indptr, true_indices, predicted_movie_ids, k)
+        precision = self.__evaluation.calc_precision_at_k_array(true_indptr, true_indices, predicted_movie_ids, k)
+
+        assert np.isclose(recall, expected_recall * 2 / 3, atol=1e-3)
+        assert np.isclose(precision, expected_precision * 2 / 3, atol=1e-3)
+        assert recall == self.__evaluation.calc_recall_at_k(true_user_id2movie_ids, predicted_user_id2movie_ids, k)
+        assert precision == self.__evaluation.calc_precision_at_k(
+            true_user_id2movie_ids, predicted_user_id2movie_ids, k
+        )
+
+    def test_calc_hits(self) -> None:
+        actual = self.__evaluation.calc_hits(
+            np.array([0, 2, 3]), np.array([10, 20, 10]), np.array([[20, 30, 20, 10], [-1, 10, 10, 20]])
+        )
+
+        np.testing.assert_array_equal(actual, [[True, False, False, True], [False, True, False, False]])
+
+    def test_group_by_user(self) -> None:
+        user_ids, indptr, indices = self.__evaluation.group_by_user(
+            np.array([3, 1, 3, 2, 1]), np.array([30, 10, 31, 20, 11])
+        )
+
+        np.testing.assert_array_equal(user_ids, [1, 2, 3])
+        np.testing.assert_array_equal(indptr, [0, 2, 3, 5])
+        np.testing.assert_array_equal(indices, [10, 11, 20, 30, 31])
+
+    def test_calc_ranking_metrics(self) -> None:
+        rng = np.random.default_rng(0)
+        true_movie_ids = [rng.choice(30, rng.integers(0, 8), replace=False).tolist() for _ in range(50)]
+        predicted_movie_ids = np.array([rng.choice(30, 12, replace=False) for _ in range(50)])
+        predicted_movie_ids[::7, 6:] = -1
+        true_indptr = np.r_[0, np.cumsum([len(movie_ids) for movie_ids in true_movie_ids])]
+        true_indices = np.array([movie_id for movie_ids in true_movie_ids for movie_id in movie_ids])
+        catalog_movie_ids = np.arange(40)
+        movie_popularity = rng.random(40)
+
+        actual = self.__evaluation.calc_ranking_metrics(
+            true_indptr, true_indices, predicted_movie_ids, [1, 5, 10], catalog_movie_ids, movie_popularity
+        )
+
+        for k in [1, 5, 10]:
+            recall, ndcg, average_precision, reciprocal_rank, novelty = [], [], [], [], []
+            for true, predicted in zip(true_movie_ids, predicted_movie_ids[:, :k].tolist()):
+                hits = [movie_id in true for movie_id in predicted]
+                recall.append(sum(hits) / len(true) if true else 0.0)
+                ideal = sum(1 / np.log2(rank + 2) for rank in range(min(len(true), k)))
+                ndcg.append(sum(hit / np.log2(rank + 2) for rank, hit in enumerate(hits)) / ideal if true else 0.0)
+                precisions = [sum(hits[: rank + 1]) / (rank + 1) for rank, hit in enumerate(hits) if hit]
+                average_precision.append(sum(precisions) / min(len(true), k) if true else 0.0)
+                reciprocal_rank.append(1 / (hits.index(True) + 1) if any(hits) else 0.0)
+                recommended = [movie_id for movie_id in predicted if movie_id >= 0]
+                if recommended:
+                    novelty.append(np.mean([-np.log2(movie_popularity[movie_id]) for movie_id in recommended]))
+            recommended_movie_ids = set(predicted_movie_ids[:, :k].ravel().tolist()) - {-1}
+
+            assert np.isclose(actual[f"recall_at_{k}"], np.mean(recall))
+            assert actual[f"recall_at_{k}"] == self.__evaluation.calc_recall_at_k_array(
+                true_indptr, true_indices, predicted_movie_ids, k
+            )
+            assert actual[f"precision_at_{k}"] == self.__evaluation.calc_precision_at_k_array(
+                true_indptr, true_indices, predicted_movie_ids, k
+            )
+            assert np.isclose(actual[f"ndcg_at_{k}"], np.mean(ndcg))
+            assert np.isclose(actual[f"map_at_{k}"], np.mean(average_precision))
+            assert np.isclose(actual[f"mrr_at_{k}"], np.mean(reciprocal_rank))
+            assert np.isclose(actual[f"hit_rate_at_{k}"], np.mean(np.array(reciprocal_rank) > 0))
+            assert np.isclose(actual[f"coverage_at_{k}"], len(recommended_movie_ids) / 40)
+            assert np.isclose(actual[f"novelty_at_{k}"], np.mean(novelty))
+
+    def test_calc_ranking_metrics_short_predictions(self) -> None:
+        actual = self.__evaluation.calc_ranking_metrics(np.array([0, 1]), np.array([7]), np.array([[3, 7]]), [1, 5])
+
+        assert actual["recall_at_1"] == 0.0 and actual["recall_at_5"] == 1.0
+        assert actual["mrr_at_5"] == 0.5
+        assert "coverage_at_5" not in actual
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.base_recommend import BaseRecommend
+from src.experiment import Experiment
+
+
+class MeanRating(BaseRecommend):
+    def __init__(self) -> None:
+        super().__init__(dataset_dir="dataset/movielens-10m", user_nums=None)
+
+    def fit(self, train: pd.DataFrame) -> "MeanRating":
+        self.mean = float(train.rating.mean())
+        self.train_nums = len(train)
+        return self
+
+    def recommend(self, user_ids: np.ndarray, k: int) -> np.ndarray:
+        return np.full((len(user_ids), k), -1, dtype=np.int32)
+
+    def evaluate(self, test: pd.DataFrame) -> dict[str, float]:
+        return {
+            "mae": float(np.abs(test.rating.to_numpy() - self.mean).mean()),
+            "train_nums": self.train_nums,
+            "test_nums": len(test),
+            "noise": float(np.random.rand()),
+        }
+
+    def run(self) -> None:
+        pass
+
+
+class TestExperiment:
+    __ratings = pd.DataFrame(
+        {
+            "user_id": np.repeat(np.arange(1, 11, dtype=np.int32), 10),
+            "movie_id": np.tile(np.arange(1, 11, dtype=np.int32), 10),
+            "rating": np.arange(100, dtype=np.float32) % 10 / 2 + 0.5,
+            "timestamp": np.arange(100, dtype=np.int32),
+        }
+    )
+
+    def test_split_kfold(self) -> None:
+        folds = Experiment(MeanRating, n_splits=3, seed=1).split(100)
+
+        assert len(folds) == 3
+        np.testing.assert_array_equal(np.sort(np.concatenate([test for _, test in folds])), np.arange(100))
+        for train, test in folds:
+            assert len(train) + len(test) == 100
+            assert len(np.intersect1d(train, test)) == 0
+            assert np.all(np.diff(train) > 0) and np.all(np.diff(test) > 0)
+
+    def test_split_holdout(self) -> None:
+        folds = Experiment(MeanRating, n_splits=4, method="holdout", test_size=0.25, seed=1).split(100)
+
+        assert [len(test) for _, test in folds] == [25] * 4
+        assert not np.array_equal(folds[0][1], folds[1][1])
+        for train, test in folds:
+            np.testing.assert_array_equal(np.sort(np.r_[train, test]), np.arange(100))
+
+    def test_split_seed(self) -> None:
+        for first, second in zip(Experiment(MeanRating, seed=3).split(50), Experiment(MeanRating, seed=3).split(50)):
+            np.testing.assert_array_equal(first[1], second[1])
+
+    @pytest.mark.parametrize("n_jobs", [1, 2])
+    def test_run(self, n_jobs: int) -> None:
+        experiment = Experiment(MeanRating, n_splits=4, seed=5, n_jobs=n_jobs)
+        fold_scores = experiment.run(self.__ratings)
+
+        assert len(fold_scores) == 4
+        assert [scores["test_nums"] for scores in fold_scores] == [25] * 4
+        assert [scores["train_nums"] for scores in fold_scores] == [75] * 4
+        for fold, scores in enumerate(fold_scores):
+            np.random.seed(5 + fold)
+            assert scores["noise"] == np.random.rand()
+            assert scores["time"] >= scores["fit_time"] + scores["evaluate_time"]
+
+    def test_run_processes_match(self) -> None:
+        serial = Experiment(MeanRating, n_splits=3, n_jobs=1).run(self.__ratings)
+        parallel = Experiment(MeanRating, n_splits=3, n_jobs=3).run(self.__ratings)
+
+        for serial_scores, parallel_scores in zip(serial, parallel):
+            assert serial_scores["mae"] == parallel_scores["mae"]
+            assert serial_scores["noise"] == parallel_scores["noise"]
+
+    def test_summarize(self) -> None:
+        summary = Experiment(MeanRating).summarize([{"mae": 1.0}, {"mae": 2.0}, {"mae": 3.0}])
+
+        assert summary == {"mae": (2.0, 1.0)}
+        assert Experiment(MeanRating).summarize([{"mae": 1.0}]) == {"mae": (1.0, 0.0)}
+
+    @pytest.mark.parametrize(
+        "kwargs, message",
+        [({"method": "bootstrap"}, "method must be one of"), ({"n_splits": 1}, "at least 2 splits")],
+    )
+    def test_invalid(self, kwargs: dict, message: str) -> None:
+        with pytest.raises(ValueError, match=message):
+            Experiment(MeanRating, **kwargs)
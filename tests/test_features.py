@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from src.features import CategoricalFeatures
+
+
+class TestCategoricalFeatures:
+    # movie 20 has no values, and the value of the unknown movie 99 is ignored
+    __ids = np.array([30, 10, 20])
+    __row_ids = np.array([10, 30, 99, 10, 30, 10])
+    __values = np.array(["pixar", "gore", "pixar", "funny", "gore", "pixar"])
+
+    def test_from_pairs(self) -> None:
+        actual = CategoricalFeatures.from_pairs(self.__ids, self.__row_ids, self.__values)
+
+        np.testing.assert_array_equal(actual.vocabulary, ["funny", "gore", "pixar"])
+        np.testing.assert_array_equal(actual.indptr, [0, 2, 5, 5])
+        np.testing.assert_array_equal(actual.indices, [1, 1, 0, 2, 2])
+        assert actual.to_lists() == [["gore", "gore"], ["funny", "pixar", "pixar"], []]
+
+    def test_from_strings(self) -> None:
+        actual = CategoricalFeatures.from_strings(
+            np.array([1, 2, 3]), pd.Series(["Comedy|Action", "Drama", "Action|Drama|Comedy"])
+        )
+
+        assert actual.to_lists() == [["Action", "Comedy"], ["Drama"], ["Action", "Comedy", "Drama"]]
+
+    def test_matrix(self) -> None:
+        features = CategoricalFeatures.from_pairs(self.__ids, self.__row_ids, self.__values)
+
+        actual = features.matrix()
+
+        np.testing.assert_array_equal(actual.toarray(), [[0, 2, 0], [1, 0, 2], [0, 0, 0]])
+        assert actual.dtype == np.float32
+        # the codes are not modified by summing duplicates
+        np.testing.assert_array_equal(features.indices, [1, 1, 0, 2, 2])
+
+    def test_state(self) -> None:
+        features = CategoricalFeatures.from_pairs(self.__ids, self.__row_ids, self.__values)
+
+        actual = CategoricalFeatures.from_state(features.get_state(prefix="tag_"), prefix="tag_")
+
+        np.testing.assert_array_equal(actual.ids, self.__ids)
+        assert actual.to_lists() == features.to_lists()
+        assert len(actual) == 3
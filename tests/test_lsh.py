@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from src.lsh import LSHIndex
+
+
+class TestLSHIndex:
+    __vectors = np.random.default_rng(0).standard_normal((200, 8)).astype(np.float32)
+
+    def __exact(self, queries: np.ndarray, k: int) -> np.ndarray:
+        normalized = self.__vectors / np.linalg.norm(self.__vectors, axis=1, keepdims=True)
+        similarities = queries / np.linalg.norm(queries, axis=1, keepdims=True) @ normalized.T
+        return np.argsort(-similarities, axis=1, kind="stable")[:, :k]
+
+    def test_query_exhaustive(self) -> None:
+        # one bit with one probe visits both buckets, so the search is exact
+        index = LSHIndex(8, table_nums=1, bit_nums=1, probe_nums=1, block_size=16)
+        index.add(self.__vectors)
+
+        neighbor_indexes, similarities = index.query(self.__vectors[:20], 5)
+
+        np.testing.assert_array_equal(neighbor_indexes, self.__exact(self.__vectors[:20], 5))
+        np.testing.assert_allclose(similarities[:, 0], 1.0, rtol=1e-5)
+        assert np.all(np.diff(similarities, axis=1) <= 0)
+
+    def test_query_recall(self) -> None:
+        index = LSHIndex(8, table_nums=16, bit_nums=6, probe_nums=2)
+        index.add(self.__vectors)
+
+        neighbor_indexes, _ = index.query(self.__vectors, 5)
+        expected = self.__exact(self.__vectors, 5)
+
+        recall = np.mean([len(set(a) & set(e)) / 5 for a, e in zip(neighbor_indexes.tolist(), expected.tolist())])
+        assert recall > 0.9
+
+    def test_add_incremental(self) -> None:
+        index = LSHIndex(8, seed=1)
+        incremental_index = LSHIndex(8, seed=1)
+        index.add(self.__vectors)
+        np.testing.assert_array_equal(incremental_index.add(self.__vectors[:50]), np.arange(50))
+        incremental_index.query(self.__vectors[:1], 3)
+        np.testing.assert_array_equal(incremental_index.add(self.__vectors[50:]), np.arange(50, 200))
+
+        assert len(incremental_index) == 200
+        for expected, actual in zip(index.query(self.__vectors, 3), incremental_index.query(self.__vectors, 3)):
+            np.testing.assert_array_equal(actual, expected)
+
+    def test_query_sparse_exclude(self) -> None:
+        matrix = sp.csr_matrix(np.array([[1, 1, 0, 0], [1, 1, 0, 0], [1, 0.9, 0, 0], [0, 0, 1, 1]], dtype=np.float32))
+        index = LSHIndex(4, table_nums=1, bit_nums=1, probe_nums=1)
+        index.add(matrix)
+
+        neighbor_indexes, _ = index.query(matrix[:1].toarray(), 2, exclude_indexes=np.array([0]))
+
+        np.testing.assert_array_equal(neighbor_indexes, [[1, 2]])
+
+    def test_query_empty(self) -> None:
+        neighbor_indexes, similarities = LSHIndex(8).query(self.__vectors[:2], 3)
+
+        np.testing.assert_array_equal(neighbor_indexes, -np.ones((2, 3)))
+        np.testing.assert_array_equal(similarities, np.zeros((2, 3)))
+
+    def test_invalid(self) -> None:
+        with pytest.raises(ValueError):
+            LSHIndex(8, bit_nums=63)
+        with pytest.raises(ValueError):
+            LSHIndex(8).add(self.__vectors[:, :4])
@@ -0,0 +1,137 @@
+import numpy as np
+import pandas as pd
+from src.matrix import InteractionMatrix
+
+
+class TestInteractionMatrix:
+    __ratings = pd.DataFrame(
+        {
+            "user_id": [1, 1, 3, 3, 3, 7],
+            "movie_id": [10, 30, 10, 20, 40, 30],
+            "rating": [5.0, 3.5, 4.0, 1.0, 4.5, 2.0],
+            "timestamp": [0, 0, 0, 0, 0, 0],
+        }
+    )
+
+    def test_init(self) -> None:
+        matrix = InteractionMatrix(self.__ratings)
+
+        assert matrix.shape == (3, 4)
+        assert matrix.matrix.dtype == np.float32
+        assert matrix.user_id2index == {1: 0, 3: 1, 7: 2}
+        assert matrix.movie_id2index == {10: 0, 20: 1, 30: 2, 40: 3}
+        np.testing.assert_array_equal(
+            matrix.matrix.toarray(),
+            [[5.0, 0.0, 3.5, 0.0], [4.0, 1.0, 0.0, 4.5], [0.0, 0.0, 2.0, 0.0]],
+        )
+
+    def test_init_with_ids(self) -> None:
+        matrix = InteractionMatrix(self.__ratings, user_ids=np.array([1, 3]), movie_ids=np.array([10, 20, 50]))
+
+        assert matrix.shape == (2, 3)
+        np.testing.assert_array_equal(matrix.matrix.toarray(), [[5.0, 0.0, 0.0], [4.0, 1.0, 0.0]])
+
+    def test_to_index(self) -> None:
+        matrix = InteractionMatrix(self.__ratings)
+
+        np.testing.assert_array_equal(matrix.to_user_index(np.array([7, 2, 1, 100])), [2, -1, 0, -1])
+        np.testing.assert_array_equal(matrix.to_movie_index(np.array([40, 0])), [3, -1])
+
+    def test_rows(self) -> None:
+        matrix = InteractionMatrix(self.__ratings)
+
+        rows = matrix.rows(np.array([7, 5, 1]))
+
+        np.testing.assert_array_equal(
+            rows.toarray(), [[0.0, 0.0, 2.0, 0.0], [0.0, 0.0, 0.0, 0.0], [5.0, 0.0, 3.5, 0.0]]
+        )
+        np.testing.assert_array_equal(matrix.user_movie_ids(3), [10, 20, 40])
+
+    def test_ratings(self) -> None:
+        matrix = InteractionMatrix(self.__ratings)
+
+        actual = matrix.ratings(np.array([3, 3, 1, 7, 100, 1]), np.array([40, 30, 10, 30, 10, 99]))
+
+        # pairs without a rating, of unknown users or of unknown movies are NaN
+        np.testing.assert_array_equal(actual, [4.5, np.nan, 5.0, 2.0, np.nan, np.nan])
+
+    def test_binary(self) -> None:
+        matrix = InteractionMatrix(self.__ratings)
+
+        binary_matrix = matrix.binary(4.0)
+
+        assert binary_matrix.dtype == np.bool_
+        assert binary_matrix.nnz == 3
+        np.testing.assert_array_equal(binary_matrix.toarray()[1], [True, False, False, True])
+        # the original matrix is not modified
+        assert matrix.matrix.nnz == 6
+
+    def test_update(self) -> None:
+        matrix = InteractionMatrix(self.__ratings)
+        new_ratings = pd.DataFrame(
+            {
+                "user_id": [3, 2, 1, 3],
+                "movie_id": [20, 50, 20, 20],
+                "rating": [2.0, 3.0, 1.5, 2.5],
+                "timestamp": [1, 1, 1, 2],
+            }
+        )
+
+        user_positions, movie_positions = matrix.update(new_ratings)
+
+        np.testing.assert_array_equal(user_positions, [0, 2, 3])
+        np.testing.assert_array_equal(movie_positions, [0, 1, 2, 3])
+        expected = InteractionMatrix(
+            pd.concat([self.__ratings, new_ratings], ignore_index=True).drop_duplicates(
+                ["user_id", "movie_id"], keep="last"
+            )
+        )
+        np.testing.assert_array_equal(matrix.user_ids, expected.user_ids)
+        np.testing.assert_array_equal(matrix.movie_ids, expected.movie_ids)
+        np.testing.assert_array_equal(matrix.matrix.toarray(), expected.matrix.toarray())
+        assert matrix.matrix.has_sorted_indices
+        assert matrix.matrix[1, 2] == 0.0 and matrix.matrix[2, 1] == 2.5
+
+    def test_update_empty(self) -> None:
+        matrix = InteractionMatrix(self.__ratings)
+
+        user_positions, movie_positions = matrix.update(self.__ratings.iloc[:0])
+
+        np.testing.assert_array_equal(user_positions, [0, 1, 2])
+        np.testing.assert_array_equal(movie_positions, [0, 1, 2, 3])
+        np.testing.assert_array_equal(matrix.matrix.toarray(), InteractionMatrix(self.__ratings).matrix.toarray())
+
+    def test_update_random(self) -> None:
+        rng = np.random.default_rng(0)
+
+        def ratings(nums: int, max_id: int) -> pd.DataFrame:
+            return pd.DataFrame(
+                {
+                    "user_id": rng.integers(1, max_id, nums),
+                    "movie_id": rng.integers(1, max_id, nums),
+                    "rating": rng.integers(1, 11, nums) / 2,
+                    "timestamp": np.zeros(nums, dtype=np.int64),
+                }
+            ).drop_duplicates(["user_id", "movie_id"])
+
+        all_ratings = ratings(300, 30)
+        matrix = InteractionMatrix(all_ratings)
+        for _ in range(5):
+            new_ratings = ratings(40, 40)
+            matrix.update(pd.concat([new_ratings.iloc[:5].assign(rating=0.5), new_ratings]))
+            all_ratings = pd.concat([all_ratings, new_ratings]).drop_duplicates(["user_id", "movie_id"], keep="last")
+
+            expected = InteractionMatrix(all_ratings)
+            np.testing.assert_array_equal(matrix.user_ids, expected.user_ids)
+            np.testing.assert_array_equal(matrix.movie_ids, expected.movie_ids)
+            np.testing.assert_array_equal(matrix.matrix.indptr, expected.matrix.indptr)
+            np.testing.assert_array_equal(matrix.matrix.indices, expected.matrix.indices)
+            np.testing.assert_array_equal(matrix.matrix.data, expected.matrix.data)
+
+    def test_state(self) -> None:
+        matrix = InteractionMatrix(self.__ratings)
+        restored = InteractionMatrix.from_state(matrix.get_state(prefix="train_"), prefix="train_")
+
+        assert restored.shape == matrix.shape
+        np.testing.assert_array_equal(restored.matrix.toarray(), matrix.matrix.toarray())
+        np.testing.assert_array_equal(restored.user_movie_ids(3), [10, 20, 40])
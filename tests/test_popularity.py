@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+from src.popularity import PopularityRanking
+
+
+class TestPopularityRanking:
+    __DAY: int = 24 * 60 * 60
+
+    # movie 10 is rated most, but movie 20 is rated most recently
+    __ratings = pd.DataFrame(
+        {
+            "user_id": [1, 2, 3, 1, 2, 3],
+            "movie_id": [10, 10, 10, 20, 20, 30],
+            "rating": [5.0, 4.0, 3.0, 2.0, 4.0, 5.0],
+            "timestamp": [0, 0, 0, 100 * __DAY, 100 * __DAY, 50 * __DAY],
+        }
+    )
+
+    def test_fit(self) -> None:
+        actual = PopularityRanking(half_life=10 * self.__DAY).fit(self.__ratings)
+
+        np.testing.assert_array_equal(actual.counts, [3, 2, 1])
+        np.testing.assert_allclose(actual.scores, [3 * 0.5**10, 2.0, 0.5**5])
+        np.testing.assert_array_equal(actual.ranked_movie_ids, [20, 30, 10])
+        np.testing.assert_array_equal(
+            PopularityRanking(half_life=None).fit(self.__ratings).ranked_movie_ids, [10, 20, 30]
+        )
+
+    def test_mean_ratings(self) -> None:
+        popularity_ranking = PopularityRanking().fit(self.__ratings)
+
+        actual = popularity_ranking.mean_ratings(np.array([10, 30, 99]))
+
+        np.testing.assert_allclose(actual, [4.0, 5.0, 23.0 / 6])
+        # a pseudo rating of the global mean shrinks the movie rated once the most
+        np.testing.assert_allclose(
+            popularity_ranking.mean_ratings(np.array([30]), prior_nums=1.0), [(5.0 + 23.0 / 6) / 2]
+        )
+
+    @pytest.mark.parametrize("half_life", [None, 1e6])
+    def test_top_k(self, half_life: float) -> None:
+        rng = np.random.default_rng(0)
+        ratings = pd.DataFrame(
+            {
+                "user_id": rng.integers(0, 10, 300),
+                "movie_id": rng.integers(0, 50, 300) * 2,
+                "rating": 3.0,
+                "timestamp": rng.integers(0, 10**7, 300),
+            }
+        )
+        popularity_ranking = PopularityRanking(half_life).fit(ratings)
+        seen = sp.random(8, len(popularity_ranking.movie_ids), density=0.3, format="csr", random_state=0)
+
+        actual = popularity_ranking.top_k(60, seen=seen)
+
+        # the same as walking down the ranking and skipping the rated movies of each user
+        for row, movie_ids in enumerate(actual):
+            rated = set(popularity_ranking.movie_ids[seen[row].indices].tolist())
+            expected = [movie_id for movie_id in popularity_ranking.ranked_movie_ids.tolist() if movie_id not in rated]
+            np.testing.assert_array_equal(movie_ids, (expected + [-1] * 60)[:60])
+
+    def test_top_k_without_seen(self) -> None:
+        actual = PopularityRanking(half_life=10 * self.__DAY).fit(self.__ratings).top_k(4, n_users=2)
+
+        np.testing.assert_array_equal(actual, [[20, 30, 10, -1], [20, 30, 10, -1]])
+
+    def test_update(self) -> None:
+        new_ratings = pd.DataFrame(
+            {
+                "user_id": [4, 4, 5],
+                "movie_id": [10, 40, 40],
+                "rating": [1.0, 5.0, 4.0],
+                "timestamp": [200 * self.__DAY] * 3,
+            }
+        )
+        popularity_ranking = PopularityRanking(half_life=10 * self.__DAY).fit(self.__ratings)
+
+        first_changed_rank = popularity_ranking.update(new_ratings)
+
+        expected = PopularityRanking(half_life=10 * self.__DAY).fit(pd.concat([self.__ratings, new_ratings]))
+        np.testing.assert_array_equal(popularity_ranking.movie_ids, [10, 20, 30, 40])
+        np.testing.assert_array_equal(popularity_ranking.counts, expected.counts)
+        np.testing.assert_allclose(popularity_ranking.rating_sums, expected.rating_sums)
+        np.testing.assert_allclose(popularity_ranking.scores, expected.scores)
+        # the new rating of movie 10 outweighs the old ratings of movie 20
+        np.testing.assert_array_equal(popularity_ranking.ranked_movie_ids, [40, 10, 20, 30])
+        assert first_changed_rank == 0
+
+    @pytest.mark.parametrize("half_life", [None, 10 * __DAY])
+    def test_update_rerated(self, half_life: float) -> None:
+        # user 3 re-rates movie 30 (rated 5.0) twice, user 4 rates it for the first time
+        first = pd.DataFrame({"user_id": [3], "movie_id": [30], "rating": [1.0], "timestamp": [50 * self.__DAY]})
+        second = pd.DataFrame(
+            {"user_id": [3, 4], "movie_id": [30, 30], "rating": [2.0, 4.0], "timestamp": [50 * self.__DAY] * 2}
+        )
+        popularity_ranking = PopularityRanking(half_life).fit(self.__ratings)
+
+        popularity_ranking.update(first, np.array([5.0]))
+        popularity_ranking.update(second, np.array([1.0, np.nan]))
+
+        # the same as fitting on the last rating of each pair
+        ratings = pd.concat([self.__ratings.iloc[:-1], second], ignore_index=True)
+        expected = PopularityRanking(half_life).fit(ratings)
+        np.testing.assert_array_equal(popularity_ranking.counts, expected.counts)
+        np.testing.assert_allclose(popularity_ranking.rating_sums, expected.rating_sums)
+        np.testing.assert_allclose(popularity_ranking.scores, expected.scores)
+        np.testing.assert_array_equal(popularity_ranking.ranked_movie_ids, expected.ranked_movie_ids)
+
+    def test_state(self) -> None:
+        popularity_ranking = PopularityRanking(half_life=None).fit(self.__ratings)
+
+        actual = PopularityRanking.from_state(popularity_ranking.get_state("popularity_"), "popularity_")
+
+        assert actual.half_life is None
+        np.testing.assert_array_equal(actual.top_k(2, n_users=1), popularity_ranking.top_k(2, n_users=1))
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from src.ranking import Ranking
+
+
+class TestRanking:
+    __scores = np.array(
+        [
+            [0.1, 0.9, 0.5, 0.3],
+            [0.8, 0.2, np.nan, 0.4],
+            [-np.inf, 0.5, -np.inf, -np.inf],
+        ]
+    )
+    __movie_ids = np.array([10, 20, 30, 40])
+    __seen = sp.csr_matrix(np.array([[0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 0, 0]], dtype=np.float32))
+
+    @pytest.mark.parametrize("block_size", [1, 2, 1024])
+    def test_top_k(self, block_size: int) -> None:
+        actual = Ranking(block_size).top_k(self.__scores, self.__movie_ids, 2, seen=self.__seen)
+
+        np.testing.assert_array_equal(actual, [[30, 40], [10, 20], [20, -1]])
+
+    def test_top_k_callable(self) -> None:
+        actual = Ranking(2).top_k(lambda start, end: self.__scores[start:end], self.__movie_ids, 5, n_users=3)
+
+        np.testing.assert_array_equal(actual, [[20, 30, 40, 10, -1], [10, 40, 20, -1, -1], [20, -1, -1, -1, -1]])
+        # the given scores are never modified
+        assert self.__scores[0, 1] == 0.9
+
+    def test_top_k_callable_without_users(self) -> None:
+        with pytest.raises(ValueError):
+            Ranking().top_k(lambda start, end: self.__scores[start:end], self.__movie_ids, 2)
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from src.similarity import Similarity
+
+
+class TestSimilarity:
+    __matrix = sp.random(40, 30, density=0.3, format="csr", random_state=0, dtype=np.float32)
+
+    def __dense_similarities(self, metric: str) -> np.ndarray:
+        dense = self.__matrix.toarray()
+        rated = dense != 0
+        if metric == "pearson":
+            means = dense.sum(axis=1) / np.maximum(rated.sum(axis=1), 1)
+            dense = np.where(rated, dense - means[:, np.newaxis], 0.0)
+        norms = np.linalg.norm(dense, axis=1)
+        normalized = dense / np.where(norms == 0, 1.0, norms)[:, np.newaxis]
+        similarities = normalized @ normalized.T
+        np.fill_diagonal(similarities, -np.inf)
+        return similarities
+
+    @pytest.mark.parametrize("metric", ["cosine", "pearson"])
+    @pytest.mark.parametrize("block_size", [1, 7, 256])
+    def test_top_neighbors(self, metric: str, block_size: int) -> None:
+        neighbor_indexes, similarities = Similarity(5, metric=metric, block_size=block_size).top_neighbors(
+            self.__matrix
+        )
+        expected = self.__dense_similarities(metric)
+
+        assert neighbor_indexes.shape == similarities.shape == (40, 5)
+        assert neighbor_indexes.dtype == np.int32 and similarities.dtype == np.float32
+        for row in range(40):
+            valid = neighbor_indexes[row] >= 0
+            expected_similarities = np.sort(expected[row][expected[row] > 0])[::-1][:5]
+            np.testing.assert_allclose(similarities[row][valid], expected_similarities, rtol=1e-4)
+            np.testing.assert_allclose(expected[row, neighbor_indexes[row][valid]], similarities[row][valid], rtol=1e-4)
+            assert row not in neighbor_indexes[row]
+            assert np.all(similarities[row][~valid] == 0.0)
+
+    def test_top_neighbors_few_rows(self) -> None:
+        matrix = sp.csr_matrix(np.array([[1.0, 0.0], [2.0, 0.0], [0.0, 3.0]], dtype=np.float32))
+
+        neighbor_indexes, similarities = Similarity(4, metric="cosine").top_neighbors(matrix)
+
+        np.testing.assert_array_equal(neighbor_indexes, [[1, -1, -1, -1], [0, -1, -1, -1], [-1, -1, -1, -1]])
+        np.testing.assert_allclose(similarities[:, 0], [1.0, 1.0, 0.0])
+
+    @pytest.mark.parametrize("block_size", [1, 256])
+    def test_update_neighbors(self, block_size: int) -> None:
+        similarity = Similarity(5, metric="pearson", block_size=block_size)
+        neighbor_indexes, similarities = similarity.top_neighbors(self.__matrix)
+
+        # rows 3 and 17 rate new columns
+        changed = self.__matrix.tolil()
+        changed[3, :10] = 5.0
+        changed[17, 20:] = 1.0
+        changed = changed.tocsr()
+        updated_indexes, updated_similarities, affected = similarity.update_neighbors(
+            changed, neighbor_indexes, similarities, np.array([17, 3])
+        )
+        expected_indexes, expected_similarities = similarity.top_neighbors(changed)
+
+        # the changed rows and the rows that had or now have one of them as a neighbour
+        np.testing.assert_array_equal(
+            affected,
+            np.flatnonzero(
+                np.isin(np.arange(40), [3, 17])
+                | np.isin(neighbor_indexes, [3, 17]).any(axis=1)
+                | np.isin(updated_indexes, [3, 17]).any(axis=1)
+            ),
+        )
+        np.testing.assert_array_equal(updated_indexes[[3, 17]], expected_indexes[[3, 17]])
+        np.testing.assert_allclose(updated_similarities[[3, 17]], expected_similarities[[3, 17]], rtol=1e-5)
+
+        # unaffected rows are exact, affected rows hold true similarities in descending order
+        unaffected = np.setdiff1d(np.arange(40), affected)
+        np.testing.assert_array_equal(updated_indexes[unaffected], expected_indexes[unaffected])
+        normalized = similarity.normalize(changed).toarray()
+        for row in affected:
+            valid = updated_indexes[row] >= 0
+            assert np.all(np.diff(updated_similarities[row][valid]) <= 0)
+            np.testing.assert_allclose(
+                updated_similarities[row][valid], normalized[updated_indexes[row][valid]] @ normalized[row], rtol=1e-4
+            )
+
+    def test_invalid_metric(self) -> None:
+        with pytest.raises(ValueError):
+            Similarity(metric="jaccard")
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.split import Split
+
+
+class TestSplit:
+    __split = Split()
+    __rng = np.random.default_rng(0)
+    __ratings = pd.DataFrame(
+        {
+            "user_id": __rng.integers(1, 30, 500),
+            "timestamp": __rng.integers(0, 100, 500),
+        }
+    )
+
+    def __newest(self, n: pd.Series) -> np.ndarray:
+        # reference: rank the ratings of each user from the newest (ties: the later row is newer)
+        ranks = (
+            self.__ratings.reset_index()
+            .sort_values(["user_id", "timestamp", "index"])
+            .groupby("user_id")
+            .cumcount(ascending=False)
+            .sort_index()
+            .to_numpy()
+        )
+        return np.flatnonzero(ranks < n.to_numpy())
+
+    def test_random(self) -> None:
+        train, test = self.__split.random(100, 0.25, seed=0)
+
+        assert len(test) == 25
+        np.testing.assert_array_equal(np.sort(np.r_[train, test]), np.arange(100))
+        np.testing.assert_array_equal(self.__split.random(100, 0.25, seed=0)[1], test)
+
+    def test_time_cutoff(self) -> None:
+        timestamps = self.__ratings.timestamp.to_numpy()
+        train, test = self.__split.time_cutoff(timestamps, 0.2)
+
+        assert len(test) >= 100
+        assert timestamps[train].max() < timestamps[test].min()
+        np.testing.assert_array_equal(np.sort(np.r_[train, test]), np.arange(500))
+
+    @pytest.mark.parametrize("last_nums", [1, 3])
+    def test_user_last(self, last_nums: int) -> None:
+        counts = self.__ratings.groupby("user_id").user_id.transform("size")
+        train, test = self.__split.user_last(
+            self.__ratings.user_id.to_numpy(), self.__ratings.timestamp.to_numpy(), last_nums
+        )
+
+        np.testing.assert_array_equal(test, self.__newest(np.minimum(counts - 1, last_nums)))
+        np.testing.assert_array_equal(np.sort(np.r_[train, test]), np.arange(500))
+
+    def test_user_last_fraction(self) -> None:
+        counts = self.__ratings.groupby("user_id").user_id.transform("size")
+        train, test = self.__split.user_last_fraction(
+            self.__ratings.user_id.to_numpy(), self.__ratings.timestamp.to_numpy(), 0.3
+        )
+
+        np.testing.assert_array_equal(test, self.__newest(np.minimum(np.ceil(counts * 0.3), counts - 1)))
+        np.testing.assert_array_equal(np.sort(np.r_[train, test]), np.arange(500))
+
+    def test_user_last_keeps_one(self) -> None:
+        train, test = self.__split.user_last(np.array([1, 2, 2, 3, 3, 3]), np.array([0, 5, 1, 2, 2, 1]), 5)
+
+        np.testing.assert_array_equal(train, [0, 2, 5])
+        np.testing.assert_array_equal(test, [1, 3, 4])
+
+    def test_empty(self) -> None:
+        train, test = self.__split.user_last(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+
+        assert len(train) == 0 and len(test) == 0
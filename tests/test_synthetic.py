@@ -0,0 +1,79 @@
+import pathlib
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+from src.dataset import Dataset
+from src.synthetic import SyntheticDataset
+
+
+class TestSyntheticDataset:
+    __synthetic = SyntheticDataset(200, movie_nums=2000, mean_ratings=40, tag_nums=300, seed=1)
+
+    def test_ratings(self) -> None:
+        ratings = self.__synthetic.ratings()
+
+        assert ratings.dtypes.to_dict() == {
+            "user_id": "int32",
+            "movie_id": "int32",
+            "rating": "float32",
+            "timestamp": "int32",
+        }
+        assert ratings.user_id.nunique() == 200
+        assert ratings.movie_id.between(1, 2000).all()
+        assert ratings.groupby("user_id").size().min() >= 20
+        assert not ratings.duplicated(["user_id", "movie_id"]).any()
+        assert ratings.user_id.is_monotonic_increasing
+        assert set(ratings.rating.unique()) <= set(np.arange(1, 11) / 2)
+
+        # zipfian popularity: the most popular 10% of the movies collect far more than 10% of the ratings
+        counts = ratings.movie_id.value_counts()
+        assert counts.iloc[:200].sum() > 0.3 * len(ratings)
+
+    def test_seed(self) -> None:
+        pd.testing.assert_frame_equal(
+            self.__synthetic.ratings(), SyntheticDataset(200, 2000, 40, tag_nums=300, seed=1).ratings()
+        )
+        assert not self.__synthetic.ratings().equals(SyntheticDataset(200, 2000, 40, tag_nums=300, seed=2).ratings())
+
+    def test_write(self, tmp_path: pathlib.Path) -> None:
+        self.__synthetic.write(str(tmp_path))
+        dataset = Dataset(str(tmp_path), None, use_cache=False)
+        movies, ratings = dataset.load()
+        genres, tags = dataset.movie_features()
+        expected_genres, expected_tags = self.__synthetic.movie_features()
+
+        pd.testing.assert_frame_equal(ratings, self.__synthetic.ratings())
+        assert len(movies) == 2000
+        assert np.all((np.diff(genres.indptr) >= 1) & (np.diff(genres.indptr) <= 3))
+        assert len(tags.indices) == 300
+
+        # the features read back are the generated ones
+        assert expected_tags is not None
+        for actual, expected in [(genres, expected_genres), (tags, expected_tags)]:
+            np.testing.assert_array_equal(actual.ids, expected.ids)
+            np.testing.assert_array_equal(actual.vocabulary, expected.vocabulary)
+            np.testing.assert_array_equal(actual.indptr, expected.indptr)
+            np.testing.assert_array_equal(actual.indices, expected.indices)
+
+    def test_write_binary(self, tmp_path: pathlib.Path) -> None:
+        self.__synthetic.write(str(tmp_path), binary=True)
+        _, ratings = Dataset(str(tmp_path), None).load()
+
+        assert not (tmp_path / "ratings.dat").exists()
+        assert not (tmp_path / ".cache").exists()
+        pd.testing.assert_frame_equal(ratings, self.__synthetic.ratings())
+
+        _, ratings = Dataset(str(tmp_path), 50).load()
+        assert ratings.user_id.nunique() == 50
+
+    def test_write_memory(self, tmp_path: pathlib.Path) -> None:
+        peaks = []
+        for user_nums in [20_000, 60_000]:
+            tracemalloc.start()
+            SyntheticDataset(user_nums, 20, 20, tag_nums=0).write(str(tmp_path / str(user_nums)))
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        # blocks of users are written one at a time, so the peak memory does not grow with the users
+        assert peaks[1] < 1.05 * peaks[0]
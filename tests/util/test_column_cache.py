@@ -0,0 +1,32 @@
+import pathlib
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+import pytest
+from src.utils.column_cache import ColumnCache
+
+
+class TestColumnCache:
+    def test_save_chunks(self, tmp_path: pathlib.Path) -> None:
+        chunks = [
+            pd.DataFrame({"user_id": np.arange(i, i + 3, dtype=np.int32), "title": [f"movie{i}"] * 3})
+            for i in range(0, 9, 3)
+        ]
+        cache = ColumnCache(str(tmp_path))
+        cache.save_chunks("key", {"movies": iter(chunks)})
+        movies = cache.load("key")["movies"]
+
+        pd.testing.assert_frame_equal(movies, pd.concat(chunks, ignore_index=True))
+
+    def test_save_chunks_failure(self, tmp_path: pathlib.Path) -> None:
+        def chunks() -> Iterator[pd.DataFrame]:
+            yield pd.DataFrame({"user_id": [1, 2]})
+            raise ValueError("failed")
+
+        cache = ColumnCache(str(tmp_path))
+        with pytest.raises(ValueError):
+            cache.save_chunks("key", {"movies": chunks()})
+
+        assert not cache.exists("key")
+        assert list(tmp_path.iterdir()) == []
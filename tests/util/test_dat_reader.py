@@ -0,0 +1,38 @@
+import os
+import pathlib
+
+import pandas as pd
+import pytest
+from src.utils.dat_reader import DatReader
+
+
+class TestDatReader:
+    __LINES: list[bytes] = [
+        b"1::Toy Story (1995)::Adventure|Animation|Children|Comedy|Fantasy\n",
+        b'2::"Great" Escape, The (1963)::Action\n',
+        b"3::Am\xe9lie (2001)::Comedy|Romance\n",
+        b"4::Kid's \"Day::(no genres listed)",
+    ]
+    __NAMES: list[str] = ["movie_id", "title", "genres"]
+    __DTYPES: dict[str, str] = {"movie_id": "int32", "title": "str", "genres": "str"}
+
+    @pytest.mark.parametrize("chunk_bytes", [1, 16, 1024])
+    def test_read(self, tmp_path: pathlib.Path, chunk_bytes: int) -> None:
+        path = os.path.join(tmp_path, "movies.dat")
+        with open(path, "wb") as f:
+            f.write(b"".join(self.__LINES))
+
+        expected = pd.read_csv(path, sep="::", names=self.__NAMES, encoding="latin-1", engine="python")
+        actual = DatReader(chunk_bytes=chunk_bytes).read(path, self.__NAMES, self.__DTYPES)
+
+        assert actual.movie_id.dtype == "int32"
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+    def test_iter_chunks(self, tmp_path: pathlib.Path) -> None:
+        path = os.path.join(tmp_path, "ratings.dat")
+        with open(path, "wb") as f:
+            f.write(b"1::1::5::838985046\n1::2::3.5::838983525\n2::3::0.5::868245777\n")
+
+        chunks = list(DatReader(chunk_bytes=20).iter_chunks(path, ["user_id", "movie_id", "rating", "timestamp"]))
+
+        assert [len(chunk) for chunk in chunks] == [1, 1, 1]
@@ -0,0 +1,104 @@
+import json
+import pathlib
+
+import numpy as np
+import pytest
+from src.utils.profiler import Profiler
+
+
+class TestProfiler:
+    def test_disabled(self, capsys: pytest.CaptureFixture) -> None:
+        profiler = Profiler()
+        with profiler.phase("fit"):
+            pass
+        profiler.report(model="Random")
+
+        assert profiler.records == []
+        assert capsys.readouterr().out == ""
+
+    def test_phase(self) -> None:
+        profiler = Profiler(enabled=True)
+        with profiler.phase("fit"):
+            with profiler.phase("similarity"):
+                pass
+            with profiler.phase("similarity"):
+                pass
+        with profiler.phase("evaluate"):
+            pass
+
+        assert [record["phase"] for record in profiler.records] == [
+            "fit/similarity",
+            "fit/similarity",
+            "fit",
+            "evaluate",
+        ]
+        assert profiler.records[2]["time"] >= profiler.records[0]["time"] + profiler.records[1]["time"]
+        assert all(record["max_rss_mib"] > 0 for record in profiler.records)
+
+    def test_phase_exception(self) -> None:
+        profiler = Profiler(enabled=True)
+        with pytest.raises(ValueError):
+            with profiler.phase("fit"):
+                raise ValueError("failed")
+
+        with profiler.phase("evaluate"):
+            pass
+
+        assert [record["phase"] for record in profiler.records] == ["fit", "evaluate"]
+
+    def test_trace_memory(self) -> None:
+        profiler = Profiler(enabled=True, trace_memory=True)
+        with profiler.phase("fit"):
+            with profiler.phase("allocate"):
+                array = np.ones(10 * 2**20, dtype=np.uint8)
+                del array
+            with profiler.phase("small"):
+                pass
+
+        peaks = {record["phase"]: record["peak_mib"] for record in profiler.records}
+        assert peaks["fit/allocate"] >= 10
+        assert peaks["fit/small"] < 1
+        assert peaks["fit"] >= peaks["fit/allocate"]
+
+    def test_profile_phases(self) -> None:
+        def expensive() -> int:
+            return sum(range(1000))
+
+        profiler = Profiler(enabled=True, profile_phases=["fit/expensive"])
+        with profiler.phase("fit"):
+            with profiler.phase("expensive"):
+                expensive()
+
+        records = {record["phase"]: record for record in profiler.records}
+        assert "profile" not in records["fit"]
+        assert any("(expensive)" in function["function"] for function in records["fit/expensive"]["profile"])
+
+    def test_timed(self) -> None:
+        profiler = Profiler(enabled=True)
+        square = profiler.timed("square")(lambda x: x * x)
+
+        assert square(3) == 9
+        assert [record["phase"] for record in profiler.records] == ["square"]
+
+    def test_report(self, tmp_path: pathlib.Path) -> None:
+        profiler = Profiler(enabled=True, report_path=str(tmp_path / "report.jsonl"))
+        for recall in [0.1, 0.2]:
+            with profiler.phase("fit"):
+                pass
+            profiler.report(model="Random", metrics={"recall_at_k": recall})
+
+        lines = [json.loads(line) for line in (tmp_path / "report.jsonl").read_text().splitlines()]
+        assert [line["metrics"]["recall_at_k"] for line in lines] == [0.1, 0.2]
+        assert [[phase["phase"] for phase in line["phases"]] for line in lines] == [["fit"], ["fit"]]
+        assert profiler.records == []
+
+    def test_from_env(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        assert not Profiler.from_env().enabled
+
+        monkeypatch.setenv("RECOMMEND_PROFILE", "-")
+        monkeypatch.setenv("RECOMMEND_TRACE_MEMORY", "1")
+        monkeypatch.setenv("RECOMMEND_PROFILE_PHASES", "fit,evaluate/recommend")
+        profiler = Profiler.from_env()
+
+        assert profiler.enabled and profiler.report_path is None and profiler.trace_memory
+        assert profiler.profile_phases == ["fit", "evaluate/recommend"]